@@ -2,6 +2,7 @@ from django.contrib import admin
 from unfold.admin import ModelAdmin
 
 from ..models.channel_models import Channel
+from ..services.retro_decryption_service import schedule_retro_decryption
 
 
 @admin.register(Channel)
@@ -53,6 +54,13 @@ class ChannelAdmin(ModelAdmin):
 
     ordering = ("-last_seen",)
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+
+        if "psk" in form.changed_data and obj.psk:
+            # Packets stored while the key was unknown are decrypted in the background.
+            schedule_retro_decryption(channel=obj)
+
     def members_count(self, obj):
         has_broadcast = 1 if obj.members.filter(node_id="!ffffffff").exists() else 0
         return obj.members.count() - has_broadcast
@@ -6,6 +6,7 @@ from django.db.models import Q
 from unfold.admin import ModelAdmin
 
 from ..models.node_models import Node, NodeLatencyHistory
+from ..services.retro_decryption_service import schedule_retro_decryption
 
 
 class HasPrivateKeyFilter(admin.SimpleListFilter):
@@ -227,6 +228,8 @@ class NodeAdmin(ModelAdmin):
             if private_key:
                 fingerprint = hashlib.sha256(private_key.encode("utf-8")).hexdigest()
             obj.store_private_key(private_key or "", fingerprint=fingerprint)
+            if private_key:
+                schedule_retro_decryption(node=obj)
 
 
 @admin.register(NodeLatencyHistory)
@@ -58,6 +58,8 @@ class PacketAdmin(ModelAdmin):
         "how_decrypted",
         "public_key",
         "raw_data",
+        "raw_segment",
+        "raw_offset",
         "time",
     )
     fieldsets = ((None, {"fields": readonly_fields}),)
@@ -4,6 +4,7 @@ from .controllers import (
     AuthController,
     CaptureController,
     ChannelController,
+    DecryptionController,
     GraphController,
     KeepaliveController,
     LinkController,
@@ -11,6 +12,7 @@ from .controllers import (
     NodeController,
     PortController,
     PublisherController,
+    RetentionController,
     VirtualNodeMetaController,
 )
 from .controllers.interface_controller import InterfaceController
@@ -42,4 +44,6 @@ api.register_controllers(
     MetricsController,
     KeepaliveController,
     LinkController,
+    RetentionController,
+    DecryptionController,
 )
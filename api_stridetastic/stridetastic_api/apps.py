@@ -20,6 +20,11 @@ class StridetasticApiConfig(AppConfig):
 
     def _should_start_services(self) -> bool:
         """Check if services should be started"""
+        from .ingest.workers import is_ingest_shard
+        from .services.retro_decryption_service import is_decryption_worker
+
+        if is_ingest_shard() or is_decryption_worker():
+            return False
         if self._is_celery_worker():
             return True
         return False
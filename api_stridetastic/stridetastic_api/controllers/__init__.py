@@ -8,6 +8,7 @@ These imports are intentionally re-exported.
 from .auth_controller import AuthController
 from .capture_controller import CaptureController
 from .channel_controller import ChannelController
+from .decryption_controller import DecryptionController
 from .graph_controller import GraphController
 from .keepalive_controller import KeepaliveController
 from .link_controller import LinkController
@@ -15,4 +16,5 @@ from .metrics_controller import MetricsController
 from .node_controller import NodeController
 from .port_controller import PortController
 from .publisher_controller import PublisherController
+from .retention_controller import RetentionController
 from .virtual_node_meta_controller import VirtualNodeMetaController
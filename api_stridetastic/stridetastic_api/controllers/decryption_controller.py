@@ -0,0 +1,151 @@
+from typing import List
+
+from ninja_extra import permissions  # type: ignore[import]
+from ninja_extra import api_controller, route
+from ninja_jwt.authentication import JWTAuth  # type: ignore[import]
+
+from ..models import Channel, DecryptionJob, Node
+from ..schemas import DecryptionJobCreateSchema, DecryptionJobSchema, MessageSchema
+from ..services.retro_decryption_service import (
+    RetroDecryptionError,
+    RetroDecryptionService,
+    enqueue_decryption_job,
+    validate_psk,
+)
+
+auth = JWTAuth()
+
+
+@api_controller(
+    "/decryption", tags=["Decryption"], permissions=[permissions.IsAuthenticated]
+)
+class DecryptionController:
+    def _serialize_job(self, job: DecryptionJob) -> DecryptionJobSchema:
+        return DecryptionJobSchema(
+            id=job.pk,
+            kind=job.kind,
+            channel_id=job.channel.channel_id if job.channel else None,
+            channel_num=job.channel.channel_num if job.channel else None,
+            node_id=job.node.node_id if job.node else None,
+            status=job.status,
+            total=job.total,
+            processed=job.processed,
+            decrypted=job.decrypted,
+            failed=job.failed,
+            progress=round(job.progress, 4),
+            error_message=job.error_message or None,
+            created_at=job.created_at,
+            started_at=job.started_at,
+            finished_at=job.finished_at,
+            updated_at=job.updated_at,
+        )
+
+    @route.get("/jobs", response={200: List[DecryptionJobSchema]}, auth=auth)
+    def list_jobs(self, request):
+        """
+        List retroactive decryption jobs, newest first.
+
+        Query params:
+        - status: only jobs in this status
+        - limit: maximum number of jobs (default 50)
+        """
+        jobs = DecryptionJob.objects.select_related("channel", "node")
+        status = request.GET.get("status")
+        if status:
+            jobs = jobs.filter(status=status)
+        try:
+            limit = max(1, min(int(request.GET.get("limit", 50)), 500))
+        except (TypeError, ValueError):
+            limit = 50
+        return 200, [self._serialize_job(job) for job in jobs[:limit]]
+
+    @route.post(
+        "/jobs",
+        response={
+            200: DecryptionJobSchema,
+            400: MessageSchema,
+            404: MessageSchema,
+        },
+        auth=auth,
+    )
+    def create_job(self, request, payload: DecryptionJobCreateSchema):
+        """
+        Decrypt the stored packets of a channel PSK or node private key.
+
+        Give either ``channel_id`` and ``channel_num`` (optionally with the
+        ``psk`` to store first) or ``node_id``.
+        """
+        channel = node = None
+        if payload.node_id is not None:
+            if payload.channel_id is not None or payload.psk is not None:
+                return 400, MessageSchema(
+                    message="Specify either a channel or a node, not both"
+                )
+            node = Node.objects.filter(node_id=payload.node_id).first()
+            if node is None:
+                return 404, MessageSchema(message="Node not found")
+        elif payload.channel_id is not None and payload.channel_num is not None:
+            channel = Channel.objects.filter(
+                channel_id=payload.channel_id, channel_num=payload.channel_num
+            ).first()
+            if channel is None:
+                return 404, MessageSchema(message="Channel not found")
+            if payload.psk is not None:
+                try:
+                    validate_psk(payload.psk)
+                except RetroDecryptionError as exc:
+                    return 400, MessageSchema(message=str(exc))
+                if channel.psk != payload.psk:
+                    channel.psk = payload.psk
+                    channel.save(update_fields=["psk"])
+        else:
+            return 400, MessageSchema(
+                message="Specify channel_id and channel_num, or node_id"
+            )
+
+        try:
+            job = RetroDecryptionService.create_job(channel=channel, node=node)
+        except RetroDecryptionError as exc:
+            return 400, MessageSchema(message=str(exc))
+        enqueue_decryption_job(job)
+        return 200, self._serialize_job(job)
+
+    @route.get(
+        "/jobs/{job_id}",
+        response={200: DecryptionJobSchema, 404: MessageSchema},
+        auth=auth,
+    )
+    def get_job(self, request, job_id: int):
+        job = DecryptionJob.objects.filter(pk=job_id).first()
+        if job is None:
+            return 404, MessageSchema(message="Decryption job not found")
+        return 200, self._serialize_job(job)
+
+    @route.post(
+        "/jobs/{job_id}/resume",
+        response={200: DecryptionJobSchema, 400: MessageSchema, 404: MessageSchema},
+        auth=auth,
+    )
+    def resume_job(self, request, job_id: int):
+        """Continue a failed, cancelled or stalled job from its last batch."""
+        job = DecryptionJob.objects.filter(pk=job_id).first()
+        if job is None:
+            return 404, MessageSchema(message="Decryption job not found")
+        try:
+            job = RetroDecryptionService.resume(job)
+        except RetroDecryptionError as exc:
+            return 400, MessageSchema(message=str(exc))
+        enqueue_decryption_job(job)
+        return 200, self._serialize_job(job)
+
+    @route.post(
+        "/jobs/{job_id}/cancel",
+        response={200: DecryptionJobSchema, 404: MessageSchema},
+        auth=auth,
+    )
+    def cancel_job(self, request, job_id: int):
+        """Stop a job; its batch in flight is rolled back and it can be resumed later."""
+        job = DecryptionJob.objects.filter(pk=job_id).first()
+        if job is None:
+            return 404, MessageSchema(message="Decryption job not found")
+        return 200, self._serialize_job(RetroDecryptionService.cancel(job))
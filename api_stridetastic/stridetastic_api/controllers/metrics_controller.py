@@ -3,17 +3,28 @@ from decimal import Decimal
 from typing import List, Optional
 
 from django.db.models import Avg
+from django.http import HttpResponse
 from django.utils import timezone
 from ninja_extra import permissions  # type: ignore[import]
 from ninja_extra import api_controller, route
 from ninja_jwt.authentication import JWTAuth  # type: ignore[import]
 
+from ..ingest.admission import peek_admission_controller
+from ..ingest.log import peek_ingest_log
+from ..ingest.metrics import get_ingest_metrics
+from ..ingest.queue import peek_ingest_queue
+from ..ingest.workers import peek_sharded_ingest
+from ..mesh.encryption.pki_cache import get_pki_key_cache
+from ..mesh.utils import num_to_id
 from ..models import Channel, Edge, NetworkOverviewSnapshot, Node, NodeLink
 from ..schemas import (
+    IngestMetricsSchema,
+    IngestShedMetricsSchema,
     MessageSchema,
     OverviewMetricSnapshotSchema,
     OverviewMetricsResponseSchema,
     OverviewMetricsSchema,
+    PKICacheMetricsSchema,
 )
 from ..utils.time_filters import parse_time_window
 
@@ -21,6 +32,7 @@ auth = JWTAuth()
 ACTIVE_WINDOW = timedelta(hours=1)
 DEFAULT_HISTORY_LIMIT = 500
 DEFAULT_HISTORY_LAST = "7days"
+DEFAULT_SHED_NODES_LIMIT = 100
 
 
 def _to_float(value: Optional[Decimal | float | int]) -> Optional[float]:
@@ -31,6 +43,27 @@ def _to_float(value: Optional[Decimal | float | int]) -> Optional[float]:
     return float(value)
 
 
+def _ingest_queue_interfaces() -> dict:
+    ingest_queue = peek_ingest_queue()
+    if ingest_queue is None:
+        return {}
+    return ingest_queue.get_stats()["interfaces"]
+
+
+def _ingest_workers() -> Optional[dict]:
+    sharded_ingest = peek_sharded_ingest()
+    if sharded_ingest is None:
+        return None
+    return sharded_ingest.get_stats()
+
+
+def _ingest_log() -> Optional[dict]:
+    ingest_log = peek_ingest_log()
+    if ingest_log is None:
+        return None
+    return ingest_log.get_stats()
+
+
 def _build_snapshot_payload(
     snapshot: NetworkOverviewSnapshot,
 ) -> OverviewMetricSnapshotSchema:
@@ -156,3 +189,101 @@ class MetricsController:
         )
 
         return 200, response_payload
+
+    @route.get(
+        "/pki-cache",
+        response={200: PKICacheMetricsSchema},
+        auth=auth,
+    )
+    def get_pki_cache_metrics(self, request):
+        """Return hit-rate counters of the PKI decryption key caches."""
+
+        return 200, PKICacheMetricsSchema(**get_pki_key_cache().get_stats())
+
+    @route.get(
+        "/ingest",
+        response={200: IngestMetricsSchema},
+        auth=auth,
+    )
+    def get_ingest_latency_metrics(self, request):
+        """Return per-stage and per-port ingest latency percentiles."""
+
+        return 200, IngestMetricsSchema(
+            **get_ingest_metrics().snapshot(),
+            queue=_ingest_queue_interfaces(),
+            workers=_ingest_workers(),
+            log=_ingest_log(),
+        )
+
+    @route.get(
+        "/ingest/shed",
+        response={200: IngestShedMetricsSchema},
+        auth=auth,
+    )
+    def get_ingest_shed_metrics(self, request, limit: int = DEFAULT_SHED_NODES_LIMIT):
+        """Return packets shed by admission control, per port and per sender."""
+
+        admission = peek_admission_controller()
+        if admission is None:
+            return 200, IngestShedMetricsSchema(enabled=False)
+        stats = admission.get_stats(limit=max(0, limit))
+        for node in stats["nodes"]:
+            node["node_id"] = num_to_id(node["node_num"])
+        return 200, IngestShedMetricsSchema(enabled=True, **stats)
+
+    @route.get("/ingest/prometheus", auth=auth)
+    def get_ingest_prometheus_metrics(self, request):
+        """Expose ingest latency and queue gauges in the Prometheus text format."""
+
+        interfaces = _ingest_queue_interfaces()
+        workers = (_ingest_workers() or {}).get("workers", [])
+        ingest_log = _ingest_log()
+        admission = peek_admission_controller()
+        shed_by_port = admission.get_stats(limit=0)["shed_by_port"] if admission else {}
+        extra_gauges = {
+            "stridetastic_ingest_queue_depth": (
+                "Packets waiting in the ingest queue.",
+                [
+                    ({"interface": key}, stats["depth"])
+                    for key, stats in interfaces.items()
+                ],
+            ),
+            "stridetastic_ingest_queue_dropped": (
+                "Packets dropped by the ingest queue.",
+                [
+                    ({"interface": key}, stats["dropped"])
+                    for key, stats in interfaces.items()
+                ],
+            ),
+            "stridetastic_ingest_worker_processed": (
+                "Packets ingested per worker process.",
+                [({"worker": str(w["index"])}, w["processed"]) for w in workers],
+            ),
+            "stridetastic_ingest_worker_depth": (
+                "Packets waiting in each worker queue.",
+                [({"worker": str(w["index"])}, w["depth"]) for w in workers],
+            ),
+            "stridetastic_ingest_worker_restarts": (
+                "Restarts of each worker process.",
+                [({"worker": str(w["index"])}, w["restarts"]) for w in workers],
+            ),
+            "stridetastic_ingest_worker_throughput_pps": (
+                "Packets per second ingested by each worker process.",
+                [({"worker": str(w["index"])}, w["throughput_pps"]) for w in workers],
+            ),
+        }
+        if admission is not None:
+            extra_gauges["stridetastic_ingest_shed"] = (
+                "Packets shed by admission control per port.",
+                [({"port": port}, shed) for port, shed in sorted(shed_by_port.items())],
+            )
+        if ingest_log is not None:
+            for key in ("length", "pending", "dead_lettered"):
+                extra_gauges[f"stridetastic_ingest_log_{key}"] = (
+                    f"Ingest log {key.replace('_', ' ')}.",
+                    [({}, ingest_log[key])],
+                )
+        return HttpResponse(
+            get_ingest_metrics().render_prometheus(extra_gauges),
+            content_type="text/plain; version=0.0.4",
+        )
@@ -8,18 +8,19 @@
 from collections import defaultdict
 from typing import List, Optional
 
-from django.db.models import Count, Max, Q  # type: ignore[import]
+from django.db.models import Q  # type: ignore[import]
 from meshtastic.protobuf import portnums_pb2  # type: ignore[attr-defined]
 from ninja_extra import permissions  # type: ignore[import]
 from ninja_extra import api_controller, route
 from ninja_jwt.authentication import JWTAuth  # type: ignore[import]
 
-from ..models import Node, NodeLatencyHistory  # type: ignore[import]
+from ..models import Node, NodeLatencyHistory, NodeNeighbor  # type: ignore[import]
 from ..models.packet_models import PacketData, PositionPayload, TelemetryPayload
 from ..schemas import (
     MessageSchema,
     NodeKeyHealthSchema,
     NodeLatencyHistorySchema,
+    NodeNeighborSchema,
     NodePortActivitySchema,
     NodePortPacketSchema,
     NodePositionHistorySchema,
@@ -35,6 +36,7 @@ from ..utils.node_serialization import serialize_node
 from ..utils.packet_payloads import build_packet_payload_schema
 from ..utils.ports import resolve_port_identity
 from ..utils.time_filters import parse_time_window
+from ..utils.traffic_rollups import traffic_totals
 
 auth = JWTAuth()
 
@@ -243,6 +245,37 @@ class NodeController:
         """
         pass
 
+    @route.get(
+        "/{node_id}/neighbors",
+        response={200: List[NodeNeighborSchema], 404: MessageSchema},
+        auth=auth,
+    )
+    def get_node_neighbors(self, node_id: str):
+        """Return the neighbor set from the node's latest NeighborInfo report."""
+        node = Node.objects.filter(node_id=node_id).first()
+        if not node:
+            return 404, MessageSchema(message="Node not found")
+
+        neighbors = (
+            NodeNeighbor.objects.filter(reporting_node=node)
+            .select_related("neighbor_node")
+            .order_by("neighbor_node__node_num")
+        )
+        return 200, [
+            NodeNeighborSchema(
+                node_id=entry.neighbor_node.node_id,
+                node_num=entry.neighbor_node.node_num,
+                short_name=entry.neighbor_node.short_name,
+                long_name=entry.neighbor_node.long_name,
+                snr=float(entry.snr) if entry.snr is not None else None,
+                last_rx_time=entry.last_rx_time,
+                node_broadcast_interval_secs=entry.node_broadcast_interval_secs,
+                last_packet_id=entry.last_packet_id,
+                reported_at=entry.reported_at,
+            )
+            for entry in neighbors
+        ]
+
     @route.get(
         "/{node_id}/positions",
         response={
@@ -495,17 +528,11 @@ class NodeController:
         if not node:
             return 404, MessageSchema(message="Node not found")
 
-        base_filter = Q(port__isnull=False) | Q(portnum__isnull=False)
-
-        sent_query = (
-            PacketData.objects.filter(base_filter, packet__from_node=node)
-            .values("port", "portnum")
-            .annotate(count=Count("id"), last_seen=Max("time"))
+        sent_query = traffic_totals(
+            "sender", ["port", "portnum"], node=node, decoded_only=True
         )
-        received_query = (
-            PacketData.objects.filter(base_filter, packet__to_node=node)
-            .values("port", "portnum")
-            .annotate(count=Count("id"), last_seen=Max("time"))
+        received_query = traffic_totals(
+            "receiver", ["port", "portnum"], node=node, decoded_only=True
         )
 
         def build_port_map(queryset):
@@ -515,7 +542,7 @@ class NodeController:
                     entry["port"], entry["portnum"]
                 )
                 port_map[port_key] = {
-                    "count": entry["count"],
+                    "count": entry["packets"],
                     "last_seen": entry["last_seen"],
                     "display": display_name,
                 }
@@ -1,15 +1,14 @@
 from typing import List
 from urllib.parse import unquote
 
-from django.db.models import Count, Max, Q  # type: ignore[import]
 from meshtastic.protobuf import portnums_pb2  # type: ignore[attr-defined]
 from ninja_extra import permissions  # type: ignore[import]
 from ninja_extra import api_controller, route
 from ninja_jwt.authentication import JWTAuth  # type: ignore[import]
 
-from ..models.packet_models import PacketData
 from ..schemas import MessageSchema, PortActivitySchema, PortNodeActivitySchema
 from ..utils.ports import resolve_port_identity
+from ..utils.traffic_rollups import traffic_totals
 
 auth = JWTAuth()
 
@@ -18,11 +17,10 @@ auth = JWTAuth()
 class PortController:
     @route.get("/activity", response={200: List[PortActivitySchema]}, auth=auth)
     def get_port_activity(self):
-        queryset = (
-            PacketData.objects.filter(Q(port__isnull=False) | Q(portnum__isnull=False))
-            .values("port", "portnum")
-            .annotate(total_packets=Count("id"), last_seen=Max("time"))
-            .order_by("-total_packets")
+        queryset = sorted(
+            traffic_totals("port", ["port", "portnum"], decoded_only=True),
+            key=lambda entry: entry["packets"],
+            reverse=True,
         )
 
         results: List[PortActivitySchema] = []
@@ -34,7 +32,7 @@ class PortController:
                 PortActivitySchema(
                     port=canonical_port,
                     display_name=display_name,
-                    total_packets=entry["total_packets"],
+                    total_packets=entry["packets"],
                     last_seen=entry["last_seen"],
                 )
             )
@@ -51,7 +49,8 @@ class PortController:
         if not raw_port:
             return 400, MessageSchema(message="Port identifier is required")
 
-        port_conditions: List[Q] = []
+        ports: List[str] = []
+        portnums: List[int] = []
 
         try:
             portnum_value = int(raw_port, 0)
@@ -60,53 +59,50 @@ class PortController:
 
         if portnum_value is not None:
             canonical_port, _ = resolve_port_identity(None, portnum_value)
-            port_conditions.append(Q(portnum=portnum_value))
-            port_conditions.append(Q(port=canonical_port))
+            portnums.append(portnum_value)
+            ports.append(canonical_port)
         else:
             normalized = raw_port.replace("-", "_").upper()
             canonical_port, _ = resolve_port_identity(normalized, None)
-            port_conditions.append(Q(port=canonical_port))
+            ports.append(canonical_port)
             if normalized != canonical_port:
-                port_conditions.append(Q(port=normalized))
+                ports.append(normalized)
             try:
                 portnum_value = portnums_pb2.PortNum.Value(canonical_port)
-                port_conditions.append(Q(portnum=portnum_value))
+                portnums.append(portnum_value)
             except ValueError:
                 portnum_value = None
 
-        if not port_conditions:
+        if not ports and not portnums:
             return 400, MessageSchema(message="Unable to resolve port identifier")
 
-        port_filter = port_conditions[0]
-        for condition in port_conditions[1:]:
-            port_filter |= condition
-
-        sender_query = (
-            PacketData.objects.filter(port_filter)
-            .values(
-                "packet__from_node__node_id",
-                "packet__from_node__node_num",
-                "packet__from_node__short_name",
-                "packet__from_node__long_name",
-            )
-            .annotate(sent_count=Count("id"), last_sent=Max("time"))
+        sender_query = traffic_totals(
+            "sender",
+            [
+                "node__node_id",
+                "node__node_num",
+                "node__short_name",
+                "node__long_name",
+            ],
+            ports=ports,
+            portnums=portnums,
         )
 
         results: List[PortNodeActivitySchema] = []
         for entry in sender_query:
-            node_id = entry.get("packet__from_node__node_id")
+            node_id = entry.get("node__node_id")
             if not node_id:
                 continue
 
-            sent_count = entry["sent_count"]
-            last_sent = entry["last_sent"]
+            sent_count = entry["packets"]
+            last_sent = entry["last_seen"]
 
             results.append(
                 PortNodeActivitySchema(
                     node_id=node_id,
-                    node_num=entry.get("packet__from_node__node_num"),
-                    short_name=entry.get("packet__from_node__short_name"),
-                    long_name=entry.get("packet__from_node__long_name"),
+                    node_num=entry.get("node__node_num"),
+                    short_name=entry.get("node__short_name"),
+                    long_name=entry.get("node__long_name"),
                     sent_count=sent_count,
                     received_count=0,
                     total_packets=sent_count,
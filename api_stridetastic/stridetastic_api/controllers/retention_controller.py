@@ -0,0 +1,94 @@
+from typing import List
+
+from ninja_extra import permissions  # type: ignore[import]
+from ninja_extra import api_controller, route
+from ninja_jwt.authentication import JWTAuth  # type: ignore[import]
+
+from ..models import RetentionPolicy
+from ..schemas import (
+    MessageSchema,
+    RetentionPolicySchema,
+    RetentionPolicyUpdateSchema,
+    RetentionRunRequestSchema,
+    RetentionRunSchema,
+)
+from ..services.retention_service import MANAGED_TABLES, RetentionService
+from ..tasks.retention_tasks import run_retention_policies
+
+auth = JWTAuth()
+
+
+@api_controller(
+    "/retention", tags=["Retention"], permissions=[permissions.IsAuthenticated]
+)
+class RetentionController:
+    def _serialize_policy(
+        self, service: RetentionService, policy: RetentionPolicy
+    ) -> RetentionPolicySchema:
+        db_table = MANAGED_TABLES[policy.table].db_table
+        hypertable = service.hypertable_info(db_table) is not None
+        return RetentionPolicySchema(
+            table=policy.table,
+            enabled=bool(policy.enabled),
+            retention_days=policy.retention_days,
+            compress_after_days=policy.compress_after_days,
+            chunk_interval_hours=policy.chunk_interval_hours,
+            hypertable=hypertable,
+            size_bytes=service.table_size(db_table, hypertable=hypertable),
+            last_run_at=policy.last_run_at,
+            last_deleted_rows=policy.last_deleted_rows,
+            last_reclaimed_bytes=policy.last_reclaimed_bytes,
+            total_reclaimed_bytes=policy.total_reclaimed_bytes,
+            last_error_message=policy.last_error_message or None,
+        )
+
+    @route.get("/policies", response={200: List[RetentionPolicySchema]}, auth=auth)
+    def list_policies(self, request):
+        service = RetentionService()
+        return 200, [
+            self._serialize_policy(service, policy)
+            for policy in service.ensure_policies()
+        ]
+
+    @route.post(
+        "/policies/{table}",
+        response={200: RetentionPolicySchema, 404: MessageSchema},
+        auth=auth,
+    )
+    def update_policy(self, request, table: str, payload: RetentionPolicyUpdateSchema):
+        service = RetentionService()
+        service.ensure_policies()
+        policy = RetentionPolicy.objects.filter(table=table.lower()).first()
+        if policy is None:
+            return 404, MessageSchema(message="Unknown retention table")
+
+        data = payload.dict(exclude_unset=True)
+        if "enabled" in data and data["enabled"] is not None:
+            policy.enabled = bool(data["enabled"])
+        for field in ("retention_days", "compress_after_days", "chunk_interval_hours"):
+            if field in data:
+                setattr(policy, field, data[field])
+        policy.save()
+        return 200, self._serialize_policy(service, policy)
+
+    @route.post(
+        "/run", response={200: RetentionRunSchema, 400: MessageSchema}, auth=auth
+    )
+    def run_policies(self, request, payload: RetentionRunRequestSchema):
+        """
+        Queue a retention run in the Celery worker.
+
+        The outcome is recorded on each policy (``last_run_at``,
+        ``last_deleted_rows``, ``last_reclaimed_bytes``).
+        """
+        tables = None
+        if payload.tables is not None:
+            tables = [table.lower() for table in payload.tables]
+            unknown = sorted(set(tables) - set(MANAGED_TABLES))
+            if unknown:
+                return 400, MessageSchema(
+                    message=f"Unknown retention tables: {', '.join(unknown)}"
+                )
+
+        task = run_retention_policies.delay(tables=tables)
+        return 200, RetentionRunSchema(task_id=str(task.id), tables=tables)
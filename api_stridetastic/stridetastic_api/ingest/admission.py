@@ -0,0 +1,219 @@
+"""
+Admission control in front of the packet handler.
+
+A node flooding position or text packets would otherwise push every copy
+through full persistence and the reactive publisher. With
+``INGEST_ADMISSION_ENABLED`` each packet must take a token from its sender's
+bucket (``INGEST_ADMISSION_NODE_PER_MIN`` refill, ``INGEST_ADMISSION_NODE_BURST``
+capacity) and, when its port has a limit in ``INGEST_ADMISSION_PORT_LIMITS``
+(``"POSITION_APP=12:10,TEXT_MESSAGE_APP=30:20"``: per minute and burst), from
+the sender's bucket for that port. The packet handler charges the buckets right
+after parsing the packet header, before it archives the envelope or resolves
+any node. Repeat copies of a packet it already processed are free, and
+encrypted packets are decrypted first so they count against their real port.
+Packets that stay encrypted are accounted to the ``ENCRYPTED`` port.
+
+Shed packets are neither archived nor persisted; they only increment per-node
+and aggregate counters served on ``/metrics/ingest/shed``. Buckets and per-node counters
+are kept for the ``INGEST_ADMISSION_MAX_NODES`` most recently active senders.
+"""
+
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.utils import timezone
+from meshtastic.protobuf import portnums_pb2
+
+ENCRYPTED_PORT = "ENCRYPTED"
+
+
+def parse_port_limits(spec: Optional[str]) -> dict[str, tuple[float, float]]:
+    """Parse ``"PORT=per_minute:burst,..."``; the burst defaults to the rate."""
+    limits: dict[str, tuple[float, float]] = {}
+    for item in (spec or "").split(","):
+        if not item.strip():
+            continue
+        port, _, budget = item.partition("=")
+        per_minute, _, burst = budget.partition(":")
+        try:
+            rate = float(per_minute)
+            limits[port.strip().upper()] = (rate, float(burst) if burst else rate)
+        except ValueError:
+            raise ValueError(f"Invalid admission limit: {item.strip()!r}") from None
+    return limits
+
+
+def packet_port(packet, decoded_data=None) -> str:
+    """Port name of a MeshPacket (or of its decrypted ``decoded_data``).
+
+    Returns ``ENCRYPTED`` while the packet is not decoded.
+    """
+    if decoded_data is None:
+        if not packet.HasField("decoded"):
+            return ENCRYPTED_PORT
+        decoded_data = packet.decoded
+    try:
+        return portnums_pb2.PortNum.Name(decoded_data.portnum)
+    except ValueError:
+        return str(decoded_data.portnum)
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated_at")
+
+    def __init__(self, per_minute: float, burst: float, now: float):
+        self.rate = max(0.0, per_minute) / 60.0
+        self.capacity = max(1.0, burst)
+        self.tokens = self.capacity
+        self.updated_at = now
+
+    def refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+
+@dataclass
+class NodeShedStats:
+    shed: int = 0
+    by_port: Counter = field(default_factory=Counter)
+    first_shed_at: Optional[datetime] = None
+    last_shed_at: Optional[datetime] = None
+
+
+class AdmissionController:
+    """Per-node and per-(node, port) token buckets plus shed counters."""
+
+    def __init__(
+        self,
+        *,
+        node_per_minute: float = 120,
+        node_burst: float = 60,
+        port_limits: Optional[dict[str, tuple[float, float]]] = None,
+        max_nodes: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.node_per_minute = float(node_per_minute)
+        self.node_burst = float(node_burst)
+        self.port_limits = dict(port_limits or {})
+        self.max_nodes = max(1, int(max_nodes))
+        self._clock = clock
+        self._buckets: "OrderedDict[tuple[int, Optional[str]], TokenBucket]" = (
+            OrderedDict()
+        )
+        self._shed_nodes: "OrderedDict[int, NodeShedStats]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.admitted = 0
+        self.shed = 0
+        self.shed_by_port: Counter = Counter()
+
+    def _bucket(
+        self, key: tuple[int, Optional[str]], per_minute: float, burst: float, now
+    ) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(per_minute, burst, now)
+            # A node has at most one bucket per limited port plus its own.
+            while len(self._buckets) > self.max_nodes * (1 + len(self.port_limits)):
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket.refill(now)
+        return bucket
+
+    def admit(self, node_num: int, port: str) -> bool:
+        """Take a token for a packet of ``node_num`` on ``port``; False sheds it."""
+        now = self._clock()
+        with self._lock:
+            buckets = [
+                self._bucket(
+                    (node_num, None), self.node_per_minute, self.node_burst, now
+                )
+            ]
+            port_limit = self.port_limits.get(port)
+            if port_limit is not None:
+                buckets.append(self._bucket((node_num, port), *port_limit, now))
+            if all(bucket.tokens >= 1.0 for bucket in buckets):
+                for bucket in buckets:
+                    bucket.tokens -= 1.0
+                self.admitted += 1
+                return True
+
+            self.shed += 1
+            self.shed_by_port[port] += 1
+            stats = self._shed_nodes.pop(node_num, None) or NodeShedStats()
+            self._shed_nodes[node_num] = stats
+            while len(self._shed_nodes) > self.max_nodes:
+                self._shed_nodes.popitem(last=False)
+            stats.shed += 1
+            stats.by_port[port] += 1
+            stats.last_shed_at = timezone.now()
+            stats.first_shed_at = stats.first_shed_at or stats.last_shed_at
+            return False
+
+    def admit_packet(self, packet, decoded_data=None) -> bool:
+        return self.admit(getattr(packet, "from", 0), packet_port(packet, decoded_data))
+
+    def get_stats(self, *, limit: Optional[int] = None) -> dict:
+        """Aggregate counters plus the heaviest shed senders first."""
+        with self._lock:
+            nodes = sorted(
+                self._shed_nodes.items(), key=lambda item: item[1].shed, reverse=True
+            )
+            if limit is not None:
+                nodes = nodes[: max(0, limit)]
+            return {
+                "admitted": self.admitted,
+                "shed": self.shed,
+                "shed_by_port": dict(self.shed_by_port),
+                "nodes": [
+                    {
+                        "node_num": node_num,
+                        "shed": stats.shed,
+                        "by_port": dict(stats.by_port),
+                        "first_shed_at": stats.first_shed_at,
+                        "last_shed_at": stats.last_shed_at,
+                    }
+                    for node_num, stats in nodes
+                ],
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+            self._shed_nodes.clear()
+            self.admitted = 0
+            self.shed = 0
+            self.shed_by_port.clear()
+
+
+_controller: Optional[AdmissionController] = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> Optional[AdmissionController]:
+    """Return the process-wide controller, or ``None`` when admission is off."""
+    global _controller
+    if not getattr(settings, "INGEST_ADMISSION_ENABLED", False):
+        return None
+    with _controller_lock:
+        if _controller is None:
+            _controller = AdmissionController(
+                node_per_minute=getattr(settings, "INGEST_ADMISSION_NODE_PER_MIN", 120),
+                node_burst=getattr(settings, "INGEST_ADMISSION_NODE_BURST", 60),
+                port_limits=parse_port_limits(
+                    getattr(settings, "INGEST_ADMISSION_PORT_LIMITS", "")
+                ),
+                max_nodes=getattr(settings, "INGEST_ADMISSION_MAX_NODES", 10_000),
+            )
+        return _controller
+
+
+def peek_admission_controller() -> Optional[AdmissionController]:
+    with _controller_lock:
+        return _controller
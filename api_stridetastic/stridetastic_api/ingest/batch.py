@@ -0,0 +1,188 @@
+"""
+Write-behind micro-batching for the ingest pipeline.
+
+When ``INGEST_BATCH_ENABLED`` is set, normalized messages are buffered and
+persisted through `persist_packet_batch` once the batch reaches
+``INGEST_BATCH_MAX_SIZE`` items or its oldest item is older than
+``INGEST_BATCH_MAX_WAIT_MS``.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Optional, Sequence
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from ..mesh.packet.bulk import persist_packet_batch
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IngestBatchStats:
+    batches_flushed: int = 0
+    packets_flushed: int = 0
+    failed_batches: int = 0
+    last_batch_size: int = 0
+    max_batch_size: int = 0
+    last_flush_ms: float = 0.0
+    max_flush_ms: float = 0.0
+    total_flush_ms: float = 0.0
+
+    @property
+    def avg_batch_size(self) -> float:
+        if not self.batches_flushed:
+            return 0.0
+        return self.packets_flushed / self.batches_flushed
+
+    @property
+    def avg_flush_ms(self) -> float:
+        if not self.batches_flushed:
+            return 0.0
+        return self.total_flush_ms / self.batches_flushed
+
+
+class IngestBatcher:
+    """Buffers normalized messages and persists them in micro-batches."""
+
+    def __init__(
+        self,
+        *,
+        max_batch_size: int = 200,
+        max_wait_ms: int = 500,
+        persist: Callable[[Sequence[tuple[dict, str]]], object] = persist_packet_batch,
+    ):
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_seconds = max(0.01, max_wait_ms / 1000.0)
+        self._persist = persist
+        self._pending: list[tuple[dict, str]] = []
+        self._oldest_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = IngestBatchStats()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="ingest-batcher", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background flusher and persist anything still buffered."""
+        self._stop_event.set()
+        thread = self._thread
+        if thread and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout=self.max_wait_seconds * 4)
+        self._thread = None
+        self.flush()
+
+    def submit(self, normalized: dict, iface: str = "MQTT") -> None:
+        with self._lock:
+            self._pending.append((normalized, iface))
+            if self._oldest_at is None:
+                self._oldest_at = time.monotonic()
+            full = len(self._pending) >= self.max_batch_size
+        if full:
+            self.flush()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """Persist the buffered batch synchronously; returns its size."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                self._oldest_at = None
+            if not batch:
+                return 0
+
+            started = time.perf_counter()
+            failed = False
+            try:
+                self._persist(batch)
+            except Exception:
+                failed = True
+                logger.exception(
+                    "[IngestBatch] Failed to persist batch of %d packets", len(batch)
+                )
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+
+            with self._lock:
+                stats = self._stats
+                stats.batches_flushed += 1
+                stats.packets_flushed += len(batch)
+                stats.failed_batches += int(failed)
+                stats.last_batch_size = len(batch)
+                stats.max_batch_size = max(stats.max_batch_size, len(batch))
+                stats.last_flush_ms = elapsed_ms
+                stats.max_flush_ms = max(stats.max_flush_ms, elapsed_ms)
+                stats.total_flush_ms += elapsed_ms
+
+            logger.debug(
+                "[IngestBatch] Flushed %d packets in %.1f ms", len(batch), elapsed_ms
+            )
+            return len(batch)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            payload = asdict(self._stats)
+            payload["avg_batch_size"] = round(self._stats.avg_batch_size, 2)
+            payload["avg_flush_ms"] = round(self._stats.avg_flush_ms, 3)
+            payload["pending"] = len(self._pending)
+        return payload
+
+    def _is_due(self) -> bool:
+        with self._lock:
+            return (
+                self._oldest_at is not None
+                and time.monotonic() - self._oldest_at >= self.max_wait_seconds
+            )
+
+    def _run(self) -> None:
+        interval = self.max_wait_seconds / 2
+        try:
+            while not self._stop_event.wait(interval):
+                if self._is_due():
+                    close_old_connections()
+                    self.flush()
+        finally:
+            connection.close()
+
+
+_batcher: Optional[IngestBatcher] = None
+_batcher_lock = threading.Lock()
+
+
+def get_ingest_batcher() -> Optional[IngestBatcher]:
+    """Return the process-wide batcher, or ``None`` when batching is disabled."""
+    global _batcher
+    if not getattr(settings, "INGEST_BATCH_ENABLED", False):
+        return None
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = IngestBatcher(
+                max_batch_size=getattr(settings, "INGEST_BATCH_MAX_SIZE", 200),
+                max_wait_ms=getattr(settings, "INGEST_BATCH_MAX_WAIT_MS", 500),
+            )
+            _batcher.start()
+        return _batcher
+
+
+def shutdown_ingest_batcher() -> None:
+    """Flush and stop the process-wide batcher if one was started."""
+    global _batcher
+    with _batcher_lock:
+        batcher, _batcher = _batcher, None
+    if batcher is not None:
+        batcher.stop()
@@ -0,0 +1,86 @@
+"""
+Per-packet ingest context shared by the capture service and the packet handler.
+
+An MQTT payload is parsed into its ``ServiceEnvelope`` once, and every
+decryption attempt made for the packet (AES per PSK, PKI per target node) is
+remembered on the context. Whichever consumer decrypts first pays the cost;
+the other reuses the result instead of parsing or decrypting again.
+"""
+
+import logging
+from typing import TYPE_CHECKING, Optional
+
+from meshtastic.protobuf import mesh_pb2, mqtt_pb2
+
+from ..mesh.encryption.key_ring import decrypt_with_key_ring
+
+if TYPE_CHECKING:  # pragma: no cover
+    from ..models import Node
+    from ..services.pki_service import PKIDecryptionResult, PKIService
+
+logger = logging.getLogger(__name__)
+
+
+class IngestContext:
+    """Parsed envelope plus the decryption results of a single packet."""
+
+    def __init__(
+        self,
+        envelope: mqtt_pb2.ServiceEnvelope,
+        *,
+        raw_payload: Optional[bytes] = None,
+        interface_id: Optional[int] = None,
+    ):
+        self.envelope = envelope
+        self.raw_payload = raw_payload
+        self.interface_id = interface_id
+        # Final outcome as decided by the packet handler.
+        self.decoded_data: Optional[mesh_pb2.Data] = None
+        self.how_decrypted: Optional[str] = None
+        self._aes_results: dict[str, Optional[mesh_pb2.Data]] = {}
+        self._pki_results: dict[int, "PKIDecryptionResult"] = {}
+        self.decrypt_calls = 0
+
+    @classmethod
+    def from_payload(
+        cls, raw_payload: bytes, *, interface_id: Optional[int] = None
+    ) -> "IngestContext":
+        envelope = mqtt_pb2.ServiceEnvelope()
+        envelope.ParseFromString(raw_payload)
+        return cls(envelope, raw_payload=raw_payload, interface_id=interface_id)
+
+    @property
+    def packet(self) -> mesh_pb2.MeshPacket:
+        return self.envelope.packet
+
+    @property
+    def channel_id(self) -> Optional[str]:
+        return getattr(self.envelope, "channel_id", None)
+
+    @property
+    def gateway_node_id(self) -> Optional[str]:
+        return getattr(self.envelope, "gateway_id", None)
+
+    def decrypt_aes(self, key: str) -> Optional[mesh_pb2.Data]:
+        """AES-decrypt the packet with ``key``, at most once per key."""
+        if key not in self._aes_results:
+            self.decrypt_calls += 1
+            self._aes_results[key] = decrypt_with_key_ring(self.packet, key)
+        return self._aes_results[key]
+
+    def decrypt_pki(
+        self, pki_service: "PKIService", target_node: "Node"
+    ) -> "PKIDecryptionResult":
+        """PKI-decrypt the packet for ``target_node``, at most once per node."""
+        result = self._pki_results.get(target_node.node_num)
+        if result is None:
+            self.decrypt_calls += 1
+            result = pki_service.decrypt_packet(self.packet, target_node)
+            self._pki_results[target_node.node_num] = result
+        return result
+
+    def record_decryption(
+        self, decoded_data: Optional[mesh_pb2.Data], how_decrypted: str
+    ) -> None:
+        self.decoded_data = decoded_data
+        self.how_decrypted = how_decrypted
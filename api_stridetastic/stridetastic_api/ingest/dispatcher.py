@@ -4,9 +4,12 @@ This module provides a single entry point for ingesting packets from any source,
 normalizing and dispatching them to the appropriate protocol handler.
 """
 
+from .log import get_ingest_log
 from .mqtt import handle_mqtt_ingest
+from .queue import get_ingest_queue
 from .serial import handle_serial_ingest
 from .tcp import handle_tcp_ingest
+from .workers import get_sharded_ingest
 
 
 def ingest_packet(source_type, raw_data, meta=None):
@@ -20,7 +23,11 @@ def ingest_packet(source_type, raw_data, meta=None):
     if source_type == "mqtt":
         if meta and all(k in meta for k in ("client", "userdata", "msg")):
             handle_mqtt_ingest(
-                meta["client"], meta["userdata"], meta["msg"], interface_id=interface_id
+                meta["client"],
+                meta["userdata"],
+                meta["msg"],
+                interface_id=interface_id,
+                capture=meta.get("capture", True),
             )
         else:
             raise ValueError(
@@ -32,3 +39,24 @@ def ingest_packet(source_type, raw_data, meta=None):
         handle_tcp_ingest(raw_data, interface_id=interface_id)
     else:
         raise ValueError(f"Unknown source_type: {source_type}")
+
+
+def enqueue_packet(source_type, raw_data, meta=None):
+    """
+    Entry point for interface callbacks.
+    Hands the packet to the durable ingest log, the ingest worker processes or
+    the bounded ingest queue when enabled so the calling network/reader thread
+    returns immediately; otherwise ingests inline. Returns False if the packet
+    was dropped.
+    """
+    ingest_log = get_ingest_log()
+    if ingest_log is not None:
+        return ingest_log.append(source_type, raw_data, meta)
+    sharded_ingest = get_sharded_ingest()
+    if sharded_ingest is not None:
+        return sharded_ingest.submit(source_type, raw_data, meta)
+    ingest_queue = get_ingest_queue()
+    if ingest_queue is None:
+        ingest_packet(source_type, raw_data, meta=meta)
+        return True
+    return ingest_queue.submit(source_type, raw_data, meta)
@@ -0,0 +1,114 @@
+"""
+Serializable form of a received packet, handed between ingest processes.
+
+Interface callbacks receive paho messages or meshtastic packet dicts that
+cannot leave the process. `build_job` reduces them to the raw bytes plus the
+interface metadata the handler needs (recording MQTT captures on the way,
+since capture sessions live in the receiving process), and `run_job` replays
+such a job through `ingest_packet` wherever it is consumed.
+"""
+
+import json
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, Mapping, Optional
+
+from meshtastic.protobuf import mesh_pb2
+
+from .context import IngestContext
+from .mqtt import record_mqtt_capture
+
+
+@dataclass
+class IngestJob:
+    source_type: str
+    payload: bytes
+    interface_id: Optional[int]
+    topic: Optional[str] = None
+    channel: Any = None
+
+    def to_fields(self) -> dict[str, Any]:
+        """Flat mapping suitable for a Redis stream entry."""
+        return {
+            "source_type": self.source_type,
+            "payload": self.payload,
+            "interface_id": "" if self.interface_id is None else self.interface_id,
+            "topic": self.topic or "",
+            "channel": json.dumps(self.channel),
+        }
+
+    @classmethod
+    def from_fields(cls, fields: Mapping[Any, Any]) -> "IngestJob":
+        values = {
+            (key.decode() if isinstance(key, bytes) else key): value
+            for key, value in fields.items()
+        }
+
+        def text(name: str) -> str:
+            value = values.get(name, "")
+            return value.decode() if isinstance(value, bytes) else str(value)
+
+        payload = values["payload"]
+        return cls(
+            source_type=text("source_type"),
+            payload=payload if isinstance(payload, bytes) else payload.encode(),
+            interface_id=int(text("interface_id")) if text("interface_id") else None,
+            topic=text("topic") or None,
+            channel=json.loads(text("channel") or "null"),
+        )
+
+
+def _packet_of(raw_data: Any) -> mesh_pb2.MeshPacket:
+    return raw_data.get("raw") if isinstance(raw_data, dict) else raw_data
+
+
+def build_job(
+    source_type: str, raw_data: Any, meta: Optional[dict]
+) -> tuple[int, IngestJob]:
+    """Return the sender node_num and the job for a packet from an interface."""
+    interface_id = meta.get("interface_id") if meta else None
+    if source_type == "mqtt":
+        msg = meta["msg"] if meta and "msg" in meta else None
+        payload = msg.payload if msg is not None else raw_data
+        context = IngestContext.from_payload(payload, interface_id=interface_id)
+        record_mqtt_capture(payload, context, interface_id=interface_id)
+        job = IngestJob(
+            source_type,
+            payload,
+            interface_id,
+            topic=getattr(msg, "topic", None),
+        )
+        return getattr(context.packet, "from", 0), job
+    packet = _packet_of(raw_data)
+    channel = raw_data.get("channel") if isinstance(raw_data, dict) else None
+    job = IngestJob(
+        source_type, packet.SerializeToString(), interface_id, channel=channel
+    )
+    return getattr(packet, "from", 0), job
+
+
+def run_job(job: IngestJob) -> None:
+    """Ingest a job in this process."""
+    from .dispatcher import ingest_packet
+
+    if job.source_type == "mqtt":
+        msg = SimpleNamespace(topic=job.topic, payload=job.payload)
+        ingest_packet(
+            "mqtt",
+            job.payload,
+            meta={
+                "client": None,
+                "userdata": None,
+                "msg": msg,
+                "interface_id": job.interface_id,
+                # Recorded by `build_job` in the receiving process.
+                "capture": False,
+            },
+        )
+        return
+    packet = mesh_pb2.MeshPacket()
+    packet.ParseFromString(job.payload)
+    raw_data = {"raw": packet}
+    if job.channel is not None:
+        raw_data["channel"] = job.channel
+    ingest_packet(job.source_type, raw_data, meta={"interface_id": job.interface_id})
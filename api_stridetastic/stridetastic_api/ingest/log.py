@@ -0,0 +1,453 @@
+"""
+Durable ingest log between interfaces and the database writers.
+
+With ``INGEST_LOG_ENABLED`` set, interface callbacks only append the raw
+packet (an `IngestJob`) to a Redis Stream and return; a packet is no longer
+lost when ``on_message`` crashes, and writers scale independently of the
+process holding the MQTT connection. Writers are consumers of one consumer
+group (``INGEST_LOG_GROUP``):
+
+* each entry is acknowledged once the handler pipeline has run for it;
+* entries left pending for ``INGEST_LOG_CLAIM_IDLE_SECS`` by a crashed or
+  stuck consumer are claimed and retried by the others;
+* an entry that failed ``INGEST_LOG_MAX_DELIVERIES`` times is moved to the
+  ``<stream>:dead`` stream and acknowledged.
+
+``INGEST_LOG_CONSUMERS`` writer threads run next to the interfaces; more can
+be started anywhere with ``manage.py run_ingest_consumers``. Writers do not
+keep per-sender ordering. ``INGEST_LOG_BACKEND=memory`` keeps the log in this
+process (tests and single-process setups).
+"""
+
+import itertools
+import logging
+import os
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from .jobs import IngestJob, build_job, run_job
+
+logger = logging.getLogger(__name__)
+
+BACKEND_MEMORY = "memory"
+BACKEND_REDIS = "redis"
+
+
+@dataclass
+class LogEntry:
+    entry_id: str
+    fields: dict
+    deliveries: int = 1
+
+
+class RedisStreamBackend:
+    """Consumer-group operations on a Redis Stream."""
+
+    def __init__(
+        self, *, url: str, stream: str, group: str, maxlen: Optional[int] = None
+    ):
+        import redis  # type: ignore[import]
+
+        self.client = redis.Redis.from_url(url)
+        self.stream = stream
+        self.group = group
+        self.maxlen = maxlen or None
+        self._group_ready = False
+
+    def ensure_group(self) -> None:
+        if self._group_ready:
+            return
+        try:
+            self.client.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except Exception as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+        self._group_ready = True
+
+    def append(self, fields: dict) -> str:
+        entry_id = self.client.xadd(
+            self.stream, fields, maxlen=self.maxlen, approximate=True
+        )
+        return entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+
+    def read(self, consumer: str, *, count: int, block_ms: int) -> list[LogEntry]:
+        self.ensure_group()
+        response = self.client.xreadgroup(
+            self.group, consumer, {self.stream: ">"}, count=count, block=block_ms
+        )
+        return [
+            LogEntry(_text(entry_id), fields)
+            for _, entries in response or []
+            for entry_id, fields in entries
+        ]
+
+    def claim_stale(
+        self, consumer: str, *, min_idle_ms: int, count: int
+    ) -> list[LogEntry]:
+        self.ensure_group()
+        _, claimed, *_ = self.client.xautoclaim(
+            self.stream, self.group, consumer, min_idle_ms, "0-0", count=count
+        )
+        claimed = [(entry_id, fields) for entry_id, fields in claimed if fields]
+        if not claimed:
+            return []
+        deliveries = {
+            _text(info["message_id"]): info["times_delivered"]
+            for info in self.client.xpending_range(
+                self.stream,
+                self.group,
+                min=claimed[0][0],
+                max=claimed[-1][0],
+                count=len(claimed),
+            )
+        }
+        return [
+            LogEntry(
+                _text(entry_id),
+                fields,
+                deliveries=deliveries.get(_text(entry_id), 1),
+            )
+            for entry_id, fields in claimed
+        ]
+
+    def ack(self, entry_ids: list[str]) -> None:
+        if entry_ids:
+            self.client.xack(self.stream, self.group, *entry_ids)
+
+    def dead_letter(self, entry: LogEntry) -> None:
+        self.client.xadd(f"{self.stream}:dead", entry.fields)
+
+    def length(self) -> int:
+        return int(self.client.xlen(self.stream))
+
+    def pending(self) -> int:
+        self.ensure_group()
+        return int(self.client.xpending(self.stream, self.group)["pending"])
+
+    def clear(self) -> None:
+        self.client.delete(self.stream, f"{self.stream}:dead")
+        self._group_ready = False
+
+
+def _text(value: Any) -> str:
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+@dataclass
+class _PendingEntry:
+    entry: LogEntry
+    consumer: str
+    delivered_at: float
+
+
+class InMemoryStreamBackend:
+    """Process-local stand-in with the same consumer-group semantics."""
+
+    def __init__(self, *, maxlen: Optional[int] = None):
+        self.maxlen = maxlen or None
+        self.entries: list[LogEntry] = []
+        self.dead: list[LogEntry] = []
+        self._pending: dict[str, _PendingEntry] = {}
+        self._ids = itertools.count(1)
+        self._cond = threading.Condition()
+
+    def ensure_group(self) -> None:
+        return None
+
+    def append(self, fields: dict) -> str:
+        with self._cond:
+            entry_id = f"{int(time.time() * 1000)}-{next(self._ids)}"
+            self.entries.append(LogEntry(entry_id, dict(fields)))
+            if self.maxlen and len(self.entries) > self.maxlen:
+                del self.entries[: len(self.entries) - self.maxlen]
+            self._cond.notify_all()
+            return entry_id
+
+    def read(self, consumer: str, *, count: int, block_ms: int) -> list[LogEntry]:
+        with self._cond:
+            if not self.entries and block_ms:
+                self._cond.wait(block_ms / 1000.0)
+            batch, self.entries = self.entries[:count], self.entries[count:]
+            now = time.monotonic()
+            for entry in batch:
+                self._pending[entry.entry_id] = _PendingEntry(entry, consumer, now)
+            return list(batch)
+
+    def claim_stale(
+        self, consumer: str, *, min_idle_ms: int, count: int
+    ) -> list[LogEntry]:
+        now = time.monotonic()
+        claimed = []
+        with self._cond:
+            for pending in self._pending.values():
+                if len(claimed) >= count:
+                    break
+                if (now - pending.delivered_at) * 1000.0 < min_idle_ms:
+                    continue
+                pending.consumer = consumer
+                pending.delivered_at = now
+                pending.entry.deliveries += 1
+                claimed.append(pending.entry)
+        return claimed
+
+    def ack(self, entry_ids: list[str]) -> None:
+        with self._cond:
+            for entry_id in entry_ids:
+                self._pending.pop(entry_id, None)
+
+    def dead_letter(self, entry: LogEntry) -> None:
+        with self._cond:
+            self.dead.append(entry)
+
+    def length(self) -> int:
+        with self._cond:
+            return len(self.entries) + len(self._pending)
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def clear(self) -> None:
+        with self._cond:
+            self.entries.clear()
+            self.dead.clear()
+            self._pending.clear()
+
+
+class IngestLog:
+    """Append side of the log plus counters shared by its consumers."""
+
+    def __init__(self, backend, *, max_deliveries: int = 5):
+        self.backend = backend
+        self.max_deliveries = max(1, int(max_deliveries))
+        self._lock = threading.Lock()
+        self.appended = 0
+        self.append_failed = 0
+        self.processed = 0
+        self.failed = 0
+        self.reclaimed = 0
+        self.dead_lettered = 0
+
+    def append(self, source_type: str, raw_data: Any, meta: Optional[dict]) -> bool:
+        """Append a packet from an interface; returns False if it was lost."""
+        try:
+            _, job = build_job(source_type, raw_data, meta)
+            self.backend.append(job.to_fields())
+        except Exception:
+            logger.exception("[IngestLog] Failed to append %s packet", source_type)
+            with self._lock:
+                self.append_failed += 1
+            return False
+        with self._lock:
+            self.appended += 1
+        return True
+
+    def consume(
+        self,
+        consumer: str,
+        *,
+        count: int = 100,
+        block_ms: int = 1000,
+        claim_idle_ms: int = 60_000,
+        handler: Callable[[IngestJob], object] = run_job,
+    ) -> int:
+        """Process one batch (stale entries first); returns entries handled."""
+        entries = self.backend.claim_stale(
+            consumer, min_idle_ms=claim_idle_ms, count=count
+        )
+        reclaimed = len(entries)
+        if not entries:
+            entries = self.backend.read(consumer, count=count, block_ms=block_ms)
+
+        done: list[str] = []
+        processed = failed = dead = 0
+        for entry in entries:
+            try:
+                handler(IngestJob.from_fields(entry.fields))
+            except Exception:
+                failed += 1
+                logger.exception(
+                    "[IngestLog] Failed to ingest entry %s (delivery %d)",
+                    entry.entry_id,
+                    entry.deliveries,
+                )
+                if entry.deliveries < self.max_deliveries:
+                    # Left pending; a consumer claims it again once idle.
+                    continue
+                self.backend.dead_letter(entry)
+                dead += 1
+            else:
+                processed += 1
+            done.append(entry.entry_id)
+        self.backend.ack(done)
+
+        with self._lock:
+            self.processed += processed
+            self.failed += failed
+            self.reclaimed += reclaimed
+            self.dead_lettered += dead
+        return len(entries)
+
+    def get_stats(self) -> dict:
+        try:
+            length, pending = self.backend.length(), self.backend.pending()
+        except Exception:
+            logger.exception("[IngestLog] Failed to read stream state")
+            length = pending = -1
+        with self._lock:
+            return {
+                "backend": (
+                    BACKEND_MEMORY
+                    if isinstance(self.backend, InMemoryStreamBackend)
+                    else BACKEND_REDIS
+                ),
+                "length": length,
+                "pending": pending,
+                "appended": self.appended,
+                "append_failed": self.append_failed,
+                "processed": self.processed,
+                "failed": self.failed,
+                "reclaimed": self.reclaimed,
+                "dead_lettered": self.dead_lettered,
+            }
+
+
+def consumer_name(index: int = 0) -> str:
+    """Consumer names must be unique per group; make them per process/thread."""
+    return f"{socket.gethostname()}-{os.getpid()}-{index}"
+
+
+class IngestLogConsumers:
+    """Writer threads draining the log in this process."""
+
+    def __init__(
+        self,
+        log: IngestLog,
+        *,
+        consumers: int = 1,
+        count: int = 100,
+        block_ms: int = 1000,
+        claim_idle_ms: int = 60_000,
+    ):
+        self.log = log
+        self.consumers = max(1, int(consumers))
+        self.count = max(1, int(count))
+        self.block_ms = max(1, int(block_ms))
+        self.claim_idle_ms = max(0, int(claim_idle_ms))
+        self._stop_event = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stop_event.clear()
+        for index in range(self.consumers):
+            thread = threading.Thread(
+                target=self._run,
+                args=(consumer_name(index),),
+                name=f"ingest-log-consumer-{index}",
+                daemon=True,
+            )
+            self._threads.append(thread)
+            thread.start()
+
+    def stop(self, *, timeout: float = 30.0) -> None:
+        self._stop_event.set()
+        threads, self._threads = self._threads, []
+        deadline = time.monotonic() + max(0.0, timeout)
+        for thread in threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=max(0.1, deadline - time.monotonic()))
+
+    def wait(self) -> None:
+        for thread in list(self._threads):
+            thread.join()
+
+    def _run(self, name: str) -> None:
+        try:
+            while not self._stop_event.is_set():
+                close_old_connections()
+                try:
+                    self.log.consume(
+                        name,
+                        count=self.count,
+                        block_ms=self.block_ms,
+                        claim_idle_ms=self.claim_idle_ms,
+                    )
+                except Exception:
+                    logger.exception("[IngestLog] Consumer %s failed", name)
+                    self._stop_event.wait(1.0)
+        finally:
+            connection.close()
+
+
+_log: Optional[IngestLog] = None
+_consumers: Optional[IngestLogConsumers] = None
+_log_lock = threading.Lock()
+
+
+def _build_log() -> IngestLog:
+    maxlen = getattr(settings, "INGEST_LOG_MAXLEN", 1_000_000)
+    if getattr(settings, "INGEST_LOG_BACKEND", BACKEND_REDIS) == BACKEND_MEMORY:
+        backend: Any = InMemoryStreamBackend(maxlen=maxlen)
+    else:
+        backend = RedisStreamBackend(
+            url=getattr(settings, "INGEST_LOG_REDIS_URL"),
+            stream=getattr(settings, "INGEST_LOG_STREAM", "stridetastic:ingest"),
+            group=getattr(settings, "INGEST_LOG_GROUP", "ingest-writers"),
+            maxlen=maxlen,
+        )
+    return IngestLog(
+        backend, max_deliveries=getattr(settings, "INGEST_LOG_MAX_DELIVERIES", 5)
+    )
+
+
+def build_consumers(log: IngestLog, consumers: int) -> IngestLogConsumers:
+    return IngestLogConsumers(
+        log,
+        consumers=consumers,
+        count=getattr(settings, "INGEST_LOG_BATCH_SIZE", 100),
+        block_ms=getattr(settings, "INGEST_LOG_BLOCK_MS", 1000),
+        claim_idle_ms=getattr(settings, "INGEST_LOG_CLAIM_IDLE_SECS", 60) * 1000,
+    )
+
+
+def get_ingest_log(*, start_consumers: bool = True) -> Optional[IngestLog]:
+    """Return the process-wide ingest log, or ``None`` when it is disabled.
+
+    The first call also starts the ``INGEST_LOG_CONSUMERS`` local writers
+    unless ``start_consumers`` is False.
+    """
+    global _log, _consumers
+    if not getattr(settings, "INGEST_LOG_ENABLED", False):
+        return None
+    with _log_lock:
+        if _log is None:
+            _log = _build_log()
+        local_consumers = getattr(settings, "INGEST_LOG_CONSUMERS", 1)
+        if start_consumers and _consumers is None and local_consumers > 0:
+            _consumers = build_consumers(_log, local_consumers)
+            _consumers.start()
+        return _log
+
+
+def peek_ingest_log() -> Optional[IngestLog]:
+    """Return the ingest log without creating one."""
+    with _log_lock:
+        return _log
+
+
+def shutdown_ingest_log() -> None:
+    """Stop the local writers; unconsumed entries stay in the log."""
+    global _log, _consumers
+    with _log_lock:
+        consumers, _consumers = _consumers, None
+        _log = None
+    if consumers is not None:
+        consumers.stop(timeout=getattr(settings, "INGEST_QUEUE_DRAIN_TIMEOUT_SECS", 30))
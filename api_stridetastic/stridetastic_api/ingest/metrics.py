@@ -0,0 +1,262 @@
+"""
+Always-on latency instrumentation for the ingest pipeline.
+
+Each stage of ``on_message``/``handle_packet``/``handle_decoded_packet`` feeds
+a rolling window (the last ``INGEST_METRICS_WINDOW`` samples) from which
+p50/p95/p99 are computed on read. Payload handler time is also tracked per
+port, and every packet records how many SQL queries it issued.
+
+Results are served as JSON on ``/metrics/ingest`` and in the Prometheus text
+format on ``/metrics/ingest/prometheus``.
+"""
+
+import functools
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+from django.conf import settings
+from django.db import connection
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class RollingHistogram:
+    """Fixed-size window of samples plus lifetime count/sum."""
+
+    def __init__(self, size: int = 1024):
+        self._samples: "deque[float]" = deque(maxlen=max(1, int(size)))
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float, times: int = 1) -> None:
+        for _ in range(times):
+            self._samples.append(value)
+        self.count += times
+        self.total += value * times
+
+    def snapshot(self) -> dict:
+        ordered = sorted(self._samples)
+        payload = {
+            "count": self.count,
+            "sum": round(self.total, 3),
+            "max": round(ordered[-1], 3) if ordered else 0.0,
+        }
+        for quantile in QUANTILES:
+            key = f"p{int(quantile * 100)}"
+            if not ordered:
+                payload[key] = 0.0
+                continue
+            # Nearest-rank percentile.
+            index = max(0, math.ceil(quantile * len(ordered)) - 1)
+            payload[key] = round(ordered[index], 3)
+        return payload
+
+
+class _PacketScope:
+    __slots__ = ("queries",)
+
+    def __init__(self) -> None:
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+
+class IngestMetrics:
+    """Thread-safe registry of stage, port and query-count histograms."""
+
+    def __init__(self, *, window: int = 1024):
+        self.window = max(1, int(window))
+        self._stages: dict[str, RollingHistogram] = {}
+        self._ports: dict[str, RollingHistogram] = {}
+        self._queries = RollingHistogram(self.window)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def observe_stage(self, name: str, elapsed_ms: float, times: int = 1) -> None:
+        with self._lock:
+            histogram = self._stages.get(name)
+            if histogram is None:
+                histogram = self._stages[name] = RollingHistogram(self.window)
+            histogram.observe(elapsed_ms, times)
+
+    def observe_port(self, port: Optional[str], elapsed_ms: float) -> None:
+        port = port or "UNKNOWN"
+        with self._lock:
+            histogram = self._ports.get(port)
+            if histogram is None:
+                histogram = self._ports[port] = RollingHistogram(self.window)
+            histogram.observe(elapsed_ms)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(name, (time.perf_counter() - started) * 1000.0)
+
+    @contextmanager
+    def port_handler(self, port: Optional[str]) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+            self.observe_stage("payload_handler", elapsed_ms)
+            self.observe_port(port, elapsed_ms)
+
+    def clock(self) -> "StageClock":
+        return StageClock(self)
+
+    @contextmanager
+    def packets(self, count: int = 1) -> Iterator[None]:
+        """Measure total latency and SQL queries for ``count`` packets.
+
+        Batches are recorded as ``count`` packets with the amortised cost.
+        Nested scopes are folded into the outermost one.
+        """
+        if getattr(self._local, "active", False):
+            yield
+            return
+        count = max(1, int(count))
+        scope = _PacketScope()
+        self._local.active = True
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(scope):
+                yield
+        finally:
+            self._local.active = False
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+            self.observe_stage("total", elapsed_ms / count, count)
+            with self._lock:
+                self._queries.observe(scope.queries / count, count)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+            self._ports.clear()
+            self._queries = RollingHistogram(self.window)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "window": self.window,
+                "stages": {
+                    name: histogram.snapshot()
+                    for name, histogram in sorted(self._stages.items())
+                },
+                "ports": {
+                    name: histogram.snapshot()
+                    for name, histogram in sorted(self._ports.items())
+                },
+                "queries_per_packet": self._queries.snapshot(),
+            }
+
+    def render_prometheus(self, extra_gauges: Optional[dict] = None) -> str:
+        snapshot = self.snapshot()
+        lines: list[str] = []
+        _summary(
+            lines,
+            "stridetastic_ingest_stage_latency_ms",
+            "Ingest stage latency in milliseconds.",
+            "stage",
+            snapshot["stages"],
+        )
+        _summary(
+            lines,
+            "stridetastic_ingest_port_latency_ms",
+            "Payload handler latency per port in milliseconds.",
+            "port",
+            snapshot["ports"],
+        )
+        _summary(
+            lines,
+            "stridetastic_ingest_queries_per_packet",
+            "SQL queries issued per ingested packet.",
+            None,
+            {"": snapshot["queries_per_packet"]},
+        )
+        for name, (help_text, samples) in (extra_gauges or {}).items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in samples:
+                lines.append(f"{name}{_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class StageClock:
+    """Lap timer: each `lap` records the time since the previous one."""
+
+    def __init__(self, metrics: IngestMetrics):
+        self._metrics = metrics
+        self._last = time.perf_counter()
+
+    def lap(self, name: str) -> None:
+        now = time.perf_counter()
+        self._metrics.observe_stage(name, (now - self._last) * 1000.0)
+        self._last = now
+
+    def reset(self) -> None:
+        """Restart the lap without recording (time measured elsewhere)."""
+        self._last = time.perf_counter()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items())
+    return "{" + inner + "}"
+
+
+def _summary(
+    lines: list[str],
+    name: str,
+    help_text: str,
+    label: Optional[str],
+    series: dict,
+) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} summary")
+    for key, stats in series.items():
+        base = {label: key} if label else {}
+        for quantile in QUANTILES:
+            value = stats[f"p{int(quantile * 100)}"]
+            lines.append(f"{name}{_labels({**base, 'quantile': quantile})} {value}")
+        lines.append(f"{name}_sum{_labels(base)} {stats['sum']}")
+        lines.append(f"{name}_count{_labels(base)} {stats['count']}")
+
+
+_metrics: Optional[IngestMetrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_ingest_metrics() -> IngestMetrics:
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = IngestMetrics(
+                window=getattr(settings, "INGEST_METRICS_WINDOW", 1024)
+            )
+        return _metrics
+
+
+def track_packet(func: Callable) -> Callable:
+    """Decorator recording total latency and queries of a single-packet entry point."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with get_ingest_metrics().packets():
+            return func(*args, **kwargs)
+
+    return wrapper
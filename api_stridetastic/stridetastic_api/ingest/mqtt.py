@@ -1,38 +1,36 @@
 import logging
 
-from meshtastic.protobuf import mqtt_pb2
+from .context import IngestContext
+from .utils import dispatch_normalized
 
-from ..mesh.packet.handler import on_message
 
-
-def normalize_mqtt_message(msg, interface_id=None):
+def normalize_mqtt_message(msg, interface_id=None, context=None):
     """
     Extracts and normalizes the Meshtastic packet from an MQTT message.
     Returns a dict with normalized fields for the protocol handler.
+
+    When an `IngestContext` for the message is given, its already parsed
+    envelope is reused and the context travels with the normalized dict.
     """
     topic = msg.topic
-    try:
-        envelope = mqtt_pb2.ServiceEnvelope()
-        envelope.ParseFromString(msg.payload)
-        gateway_node_id = getattr(envelope, "gateway_id", None)
-        channel_id = getattr(envelope, "channel_id", None)
-        packet = envelope.packet
-        logging.info(f"Received envelope in topic={topic}\n{envelope}")
-    except Exception as e:
-        logging.error(f"Failed to parse MQTT message envelope: {e}")
-        return None
+    if context is None:
+        try:
+            context = IngestContext.from_payload(msg.payload, interface_id=interface_id)
+        except Exception as e:
+            logging.error(f"Failed to parse MQTT message envelope: {e}")
+            return None
+    logging.info(f"Received envelope in topic={topic}\n{context.envelope}")
     return {
-        "gateway_node_id": gateway_node_id,
-        "channel_id": channel_id,
-        "packet": packet,
+        "gateway_node_id": context.gateway_node_id,
+        "channel_id": context.channel_id,
+        "packet": context.packet,
         "interface_id": interface_id,
+        "context": context,
     }
 
 
-def handle_mqtt_ingest(client, userdata, msg, interface_id=None):
-    """
-    Handles MQTT message ingestion, normalizes, and dispatches to protocol handler.
-    """
+def record_mqtt_capture(raw_payload, context, interface_id=None):
+    """Hand a received MQTT payload to the capture service, if one is running."""
     from ..services.service_manager import (  # Local import to avoid circular dependency
         ServiceManager,
     )
@@ -49,15 +47,35 @@ def handle_mqtt_ingest(client, userdata, msg, interface_id=None):
         try:
             capture_service.handle_ingest(
                 source_type="mqtt",
-                raw_payload=msg.payload,
+                raw_payload=raw_payload,
                 interface_id=interface_id,
+                context=context,
             )
         except Exception as exc:
             logging.error(f"Failed to record capture payload: {exc}")
 
-    normalized = normalize_mqtt_message(msg, interface_id=interface_id)
+
+def handle_mqtt_ingest(client, userdata, msg, interface_id=None, capture=True):
+    """
+    Handles MQTT message ingestion, normalizes, and dispatches to protocol handler.
+
+    The envelope is parsed once; capture and the protocol handler share the
+    resulting `IngestContext` so the packet is also decrypted at most once.
+    ``capture=False`` skips the capture service when the caller already
+    recorded the payload.
+    """
+    try:
+        context = IngestContext.from_payload(msg.payload, interface_id=interface_id)
+    except Exception as e:
+        logging.error(f"Failed to parse MQTT message envelope: {e}")
+        return
+
+    if capture:
+        record_mqtt_capture(msg.payload, context, interface_id=interface_id)
+
+    normalized = normalize_mqtt_message(msg, interface_id=interface_id, context=context)
     if normalized is not None:
         try:
-            on_message(client, userdata, normalized)
+            dispatch_normalized(client, userdata, normalized)
         except Exception as e:
             logging.error(f"Error in protocol handler: {e}")
@@ -0,0 +1,273 @@
+"""
+Bounded hand-off queue between interface callbacks and `ingest_packet`.
+
+Interface callbacks run on the paho network thread or the meshtastic reader
+thread. When ``INGEST_QUEUE_ENABLED`` is set they only enqueue the raw packet
+and a pool of ``INGEST_QUEUE_WORKERS`` threads runs the DB-heavy ingest, so a
+slow query can no longer stall MQTT keepalives.
+
+When the queue holds ``INGEST_QUEUE_MAX_SIZE`` items, ``INGEST_QUEUE_POLICY``
+decides what happens:
+
+* ``block``: the callback waits for room (at most
+  ``INGEST_QUEUE_BLOCK_TIMEOUT_SECS``, 0 waits indefinitely). If time runs
+  out, the new packet is dropped.
+* ``drop_oldest``: the oldest queued packet is discarded.
+* ``drop_newest``: the incoming packet is discarded.
+
+With more than one worker, packets may be persisted out of arrival order.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+logger = logging.getLogger(__name__)
+
+POLICY_BLOCK = "block"
+POLICY_DROP_OLDEST = "drop_oldest"
+POLICY_DROP_NEWEST = "drop_newest"
+POLICIES = (POLICY_BLOCK, POLICY_DROP_OLDEST, POLICY_DROP_NEWEST)
+
+
+@dataclass
+class InterfaceQueueStats:
+    depth: int = 0
+    enqueued: int = 0
+    dropped: int = 0
+    processed: int = 0
+    failed: int = 0
+
+
+@dataclass
+class _QueuedPacket:
+    source_type: str
+    raw_data: Any
+    meta: Optional[dict]
+    interface_key: str
+
+
+def _interface_key(source_type: str, meta: Optional[dict]) -> str:
+    interface_id = meta.get("interface_id") if meta else None
+    return f"{source_type}:{interface_id if interface_id is not None else '-'}"
+
+
+class IngestQueue:
+    """Bounded FIFO of raw packets consumed by a pool of worker threads."""
+
+    def __init__(
+        self,
+        handler: Callable[[str, Any, Optional[dict]], object],
+        *,
+        max_size: int = 10_000,
+        workers: int = 1,
+        policy: str = POLICY_BLOCK,
+        block_timeout: float = 5.0,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown ingest queue policy: {policy}")
+        self.max_size = max(1, int(max_size))
+        self.workers = max(1, int(workers))
+        self.policy = policy
+        self.block_timeout = max(0.0, float(block_timeout))
+        self._handler = handler
+        self._items: "deque[_QueuedPacket]" = deque()
+        self._cond = threading.Condition()
+        self._stats: dict[str, InterfaceQueueStats] = {}
+        self._in_flight = 0
+        self._accepting = False
+        self._stopping = False
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        with self._cond:
+            if self._threads:
+                return
+            self._accepting = True
+            self._stopping = False
+            for index in range(self.workers):
+                thread = threading.Thread(
+                    target=self._run, name=f"ingest-worker-{index}", daemon=True
+                )
+                self._threads.append(thread)
+                thread.start()
+
+    def submit(self, source_type: str, raw_data: Any, meta: Optional[dict]) -> bool:
+        """Enqueue a packet; returns False if it was dropped."""
+        item = _QueuedPacket(
+            source_type=source_type,
+            raw_data=raw_data,
+            meta=meta,
+            interface_key=_interface_key(source_type, meta),
+        )
+        with self._cond:
+            stats = self._stats_for(item.interface_key)
+            if not self._accepting:
+                stats.dropped += 1
+                return False
+            if len(self._items) >= self.max_size:
+                if self.policy == POLICY_DROP_NEWEST:
+                    stats.dropped += 1
+                    return False
+                if self.policy == POLICY_DROP_OLDEST:
+                    oldest = self._items.popleft()
+                    oldest_stats = self._stats_for(oldest.interface_key)
+                    oldest_stats.depth -= 1
+                    oldest_stats.dropped += 1
+                elif not self._wait_for_room():
+                    stats.dropped += 1
+                    return False
+            self._items.append(item)
+            stats.depth += 1
+            stats.enqueued += 1
+            self._cond.notify_all()
+        return True
+
+    def _wait_for_room(self) -> bool:
+        deadline = time.monotonic() + self.block_timeout if self.block_timeout else None
+        while len(self._items) >= self.max_size and self._accepting:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            self._cond.wait(remaining)
+        return self._accepting
+
+    def depth(self) -> int:
+        with self._cond:
+            return len(self._items)
+
+    def stop(self, *, drain: bool = True, timeout: float = 30.0) -> int:
+        """Stop accepting packets and shut the workers down.
+
+        With ``drain`` the workers first finish everything already queued
+        (bounded by ``timeout``); whatever is left afterwards is discarded and
+        counted as dropped. Returns the number of discarded packets.
+        """
+        deadline = time.monotonic() + max(0.0, timeout)
+        with self._cond:
+            self._accepting = False
+            self._cond.notify_all()
+            if drain and self._threads:
+                while self._items or self._in_flight:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            discarded = len(self._items)
+            while self._items:
+                item = self._items.popleft()
+                stats = self._stats_for(item.interface_key)
+                stats.depth -= 1
+                stats.dropped += 1
+            self._stopping = True
+            self._cond.notify_all()
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=max(0.0, deadline - time.monotonic()) or 1.0)
+        if discarded:
+            logger.warning("[IngestQueue] Discarded %d queued packets", discarded)
+        return discarded
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            return {
+                "depth": len(self._items),
+                "in_flight": self._in_flight,
+                "max_size": self.max_size,
+                "workers": self.workers,
+                "policy": self.policy,
+                "interfaces": {
+                    key: asdict(stats) for key, stats in sorted(self._stats.items())
+                },
+            }
+
+    def _stats_for(self, interface_key: str) -> InterfaceQueueStats:
+        stats = self._stats.get(interface_key)
+        if stats is None:
+            stats = self._stats[interface_key] = InterfaceQueueStats()
+        return stats
+
+    def _next(self) -> Optional[_QueuedPacket]:
+        with self._cond:
+            while not self._items and not self._stopping:
+                self._cond.wait()
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._stats_for(item.interface_key).depth -= 1
+            self._in_flight += 1
+            self._cond.notify_all()
+            return item
+
+    def _run(self) -> None:
+        try:
+            while True:
+                item = self._next()
+                if item is None:
+                    return
+                failed = False
+                close_old_connections()
+                try:
+                    self._handler(item.source_type, item.raw_data, item.meta)
+                except Exception:
+                    failed = True
+                    logger.exception(
+                        "[IngestQueue] Failed to ingest %s packet", item.source_type
+                    )
+                with self._cond:
+                    self._in_flight -= 1
+                    stats = self._stats_for(item.interface_key)
+                    stats.processed += 1
+                    stats.failed += int(failed)
+                    self._cond.notify_all()
+        finally:
+            connection.close()
+
+
+_queue: Optional[IngestQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_ingest_queue() -> Optional[IngestQueue]:
+    """Return the process-wide ingest queue, or ``None`` when it is disabled."""
+    global _queue
+    if not getattr(settings, "INGEST_QUEUE_ENABLED", False):
+        return None
+    with _queue_lock:
+        if _queue is None:
+            from .dispatcher import ingest_packet
+
+            _queue = IngestQueue(
+                ingest_packet,
+                max_size=getattr(settings, "INGEST_QUEUE_MAX_SIZE", 10_000),
+                workers=getattr(settings, "INGEST_QUEUE_WORKERS", 1),
+                policy=getattr(settings, "INGEST_QUEUE_POLICY", POLICY_BLOCK),
+                block_timeout=getattr(settings, "INGEST_QUEUE_BLOCK_TIMEOUT_SECS", 5),
+            )
+            _queue.start()
+        return _queue
+
+
+def peek_ingest_queue() -> Optional[IngestQueue]:
+    """Return the running ingest queue without starting one."""
+    with _queue_lock:
+        return _queue
+
+
+def shutdown_ingest_queue() -> None:
+    """Drain and stop the process-wide ingest queue if one was started."""
+    global _queue
+    with _queue_lock:
+        ingest_queue, _queue = _queue, None
+    if ingest_queue is not None:
+        ingest_queue.stop(
+            drain=True,
+            timeout=getattr(settings, "INGEST_QUEUE_DRAIN_TIMEOUT_SECS", 30),
+        )
@@ -0,0 +1,444 @@
+"""
+Append-only store of the raw envelopes received by the ingest pipeline.
+
+With ``RAW_SEGMENTS_ENABLED`` set, every received uplink (duplicate copies
+included) is appended as its original ``ServiceEnvelope`` bytes to a segment
+file under ``RAW_SEGMENT_ROOT``; packets from serial/TCP interfaces, which
+arrive as bare MeshPackets, are wrapped in an envelope carrying the gateway
+and channel first. `Packet` rows reference their envelope by
+``raw_segment``/``raw_offset`` instead of keeping base64 ciphertext in
+``raw_data``, so nothing is truncated and the full stream can be replayed
+(``manage.py replay_ingest --segments``).
+
+Layout, all integers little endian:
+
+* ``<segment>.seg``: an 8 byte header, then records of ``length`` (u32),
+  ``crc32`` (u32) and ``flags`` (u8) followed by the payload. References
+  point at the record header.
+* ``<segment>.idx``: an 8 byte header, then one 24 byte entry per record:
+  time in microseconds (i64), sender node number (u32), packet id (u32) and
+  the record offset (u64). Entries are appended in time order (a time older
+  than the previous entry is clamped to it), so time ranges are found by
+  binary search over the memory-mapped index.
+
+A segment is sealed once it reaches ``RAW_SEGMENT_MAX_BYTES`` and the next
+one is started. Appends from several processes (sharded ingest, log
+consumers) are serialized with an exclusive ``flock`` on the store's lock
+file. Sealed segments are read through ``mmap``.
+"""
+
+import bisect
+import fcntl
+import logging
+import mmap
+import os
+import struct
+import threading
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from pathlib import Path
+from typing import Iterator, NamedTuple, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_MAGIC = b"STRSEG\x00\x01"
+INDEX_MAGIC = b"STRIDX\x00\x01"
+HEADER_SIZE = len(SEGMENT_MAGIC)
+RECORD_HEADER = struct.Struct("<IIB")
+INDEX_ENTRY = struct.Struct("<qIIQ")
+
+# Record flags
+FLAG_REENCODED = 0x01  # Envelope built here around a bare MeshPacket
+
+LOCK_FILE = "segments.lock"
+
+
+class SegmentRef(NamedTuple):
+    segment: int
+    offset: int
+
+
+class IndexEntry(NamedTuple):
+    time_us: int
+    from_num: int
+    packet_id: int
+    offset: int
+
+    @property
+    def time(self) -> datetime:
+        return datetime.fromtimestamp(self.time_us / 1_000_000, tz=dt_timezone.utc)
+
+
+@dataclass(frozen=True)
+class SegmentRecord:
+    ref: SegmentRef
+    flags: int
+    payload: bytes
+
+
+class SegmentCorruptError(ValueError):
+    pass
+
+
+def _time_us(value: Optional[datetime]) -> int:
+    return int((value or timezone.now()).timestamp() * 1_000_000)
+
+
+def _entry_time(entry: IndexEntry) -> int:
+    return entry.time_us
+
+
+class _Index:
+    """Read view of one index file (a mapping, or bytes for a growing one)."""
+
+    def __init__(self, data) -> None:
+        self._data = data
+        self._count = (len(data) - HEADER_SIZE) // INDEX_ENTRY.size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, position: int) -> IndexEntry:
+        return IndexEntry(
+            *INDEX_ENTRY.unpack_from(
+                self._data, HEADER_SIZE + position * INDEX_ENTRY.size
+            )
+        )
+
+    def time_at(self, position: int) -> int:
+        return self[position].time_us
+
+
+def _unpack_record(data, ref: SegmentRef) -> SegmentRecord:
+    if data[:HEADER_SIZE] != SEGMENT_MAGIC:
+        raise SegmentCorruptError(f"Segment {ref.segment} has no segment header")
+    if ref.offset < HEADER_SIZE or ref.offset + RECORD_HEADER.size > len(data):
+        raise SegmentCorruptError(f"Offset {ref.offset} is outside the segment")
+    length, crc, flags = RECORD_HEADER.unpack_from(data, ref.offset)
+    start = ref.offset + RECORD_HEADER.size
+    payload = bytes(data[start : start + length])
+    if len(payload) != length or zlib.crc32(payload) != crc:
+        raise SegmentCorruptError(
+            f"Record {ref.segment}:{ref.offset} is truncated or corrupt"
+        )
+    return SegmentRecord(ref=ref, flags=flags, payload=payload)
+
+
+class SegmentStore:
+    """Segment files of one store directory."""
+
+    def __init__(
+        self,
+        root: Path | str,
+        *,
+        max_bytes: int = 64 * 1024 * 1024,
+        fsync: bool = False,
+    ) -> None:
+        self.root = Path(root)
+        self.max_bytes = max(HEADER_SIZE + RECORD_HEADER.size, int(max_bytes))
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._lock_fd: Optional[int] = None
+        self._active: Optional[int] = None
+        self._data_fd: Optional[int] = None
+        self._index_fd: Optional[int] = None
+        # Sealed segments never change again, so their mappings are kept
+        self._maps: dict[tuple[int, str], mmap.mmap] = {}
+
+    # Paths -----------------------------------------------------------------
+
+    def data_path(self, segment: int) -> Path:
+        return self.root / f"{segment:08d}.seg"
+
+    def index_path(self, segment: int) -> Path:
+        return self.root / f"{segment:08d}.idx"
+
+    def segments(self) -> list[int]:
+        """Numbers of the segments on disk, oldest first."""
+        if not self.root.is_dir():
+            return []
+        return sorted(
+            int(path.stem) for path in self.root.glob("*.seg") if path.stem.isdigit()
+        )
+
+    # Writing ---------------------------------------------------------------
+
+    def append(
+        self,
+        payload: bytes,
+        *,
+        from_num: int = 0,
+        packet_id: int = 0,
+        time: Optional[datetime] = None,
+        flags: int = 0,
+    ) -> SegmentRef:
+        """Append one record and its index entry; returns where it was written."""
+        record = RECORD_HEADER.pack(len(payload), zlib.crc32(payload), flags) + payload
+        time_us = _time_us(time)
+        with self._lock:
+            self._ensure_open()
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            try:
+                self._follow_rotation()
+                offset = os.fstat(self._data_fd).st_size
+                if offset > HEADER_SIZE and offset + len(record) > self.max_bytes:
+                    self._open_segment(self._active + 1)
+                    offset = HEADER_SIZE
+                time_us = max(time_us, self._last_time_us())
+                os.write(self._data_fd, record)
+                os.write(
+                    self._index_fd,
+                    INDEX_ENTRY.pack(
+                        time_us, from_num & 0xFFFFFFFF, packet_id & 0xFFFFFFFF, offset
+                    ),
+                )
+                if self.fsync:
+                    os.fsync(self._data_fd)
+                    os.fsync(self._index_fd)
+                return SegmentRef(self._active, offset)
+            finally:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _ensure_open(self) -> None:
+        if self._pid == os.getpid() and self._lock_fd is not None:
+            return
+        # First use, or a forked child: never share descriptors with the parent
+        self._pid = os.getpid()
+        self._data_fd = self._index_fd = None
+        self._active = None
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock_fd = os.open(self.root / LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+
+    def _follow_rotation(self) -> None:
+        """Move on to the newest segment, which another process may have started."""
+        if self._active is None:
+            segments = self.segments()
+            self._open_segment(segments[-1] if segments else 1)
+        while self.data_path(self._active + 1).exists():
+            self._open_segment(self._active + 1)
+
+    def _open_segment(self, segment: int) -> None:
+        self._close_fds()
+        flags = os.O_RDWR | os.O_APPEND | os.O_CREAT
+        self._data_fd = os.open(self.data_path(segment), flags, 0o644)
+        self._index_fd = os.open(self.index_path(segment), flags, 0o644)
+        if os.fstat(self._data_fd).st_size == 0:
+            os.write(self._data_fd, SEGMENT_MAGIC)
+        if os.fstat(self._index_fd).st_size == 0:
+            os.write(self._index_fd, INDEX_MAGIC)
+        self._active = segment
+
+    def _last_time_us(self) -> int:
+        size = os.fstat(self._index_fd).st_size
+        torn = (size - HEADER_SIZE) % INDEX_ENTRY.size
+        if torn:
+            # A writer died mid-entry; drop the partial entry
+            size -= torn
+            os.ftruncate(self._index_fd, size)
+        if size < HEADER_SIZE + INDEX_ENTRY.size:
+            return 0
+        entry = os.pread(self._index_fd, INDEX_ENTRY.size, size - INDEX_ENTRY.size)
+        return INDEX_ENTRY.unpack(entry)[0]
+
+    def _close_fds(self) -> None:
+        for fd in (self._data_fd, self._index_fd):
+            if fd is not None:
+                os.close(fd)
+        self._data_fd = self._index_fd = None
+
+    def close(self) -> None:
+        with self._lock:
+            if self._pid == os.getpid():
+                self._close_fds()
+                if self._lock_fd is not None:
+                    os.close(self._lock_fd)
+            self._lock_fd = None
+            self._pid = None
+            for mapping in self._maps.values():
+                mapping.close()
+            self._maps.clear()
+
+    # Reading ---------------------------------------------------------------
+
+    def _view(self, segment: int, kind: str) -> mmap.mmap:
+        """Map a segment file; only sealed segments' mappings are kept."""
+        key = (segment, kind)
+        mapping = self._maps.get(key)
+        if mapping is not None:
+            return mapping
+        path = self.data_path(segment) if kind == "seg" else self.index_path(segment)
+        with open(path, "rb") as handle:
+            # The active segment is mapped up to its current size
+            mapping = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data_path(segment + 1).exists():
+            self._maps[key] = mapping
+        return mapping
+
+    @contextmanager
+    def _mapped(self, segment: int, kind: str) -> Iterator[mmap.mmap]:
+        """`_view` that unmaps the active segment again when the block exits."""
+        mapping = self._view(segment, kind)
+        try:
+            yield mapping
+        finally:
+            if self._maps.get((segment, kind)) is not mapping:
+                mapping.close()
+
+    def read(self, ref: SegmentRef) -> SegmentRecord:
+        """Return the record at ``ref``, checking its length and checksum."""
+        try:
+            with self._mapped(ref.segment, "seg") as data:
+                return _unpack_record(data, ref)
+        except FileNotFoundError:
+            raise SegmentCorruptError(f"Segment {ref.segment} does not exist") from None
+
+    def index(self, segment: int) -> _Index:
+        with self._mapped(segment, "idx") as mapping:
+            # A growing index is copied; its mapping is closed on exit
+            kept = self._maps.get((segment, "idx")) is mapping
+            data = mapping if kept else bytes(mapping)
+        if data[:HEADER_SIZE] != INDEX_MAGIC:
+            raise SegmentCorruptError(f"Segment {segment} has no index header")
+        return _Index(data)
+
+    def lookup(
+        self,
+        *,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        from_num: Optional[int] = None,
+        packet_id: Optional[int] = None,
+    ) -> Iterator[tuple[SegmentRef, IndexEntry]]:
+        """Index entries in ``[since, until]`` matching the sender/packet id.
+
+        Segments started after iteration began (e.g. by a replay appending to
+        the same store) are not visited.
+        """
+        since_us = _time_us(since) if since is not None else None
+        until_us = _time_us(until) if until is not None else None
+        for segment in self.segments():
+            index = self.index(segment)
+            if not len(index):
+                continue
+            if since_us is not None and index.time_at(len(index) - 1) < since_us:
+                continue
+            if until_us is not None and index.time_at(0) > until_us:
+                break
+            start, stop = 0, len(index)
+            if since_us is not None:
+                start = bisect.bisect_left(index, since_us, key=_entry_time)
+            if until_us is not None:
+                stop = bisect.bisect_right(index, until_us, key=_entry_time)
+            for position in range(start, stop):
+                entry = index[position]
+                if from_num is not None and entry.from_num != from_num & 0xFFFFFFFF:
+                    continue
+                if packet_id is not None and entry.packet_id != packet_id & 0xFFFFFFFF:
+                    continue
+                yield SegmentRef(segment, entry.offset), entry
+
+    def records(
+        self,
+        *,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Iterator[SegmentRecord]:
+        """Stored records in time order, e.g. to reprocess the stream."""
+        for ref, _ in self.lookup(since=since, until=until):
+            yield self.read(ref)
+
+    # Maintenance -----------------------------------------------------------
+
+    def prune(self, before: datetime) -> int:
+        """Delete sealed segments whose newest record is older than ``before``."""
+        cutoff = _time_us(before)
+        removed = 0
+        for segment in self.segments()[:-1]:
+            index = self.index(segment)
+            if len(index) and index.time_at(len(index) - 1) >= cutoff:
+                break
+            for kind in ("seg", "idx"):
+                mapping = self._maps.pop((segment, kind), None)
+                if mapping is not None:
+                    mapping.close()
+            self.data_path(segment).unlink(missing_ok=True)
+            self.index_path(segment).unlink(missing_ok=True)
+            removed += 1
+        return removed
+
+
+_store: Optional[SegmentStore] = None
+_store_lock = threading.Lock()
+
+
+def get_segment_store() -> Optional[SegmentStore]:
+    """Return the process-wide store, or ``None`` when it is disabled."""
+    global _store
+    if not getattr(settings, "RAW_SEGMENTS_ENABLED", False):
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = SegmentStore(
+                getattr(settings, "RAW_SEGMENT_ROOT", settings.BASE_DIR / "segments"),
+                max_bytes=getattr(settings, "RAW_SEGMENT_MAX_BYTES", 64 * 1024 * 1024),
+                fsync=getattr(settings, "RAW_SEGMENT_FSYNC", False),
+            )
+        return _store
+
+
+def shutdown_segment_store() -> None:
+    global _store
+    with _store_lock:
+        store, _store = _store, None
+    if store is not None:
+        store.close()
+
+
+def archive_envelope(
+    normalized, *, from_num: int, packet_id: Optional[int]
+) -> Optional[SegmentRef]:
+    """Append the uplink behind ``normalized`` to the store, if it is enabled."""
+    store = get_segment_store()
+    if store is None:
+        return None
+    context = normalized.get("context")
+    payload = getattr(context, "raw_payload", None)
+    flags = 0
+    if payload is None:
+        from ..mesh.packet.crafter import craft_service_envelope
+
+        payload = craft_service_envelope(
+            normalized["packet"],
+            normalized.get("channel_id") or "",
+            normalized.get("gateway_node_id"),
+        )
+        flags |= FLAG_REENCODED
+    try:
+        return store.append(
+            payload, from_num=from_num, packet_id=packet_id or 0, flags=flags
+        )
+    except OSError:
+        logger.exception("[Segments] Failed to archive packet %s", packet_id)
+        return None
+
+
+def load_envelope(packet):
+    """Parse the stored ``ServiceEnvelope`` of a `Packet` row, if it has one."""
+    if packet.raw_segment is None or packet.raw_offset is None:
+        return None
+    store = get_segment_store()
+    if store is None:
+        return None
+    from meshtastic.protobuf import mqtt_pb2
+
+    record = store.read(SegmentRef(packet.raw_segment, packet.raw_offset))
+    envelope = mqtt_pb2.ServiceEnvelope()
+    envelope.ParseFromString(record.payload)
+    return envelope
@@ -1,6 +1,6 @@
 import logging
 
-from ..mesh.packet.handler import on_message
+from .utils import dispatch_normalized
 
 
 def normalize_serial_message(raw_data, interface_id=None):
@@ -20,4 +20,4 @@ def handle_serial_ingest(raw_data, interface_id=None):
     if normalized is not None:
         # Call the protocol handler with the original signature
         logging.info(normalized)
-        on_message(None, None, normalized, "Serial")
+        dispatch_normalized(None, None, normalized, "Serial")
@@ -0,0 +1,344 @@
+"""
+Synthetic Meshtastic traffic for load testing the ingest pipeline.
+
+`SyntheticMesh` simulates ``nodes`` radios heard by ``gateways`` MQTT
+gateways. Every generated MeshPacket is built with `craft_mesh_packet` and
+published once per gateway that heard it (``fanout`` copies on average, with
+per-copy hop/RSSI/SNR), wrapped by `craft_service_envelope` exactly like a
+real gateway uplink. Port mix and the share of channel-encrypted packets are
+configurable through `TrafficProfile`; PKI direct messages are real
+X25519/AES-CCM ciphertexts between simulated nodes.
+
+Messages are consumed by `replay.replay_messages` (direct `ingest_packet`
+calls) or published to anything exposing ``publish(topic, payload)``: the
+in-process `LocalBroker` stand-in or a connected `MqttInterface`.
+"""
+
+import base64
+import random
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional
+
+from cryptography.hazmat.primitives.asymmetric import x25519
+from cryptography.hazmat.primitives.serialization import (
+    Encoding,
+    NoEncryption,
+    PrivateFormat,
+    PublicFormat,
+)
+from meshtastic.protobuf import mesh_pb2, portnums_pb2  # type: ignore[attr-defined]
+
+from ..mesh.encryption.pkc import PKIEncryptionInputs, encrypt_with_private_key
+from ..mesh.packet.crafter import (
+    craft_mesh_packet,
+    craft_nodeinfo,
+    craft_position,
+    craft_reachability_probe,
+    craft_service_envelope,
+    craft_telemetry,
+    craft_text_message,
+)
+from .replay import ReplayMessage
+
+BROADCAST_ID = "!ffffffff"
+PKI_CHANNEL = "PKI"
+
+PORT_NODEINFO = "NODEINFO"
+PORT_POSITION = "POSITION"
+PORT_TELEMETRY = "TELEMETRY"
+PORT_NEIGHBORINFO = "NEIGHBORINFO"
+PORT_TRACEROUTE = "TRACEROUTE"
+PORT_ROUTING = "ROUTING"
+PORT_TEXT = "TEXT"
+PORT_PKI_DM = "PKI_DM"
+
+DEFAULT_PORT_MIX: Dict[str, float] = {
+    PORT_NODEINFO: 0.10,
+    PORT_POSITION: 0.20,
+    PORT_TELEMETRY: 0.30,
+    PORT_NEIGHBORINFO: 0.05,
+    PORT_TRACEROUTE: 0.05,
+    PORT_ROUTING: 0.10,
+    PORT_TEXT: 0.15,
+    PORT_PKI_DM: 0.05,
+}
+
+
+def parse_port_mix(value: str) -> Dict[str, float]:
+    """Parse ``"TEXT=0.5,POSITION=0.5"`` into a port mix mapping."""
+    mix: Dict[str, float] = {}
+    for part in filter(None, (chunk.strip() for chunk in value.split(","))):
+        name, _, weight = part.partition("=")
+        name = name.strip().upper()
+        if name not in DEFAULT_PORT_MIX:
+            raise ValueError(f"Unknown port in mix: {name}")
+        try:
+            mix[name] = float(weight)
+        except ValueError as exc:
+            raise ValueError(f"Invalid weight for {name}: {weight!r}") from exc
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("Port mix needs at least one positive weight")
+    return mix
+
+
+@dataclass
+class TrafficProfile:
+    nodes: int = 100
+    gateways: int = 3
+    # Average number of gateways uploading each packet (1 disables duplicates)
+    fanout: float = 1.5
+    # Share of channel packets sent encrypted instead of already decoded
+    encrypted_ratio: float = 0.8
+    port_mix: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_PORT_MIX))
+    channel_name: str = "LongFast"
+    channel_key: str = "AQ=="
+    topic_root: str = "msh/US"
+    seed: Optional[int] = None
+
+
+@dataclass
+class SyntheticNode:
+    node_num: int
+    node_id: str
+    latitude: float
+    longitude: float
+    _private_key: Optional[x25519.X25519PrivateKey] = None
+
+    @property
+    def private_key(self) -> x25519.X25519PrivateKey:
+        if self._private_key is None:
+            self._private_key = x25519.X25519PrivateKey.generate()
+        return self._private_key
+
+    @property
+    def private_key_b64(self) -> str:
+        raw = self.private_key.private_bytes(
+            Encoding.Raw, PrivateFormat.Raw, NoEncryption()
+        )
+        return base64.b64encode(raw).decode("ascii")
+
+    @property
+    def public_key_bytes(self) -> bytes:
+        return self.private_key.public_key().public_bytes(
+            Encoding.Raw, PublicFormat.Raw
+        )
+
+
+class SyntheticMesh:
+    """Deterministic (given a seed) generator of gateway uplink messages."""
+
+    def __init__(self, profile: Optional[TrafficProfile] = None):
+        self.profile = profile or TrafficProfile()
+        if self.profile.nodes < 2:
+            raise ValueError("A synthetic mesh needs at least two nodes")
+        self._rng = random.Random(self.profile.seed)
+        node_nums = self._rng.sample(range(0x10000000, 0x7FFFFFFF), self.profile.nodes)
+        self.nodes: List[SyntheticNode] = [
+            SyntheticNode(
+                node_num=node_num,
+                node_id=f"!{node_num:08x}",
+                latitude=self._rng.uniform(-60.0, 60.0),
+                longitude=self._rng.uniform(-180.0, 180.0),
+            )
+            for node_num in node_nums
+        ]
+        gateway_count = max(1, min(self.profile.gateways, self.profile.nodes))
+        self.gateways: List[SyntheticNode] = self.nodes[:gateway_count]
+        self._ports = list(self.profile.port_mix)
+        self._weights = [max(0.0, self.profile.port_mix[p]) for p in self._ports]
+        self._next_id = self._rng.getrandbits(31) or 1
+        self._builders: Dict[str, Callable] = {
+            PORT_NODEINFO: self._nodeinfo,
+            PORT_POSITION: self._position,
+            PORT_TELEMETRY: self._telemetry,
+            PORT_NEIGHBORINFO: self._neighborinfo,
+            PORT_TRACEROUTE: self._traceroute,
+            PORT_ROUTING: self._routing,
+            PORT_TEXT: self._text,
+        }
+
+    def messages(self, count: int) -> Iterator[ReplayMessage]:
+        """Yield the gateway copies of ``count`` distinct mesh packets."""
+        for _ in range(count):
+            port = self._rng.choices(self._ports, weights=self._weights)[0]
+            sender, receiver = self._rng.sample(self.nodes, 2)
+            if port == PORT_PKI_DM:
+                mesh_packet = self._pki_dm(sender, receiver)
+                channel_name = PKI_CHANNEL
+            else:
+                data, to_id = self._builders[port](sender, receiver)
+                encrypted = self._rng.random() < self.profile.encrypted_ratio
+                mesh_packet = craft_mesh_packet(
+                    from_id=sender.node_id,
+                    to_id=to_id,
+                    channel_name=self.profile.channel_name,
+                    channel_aes_key=self.profile.channel_key if encrypted else "",
+                    global_message_id=self._message_id(),
+                    data_protobuf=data,
+                    want_ack=to_id != BROADCAST_ID,
+                )
+                channel_name = self.profile.channel_name
+            yield from self._fan_out(mesh_packet, channel_name)
+
+    def _fan_out(
+        self, mesh_packet: mesh_pb2.MeshPacket, channel_name: str
+    ) -> Iterator[ReplayMessage]:
+        gateways = len(self.gateways)
+        extra = 0
+        if gateways > 1 and self.profile.fanout > 1:
+            probability = min(1.0, (self.profile.fanout - 1) / (gateways - 1))
+            extra = sum(self._rng.random() < probability for _ in range(gateways - 1))
+        for gateway in self._rng.sample(self.gateways, 1 + extra):
+            copy = mesh_pb2.MeshPacket()
+            copy.CopyFrom(mesh_packet)
+            copy.hop_limit = self._rng.randint(0, copy.hop_start)
+            copy.rx_rssi = self._rng.randint(-125, -40)
+            copy.rx_snr = round(self._rng.uniform(-20.0, 12.0), 2)
+            yield ReplayMessage(
+                topic=(
+                    f"{self.profile.topic_root}/2/e/{channel_name}/{gateway.node_id}"
+                ),
+                payload=craft_service_envelope(copy, channel_name, gateway.node_id),
+            )
+
+    def _message_id(self) -> int:
+        self._next_id = (self._next_id + self._rng.randint(1, 64)) & 0xFFFFFFFF or 1
+        return self._next_id
+
+    def _nodeinfo(self, sender: SyntheticNode, _receiver) -> tuple:
+        data = craft_nodeinfo(
+            sender.node_id,
+            sender.node_id[-4:],
+            f"Synthetic {sender.node_id}",
+            mesh_pb2.HardwareModel.Value("TBEAM"),
+            base64.b64encode(sender.public_key_bytes).decode("ascii"),
+        )
+        data.want_response = False
+        return data, BROADCAST_ID
+
+    def _position(self, sender: SyntheticNode, _receiver) -> tuple:
+        return (
+            craft_position(
+                sender.latitude + self._rng.uniform(-0.001, 0.001),
+                sender.longitude + self._rng.uniform(-0.001, 0.001),
+                self._rng.randint(0, 500),
+            ),
+            BROADCAST_ID,
+        )
+
+    def _telemetry(self, _sender, _receiver) -> tuple:
+        return (
+            craft_telemetry(
+                "device",
+                {
+                    "battery_level": self._rng.randint(5, 101),
+                    "voltage": round(self._rng.uniform(3.3, 4.2), 2),
+                    "channel_utilization": round(self._rng.uniform(0, 40), 2),
+                    "air_util_tx": round(self._rng.uniform(0, 10), 2),
+                    "uptime_seconds": self._rng.randint(0, 10_000_000),
+                },
+            ),
+            BROADCAST_ID,
+        )
+
+    def _neighborinfo(self, sender: SyntheticNode, _receiver) -> tuple:
+        neighbors = self._rng.sample(self.nodes, min(len(self.nodes), 4))
+        info = mesh_pb2.NeighborInfo(
+            node_id=sender.node_num,
+            last_sent_by_id=sender.node_num,
+            node_broadcast_interval_secs=900,
+        )
+        for neighbor in neighbors:
+            if neighbor is sender:
+                continue
+            info.neighbors.add(
+                node_id=neighbor.node_num, snr=round(self._rng.uniform(-20, 12), 2)
+            )
+        data = mesh_pb2.Data(
+            portnum=portnums_pb2.NEIGHBORINFO_APP,
+            payload=info.SerializeToString(),
+            bitfield=1,
+        )
+        return data, BROADCAST_ID
+
+    def _traceroute(self, sender: SyntheticNode, receiver: SyntheticNode) -> tuple:
+        hops = [
+            node
+            for node in self._rng.sample(self.nodes, min(len(self.nodes), 3))
+            if node is not sender and node is not receiver
+        ][: self._rng.randint(0, 2)]
+        route = mesh_pb2.RouteDiscovery()
+        for hop in hops:
+            route.route.append(hop.node_num)
+        for _ in range(len(hops) + 1):
+            route.snr_towards.append(self._rng.randint(-80, 48))
+        data = mesh_pb2.Data(
+            portnum=portnums_pb2.TRACEROUTE_APP,
+            payload=route.SerializeToString(),
+            bitfield=1,
+            request_id=self._rng.getrandbits(32),
+        )
+        return data, receiver.node_id
+
+    def _routing(self, _sender, receiver: SyntheticNode) -> tuple:
+        data = craft_reachability_probe()
+        data.request_id = self._rng.getrandbits(32)
+        return data, receiver.node_id
+
+    def _text(self, _sender, _receiver) -> tuple:
+        return craft_text_message(f"load {self._rng.getrandbits(24):06x}"), BROADCAST_ID
+
+    def _pki_dm(
+        self, sender: SyntheticNode, receiver: SyntheticNode
+    ) -> mesh_pb2.MeshPacket:
+        packet_id = self._message_id()
+        data = craft_text_message(f"dm {self._rng.getrandbits(24):06x}")
+        encrypted_payload = encrypt_with_private_key(
+            PKIEncryptionInputs(
+                plaintext=data.SerializeToString(),
+                from_node_num=sender.node_num,
+                to_node_num=receiver.node_num,
+                packet_id=packet_id,
+                public_key=receiver.public_key_bytes,
+            ),
+            sender.private_key_b64,
+            extra_nonce_bytes=self._rng.randbytes(4),
+        )
+        return craft_mesh_packet(
+            from_id=sender.node_id,
+            to_id=receiver.node_id,
+            channel_name=PKI_CHANNEL,
+            channel_aes_key="",
+            global_message_id=packet_id,
+            data_protobuf=data,
+            want_ack=True,
+            pki_encrypted=True,
+            encrypted_payload=encrypted_payload,
+        )
+
+
+class LocalBroker:
+    """In-process MQTT broker stand-in.
+
+    ``publish`` delivers the message synchronously to every subscriber using
+    paho's ``on_message(client, userdata, msg)`` signature.
+    """
+
+    def __init__(self) -> None:
+        self._subscribers: List[Callable] = []
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, callback: Callable) -> None:
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def publish(self, topic: str, payload: bytes) -> bool:
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self.published += 1
+        message = ReplayMessage(topic=topic, payload=payload)
+        for callback in subscribers:
+            callback(None, None, message)
+        return True
@@ -4,7 +4,7 @@ TCP ingest handler for Meshtastic nodes connected over network (WiFi/Ethernet).
 
 import logging
 
-from ..mesh.packet.handler import on_message
+from .utils import dispatch_normalized
 
 
 def normalize_tcp_message(raw_data, interface_id=None):
@@ -43,4 +43,4 @@ def handle_tcp_ingest(raw_data, interface_id=None):
     if normalized is not None:
         logging.info(f"[TCP Ingest] Processing packet from interface {interface_id}")
         logging.debug(f"[TCP Ingest] Normalized data: {normalized}")
-        on_message(None, None, normalized, "TCP")
+        dispatch_normalized(None, None, normalized, "TCP")
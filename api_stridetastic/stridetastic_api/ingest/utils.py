@@ -0,0 +1,18 @@
+from ..mesh.packet.handler import on_message
+from .batch import get_ingest_batcher
+
+
+def dispatch_normalized(client, userdata, normalized, iface="MQTT"):
+    """
+    Hand a normalized message to the protocol handler.
+
+    With write-behind batching enabled the message is queued and persisted
+    with its batch; otherwise it is processed immediately via `on_message`.
+    Both charge admission control once duplicates are suppressed and the
+    packet is decrypted.
+    """
+    batcher = get_ingest_batcher()
+    if batcher is not None:
+        batcher.submit(normalized, iface)
+        return None
+    return on_message(client, userdata, normalized, iface)
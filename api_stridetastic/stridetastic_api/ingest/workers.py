@@ -0,0 +1,342 @@
+"""
+Multi-process ingest, hash-partitioned by sender.
+
+With ``INGEST_WORKER_PROCESSES`` > 0, interface callbacks no longer ingest in
+the receiving process. `ShardedIngest.submit` only parses as much of the raw
+packet as it needs to find the sender (``from``), records MQTT captures, and
+queues a picklable job for worker ``crc32(from) % INGEST_WORKER_PROCESSES``.
+Every worker is a separate process with its own database connection running
+`ingest_packet` on its jobs in arrival order, so everything driven by one
+sender (last seen, links, duplicate suppression, latency) stays ordered and in
+one process while ingest uses all cores.
+
+A supervisor thread restarts workers that exit unexpectedly (their queue and
+the jobs in it survive; the job being processed is lost) and samples the
+shared counters into per-worker and aggregate throughput.
+
+Per-process state does not span workers: responses come from another sender
+than their request, so set ``PENDING_REQUEST_BACKEND=redis`` to match them.
+Workers have no interfaces, so the reactive publisher cannot send from there.
+"""
+
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import zlib
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+
+from .jobs import build_job, run_job
+
+logger = logging.getLogger(__name__)
+
+# Per-worker slots of the shared counter array.
+_PROCESSED = 0
+_FAILED = 1
+_COUNTERS = 2
+
+# Set in every worker process before Django starts; spawned workers inherit the
+# parent's (celery worker) argv, so the app must not bootstrap services there.
+SHARD_ENV = "INGEST_SHARD_INDEX"
+
+
+def shard_for(from_num: int, shards: int) -> int:
+    """Worker index owning the packets of sender ``from_num``."""
+    return zlib.crc32(int(from_num).to_bytes(8, "little", signed=False)) % shards
+
+
+def is_ingest_shard() -> bool:
+    """Whether this process is an ingest worker rather than the receiver."""
+    return bool(os.environ.get(SHARD_ENV))
+
+
+def _worker_main(index: int, jobs, counters) -> None:
+    """Entry point of an ingest worker process."""
+    os.environ[SHARD_ENV] = str(index)
+
+    import django
+
+    django.setup()
+
+    from django.db import close_old_connections, connection
+
+    from ..mesh.packet.last_seen import get_last_seen_tracker
+    from ..mesh.packet.link_activity import get_link_activity_aggregator
+    from .batch import shutdown_ingest_batcher
+
+    last_seen_tracker = get_last_seen_tracker()
+    link_aggregator = get_link_activity_aggregator()
+    last_seen_tracker.start()
+    link_aggregator.start()
+    try:
+        while True:
+            job = jobs.get()
+            if job is None:
+                return
+            close_old_connections()
+            slot = _PROCESSED
+            try:
+                run_job(job)
+            except Exception:
+                slot = _FAILED
+                logger.exception(
+                    "[IngestWorker %d] Failed to ingest %s packet",
+                    index,
+                    job.source_type,
+                )
+            with counters.get_lock():
+                counters[index * _COUNTERS + slot] += 1
+    finally:
+        shutdown_ingest_batcher()
+        last_seen_tracker.stop()
+        link_aggregator.stop()
+        connection.close()
+
+
+class _Worker:
+    def __init__(self, index: int, jobs) -> None:
+        self.index = index
+        self.jobs = jobs
+        self.process: Optional[multiprocessing.process.BaseProcess] = None
+        self.restarts = 0
+        self.submitted = 0
+        self.dropped = 0
+        self.last_done = 0
+        self.throughput = 0.0
+
+
+class ShardedIngest:
+    """Receiver side of the worker pool: partitions, supervises and reports."""
+
+    def __init__(
+        self,
+        *,
+        processes: int,
+        queue_size: int = 10_000,
+        block_timeout: float = 5.0,
+        supervise_interval: float = 2.0,
+        start_method: str = "spawn",
+        target: Callable[..., None] = _worker_main,
+    ):
+        self.processes = max(1, int(processes))
+        self.block_timeout = max(0.0, float(block_timeout))
+        self.supervise_interval = max(0.1, float(supervise_interval))
+        self._target = target
+        self._ctx = multiprocessing.get_context(start_method)
+        self._counters = self._ctx.Array("q", self.processes * _COUNTERS)
+        self._workers = [
+            _Worker(index, self._ctx.Queue(max(1, int(queue_size))))
+            for index in range(self.processes)
+        ]
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._supervisor: Optional[threading.Thread] = None
+        self._running = False
+        self._sampled_at = time.monotonic()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._stop_event.clear()
+            for worker in self._workers:
+                self._spawn(worker)
+            self._sampled_at = time.monotonic()
+            self._supervisor = threading.Thread(
+                target=self._supervise, name="ingest-supervisor", daemon=True
+            )
+            self._supervisor.start()
+
+    def _spawn(self, worker: _Worker) -> None:
+        worker.process = self._ctx.Process(
+            target=self._target,
+            args=(worker.index, worker.jobs, self._counters),
+            name=f"ingest-shard-{worker.index}",
+            daemon=True,
+        )
+        # A spawned child sets Django up while unpickling its target (importing
+        # the package does), before `_worker_main` runs, so it has to inherit
+        # the marker through its environment.
+        os.environ[SHARD_ENV] = str(worker.index)
+        try:
+            worker.process.start()
+        finally:
+            os.environ.pop(SHARD_ENV, None)
+
+    def submit(self, source_type: str, raw_data: Any, meta: Optional[dict]) -> bool:
+        """Queue a packet on its sender's worker; returns False if it was dropped."""
+        try:
+            from_num, job = build_job(source_type, raw_data, meta)
+        except Exception as exc:
+            logger.error(
+                "[IngestWorkers] Failed to parse %s packet: %s", source_type, exc
+            )
+            return False
+        worker = self._workers[shard_for(from_num, self.processes)]
+        accepted = self._running
+        if accepted:
+            try:
+                worker.jobs.put(job, timeout=self.block_timeout or None)
+            except queue.Full:
+                accepted = False
+        with self._lock:
+            if accepted:
+                worker.submitted += 1
+            else:
+                worker.dropped += 1
+        return accepted
+
+    def _supervise(self) -> None:
+        while not self._stop_event.wait(self.supervise_interval):
+            self.check_workers()
+            self._sample()
+
+    def check_workers(self) -> int:
+        """Restart workers that exited while running; returns how many."""
+        restarted = 0
+        with self._lock:
+            if not self._running:
+                return 0
+            for worker in self._workers:
+                process = worker.process
+                if process is None or process.is_alive():
+                    continue
+                logger.warning(
+                    "[IngestWorkers] Worker %d exited with code %s; restarting",
+                    worker.index,
+                    process.exitcode,
+                )
+                worker.restarts += 1
+                restarted += 1
+                self._spawn(worker)
+        return restarted
+
+    def _sample(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            elapsed = max(1e-6, now - self._sampled_at)
+            self._sampled_at = now
+            for worker in self._workers:
+                done = self._done(worker.index)
+                worker.throughput = (done - worker.last_done) / elapsed
+                worker.last_done = done
+
+    def _done(self, index: int) -> int:
+        base = index * _COUNTERS
+        return self._counters[base + _PROCESSED] + self._counters[base + _FAILED]
+
+    def stop(self, *, timeout: float = 30.0) -> None:
+        """Let every worker finish its queue (bounded by ``timeout``) and exit."""
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+        self._stop_event.set()
+        supervisor = self._supervisor
+        if supervisor is not None and supervisor is not threading.current_thread():
+            supervisor.join(timeout=self.supervise_interval * 2)
+        self._supervisor = None
+
+        deadline = time.monotonic() + max(0.0, timeout)
+        for worker in self._workers:
+            try:
+                worker.jobs.put(None, timeout=max(0.1, deadline - time.monotonic()))
+            except queue.Full:
+                pass
+        for worker in self._workers:
+            process = worker.process
+            if process is None:
+                continue
+            process.join(timeout=max(0.1, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning(
+                    "[IngestWorkers] Worker %d did not drain in time; terminating",
+                    worker.index,
+                )
+                process.terminate()
+                process.join(timeout=1.0)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            workers = []
+            for worker in self._workers:
+                base = worker.index * _COUNTERS
+                try:
+                    depth = worker.jobs.qsize()
+                except NotImplementedError:  # pragma: no cover - macOS
+                    depth = 0
+                process = worker.process
+                workers.append(
+                    {
+                        "index": worker.index,
+                        "pid": process.pid if process is not None else None,
+                        "alive": bool(process is not None and process.is_alive()),
+                        "restarts": worker.restarts,
+                        "depth": depth,
+                        "submitted": worker.submitted,
+                        "dropped": worker.dropped,
+                        "processed": self._counters[base + _PROCESSED],
+                        "failed": self._counters[base + _FAILED],
+                        "throughput_pps": round(worker.throughput, 2),
+                    }
+                )
+        return {
+            "processes": self.processes,
+            **{
+                key: sum(worker[key] for worker in workers)
+                for key in ("restarts", "depth", "submitted", "dropped", "processed")
+            },
+            "failed": sum(worker["failed"] for worker in workers),
+            "throughput_pps": round(
+                sum(worker["throughput_pps"] for worker in workers), 2
+            ),
+            "workers": workers,
+        }
+
+
+_sharded: Optional[ShardedIngest] = None
+_sharded_lock = threading.Lock()
+
+
+def get_sharded_ingest() -> Optional[ShardedIngest]:
+    """Return the process-wide worker pool, or ``None`` when it is disabled."""
+    global _sharded
+    if getattr(settings, "INGEST_WORKER_PROCESSES", 0) <= 0:
+        return None
+    with _sharded_lock:
+        if _sharded is None:
+            if getattr(settings, "PENDING_REQUEST_BACKEND", "memory") == "memory":
+                logger.warning(
+                    "[IngestWorkers] PENDING_REQUEST_BACKEND=memory is per process: "
+                    "responses ingested by one worker will not match requests "
+                    "registered by another worker or the publisher. Set "
+                    "PENDING_REQUEST_BACKEND=redis."
+                )
+            _sharded = ShardedIngest(
+                processes=getattr(settings, "INGEST_WORKER_PROCESSES", 0),
+                queue_size=getattr(settings, "INGEST_WORKER_QUEUE_SIZE", 10_000),
+                block_timeout=getattr(settings, "INGEST_QUEUE_BLOCK_TIMEOUT_SECS", 5),
+                supervise_interval=getattr(settings, "INGEST_WORKER_SUPERVISE_SECS", 2),
+            )
+            _sharded.start()
+        return _sharded
+
+
+def peek_sharded_ingest() -> Optional[ShardedIngest]:
+    """Return the running worker pool without starting one."""
+    with _sharded_lock:
+        return _sharded
+
+
+def shutdown_sharded_ingest() -> None:
+    """Drain and stop the process-wide worker pool if one was started."""
+    global _sharded
+    with _sharded_lock:
+        sharded, _sharded = _sharded, None
+    if sharded is not None:
+        sharded.stop(timeout=getattr(settings, "INGEST_QUEUE_DRAIN_TIMEOUT_SECS", 30))
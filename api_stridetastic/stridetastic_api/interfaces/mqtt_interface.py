@@ -3,7 +3,7 @@ import time
 
 import paho.mqtt.client as mqtt
 
-from ..ingest.dispatcher import ingest_packet
+from ..ingest.dispatcher import enqueue_packet
 from .base import BaseInterface
 
 
@@ -156,7 +156,7 @@ class MqttInterface(BaseInterface):
         return self._is_connected
 
     def _on_message(self, client, userdata, msg):
-        ingest_packet(
+        enqueue_packet(
             "mqtt",
             msg.payload,
             meta={
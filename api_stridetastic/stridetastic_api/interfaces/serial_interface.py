@@ -1,7 +1,7 @@
 import meshtastic.serial_interface
 import pubsub.pub as pub
 
-from ..ingest.dispatcher import ingest_packet
+from ..ingest.dispatcher import enqueue_packet
 from .base import BaseInterface
 
 
@@ -33,7 +33,7 @@ class SerialInterface(BaseInterface):
             self.interface = None
 
     def _on_receive(self, packet, interface):
-        ingest_packet(
+        enqueue_packet(
             "serial",
             packet,
             meta={"port": self.port, "interface_id": self.interface_id},
@@ -3,7 +3,7 @@ import logging
 import meshtastic.tcp_interface
 import pubsub.pub as pub
 
-from ..ingest.dispatcher import ingest_packet
+from ..ingest.dispatcher import enqueue_packet
 from .base import BaseInterface
 
 
@@ -76,7 +76,7 @@ class TcpInterface(BaseInterface):
         """Handle incoming packets from the Meshtastic node."""
         # Only process packets from our interface instance
         if interface == self.interface:
-            ingest_packet(
+            enqueue_packet(
                 "tcp",
                 packet,
                 meta={
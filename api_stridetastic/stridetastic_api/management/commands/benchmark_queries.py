@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from stridetastic_api.utils.query_benchmark import run_benchmark, seed_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic history and run the API's hot queries against it, "
+        "failing on full scans of the time-series tables or slow cases"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--nodes", type=int, default=200)
+        parser.add_argument("--packets", type=int, default=100_000)
+        parser.add_argument(
+            "--days", type=int, default=30, help="History the packets span"
+        )
+        parser.add_argument(
+            "--max-ms",
+            type=float,
+            default=500.0,
+            help="Fail cases slower than this (0 disables the timing check)",
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Commit the seeded dataset instead of rolling it back",
+        )
+
+    def handle(self, *args, **options):
+        if options["max_ms"] < 0:
+            raise CommandError("--max-ms cannot be negative.")
+        with transaction.atomic():
+            try:
+                dataset = seed_dataset(
+                    nodes=options["nodes"],
+                    packets=options["packets"],
+                    days=options["days"],
+                )
+            except ValueError as exc:
+                raise CommandError(str(exc)) from exc
+            results = run_benchmark(dataset)
+            if not options["keep"]:
+                transaction.set_rollback(True)
+
+        regressions = []
+        for result in results:
+            problems = []
+            if result.status != 200:
+                problems.append(f"status {result.status}")
+            if result.full_scans:
+                problems.append(f"full scan of {', '.join(result.full_scans)}")
+            if options["max_ms"] and result.elapsed_ms > options["max_ms"]:
+                problems.append(f"slower than {options['max_ms']:g} ms")
+            line = (
+                f"{result.name:<22} {result.elapsed_ms:9.1f} ms "
+                f"{result.queries:3d} queries"
+            )
+            if problems:
+                regressions.append(result.name)
+                self.stdout.write(self.style.ERROR(f"{line}  {'; '.join(problems)}"))
+            else:
+                self.stdout.write(line)
+
+        if regressions:
+            raise CommandError(f"Query regressions: {', '.join(regressions)}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(results)} case(s) over {dataset.packets} packets, no regressions"
+            )
+        )
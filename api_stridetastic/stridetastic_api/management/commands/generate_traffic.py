@@ -0,0 +1,154 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from stridetastic_api.ingest.dispatcher import enqueue_packet
+from stridetastic_api.ingest.replay import ingest_sink, replay_messages
+from stridetastic_api.ingest.synthetic import (
+    LocalBroker,
+    SyntheticMesh,
+    TrafficProfile,
+    parse_port_mix,
+)
+
+SINK_INGEST = "ingest"
+SINK_BROKER = "broker"
+SINK_MQTT = "mqtt"
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic Meshtastic gateway traffic (N nodes, M gateways, "
+        "configurable port mix) for load testing the ingest pipeline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--packets", type=int, default=1000, help="Distinct mesh packets"
+        )
+        parser.add_argument("--nodes", type=int, default=100)
+        parser.add_argument("--gateways", type=int, default=3)
+        parser.add_argument(
+            "--fanout",
+            type=float,
+            default=1.5,
+            help="Average gateways uploading each packet",
+        )
+        parser.add_argument(
+            "--encrypted-ratio",
+            type=float,
+            default=0.8,
+            help="Share of channel packets sent encrypted",
+        )
+        parser.add_argument(
+            "--port-mix",
+            help=(
+                "Comma separated PORT=weight list, ports: NODEINFO, POSITION, "
+                "TELEMETRY, NEIGHBORINFO, TRACEROUTE, ROUTING, TEXT, PKI_DM"
+            ),
+        )
+        parser.add_argument("--channel", default="LongFast")
+        parser.add_argument("--channel-key", default="AQ==")
+        parser.add_argument("--topic-root", default="msh/US")
+        parser.add_argument("--seed", type=int)
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=0.0,
+            help="Messages per second (0 publishes at maximum speed)",
+        )
+        parser.add_argument(
+            "--sink",
+            choices=(SINK_INGEST, SINK_BROKER, SINK_MQTT),
+            default=SINK_INGEST,
+            help=(
+                "ingest: call ingest_packet inline; broker: publish to an "
+                "in-process broker stand-in feeding the interface ingest path; "
+                "mqtt: publish to a real broker"
+            ),
+        )
+        parser.add_argument("--mqtt-host", default="localhost")
+        parser.add_argument("--mqtt-port", type=int, default=1883)
+        parser.add_argument("--mqtt-username", default="")
+        parser.add_argument("--mqtt-password", default="")
+        parser.add_argument("--interface-id", type=int, help="Ingest interface id")
+        parser.add_argument(
+            "--json", action="store_true", help="Print the report as JSON"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            profile = TrafficProfile(
+                nodes=options["nodes"],
+                gateways=options["gateways"],
+                fanout=options["fanout"],
+                encrypted_ratio=options["encrypted_ratio"],
+                channel_name=options["channel"],
+                channel_key=options["channel_key"],
+                topic_root=options["topic_root"],
+                seed=options.get("seed"),
+            )
+            if options.get("port_mix"):
+                profile.port_mix = parse_port_mix(options["port_mix"])
+            mesh = SyntheticMesh(profile)
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+
+        interface = None
+        sink_name = options["sink"]
+        interface_id = options.get("interface_id")
+        if sink_name == SINK_INGEST:
+            sink = ingest_sink(interface_id)
+        elif sink_name == SINK_BROKER:
+            broker = LocalBroker()
+            broker.subscribe(
+                lambda client, userdata, msg: enqueue_packet(
+                    "mqtt",
+                    msg.payload,
+                    meta={
+                        "client": client,
+                        "userdata": userdata,
+                        "msg": msg,
+                        "interface_id": interface_id,
+                    },
+                )
+            )
+            sink = lambda msg: broker.publish(msg.topic, msg.payload)  # noqa: E731
+        else:
+            from stridetastic_api.interfaces.mqtt_interface import MqttInterface
+
+            interface = MqttInterface(
+                broker_address=options["mqtt_host"],
+                port=options["mqtt_port"],
+                topic=f"{profile.topic_root}/2/e/#",
+                username=options["mqtt_username"],
+                password=options["mqtt_password"],
+            )
+            # Publish only; ingest happens in whichever process subscribes.
+            interface.client.on_message = None
+            try:
+                interface.connect()
+                interface.start()
+            except Exception as exc:
+                raise CommandError(f"Could not connect to MQTT broker: {exc}") from exc
+            sink = lambda msg: interface.publish(msg.topic, msg.payload)  # noqa: E731
+
+        try:
+            report = replay_messages(
+                mesh.messages(options["packets"]), sink=sink, rate=options["rate"]
+            )
+        finally:
+            if interface is not None:
+                interface.disconnect()
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report.as_dict(), indent=2))
+            return
+        self.stdout.write(
+            f"Sent {report.packets} gateway messages for {options['packets']} packets "
+            f"from {len(mesh.nodes)} nodes via {len(mesh.gateways)} gateways "
+            f"({report.failed} failed) in {report.elapsed_seconds:.2f}s: "
+            f"{report.packets_per_second:.1f} msgs/s"
+        )
+        for line in report.summary_lines():
+            self.stdout.write(line)
+        self.stdout.write(self.style.SUCCESS("Traffic generation complete"))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from stridetastic_api.utils.traffic_rollups import ROLLUPS, refresh_rollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh the packet traffic rollups until they are caught up "
+        "(backfills existing history in TRAFFIC_ROLLUP_MAX_WINDOW_SECS chunks)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rollup",
+            action="append",
+            choices=sorted(ROLLUPS),
+            help="Rollup to refresh (repeatable; default: all)",
+        )
+        parser.add_argument(
+            "--max-runs",
+            type=int,
+            default=0,
+            help="Stop after this many refresh windows per rollup (0: no limit)",
+        )
+
+    def handle(self, *args, **options):
+        if options["max_runs"] < 0:
+            raise CommandError("--max-runs cannot be negative.")
+        for name in options["rollup"] or ROLLUPS:
+            runs = 0
+            previous = None
+            while not options["max_runs"] or runs < options["max_runs"]:
+                window = refresh_rollup(ROLLUPS[name])
+                # Caught up once a run only recomputes the lookback again.
+                if window is None or (previous and window[1] <= previous[1]):
+                    break
+                previous = window
+                runs += 1
+                self.stdout.write(
+                    f"{name}: {window[0]:%Y-%m-%d %H:%M} .. {window[1]:%Y-%m-%d %H:%M}"
+                )
+            self.stdout.write(self.style.SUCCESS(f"{name}: refreshed {runs} window(s)"))
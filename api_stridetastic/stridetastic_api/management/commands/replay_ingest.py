@@ -0,0 +1,127 @@
+import itertools
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from stridetastic_api.ingest.replay import (
+    ingest_sink,
+    mesh_packet_messages,
+    pcapng_mesh_packets,
+    replay_messages,
+    segment_messages,
+)
+from stridetastic_api.ingest.synthetic import SyntheticMesh, TrafficProfile
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a PCAP-NG capture or synthetic traffic through the ingest "
+        "pipeline and report throughput, stage latency and queries per packet"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "capture", nargs="?", help="PCAP-NG file written by a capture session"
+        )
+        parser.add_argument(
+            "--synthetic",
+            type=int,
+            metavar="N",
+            help="Replay N synthetic packets (see generate_traffic) instead of a capture",
+        )
+        parser.add_argument(
+            "--segments",
+            metavar="DIR",
+            help=(
+                "Replay the envelopes of a raw segment store (use another "
+                "RAW_SEGMENT_ROOT, replayed packets are archived again)"
+            ),
+        )
+        parser.add_argument(
+            "--nodes", type=int, default=10, help="Synthetic sender count"
+        )
+        parser.add_argument("--seed", type=int, help="Synthetic random seed")
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=0.0,
+            help="Packets per second (0 replays at maximum speed)",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=1, help="Replay the capture N times"
+        )
+        parser.add_argument("--limit", type=int, help="Stop after N packets")
+        parser.add_argument("--channel", default="LongFast", help="Envelope channel")
+        parser.add_argument(
+            "--gateway", default="!5e9a7e00", help="Envelope gateway node id"
+        )
+        parser.add_argument("--interface-id", type=int, help="Ingest interface id")
+        parser.add_argument(
+            "--json", action="store_true", help="Print the report as JSON"
+        )
+
+    def handle(self, *args, **options):
+        capture = options.get("capture")
+        synthetic = options.get("synthetic")
+        segments = options.get("segments")
+        if sum(map(bool, (capture, synthetic, segments))) != 1:
+            raise CommandError(
+                "Provide either a capture file, --segments DIR or --synthetic N."
+            )
+
+        if segments:
+            if not Path(segments).is_dir():
+                raise CommandError(f"Segment store not found: {segments}")
+            messages = itertools.chain.from_iterable(
+                segment_messages(segments) for _ in range(max(1, options["repeat"]))
+            )
+        elif capture:
+            path = Path(capture)
+            if not path.is_file():
+                raise CommandError(f"Capture file not found: {path}")
+            repeat = max(1, options["repeat"])
+            messages = mesh_packet_messages(
+                itertools.chain.from_iterable(
+                    pcapng_mesh_packets(path) for _ in range(repeat)
+                ),
+                channel_id=options["channel"],
+                gateway_id=options["gateway"],
+            )
+        else:
+            try:
+                mesh = SyntheticMesh(
+                    TrafficProfile(
+                        nodes=options["nodes"],
+                        gateways=1,
+                        fanout=1.0,
+                        channel_name=options["channel"],
+                        seed=options.get("seed"),
+                    )
+                )
+            except ValueError as exc:
+                raise CommandError(str(exc)) from exc
+            messages = mesh.messages(synthetic)
+
+        try:
+            report = replay_messages(
+                messages,
+                sink=ingest_sink(options.get("interface_id")),
+                rate=options["rate"],
+                limit=options.get("limit"),
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report.as_dict(), indent=2))
+            return
+        self._write_report(report)
+
+    def _write_report(self, report) -> None:
+        self.stdout.write(
+            f"Replayed {report.packets} packets ({report.failed} failed) in "
+            f"{report.elapsed_seconds:.2f}s: {report.packets_per_second:.1f} pkts/s"
+        )
+        for line in report.summary_lines():
+            self.stdout.write(line)
+        self.stdout.write(self.style.SUCCESS("Replay complete"))
@@ -0,0 +1,90 @@
+from django.core.management.base import BaseCommand, CommandError
+from stridetastic_api.models import Channel, DecryptionJob, Node
+from stridetastic_api.models.decryption_models import DecryptionJobStatus
+from stridetastic_api.services.retro_decryption_service import (
+    RetroDecryptionError,
+    RetroDecryptionService,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Decrypt stored packets with a channel's PSK or a node's private key "
+        "in the foreground, or resume an interrupted decryption job"
+    )
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument("--channel", help="Channel name whose PSK is applied")
+        target.add_argument("--node", help="Node id (!xxxxxxxx) whose key is applied")
+        target.add_argument("--resume", type=int, help="Decryption job to continue")
+        parser.add_argument(
+            "--channel-num",
+            type=int,
+            help="Channel hash, when several channels share the name",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Decryption processes (default: RETRO_DECRYPT_WORKERS)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Packets per committed batch (default: RETRO_DECRYPT_BATCH_SIZE)",
+        )
+
+    def _resolve_job(self, options) -> DecryptionJob:
+        if options["resume"] is not None:
+            job = DecryptionJob.objects.filter(pk=options["resume"]).first()
+            if job is None:
+                raise CommandError(f"Decryption job {options['resume']} not found.")
+            return RetroDecryptionService.resume(job)
+        if options["node"]:
+            node = Node.objects.filter(node_id=options["node"]).first()
+            if node is None:
+                raise CommandError(f"Node {options['node']} not found.")
+            return RetroDecryptionService.create_job(node=node)
+
+        channels = Channel.objects.filter(channel_id=options["channel"])
+        if options["channel_num"] is not None:
+            channels = channels.filter(channel_num=options["channel_num"])
+        channels = list(channels[:2])
+        if not channels:
+            raise CommandError(f"Channel {options['channel']} not found.")
+        if len(channels) > 1:
+            raise CommandError(
+                f"Several channels are named {options['channel']}; "
+                "pass --channel-num."
+            )
+        return RetroDecryptionService.create_job(channel=channels[0])
+
+    def handle(self, *args, **options):
+        for option in ("workers", "batch_size"):
+            if options[option] is not None and options[option] < 1:
+                raise CommandError(f"--{option.replace('_', '-')} must be positive.")
+        try:
+            job = self._resolve_job(options)
+        except RetroDecryptionError as exc:
+            raise CommandError(str(exc)) from exc
+
+        self.stdout.write(f"Job {job.pk}: {job.total} candidate packet(s)")
+
+        def report(job: DecryptionJob) -> None:
+            self.stdout.write(
+                f"  {job.processed}/{job.total} processed, "
+                f"{job.decrypted} decrypted ({job.progress:.0%})"
+            )
+
+        service = RetroDecryptionService(
+            workers=options["workers"], batch_size=options["batch_size"]
+        )
+        job = service.run(job, progress=report)
+        message = (
+            f"Job {job.pk} {job.status}: {job.decrypted} of {job.processed} "
+            "packet(s) decrypted"
+        )
+        if job.status == DecryptionJobStatus.COMPLETED:
+            self.stdout.write(self.style.SUCCESS(message))
+        else:
+            raise CommandError(f"{message}. {job.error_message}".strip())
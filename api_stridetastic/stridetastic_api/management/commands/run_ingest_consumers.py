@@ -0,0 +1,62 @@
+import json
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+from stridetastic_api.ingest.log import (
+    build_consumers,
+    get_ingest_log,
+    shutdown_ingest_log,
+)
+from stridetastic_api.mesh.packet.last_seen import get_last_seen_tracker
+from stridetastic_api.mesh.packet.link_activity import get_link_activity_aggregator
+
+
+class Command(BaseCommand):
+    help = (
+        "Run ingest log writers: consume packets appended by the interfaces "
+        "and persist them (start several processes to scale out)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--consumers",
+            type=int,
+            default=1,
+            help="Writer threads in this process",
+        )
+        parser.add_argument(
+            "--stats", action="store_true", help="Print log counters as JSON and exit"
+        )
+
+    def handle(self, *args, **options):
+        ingest_log = get_ingest_log(start_consumers=False)
+        if ingest_log is None:
+            raise CommandError("The ingest log is disabled (INGEST_LOG_ENABLED).")
+        if options["stats"]:
+            self.stdout.write(json.dumps(ingest_log.get_stats(), indent=2))
+            return
+        if options["consumers"] < 1:
+            raise CommandError("--consumers must be at least 1.")
+
+        consumers = build_consumers(ingest_log, options["consumers"])
+        last_seen_tracker = get_last_seen_tracker()
+        link_aggregator = get_link_activity_aggregator()
+        last_seen_tracker.start()
+        link_aggregator.start()
+
+        def _stop(signum, frame):
+            consumers.stop()
+
+        signal.signal(signal.SIGTERM, _stop)
+        signal.signal(signal.SIGINT, _stop)
+        consumers.start()
+        self.stdout.write(
+            f"Consuming the ingest log with {options['consumers']} writer(s)"
+        )
+        try:
+            consumers.wait()
+        finally:
+            shutdown_ingest_log()
+            last_seen_tracker.stop()
+            link_aggregator.stop()
+        self.stdout.write(self.style.SUCCESS("Ingest log writers stopped"))
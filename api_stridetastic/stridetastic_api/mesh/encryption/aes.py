@@ -1,5 +1,7 @@
 import base64
 import logging
+from functools import lru_cache
+from typing import Optional
 
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
@@ -25,20 +27,36 @@ def encrypt_message(channel, key, mesh_packet, encoded_message, node_number):
     return encrypted_bytes
 
 
-def decrypt_packet(mp, key: str):
+@lru_cache(maxsize=256)
+def decode_key(key: Optional[str]) -> bytes:
+    """Expand the default PSK alias and base64-decode a channel key."""
     key = ensure_aes_key(key)
+    return base64.b64decode(key.replace("-", "+").replace("_", "/").encode("ascii"))
+
+
+@lru_cache(maxsize=256)
+def _aes_algorithm(key_bytes: bytes) -> algorithms.AES:
+    return algorithms.AES(key_bytes)
+
+
+def decrypt_with_key_bytes(mp, key_bytes: bytes) -> mesh_pb2.Data:
+    """AES-CTR decrypt ``mp.encrypted``; raises if the result is not a Data message."""
+    nonce_packet_id = getattr(mp, "id").to_bytes(8, "little")
+    nonce_from_node = getattr(mp, "from").to_bytes(8, "little")
+    nonce = nonce_packet_id + nonce_from_node
+    cipher = Cipher(
+        _aes_algorithm(key_bytes), modes.CTR(nonce), backend=default_backend()
+    )
+    decryptor = cipher.decryptor()
+    bytes_ = decryptor.update(getattr(mp, "encrypted")) + decryptor.finalize()
+    data = mesh_pb2.Data()
+    data.ParseFromString(bytes_)
+    return data
+
+
+def decrypt_packet(mp, key: str):
     try:
-        key_bytes = base64.b64decode(key.encode("ascii"))
-        nonce_packet_id = getattr(mp, "id").to_bytes(8, "little")
-        nonce_from_node = getattr(mp, "from").to_bytes(8, "little")
-        nonce = nonce_packet_id + nonce_from_node
-        cipher = Cipher(
-            algorithms.AES(key_bytes), modes.CTR(nonce), backend=default_backend()
-        )
-        decryptor = cipher.decryptor()
-        bytes_ = decryptor.update(getattr(mp, "encrypted")) + decryptor.finalize()
-        data = mesh_pb2.Data()
-        data.ParseFromString(bytes_)
+        data = decrypt_with_key_bytes(mp, decode_key(key))
         logging.info(f"[Decrypt] Decrypted data: {data}")
         return data
     except Exception as e:
@@ -0,0 +1,102 @@
+"""
+Batch decryption of stored ciphertexts for retroactive decryption jobs.
+
+The functions take plain tuples and return serialized ``Data`` messages so
+they can run in worker processes of a ``ProcessPoolExecutor``: nothing here
+touches the ORM, and key material is parsed once per batch instead of once
+per packet.
+
+Each item is ``(packet_pk, packet_id, from_num, to_num, ciphertext,
+sender_public_key)``; the result for it is ``(packet_pk, data_bytes)`` with
+``data_bytes`` None when the key does not yield a valid ``Data`` message.
+"""
+
+from typing import Optional, Sequence
+
+from meshtastic.protobuf import mesh_pb2, portnums_pb2
+
+from .aes import decrypt_with_key_bytes
+from .pkc import (
+    PKIDecryptionError,
+    PKIDecryptionInputs,
+    decrypt_with_shared_key,
+    derive_shared_key,
+    load_private_key,
+    load_public_key_bytes,
+)
+
+CipherItem = tuple[int, int, int, int, bytes, Optional[bytes]]
+DecryptResult = tuple[int, Optional[bytes]]
+
+
+def _mesh_packet(packet_id: int, from_num: int, ciphertext: bytes):
+    packet = mesh_pb2.MeshPacket()
+    packet.id = packet_id
+    setattr(packet, "from", from_num)
+    packet.encrypted = ciphertext
+    return packet
+
+
+def _valid_data(plaintext: bytes) -> Optional[bytes]:
+    data = mesh_pb2.Data()
+    try:
+        data.ParseFromString(plaintext)
+    except Exception:
+        return None
+    if data.portnum == portnums_pb2.UNKNOWN_APP:
+        return None
+    return data.SerializeToString()
+
+
+def decrypt_aes_batch(
+    key_bytes: bytes, items: Sequence[CipherItem]
+) -> list[DecryptResult]:
+    """AES-CTR decrypt every item with one channel key."""
+    results: list[DecryptResult] = []
+    for pk, packet_id, from_num, _to_num, ciphertext, _public_key in items:
+        try:
+            data = decrypt_with_key_bytes(
+                _mesh_packet(packet_id, from_num, ciphertext), key_bytes
+            )
+        except Exception:
+            results.append((pk, None))
+            continue
+        if data.portnum == portnums_pb2.UNKNOWN_APP:
+            results.append((pk, None))
+        else:
+            results.append((pk, data.SerializeToString()))
+    return results
+
+
+def decrypt_pki_batch(
+    private_key_material: str, items: Sequence[CipherItem]
+) -> list[DecryptResult]:
+    """PKI decrypt every item addressed to the owner of ``private_key_material``."""
+    private_key = load_private_key(private_key_material)
+    shared_keys: dict[bytes, bytes] = {}
+    results: list[DecryptResult] = []
+    for pk, packet_id, from_num, to_num, ciphertext, public_key in items:
+        plaintext: Optional[bytes] = None
+        try:
+            if not public_key:
+                raise PKIDecryptionError("Sender public key is unavailable")
+            public_key = load_public_key_bytes(public_key)
+            shared_key = shared_keys.get(public_key)
+            if shared_key is None:
+                shared_key = shared_keys[public_key] = derive_shared_key(
+                    private_key, public_key
+                )
+            plaintext = decrypt_with_shared_key(
+                PKIDecryptionInputs(
+                    encrypted_payload=ciphertext,
+                    from_node_num=from_num,
+                    to_node_num=to_num,
+                    packet_id=packet_id,
+                    public_key=public_key,
+                ),
+                shared_key,
+            )
+        except Exception:
+            plaintext = None
+        results.append((pk, _valid_data(plaintext) if plaintext else None))
+    return results
@@ -0,0 +1,202 @@
+"""
+Channel key ring for AES packet decryption.
+
+Every PSK known from the ``Channel`` table (plus the default ``LongFast``
+key) is decoded once into raw key bytes and indexed by the 8-bit Meshtastic
+channel hash (``mesh.utils.generate_hash``), which is what ``packet.channel``
+carries on the wire. When the PSK of the channel a packet was attributed to
+does not yield a valid ``Data`` message, only keys whose hash matches
+``packet.channel`` are tried. This matters for serial/TCP sources, where the
+channel id is just ``"0"`` and says nothing about the key in use.
+
+The ring is reloaded from the database every ``CHANNEL_KEY_RING_REFRESH_SECS``.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from django.conf import settings
+from meshtastic.protobuf import mesh_pb2, portnums_pb2
+
+from ..utils import ensure_aes_key, generate_hash
+from .aes import decode_key, decrypt_packet, decrypt_with_key_bytes
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHANNEL_NAME = "LongFast"
+DEFAULT_PSK = "AQ=="
+
+
+@dataclass(frozen=True)
+class ChannelKey:
+    channel_name: str
+    psk: str
+    key_bytes: bytes
+    channel_hash: int
+
+
+def _is_valid_data(data: Optional[mesh_pb2.Data]) -> bool:
+    return data is not None and data.portnum != portnums_pb2.UNKNOWN_APP
+
+
+class ChannelKeyRing:
+    """Thread-safe index of decoded channel keys by channel hash."""
+
+    def __init__(self, *, refresh_seconds: float = 60.0):
+        self.refresh_seconds = max(0.0, float(refresh_seconds))
+        self._by_hash: dict[int, list[ChannelKey]] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self.preferred_hits = 0
+        self.trial_hits = 0
+        self.trial_attempts = 0
+        self.misses = 0
+
+    def _add(
+        self,
+        index: dict[int, list[ChannelKey]],
+        channel_name: str,
+        psk: Optional[str],
+        channel_hash: Optional[int],
+    ) -> Optional[ChannelKey]:
+        psk = psk or DEFAULT_PSK
+        try:
+            key_bytes = decode_key(psk)
+            hashes = {generate_hash(channel_name, ensure_aes_key(psk))}
+        except Exception as exc:
+            logger.debug(
+                "[KeyRing] Skipping undecodable PSK for %s: %s", channel_name, exc
+            )
+            return None
+        if channel_hash is not None:
+            # The hash observed on the wire for this channel row.
+            hashes.add(int(channel_hash))
+        entry = None
+        for value in hashes:
+            entry = ChannelKey(
+                channel_name=channel_name,
+                psk=psk,
+                key_bytes=key_bytes,
+                channel_hash=value,
+            )
+            bucket = index.setdefault(value, [])
+            if all(existing.key_bytes != key_bytes for existing in bucket):
+                bucket.append(entry)
+        return entry
+
+    def refresh(self) -> int:
+        """Rebuild the ring from the Channel table; returns the number of keys."""
+        from ...models import Channel  # Local import to avoid circular at module load
+
+        index: dict[int, list[ChannelKey]] = {}
+        self._add(index, DEFAULT_CHANNEL_NAME, DEFAULT_PSK, None)
+        rows = (
+            Channel.objects.exclude(psk__isnull=True)
+            .exclude(psk="")
+            .values_list("channel_id", "channel_num", "psk")
+            .distinct()
+        )
+        for channel_name, channel_num, psk in rows:
+            self._add(index, channel_name, psk, channel_num)
+        with self._lock:
+            self._by_hash = index
+            self._loaded_at = time.monotonic()
+        return sum(len(bucket) for bucket in index.values())
+
+    def _ensure_loaded(self) -> None:
+        loaded_at = self._loaded_at
+        if (
+            loaded_at is not None
+            and time.monotonic() - loaded_at < self.refresh_seconds
+        ):
+            return
+        try:
+            self.refresh()
+        except Exception as exc:  # pragma: no cover - defensive logging
+            logger.warning("[KeyRing] Failed to load channel keys: %s", exc)
+
+    def candidates(self, channel_hash: int) -> list[ChannelKey]:
+        self._ensure_loaded()
+        with self._lock:
+            return list(self._by_hash.get(channel_hash, ()))
+
+    def decrypt(
+        self, packet, *, preferred_psk: Optional[str] = None
+    ) -> tuple[Optional[mesh_pb2.Data], Optional[ChannelKey]]:
+        """Decrypt ``packet``, trying the preferred PSK before hash-matched keys.
+
+        If no key yields a valid Data message, the preferred PSK's result is
+        returned unchanged, matching the single-key behaviour.
+        """
+        preferred_psk = preferred_psk or DEFAULT_PSK
+        preferred = decrypt_packet(packet, preferred_psk)
+        if _is_valid_data(preferred):
+            with self._lock:
+                self.preferred_hits += 1
+            return preferred, None
+
+        try:
+            preferred_bytes = decode_key(preferred_psk)
+        except Exception:
+            preferred_bytes = None
+        for candidate in self.candidates(getattr(packet, "channel", 0)):
+            if candidate.key_bytes == preferred_bytes:
+                continue
+            with self._lock:
+                self.trial_attempts += 1
+            try:
+                data = decrypt_with_key_bytes(packet, candidate.key_bytes)
+            except Exception:
+                continue
+            if _is_valid_data(data):
+                logger.debug(
+                    "[KeyRing] Packet %s decrypted with key of channel %s",
+                    getattr(packet, "id", None),
+                    candidate.channel_name,
+                )
+                with self._lock:
+                    self.trial_hits += 1
+                return data, candidate
+
+        with self._lock:
+            self.misses += 1
+        return preferred, None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._by_hash = {}
+            self._loaded_at = None
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "keys": sum(len(bucket) for bucket in self._by_hash.values()),
+                "hashes": len(self._by_hash),
+                "preferred_hits": self.preferred_hits,
+                "trial_hits": self.trial_hits,
+                "trial_attempts": self.trial_attempts,
+                "misses": self.misses,
+            }
+
+
+_key_ring: Optional[ChannelKeyRing] = None
+_key_ring_lock = threading.Lock()
+
+
+def get_channel_key_ring() -> ChannelKeyRing:
+    global _key_ring
+    with _key_ring_lock:
+        if _key_ring is None:
+            _key_ring = ChannelKeyRing(
+                refresh_seconds=getattr(settings, "CHANNEL_KEY_RING_REFRESH_SECS", 60)
+            )
+        return _key_ring
+
+
+def decrypt_with_key_ring(packet, key: Optional[str]) -> Optional[mesh_pb2.Data]:
+    """Drop-in replacement for `decrypt_packet` that falls back to the key ring."""
+    data, _ = get_channel_key_ring().decrypt(packet, preferred_psk=key)
+    return data
@@ -116,13 +116,30 @@ def load_private_key_bytes(key_material: str) -> bytes:
     raise PKIDecryptionError("Unsupported private key format")
 
 
-def decrypt_with_private_key(
-    inputs: PKIDecryptionInputs, private_key_material: str
+def load_private_key(key_material: str) -> x25519.X25519PrivateKey:
+    """Parse Curve25519 private key material into a key object."""
+
+    try:
+        private_key_bytes = load_private_key_bytes(key_material)
+    except PKIDecryptionError as exc:
+        raise PKIDecryptionError(str(exc)) from exc
+    return x25519.X25519PrivateKey.from_private_bytes(private_key_bytes)
+
+
+def derive_shared_key(
+    private_key: x25519.X25519PrivateKey, peer_public_bytes: bytes
 ) -> bytes:
-    """Decrypt a PKI-encrypted payload using the Meshtastic reference process."""
+    """Run the X25519 exchange and hash the secret into the AES-CCM key."""
 
-    if inputs.public_key is None:
-        raise PKIDecryptionError("Sender public key is unavailable")
+    peer_public_key = x25519.X25519PublicKey.from_public_bytes(peer_public_bytes)
+    shared_secret = private_key.exchange(peer_public_key)
+    digest = hashes.Hash(hashes.SHA256())
+    digest.update(shared_secret)
+    return digest.finalize()
+
+
+def decrypt_with_shared_key(inputs: PKIDecryptionInputs, derived_key: bytes) -> bytes:
+    """Decrypt a PKI-encrypted payload with an already derived shared key."""
 
     payload = bytes(inputs.encrypted_payload)
     if len(payload) <= 12:
@@ -132,20 +149,6 @@ def decrypt_with_private_key(
     auth_tag = payload[-12:-4]
     extra_nonce_bytes = payload[-4:]
 
-    try:
-        private_key_bytes = load_private_key_bytes(private_key_material)
-    except PKIDecryptionError as exc:
-        raise PKIDecryptionError(str(exc)) from exc
-    peer_public_bytes = load_public_key_bytes(inputs.public_key)
-
-    private_key = x25519.X25519PrivateKey.from_private_bytes(private_key_bytes)
-    peer_public_key = x25519.X25519PublicKey.from_public_bytes(peer_public_bytes)
-
-    shared_secret = private_key.exchange(peer_public_key)
-    digest = hashes.Hash(hashes.SHA256())
-    digest.update(shared_secret)
-    derived_key = digest.finalize()
-
     nonce = _build_nonce(inputs.packet_id, inputs.from_node_num, extra_nonce_bytes)
     aead = AESCCM(derived_key, tag_length=8)
 
@@ -162,6 +165,23 @@ def decrypt_with_private_key(
     return plaintext
 
 
+def decrypt_with_private_key(
+    inputs: PKIDecryptionInputs, private_key_material: str
+) -> bytes:
+    """Decrypt a PKI-encrypted payload using the Meshtastic reference process."""
+
+    if inputs.public_key is None:
+        raise PKIDecryptionError("Sender public key is unavailable")
+
+    if len(bytes(inputs.encrypted_payload)) <= 12:
+        raise PKIDecryptionError("Encrypted payload is too short for PKI data")
+
+    private_key = load_private_key(private_key_material)
+    peer_public_bytes = load_public_key_bytes(inputs.public_key)
+    derived_key = derive_shared_key(private_key, peer_public_bytes)
+    return decrypt_with_shared_key(inputs, derived_key)
+
+
 def encrypt_with_private_key(
     inputs: PKIEncryptionInputs,
     private_key_material: str,
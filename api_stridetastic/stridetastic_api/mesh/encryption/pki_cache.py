@@ -0,0 +1,165 @@
+"""
+Key material cache for PKI packet decryption.
+
+The same (virtual node, peer) pairs exchange direct messages over and over,
+so `PKIKeyCache` keeps three bounded LRU maps:
+
+* parsed private keys, keyed by a digest of the stored key material;
+* derived AES-CCM keys, keyed by (private key fingerprint, remote public key);
+* sender public keys by node_num, invalidated when a NodeInfo (or a virtual
+  node key rotation) updates ``Node.public_key`` and otherwise expiring after
+  ``PKI_PUBLIC_KEY_TTL_SECS``.
+
+Sizes are bounded by ``PKI_KEY_CACHE_SIZE`` (0 disables caching).
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from cryptography.hazmat.primitives.asymmetric import x25519
+from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+from django.conf import settings
+
+from .pkc import derive_shared_key, load_private_key
+
+_MISSING = object()
+
+
+class _LRU:
+    def __init__(self, max_size: int, ttl_seconds: Optional[float] = None):
+        self.max_size = max(0, int(max_size))
+        self.ttl_seconds = ttl_seconds
+        self.entries: "OrderedDict[object, tuple[object, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: object) -> object:
+        entry = self.entries.get(key)
+        if entry is None or (
+            self.ttl_seconds is not None and time.monotonic() >= entry[1]
+        ):
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return _MISSING
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: object, value: object) -> None:
+        if self.max_size == 0:
+            return
+        expires_at = time.monotonic() + (self.ttl_seconds or 0.0)
+        self.entries[key] = (value, expires_at)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class PKIKeyCache:
+    """Thread-safe cache of parsed private keys, peer keys and shared secrets."""
+
+    def __init__(self, *, max_size: int = 1024, public_key_ttl: float = 300.0):
+        self._private_keys = _LRU(max_size)
+        self._shared_keys = _LRU(max_size)
+        self._public_keys = _LRU(max_size, max(0.0, float(public_key_ttl)))
+        self._lock = threading.Lock()
+
+    def private_key(self, key_material: str) -> tuple[str, x25519.X25519PrivateKey]:
+        """Return ``(fingerprint, key)`` for stored private key material.
+
+        Raises `PKIDecryptionError` if the material cannot be parsed.
+        """
+        material_digest = hashlib.sha256(key_material.encode("utf-8")).digest()
+        with self._lock:
+            cached = self._private_keys.get(material_digest)
+        if cached is not _MISSING:
+            return cached  # type: ignore[return-value]
+        private_key = load_private_key(key_material)
+        public_bytes = private_key.public_key().public_bytes(
+            Encoding.Raw, PublicFormat.Raw
+        )
+        entry = (hashlib.sha256(public_bytes).hexdigest()[:16], private_key)
+        with self._lock:
+            self._private_keys.put(material_digest, entry)
+        return entry
+
+    def shared_key(
+        self,
+        fingerprint: str,
+        private_key: x25519.X25519PrivateKey,
+        peer_public_bytes: bytes,
+    ) -> bytes:
+        key = (fingerprint, bytes(peer_public_bytes))
+        with self._lock:
+            cached = self._shared_keys.get(key)
+        if cached is not _MISSING:
+            return cached  # type: ignore[return-value]
+        derived = derive_shared_key(private_key, peer_public_bytes)
+        with self._lock:
+            self._shared_keys.put(key, derived)
+        return derived
+
+    def public_key(
+        self, node_num: int, loader: Callable[[int], Optional[bytes]]
+    ) -> Optional[bytes]:
+        """Return the public key of ``node_num``, calling ``loader`` on a miss."""
+        with self._lock:
+            cached = self._public_keys.get(node_num)
+        if cached is not _MISSING:
+            return cached  # type: ignore[return-value]
+        value = loader(node_num)
+        with self._lock:
+            self._public_keys.put(node_num, value)
+        return value
+
+    def invalidate_public_key(self, node_num: int) -> None:
+        with self._lock:
+            self._public_keys.entries.pop(node_num, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            for lru in (self._private_keys, self._shared_keys, self._public_keys):
+                lru.entries.clear()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "private_keys": self._private_keys.stats(),
+                "shared_keys": self._shared_keys.stats(),
+                "public_keys": self._public_keys.stats(),
+            }
+
+
+_cache: Optional[PKIKeyCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_pki_key_cache() -> PKIKeyCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PKIKeyCache(
+                max_size=getattr(settings, "PKI_KEY_CACHE_SIZE", 1024),
+                public_key_ttl=getattr(settings, "PKI_PUBLIC_KEY_TTL_SECS", 300),
+            )
+        return _cache
+
+
+def invalidate_public_key(node_num: Optional[int]) -> None:
+    """Forget the cached public key of a node after it changed."""
+    if node_num is None:
+        return
+    get_pki_key_cache().invalidate_public_key(int(node_num))
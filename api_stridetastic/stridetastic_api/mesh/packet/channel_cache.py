@@ -0,0 +1,238 @@
+"""Channel row and membership cache for the packet handler.
+
+For every packet `on_message` needs the Channel row, must make sure the
+channel is linked to the receiving interface and that sender and receiver
+are members, and used to bump ``Channel.last_seen``. Those facts almost never
+change, so `ChannelMembershipCache` keeps:
+
+* channel identities by ``(channel_id, channel_num)`` (expiring after
+  ``CHANNEL_CACHE_TTL_SECS``), handed out as deferred Channel instances;
+* known (channel, interface) and (channel, node) pairs, so M2M rows are only
+  inserted the first time a pair is seen, in one bulk insert per table;
+* the last ``Channel.last_seen`` write per channel, so the column is updated
+  at most once every ``CHANNEL_LAST_SEEN_INTERVAL_SECS``.
+
+Pairs and channels are remembered once the surrounding transaction commits.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.db import router, transaction
+from django.utils import timezone
+
+from ...models import Channel, Interface, Node
+
+CHANNEL_FIELDS = ("id", "channel_id", "channel_num", "psk")
+
+INTERFACE_PAIR = "interface"
+MEMBER_PAIR = "member"
+
+
+@dataclass(frozen=True)
+class ChannelIdentity:
+    pk: int
+    channel_id: str
+    channel_num: int
+    psk: Optional[str]
+    cached_at: float
+
+
+class ChannelMembershipCache:
+    """Thread-safe cache of channel rows, M2M pairs and last_seen writes."""
+
+    def __init__(
+        self,
+        *,
+        max_size: int = 50_000,
+        ttl_seconds: float = 300.0,
+        last_seen_interval: float = 30.0,
+    ):
+        self.max_size = max(0, int(max_size))
+        self.ttl_seconds = float(ttl_seconds)
+        self.last_seen_interval = max(0.0, float(last_seen_interval))
+        self._channels: "OrderedDict[tuple, ChannelIdentity]" = OrderedDict()
+        self._pairs: "OrderedDict[tuple, None]" = OrderedDict()
+        self._last_seen_writes: dict[int, float] = {}
+        self._lock = threading.Lock()
+        self.channel_hits = 0
+        self.channel_misses = 0
+        self.pair_hits = 0
+        self.pairs_inserted = 0
+        self.last_seen_writes = 0
+
+    def get_channel(self, channel_id: str, channel_num: int) -> Channel:
+        """Return the Channel row, creating it on first sight."""
+        key = (channel_id, channel_num)
+        with self._lock:
+            entry = self._channels.get(key)
+            if entry is not None and (
+                self.ttl_seconds <= 0
+                or time.monotonic() - entry.cached_at < self.ttl_seconds
+            ):
+                self._channels.move_to_end(key)
+                self.channel_hits += 1
+                return Channel.from_db(
+                    router.db_for_read(Channel),
+                    list(CHANNEL_FIELDS),
+                    [entry.pk, entry.channel_id, entry.channel_num, entry.psk],
+                )
+            self.channel_misses += 1
+
+        channel, _ = Channel.objects.get_or_create(
+            channel_id=channel_id, channel_num=channel_num
+        )
+        identity = ChannelIdentity(
+            pk=channel.pk,
+            channel_id=channel.channel_id,
+            channel_num=channel.channel_num,
+            psk=channel.psk,
+            cached_at=time.monotonic(),
+        )
+        transaction.on_commit(lambda: self._remember_channel(key, identity))
+        return channel
+
+    def _remember_channel(self, key: tuple, identity: ChannelIdentity) -> None:
+        if not self.max_size:
+            return
+        with self._lock:
+            self._channels[key] = identity
+            self._channels.move_to_end(key)
+            while len(self._channels) > self.max_size:
+                self._channels.popitem(last=False)
+
+    def link(
+        self,
+        channel: Channel,
+        *,
+        interfaces: Iterable[Optional[Interface]] = (),
+        members: Iterable[Optional[Node]] = (),
+    ) -> int:
+        """Insert unseen channel-interface and channel-member rows.
+
+        Returns the number of pairs that were not cached (and thus written).
+        """
+        return self.link_pairs(
+            [(channel.pk, interface.pk) for interface in interfaces if interface],
+            [(channel.pk, node.pk) for node in members if node],
+        )
+
+    def link_pairs(
+        self,
+        interface_pairs: Iterable[tuple[int, int]],
+        member_pairs: Iterable[tuple[int, int]],
+    ) -> int:
+        """`link` for ``(channel_pk, interface_pk)``/``(channel_pk, node_pk)`` rows."""
+        new_interfaces = self._unseen(INTERFACE_PAIR, interface_pairs)
+        new_members = self._unseen(MEMBER_PAIR, member_pairs)
+        if new_interfaces:
+            Channel.interfaces.through.objects.bulk_create(
+                [
+                    Channel.interfaces.through(
+                        channel_id=channel_pk, interface_id=interface_pk
+                    )
+                    for channel_pk, interface_pk in new_interfaces
+                ],
+                ignore_conflicts=True,
+            )
+        if new_members:
+            Channel.members.through.objects.bulk_create(
+                [
+                    Channel.members.through(channel_id=channel_pk, node_id=node_pk)
+                    for channel_pk, node_pk in new_members
+                ],
+                ignore_conflicts=True,
+            )
+        keys = [(INTERFACE_PAIR, *pair) for pair in new_interfaces] + [
+            (MEMBER_PAIR, *pair) for pair in new_members
+        ]
+        if keys:
+            transaction.on_commit(lambda: self._remember_pairs(keys))
+        return len(keys)
+
+    def _unseen(self, kind: str, pairs: Iterable[tuple[int, int]]) -> list:
+        unseen = []
+        with self._lock:
+            for pair in dict.fromkeys(pairs):
+                key = (kind, *pair)
+                if key in self._pairs:
+                    self._pairs.move_to_end(key)
+                    self.pair_hits += 1
+                else:
+                    unseen.append(pair)
+        return unseen
+
+    def _remember_pairs(self, keys: list) -> None:
+        with self._lock:
+            self.pairs_inserted += len(keys)
+            if not self.max_size:
+                return
+            for key in keys:
+                self._pairs[key] = None
+                self._pairs.move_to_end(key)
+            while len(self._pairs) > self.max_size:
+                self._pairs.popitem(last=False)
+
+    def touch(self, channel_pks: Iterable[int], seen_at: Optional[datetime] = None):
+        """Bump ``last_seen`` of channels not written within the interval."""
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            for channel_pk in set(channel_pks):
+                last_write = self._last_seen_writes.get(channel_pk)
+                if last_write is None or now - last_write >= self.last_seen_interval:
+                    self._last_seen_writes[channel_pk] = now
+                    due.append(channel_pk)
+            if len(self._last_seen_writes) > max(self.max_size, 1):
+                self._last_seen_writes.clear()
+            self.last_seen_writes += len(due)
+        if due:
+            Channel.objects.filter(pk__in=due).update(
+                last_seen=seen_at or timezone.now()
+            )
+        return len(due)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._channels.clear()
+            self._pairs.clear()
+            self._last_seen_writes.clear()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self.channel_hits + self.channel_misses
+            return {
+                "channels": len(self._channels),
+                "pairs": len(self._pairs),
+                "channel_hits": self.channel_hits,
+                "channel_misses": self.channel_misses,
+                "channel_hit_rate": (
+                    round(self.channel_hits / lookups, 4) if lookups else 0.0
+                ),
+                "pair_hits": self.pair_hits,
+                "pairs_inserted": self.pairs_inserted,
+                "last_seen_writes": self.last_seen_writes,
+            }
+
+
+_cache: Optional[ChannelMembershipCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_channel_cache() -> ChannelMembershipCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ChannelMembershipCache(
+                max_size=getattr(settings, "CHANNEL_CACHE_SIZE", 50_000),
+                ttl_seconds=getattr(settings, "CHANNEL_CACHE_TTL_SECS", 300),
+                last_seen_interval=getattr(
+                    settings, "CHANNEL_LAST_SEEN_INTERVAL_SECS", 30
+                ),
+            )
+        return _cache
@@ -0,0 +1,141 @@
+"""Time-windowed index of recently processed packets.
+
+A MeshPacket is typically uplinked by every gateway that heard it. Once the
+first copy has been persisted (decoded or not), later copies only contribute a
+new gateway/interface association and their own RSSI/SNR, so the handler
+records them through a cheap path instead of decoding and dispatching them
+again.
+
+Entries are keyed by ``(from node_num, packet_id)``, expire after
+``PACKET_DEDUP_WINDOW_SECS`` and the index never holds more than
+``PACKET_DEDUP_MAX_ENTRIES`` packets (oldest evicted first).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from django.conf import settings
+
+DedupKey = tuple[int, int]
+
+
+@dataclass
+class SeenPacket:
+    packet_pk: int
+    first_seen: float
+    copies: int = 1
+
+
+class DuplicateWindow:
+    """Thread-safe bounded index of packets processed within the window."""
+
+    def __init__(self, *, window_seconds: float = 30.0, max_entries: int = 50_000):
+        self.window_seconds = max(0.0, float(window_seconds))
+        self.max_entries = max(0, int(max_entries))
+        self._entries: "OrderedDict[DedupKey, SeenPacket]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.suppressed = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_seconds > 0 and self.max_entries > 0
+
+    def lookup(
+        self,
+        from_num: int,
+        packet_id: Optional[int],
+        *,
+        packet_pk: Optional[int] = None,
+    ) -> Optional[SeenPacket]:
+        """Return the processed packet for a repeat copy, counting it as suppressed.
+
+        When ``packet_pk`` is given, an entry pointing at a different row is
+        stale (e.g. the original was deleted) and is dropped instead.
+        """
+        if not self.enabled or not packet_id:
+            return None
+        key = (from_num, packet_id)
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get(key)
+            if entry is not None and packet_pk is not None:
+                if entry.packet_pk != packet_pk:
+                    del self._entries[key]
+                    entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            entry.copies += 1
+            self.suppressed += 1
+            return entry
+
+    def remember(self, from_num: int, packet_id: Optional[int], packet_pk: int) -> None:
+        if not self.enabled or not packet_id:
+            return
+        key = (from_num, packet_id)
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            if key in self._entries:
+                self._entries[key].packet_pk = packet_pk
+                return
+            self._entries[key] = SeenPacket(packet_pk=packet_pk, first_seen=now)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def peek(self, from_num: int, packet_id: Optional[int]) -> Optional[SeenPacket]:
+        """Like `lookup` but without touching counters."""
+        if not self.enabled or not packet_id:
+            return None
+        with self._lock:
+            self._expire(time.monotonic())
+            return self._entries.get((from_num, packet_id))
+
+    def forget(self, from_num: int, packet_id: Optional[int]) -> None:
+        with self._lock:
+            self._entries.pop((from_num, packet_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _expire(self, now: float) -> None:
+        # Entries are inserted in arrival order, so expired ones sit at the front.
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if now - entry.first_seen < self.window_seconds:
+                break
+            del self._entries[key]
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "window_seconds": self.window_seconds,
+                "suppressed": self.suppressed,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_window: Optional[DuplicateWindow] = None
+_window_lock = threading.Lock()
+
+
+def get_duplicate_window() -> DuplicateWindow:
+    global _window
+    with _window_lock:
+        if _window is None:
+            _window = DuplicateWindow(
+                window_seconds=getattr(settings, "PACKET_DEDUP_WINDOW_SECS", 30),
+                max_entries=getattr(settings, "PACKET_DEDUP_MAX_ENTRIES", 50_000),
+            )
+        return _window
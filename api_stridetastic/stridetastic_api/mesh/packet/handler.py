@@ -6,10 +6,21 @@ from decimal import Decimal, InvalidOperation
 from json import dumps
 from typing import Any, Optional
 
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 from meshtastic.protobuf import mesh_pb2, portnums_pb2, telemetry_pb2
 
-from ...models import Channel, Edge, Interface, Node, NodeLatencyHistory, NodeLink
+from ...ingest.admission import get_admission_controller
+from ...ingest.context import IngestContext
+from ...ingest.metrics import get_ingest_metrics, track_packet
+from ...ingest.segments import archive_envelope
+from ...models import (
+    Edge,
+    Interface,
+    Node,
+    NodeLatencyHistory,
+    NodeNeighbor,
+)
 from ...models.packet_models import (
     NeighborInfoNeighbor,
     NeighborInfoPayload,
@@ -17,13 +28,15 @@ from ...models.packet_models import (
     Packet,
     PacketData,
     PacketDecryptionMethod,
+    PacketObservation,
     PositionPayload,
     RouteDiscoveryPayload,
     RouteDiscoveryRoute,
     RoutingPayload,
     TelemetryPayload,
 )
-from ..encryption.aes import decrypt_packet
+from ..encryption.key_ring import decrypt_with_key_ring
+from ..encryption.pki_cache import invalidate_public_key
 from ..utils import (
     error_reason_num_to_str,
     hw_num_to_model,
@@ -32,6 +45,13 @@ from ..utils import (
     num_to_mac,
     role_num_ro_role,
 )
+from .channel_cache import get_channel_cache
+from .dedup import SeenPacket, get_duplicate_window
+from .identity import upsert_packets
+from .last_seen import touch_last_seen
+from .link_activity import record_link_activity
+from .node_cache import get_node_identity_cache, remember_on_commit
+from .pending_requests import PendingRequest, get_pending_requests
 
 try:
     # Exposed for tests that patch `stridetastic_api.mesh.packet.handler.ServiceManager`.
@@ -51,6 +71,12 @@ def _get_or_update_node(
 ) -> Node:
     """Fetch an existing node by number or create one with normalized identity fields."""
     normalized_mac = mac_address.upper() if mac_address else None
+    cached = get_node_identity_cache().get_node(
+        node_num, node_id=node_id, mac_address=normalized_mac
+    )
+    if cached is not None:
+        return cached
+
     defaults: dict[str, str] = {}
     if node_id is not None:
         defaults["node_id"] = node_id
@@ -71,9 +97,71 @@ def _get_or_update_node(
             update_fields.append("mac_address")
         if update_fields:
             node.save(update_fields=update_fields)
+    remember_on_commit(node)
     return node
 
 
+def resolve_nodes(identities: dict[int, str]) -> dict[int, Node]:
+    """Fetch or create nodes for ``{node_num: node_id}`` with at most three queries.
+
+    Mirrors `_get_or_update_node`: cached identities are served from the node
+    identity cache, missing nodes are created with normalized identity fields
+    and existing nodes get their node_id/mac refreshed when they drifted.
+    """
+    if not identities:
+        return {}
+
+    cache = get_node_identity_cache()
+    nodes: dict[int, Node] = {}
+    for node_num, node_id in identities.items():
+        cached = cache.get_node(
+            node_num, node_id=node_id, mac_address=num_to_mac(node_num).upper()
+        )
+        if cached is not None:
+            nodes[node_num] = cached
+    uncached = [node_num for node_num in identities if node_num not in nodes]
+    if not uncached:
+        return nodes
+
+    nodes.update(
+        {node.node_num: node for node in Node.objects.filter(node_num__in=uncached)}
+    )
+    missing = [node_num for node_num in uncached if node_num not in nodes]
+    if missing:
+        Node.objects.bulk_create(
+            [
+                Node(
+                    node_num=node_num,
+                    node_id=identities[node_num],
+                    mac_address=num_to_mac(node_num).upper(),
+                )
+                for node_num in missing
+            ],
+            ignore_conflicts=True,
+        )
+        nodes.update(
+            {node.node_num: node for node in Node.objects.filter(node_num__in=missing)}
+        )
+
+    for node_num in uncached:
+        node_id = identities[node_num]
+        node = nodes.get(node_num)
+        if node is None or node.node_id != node_id:
+            # Conflicting identities (or a concurrent writer) fall back to the
+            # per-node path, which surfaces the same errors as on_message.
+            nodes[node_num] = _get_or_update_node(
+                node_num=node_num,
+                node_id=node_id,
+                mac_address=num_to_mac(node_num),
+            )
+            continue
+        if node.mac_address != num_to_mac(node_num).upper():
+            node.mac_address = num_to_mac(node_num).upper()
+            node.save(update_fields=["mac_address"])
+        remember_on_commit(node)
+    return nodes
+
+
 def _decimal_from(
     value: Optional[float | int], *, places: Optional[int] = None
 ) -> Optional[Decimal]:
@@ -119,33 +207,37 @@ def _update_latency_history(
     latency_ms: Optional[int],
     responded_at: Optional[datetime],
     request_time: Optional[datetime],
-) -> None:
-    """Persist the latency outcome, preferring to update the original pending probe row."""
-    history_qs = NodeLatencyHistory.objects.filter(node=node)
+    history_pk: Optional[int] = None,
+) -> int:
+    """Persist the latency outcome, updating the pending probe row when known.
 
-    pending_entry: Optional[NodeLatencyHistory] = None
-    if probe_message_id is not None:
-        pending_entry = history_qs.filter(probe_message_id=probe_message_id).first()
+    Returns the primary key of the history row that holds the outcome.
+    """
+    if history_pk is not None:
+        updated = NodeLatencyHistory.objects.filter(pk=history_pk, node=node).update(
+            reachable=True, latency_ms=latency_ms, responded_at=responded_at
+        )
+        if updated:
+            return history_pk
 
-    if pending_entry is None:
-        pending_entry = (
-            history_qs.filter(
-                reachable=False, latency_ms__isnull=True, responded_at__isnull=True
+    if probe_message_id is not None:
+        # The pending row was written by another process (or the in-memory
+        # request was lost), so look it up by the probe's message id.
+        pending_pk = (
+            NodeLatencyHistory.objects.filter(
+                node=node,
+                probe_message_id=probe_message_id,
+                responded_at__isnull=True,
             )
             .order_by("time")
+            .values_list("pk", flat=True)
             .first()
         )
-
-    if pending_entry is not None:
-        update_fields = ["reachable", "latency_ms", "responded_at"]
-        pending_entry.reachable = True
-        pending_entry.latency_ms = latency_ms
-        pending_entry.responded_at = responded_at
-        if pending_entry.probe_message_id is None and probe_message_id is not None:
-            pending_entry.probe_message_id = probe_message_id
-            update_fields.append("probe_message_id")
-        pending_entry.save(update_fields=update_fields)
-        return
+        if pending_pk is not None:
+            NodeLatencyHistory.objects.filter(pk=pending_pk).update(
+                reachable=True, latency_ms=latency_ms, responded_at=responded_at
+            )
+            return pending_pk
 
     create_kwargs: dict[str, Any] = {
         "node": node,
@@ -156,76 +248,67 @@ def _update_latency_history(
     }
     if request_time is not None:
         create_kwargs["time"] = request_time
-    NodeLatencyHistory.objects.create(**create_kwargs)
+    return NodeLatencyHistory.objects.create(**create_kwargs).pk
+
+
+def _match_request(packet_data: PacketData) -> Optional[PendingRequest]:
+    """Find the pending request that ``packet_data`` answers, if any."""
+    if not getattr(packet_data, "request_id", None):
+        return None
+    return get_pending_requests().match(
+        packet_data.request_id, packet_data.packet.from_node.node_num
+    )
+
+
+def _acknowledge_request(request: PendingRequest, *, ackd: bool = True) -> None:
+    """Flag the stored request packet as answered."""
+    if request.packet_pk is None:
+        return
+    if ackd:
+        Packet.objects.filter(pk=request.packet_pk).update(ackd=True)
+    PacketData.objects.filter(packet_id=request.packet_pk).update(got_response=True)
+
+
+def _record_probe_latency(request: PendingRequest, packet_data: PacketData) -> None:
+    """Mark the responding node reachable and store the round-trip latency."""
+    target_node = packet_data.packet.from_node
+    request_time = request.sent_at_datetime
+    response_time = getattr(packet_data.packet, "time", None)
+    latency_ms: Optional[int] = None
+    if request_time and response_time:
+        latency_delta = response_time - request_time
+        latency_ms = max(0, int(latency_delta.total_seconds() * 1000))
+    responded_at = response_time or timezone.now()
+    Node.objects.filter(pk=target_node.pk).update(
+        latency_reachable=True,
+        latency_ms=latency_ms,
+    )
+    history_pk = _update_latency_history(
+        node=target_node,
+        probe_message_id=request.message_id,
+        latency_ms=latency_ms,
+        responded_at=responded_at,
+        request_time=request_time,
+        history_pk=request.history_pk,
+    )
+    if history_pk != request.history_pk:
+        # Later responses to the same request update this row as well.
+        get_pending_requests().register(
+            request.message_id, request.node_num, history_pk=history_pk
+        )
 
 
 def _process_probe_response(packet_data: PacketData) -> None:
     """When an incoming packet is a response to a previously-sent probe/request,
-    compute latency and persist history. This is a best-effort helper that will
-    skip if the original request has already been marked as responded.
+    compute latency and persist history. Requests are looked up in the pending
+    request registry; responses to unknown or expired requests are ignored.
     """
     try:
-        # print(f"[_process_probe_response] Processing packet_data={packet_data}")
-        request_id = getattr(packet_data, "request_id", None)
-        if request_id is None:
-            # print(f"[_process_probe_response] No request_id in packet_data={packet_data}")
-            return
-
-        # Find the original packet (the request) that this packet is responding to.
-        ackd_packet = (
-            Packet.objects.filter(
-                packet_id=request_id,
-                to_node=packet_data.packet.from_node,
-            )
-            .select_related("to_node", "data")
-            .first()
-        )
-
-        if not ackd_packet:
-            # print(f"[_process_probe_response] No original packet found for request_id={request_id}")
+        request = _match_request(packet_data)
+        if request is None:
             return
-
-        # If the original packet already marked as having got a response, skip.
-        orig_data = getattr(ackd_packet, "data", None)
-        # if orig_data is not None and getattr(orig_data, 'got_response', False):
-        #     print(f"[_process_probe_response] Original packet with request_id={request_id} already marked as responded")
-        #     return
-
-        # Mark original as responded
-        if orig_data is not None:
-            orig_data.got_response = True
-            orig_data.save(update_fields=["got_response"])
-
-        # Mark ack flag on original packet where appropriate
-        try:
-            ackd_packet.ackd = True
-            ackd_packet.save(update_fields=["ackd"])
-        except Exception:
-            # non-fatal
-            pass
-
-        # Compute latency if possible and persist
-        target_node = ackd_packet.to_node
-        if target_node:
-            request_time = getattr(ackd_packet, "time", None)
-            response_time = getattr(packet_data.packet, "time", None)
-            latency_ms = None
-            if request_time and response_time:
-                latency_delta = response_time - request_time
-                latency_ms = max(0, int(latency_delta.total_seconds() * 1000))
-            responded_at = response_time or timezone.now()
-            Node.objects.filter(pk=target_node.pk).update(
-                latency_reachable=True,
-                latency_ms=latency_ms,
-            )
-            packet_id = getattr(ackd_packet, "packet_id", None)
-            _update_latency_history(
-                node=target_node,
-                probe_message_id=packet_id,
-                latency_ms=latency_ms,
-                responded_at=responded_at,
-                request_time=request_time,
-            )
+        _acknowledge_request(request)
+        _record_probe_latency(request, packet_data)
     except Exception:
         logging.exception("Failed to process probe response latency")
 
@@ -265,18 +348,14 @@ def handle_nodeinfo(payload: bytes, packet_data: PacketData) -> None:
         node.mac_address = str(macaddr) if macaddr else node.mac_address
         node.public_key = pubkey if pubkey else None
         node.save()
+        invalidate_public_key(node_num)
 
-        if packet_data.request_id is not None:
-            responded_packet = Packet.objects.filter(
-                packet_id=packet_data.request_id,
-                to_node=packet_data.packet.from_node,
-            ).first()
-            if responded_packet:
-                responded_packet.data.got_response = True
-                responded_packet.data.save()
-                logging.info(
-                    f"[Routing] Acknowledged packet with request_id={packet_data.request_id} for node {packet_data.packet.from_node.node_num} ({packet_data.packet.from_node.node_id})"
-                )
+        request = _match_request(packet_data)
+        if request is not None:
+            _acknowledge_request(request, ackd=False)
+            logging.info(
+                f"[Routing] Acknowledged packet with request_id={packet_data.request_id} for node {packet_data.packet.from_node.node_num} ({packet_data.packet.from_node.node_id})"
+            )
 
 
 def handle_neighborinfo(payload: bytes, packet_data: PacketData) -> None:
@@ -311,7 +390,7 @@ def handle_neighborinfo(payload: bytes, packet_data: PacketData) -> None:
         reporting_node_id = reporting_node.node_id
 
     if reporting_node:
-        reporting_node.update_last_seen()
+        touch_last_seen(reporting_node)
 
     last_sent_by_node: Optional[Node] = None
     last_sent_by_node_num: Optional[int] = None
@@ -325,7 +404,7 @@ def handle_neighborinfo(payload: bytes, packet_data: PacketData) -> None:
                 node_id=last_sent_by_node_id,
                 mac_address=mac_address,
             )
-            last_sent_by_node.update_last_seen()
+            touch_last_seen(last_sent_by_node)
         except ValueError:
             logging.debug(
                 f"[NeighborInfo] Invalid last_sent_by_id {neighbor_info.last_sent_by_id}"
@@ -350,66 +429,129 @@ def handle_neighborinfo(payload: bytes, packet_data: PacketData) -> None:
 
     interfaces = list(packet_obj.interfaces.all()) if packet_obj else []
 
+    advertised_entries: list[tuple[Any, Optional[int], Optional[str]]] = []
+    identities: dict[int, str] = {}
     for advertised in neighbor_info.neighbors:
-        neighbor_node: Optional[Node] = None
         neighbor_node_num: Optional[int] = advertised.node_id or None
         neighbor_node_id: Optional[str] = None
         if neighbor_node_num is not None:
             try:
                 neighbor_node_id = num_to_id(neighbor_node_num)
-            except ValueError:
-                neighbor_node_num = None
-
-        if neighbor_node_num is not None:
-            try:
-                mac_address = num_to_mac(neighbor_node_num)
-                neighbor_node = _get_or_update_node(
-                    node_num=neighbor_node_num,
-                    node_id=neighbor_node_id,
-                    mac_address=mac_address,
-                )
+                num_to_mac(neighbor_node_num)
             except ValueError:
                 logging.debug(
                     f"[NeighborInfo] Invalid neighbor node num {neighbor_node_num}"
                 )
                 neighbor_node_id = None
                 neighbor_node_num = None
-
-        if neighbor_node:
-            neighbor_node.update_last_seen()
-
+        if neighbor_node_num is not None and neighbor_node_id is not None:
+            identities[neighbor_node_num] = neighbor_node_id
+        advertised_entries.append((advertised, neighbor_node_num, neighbor_node_id))
+
+    neighbor_nodes = resolve_nodes(identities)
+    for neighbor_node in neighbor_nodes.values():
+        touch_last_seen(neighbor_node)
+
+    neighbor_rows: list[NeighborInfoNeighbor] = []
+    # Keyed by neighbor so repeated entries keep the last advertisement.
+    current: dict[int, tuple[Node, Optional[Decimal], Any]] = {}
+    for advertised, neighbor_node_num, neighbor_node_id in advertised_entries:
+        neighbor_node = (
+            neighbor_nodes.get(neighbor_node_num)
+            if neighbor_node_num is not None
+            else None
+        )
         snr_value = _decimal_from(advertised.snr, places=2)
         last_rx_time_raw = advertised.last_rx_time if advertised.last_rx_time else None
-        last_rx_time_dt = _epoch_to_datetime(last_rx_time_raw)
         broadcast_interval = (
             advertised.node_broadcast_interval_secs
             if advertised.node_broadcast_interval_secs
             else None
         )
+        neighbor_rows.append(
+            NeighborInfoNeighbor(
+                payload=neighbor_payload,
+                node=neighbor_node,
+                advertised_node_id=neighbor_node_id,
+                advertised_node_num=neighbor_node_num,
+                snr=snr_value,
+                last_rx_time=_epoch_to_datetime(last_rx_time_raw),
+                last_rx_time_raw=last_rx_time_raw,
+                node_broadcast_interval_secs=broadcast_interval,
+            )
+        )
+        if neighbor_node is not None:
+            current[neighbor_node.pk] = (neighbor_node, snr_value, neighbor_rows[-1])
+    if neighbor_rows:
+        NeighborInfoNeighbor.objects.bulk_create(neighbor_rows)
 
-        NeighborInfoNeighbor.objects.create(
-            payload=neighbor_payload,
-            node=neighbor_node,
-            advertised_node_id=neighbor_node_id,
-            advertised_node_num=neighbor_node_num,
-            snr=snr_value,
-            last_rx_time=last_rx_time_dt,
-            last_rx_time_raw=last_rx_time_raw,
-            node_broadcast_interval_secs=broadcast_interval,
+    if reporting_node:
+        _replace_current_neighbors(
+            reporting_node, list(current.values()), packet_obj, interfaces
         )
 
-        if reporting_node and neighbor_node:
-            link_edge, _ = Edge.objects.get_or_create(
-                source_node=reporting_node,
-                target_node=neighbor_node,
+
+def _replace_current_neighbors(
+    reporting_node: Node,
+    neighbors: list[tuple[Node, Optional[Decimal], NeighborInfoNeighbor]],
+    packet_obj: Optional[Packet],
+    interfaces: list[Interface],
+) -> None:
+    """Upsert the reporter's neighbor edges and current neighbor set in bulk."""
+    packet_pk = packet_obj.pk if packet_obj else None
+    if neighbors:
+        edge_update_fields = ["last_rx_snr", "last_hops", "last_seen"]
+        if packet_pk is not None:
+            edge_update_fields.append("last_packet")
+        edges = Edge.objects.bulk_create(
+            [
+                Edge(
+                    source_node=reporting_node,
+                    target_node=neighbor_node,
+                    last_packet_id=packet_pk,
+                    last_rx_snr=snr_value,
+                    last_hops=0,
+                )
+                for neighbor_node, snr_value, _ in neighbors
+            ],
+            update_conflicts=True,
+            unique_fields=["source_node", "target_node"],
+            update_fields=edge_update_fields,
+        )
+        if interfaces:
+            Edge.interfaces.through.objects.bulk_create(
+                [
+                    Edge.interfaces.through(edge_id=edge.pk, interface_id=interface.pk)
+                    for edge in edges
+                    for interface in interfaces
+                ],
+                ignore_conflicts=True,
             )
-            if packet_obj:
-                link_edge.last_packet = packet_obj  # type: ignore[assignment]
-            link_edge.last_rx_snr = snr_value
-            link_edge.last_hops = 0
-            link_edge.save()
-            if interfaces:
-                link_edge.interfaces.add(*interfaces)
+        NodeNeighbor.objects.bulk_create(
+            [
+                NodeNeighbor(
+                    reporting_node=reporting_node,
+                    neighbor_node=neighbor_node,
+                    snr=snr_value,
+                    last_rx_time=row.last_rx_time,
+                    node_broadcast_interval_secs=row.node_broadcast_interval_secs,
+                    last_packet_id=packet_pk,
+                )
+                for neighbor_node, snr_value, row in neighbors
+            ],
+            update_conflicts=True,
+            unique_fields=["reporting_node", "neighbor_node"],
+            update_fields=[
+                "snr",
+                "last_rx_time",
+                "node_broadcast_interval_secs",
+                "last_packet",
+                "reported_at",
+            ],
+        )
+    NodeNeighbor.objects.filter(reporting_node=reporting_node).exclude(
+        neighbor_node__in=[neighbor_node.pk for neighbor_node, _, _ in neighbors]
+    ).delete()
 
 
 def handle_position(payload: bytes, packet_data: PacketData) -> None:
@@ -569,6 +711,120 @@ def handle_telemetry(payload: bytes, packet_data: PacketData) -> None:
         logging.warning(f"[Telemetry] failed to decode: {e}")
 
 
+def _resolve_route_nodes(*route_lists: list[str]) -> list[Optional[Node]]:
+    """Resolve the hop node ids of traceroute routes with one `resolve_nodes` call.
+
+    Returns the nodes of all lists concatenated, with None for broadcast hops.
+    """
+    hop_nums = [
+        None if node_id == BROADCAST_NODE_ID else id_to_num(node_id)
+        for route_list in route_lists
+        for node_id in route_list
+    ]
+    nodes = resolve_nodes(
+        {node_num: num_to_id(node_num) for node_num in hop_nums if node_num is not None}
+    )
+    for node in nodes.values():
+        touch_last_seen(node)
+    return [nodes[node_num] if node_num is not None else None for node_num in hop_nums]
+
+
+def _store_route(node_list: list[str], nodes: list[Node]) -> RouteDiscoveryRoute:
+    """Fetch or create the route row for ``node_list`` and link its hop nodes.
+
+    Routes are shared by every traceroute taking the same path, so the M2M
+    rows and hop count are only written when the route is new or incomplete.
+    """
+    route, created = RouteDiscoveryRoute.objects.get_or_create(
+        node_list=dumps(node_list),
+    )
+    if created or route.hops != len(nodes):
+        route.nodes.add(*nodes)
+        route.hops = len(nodes)
+        route.save()
+    return route
+
+
+def _build_edge_segments(
+    nodes: list[Optional[Node]], snr_values: list[float]
+) -> list[tuple[Node, Node, Optional[float], int]]:
+    """Collapse broadcast placeholders into synthetic hop segments.
+
+    Edges are persisted between known nodes while tracking how many unknown
+    hops occurred in between.
+    """
+    segments: list[tuple[Node, Node, Optional[float], int]] = []
+    last_known_index: Optional[int] = None
+    unknown_between = 0
+    total_nodes = len(nodes)
+
+    for index, node in enumerate(nodes):
+        if node is None:
+            if last_known_index is not None and index < total_nodes - 1:
+                unknown_between += 1
+            continue
+
+        if last_known_index is None:
+            last_known_index = index
+            unknown_between = 0
+            continue
+
+        source_index = last_known_index
+        hop_count = unknown_between
+
+        if hop_count == 0 and source_index >= len(snr_values):
+            last_known_index = index
+            unknown_between = 0
+            continue
+
+        snr_value: Optional[float] = None
+        if hop_count == 0 and source_index < len(snr_values):
+            snr_value = snr_values[source_index]
+
+        source_node = nodes[source_index]
+        target_node = node
+        if source_node is not None and target_node is not None:
+            segments.append((source_node, target_node, snr_value, hop_count))
+
+        last_known_index = index
+        unknown_between = 0
+
+    return segments
+
+
+def _persist_edge_segments(
+    segments: list[tuple[Node, Node, Optional[float], int]],
+    packet_pk: Optional[int],
+) -> None:
+    """Upsert all traceroute edge segments with a single statement."""
+    # A pair repeated within one traceroute keeps its last segment, as
+    # sequential saves would.
+    edges: dict[tuple[int, int], Edge] = {}
+    for source_node, target_node, snr_value, hop_count in segments:
+        edges[(source_node.pk, target_node.pk)] = Edge(
+            source_node=source_node,
+            target_node=target_node,
+            last_packet_id=packet_pk,
+            last_rx_rssi=0,
+            last_rx_snr=_decimal_from(snr_value, places=2),
+            last_hops=hop_count,
+        )
+    if not edges:
+        return
+    Edge.objects.bulk_create(
+        list(edges.values()),
+        update_conflicts=True,
+        unique_fields=["source_node", "target_node"],
+        update_fields=[
+            "last_packet",
+            "last_rx_rssi",
+            "last_rx_snr",
+            "last_hops",
+            "last_seen",
+        ],
+    )
+
+
 # This one needs a rework, as
 def handle_route_discovery(payload: bytes, packet_data: PacketData) -> None:
     route_discovery = mesh_pb2.RouteDiscovery()
@@ -593,7 +849,6 @@ def handle_route_discovery(payload: bytes, packet_data: PacketData) -> None:
         )
 
     if packet_data.request_id == 0:
-        route_towards_nodes = []
         route_node_towards_list = [packet_data.packet.from_node.node_id] + [
             num_to_id(node_num) for node_num in route_discovery.route
         ]
@@ -602,29 +857,16 @@ def handle_route_discovery(payload: bytes, packet_data: PacketData) -> None:
             for node_id in route_node_towards_list
             if node_id != BROADCAST_NODE_ID
         ]
-        route_towards_hops = 0
         snr_towards = [i / 4 for i in route_discovery.snr_towards]
 
-        route_discovery_route_towards, _ = RouteDiscoveryRoute.objects.get_or_create(
-            node_list=dumps(sanitized_route_node_list),
+        route_towards_nodes = [
+            node
+            for node in _resolve_route_nodes(route_node_towards_list)
+            if node is not None
+        ]
+        route_discovery_route_towards = _store_route(
+            sanitized_route_node_list, route_towards_nodes
         )
-        for node_id in route_node_towards_list:
-            if node_id == BROADCAST_NODE_ID:
-                continue
-            node_num = id_to_num(node_id)
-            node_id = num_to_id(node_num)
-            node_mac = num_to_mac(node_num)
-            node = _get_or_update_node(
-                node_num=node_num,
-                node_id=node_id,
-                mac_address=node_mac,
-            )
-            node.update_last_seen()
-            route_towards_nodes.append(node)
-            route_towards_hops += 1
-        route_discovery_route_towards.nodes.add(*route_towards_nodes)
-        route_discovery_route_towards.hops = route_towards_hops
-        route_discovery_route_towards.save()
 
         route_discovery_payload, _ = RouteDiscoveryPayload.objects.get_or_create(
             packet_data=packet_data,
@@ -649,47 +891,19 @@ def handle_route_discovery(payload: bytes, packet_data: PacketData) -> None:
         #     link_edge.save()
 
     else:
-        ackd_packet = Packet.objects.filter(
-            packet_id=packet_data.request_id,
-            to_node=packet_data.packet.from_node,
-        ).first()
-        if ackd_packet:
-            ackd_packet.ackd = True
-            ackd_packet.save()
-            ackd_packet.data.got_response = True
-            ackd_packet.data.save()
-
-            if packet_data.request_id is not None:
-                ackd_packet.data.got_response = True
-                ackd_packet.data.save()
+        request = _match_request(packet_data)
+        if request is not None:
+            _acknowledge_request(request)
             logging.info(
                 f"[Routing] Acknowledged packet with request_id={packet_data.request_id} for node {packet_data.packet.from_node.node_num} ({packet_data.packet.from_node.node_id})"
             )
+            _record_probe_latency(request, packet_data)
 
-            target_node = ackd_packet.to_node
-            if target_node:
-                request_time = getattr(ackd_packet, "time", None)
-                response_time = getattr(packet_data.packet, "time", None)
-                latency_ms: Optional[int] = None
-                if request_time and response_time:
-                    latency_delta = response_time - request_time
-                    latency_ms = max(0, int(latency_delta.total_seconds() * 1000))
-                responded_at = response_time or timezone.now()
-                Node.objects.filter(pk=target_node.pk).update(
-                    latency_reachable=True,
-                    latency_ms=latency_ms,
-                )
-                packet_id = getattr(ackd_packet, "packet_id", None)
-                _update_latency_history(
-                    node=target_node,
-                    probe_message_id=packet_id,
-                    latency_ms=latency_ms,
-                    responded_at=responded_at,
-                    request_time=request_time,
-                )
-
+            origin_num = request.from_node_num
+            if origin_num is None:
+                origin_num = packet_data.packet.to_node.node_num
             route_node_list = (
-                [ackd_packet.from_node.node_id]
+                [num_to_id(origin_num)]
                 + [num_to_id(node_num) for node_num in route_discovery.route]
                 + [packet_data.packet.from_node.node_id]
             )
@@ -699,38 +913,9 @@ def handle_route_discovery(payload: bytes, packet_data: PacketData) -> None:
             ]
             snr_back_list = [i / 4 for i in route_discovery.snr_back]
 
-            route_nodes = []
-            route_back_nodes = []
-
-            for node_id in route_node_list:
-                if node_id == BROADCAST_NODE_ID:
-                    route_nodes.append(None)
-                    continue
-                node_num = id_to_num(node_id)
-                node_id = num_to_id(node_num)
-                node_mac = num_to_mac(node_num)
-                node = _get_or_update_node(
-                    node_num=node_num,
-                    node_id=node_id,
-                    mac_address=node_mac,
-                )
-                node.update_last_seen()
-                route_nodes.append(node)
-
-            for node_id in route_node_back_list:
-                if node_id == BROADCAST_NODE_ID:
-                    route_back_nodes.append(None)
-                    continue
-                node_num = id_to_num(node_id)
-                node_id = num_to_id(node_num)
-                node_mac = num_to_mac(node_num)
-                node = _get_or_update_node(
-                    node_num=node_num,
-                    node_id=node_id,
-                    mac_address=node_mac,
-                )
-                node.update_last_seen()
-                route_back_nodes.append(node)
+            route_nodes = _resolve_route_nodes(route_node_list, route_node_back_list)
+            route_back_nodes = route_nodes[len(route_node_list) :]
+            route_nodes = route_nodes[: len(route_node_list)]
 
             if broadcast_present:
                 forward_has_known_intermediate = any(
@@ -742,77 +927,18 @@ def handle_route_discovery(payload: bytes, packet_data: PacketData) -> None:
                 if not (forward_has_known_intermediate or back_has_known_intermediate):
                     return
 
-            # Collapse broadcast placeholders into synthetic hop segments so we can
-            # persist edges between known nodes while tracking how many unknown hops
-            # occurred in between.
-            def build_edge_segments(
-                nodes: list[Optional[Node]], snr_values: list[float]
-            ) -> list[tuple[Node, Node, Optional[float], int]]:
-                segments: list[tuple[Node, Node, Optional[float], int]] = []
-                last_known_index: Optional[int] = None
-                unknown_between = 0
-                total_nodes = len(nodes)
-
-                for index, node in enumerate(nodes):
-                    if node is None:
-                        if last_known_index is not None and index < total_nodes - 1:
-                            unknown_between += 1
-                        continue
-
-                    if last_known_index is None:
-                        last_known_index = index
-                        unknown_between = 0
-                        continue
-
-                    source_index = last_known_index
-                    hop_count = unknown_between
-
-                    if hop_count == 0 and source_index >= len(snr_values):
-                        last_known_index = index
-                        unknown_between = 0
-                        continue
-
-                    snr_value: Optional[float] = None
-                    if hop_count == 0 and source_index < len(snr_values):
-                        snr_value = snr_values[source_index]
-
-                    source_node = nodes[source_index]
-                    target_node = node
-                    if source_node is not None and target_node is not None:
-                        segments.append(
-                            (source_node, target_node, snr_value, hop_count)
-                        )
-
-                    last_known_index = index
-                    unknown_between = 0
-
-                return segments
-
-            def persist_edge_segments(
-                segments: list[tuple[Node, Node, Optional[float], int]],
-            ) -> None:
-                for source_node, target_node, snr_value, hop_count in segments:
-                    link_edge, _ = Edge.objects.get_or_create(
-                        source_node=source_node,
-                        target_node=target_node,
-                    )
-                    link_edge.last_packet = ackd_packet
-                    link_edge.last_rx_rssi = 0
-                    link_edge.last_rx_snr = _decimal_from(snr_value, places=2)
-                    link_edge.last_hops = hop_count
-                    link_edge.save()
-
             logging.info(
                 f"[Routing] Creating edges for route: {route_node_list}, {route_nodes}, SNR: {route_snr_list}"
             )
-            forward_segments = build_edge_segments(route_nodes, route_snr_list)
-            persist_edge_segments(forward_segments)
+            forward_segments = _build_edge_segments(route_nodes, route_snr_list)
 
             logging.info(
                 f"[Routing] Creating edges for route back: {route_node_back_list}, {route_back_nodes}, SNR: {snr_back_list}"
             )
-            backward_segments = build_edge_segments(route_back_nodes, snr_back_list)
-            persist_edge_segments(backward_segments)
+            backward_segments = _build_edge_segments(route_back_nodes, snr_back_list)
+            _persist_edge_segments(
+                forward_segments + backward_segments, request.packet_pk
+            )
 
             # route_discovery_route_back, _ = RouteDiscoveryRoute.objects.get_or_create(
             #     node_list=dumps(route_node_back_list),
@@ -862,50 +988,17 @@ def handle_routing(payload: bytes, packet_data: PacketData) -> None:
     # routing_payload.request_id = getattr(routing, 'request_id', None)
     # routing_payload.reply_id = getattr(routing, 'reply_id', None)
 
-    if packet_data.request_id is not None and not error_reason:
-        ackd_packet = (
-            Packet.objects.filter(
-                packet_id=packet_data.request_id,
-                to_node=packet_data.packet.from_node,
-            )
-            .select_related("to_node")
-            .first()
-        )
-        if ackd_packet:
-            ackd_packet.ackd = True
-            ackd_packet.save(update_fields=["ackd"])
-            if hasattr(ackd_packet, "data") and ackd_packet.data is not None:
-                ackd_packet.data.got_response = True
-                ackd_packet.data.save(update_fields=["got_response"])
+    request = None if error_reason else _match_request(packet_data)
+    if request is not None:
+        _acknowledge_request(request)
 
-            packet_data.got_response = True
-            packet_data.save(update_fields=["got_response"])
-
-            logging.info(
-                f"[Routing] Acknowledged packet with request_id={packet_data.request_id} for node {packet_data.packet.from_node.node_num} ({packet_data.packet.from_node.node_id})"
-            )
+        packet_data.got_response = True
+        packet_data.save(update_fields=["got_response"])
 
-            target_node = ackd_packet.to_node
-            if target_node:
-                request_time = getattr(ackd_packet, "time", None)
-                response_time = getattr(packet_data.packet, "time", None)
-                latency_ms: Optional[int] = None
-                if request_time and response_time:
-                    latency_delta = response_time - request_time
-                    latency_ms = max(0, int(latency_delta.total_seconds() * 1000))
-                responded_at = response_time or timezone.now()
-                Node.objects.filter(pk=target_node.pk).update(
-                    latency_reachable=True,
-                    latency_ms=latency_ms,
-                )
-                packet_id = getattr(ackd_packet, "packet_id", None)
-                _update_latency_history(
-                    node=target_node,
-                    probe_message_id=packet_id,
-                    latency_ms=latency_ms,
-                    responded_at=responded_at,
-                    request_time=request_time,
-                )
+        logging.info(
+            f"[Routing] Acknowledged packet with request_id={packet_data.request_id} for node {packet_data.packet.from_node.node_num} ({packet_data.packet.from_node.node_id})"
+        )
+        _record_probe_latency(request, packet_data)
 
 
 def handle_text_message(payload: bytes, packet_data: PacketData) -> None:
@@ -915,6 +1008,17 @@ def handle_text_message(payload: bytes, packet_data: PacketData) -> None:
     packet_data.save()
 
 
+def _node_label(node: Node) -> str:
+    """Describe a node for logs without loading deferred columns."""
+    deferred = node.get_deferred_fields()
+    names = [
+        str(getattr(node, field_name))
+        for field_name in ("short_name", "long_name")
+        if field_name not in deferred
+    ]
+    return f"{node.node_num} ({', '.join([str(node.node_id), *names])})"
+
+
 def handle_other(portnum: int, payload: bytes) -> None:
     logging.info(f"[Other] portnum={portnum} payload={payload}")
 
@@ -927,16 +1031,8 @@ def handle_decoded_packet(
     packet_obj: Packet,
     how_decrypted: str = PacketDecryptionMethod.NOT_DECRYPTED,
 ):
-    from_node_number = from_node.node_num
-    from_node_id = from_node.node_id
-    from_node_shortname = from_node.short_name
-    from_node_longname = from_node.long_name
-
-    to_node_number = to_node.node_num
-    to_node_id = to_node.node_id
-    to_node_shortname = to_node.short_name
-    to_node_longname = to_node.long_name
-
+    metrics = get_ingest_metrics()
+    clock = metrics.clock()
     portnum = decoded_data.portnum
     port = (
         portnums_pb2.PortNum.Name(decoded_data.portnum)
@@ -963,31 +1059,45 @@ def handle_decoded_packet(
     data_obj.got_response = got_response
     data_obj.how_decrypted = how_decrypted
     data_obj.save()
+    if (
+        want_response or packet_obj.want_ack
+    ) and to_node.node_num != BROADCAST_NODE_NUM:
+        # Answers reference this packet by id; remember it for response matching.
+        get_pending_requests().register(
+            packet_obj.packet_id,
+            to_node.node_num,
+            from_node_num=from_node.node_num,
+            sent_at=packet_obj.time,
+            packet_pk=packet_obj.pk,
+        )
+    clock.lap("packet_data")
 
     logging.info(
-        f"[Packet] from: {from_node_number} ({from_node_id}, {from_node_shortname}, {from_node_longname}) >-- port:{port} --> to: {to_node_number} ({to_node_id}, {to_node_shortname}, {to_node_longname})"
+        f"[Packet] from: {_node_label(from_node)} >-- port:{port} --> to: {_node_label(to_node)}"
     )
     logging.info(f"[Packet] decoded={decoded_data}")
 
-    match decoded_data.portnum:
-        case portnums_pb2.NODEINFO_APP:
-            handle_nodeinfo(decoded_data.payload, data_obj)
-        case portnums_pb2.NEIGHBORINFO_APP:
-            handle_neighborinfo(decoded_data.payload, data_obj)
-        case portnums_pb2.POSITION_APP:
-            handle_position(decoded_data.payload, data_obj)
-        case portnums_pb2.RANGE_TEST_APP:
-            handle_range_test(decoded_data.payload, data_obj)
-        case portnums_pb2.TELEMETRY_APP:
-            handle_telemetry(decoded_data.payload, data_obj)
-        case portnums_pb2.TRACEROUTE_APP:
-            handle_route_discovery(decoded_data.payload, data_obj)
-        case portnums_pb2.ROUTING_APP:
-            handle_routing(decoded_data.payload, data_obj)
-        case portnums_pb2.TEXT_MESSAGE_APP:
-            handle_text_message(decoded_data.payload, data_obj)
-        case _:
-            handle_other(decoded_data.portnum, data_obj)
+    with metrics.port_handler(port):
+        match decoded_data.portnum:
+            case portnums_pb2.NODEINFO_APP:
+                handle_nodeinfo(decoded_data.payload, data_obj)
+            case portnums_pb2.NEIGHBORINFO_APP:
+                handle_neighborinfo(decoded_data.payload, data_obj)
+            case portnums_pb2.POSITION_APP:
+                handle_position(decoded_data.payload, data_obj)
+            case portnums_pb2.RANGE_TEST_APP:
+                handle_range_test(decoded_data.payload, data_obj)
+            case portnums_pb2.TELEMETRY_APP:
+                handle_telemetry(decoded_data.payload, data_obj)
+            case portnums_pb2.TRACEROUTE_APP:
+                handle_route_discovery(decoded_data.payload, data_obj)
+            case portnums_pb2.ROUTING_APP:
+                handle_routing(decoded_data.payload, data_obj)
+            case portnums_pb2.TEXT_MESSAGE_APP:
+                handle_text_message(decoded_data.payload, data_obj)
+            case _:
+                handle_other(decoded_data.portnum, data_obj)
+    clock.reset()
 
     # After handlers run, perform generic processing of response-based latency
     # This will compute latency for packets that are replies to earlier
@@ -1000,10 +1110,103 @@ def handle_decoded_packet(
     except Exception:
         # _process_probe_response already logs failures; don't escalate here
         pass
+    clock.lap("probe_response")
 
     return (packet, decoded_data, portnum, from_node, to_node, packet_obj)
 
 
+def _decrypt_payload(
+    packet: mesh_pb2.MeshPacket,
+    to_node: Node,
+    key: Optional[str] = "AQ==",
+    pki_encrypted: bool = False,
+    context: Optional[IngestContext] = None,
+) -> tuple[Optional[mesh_pb2.Data], str]:
+    """Decrypt an encrypted packet with the channel key or, for PKI, ``to_node``'s.
+
+    Returns the decoded ``Data`` (None when it stays encrypted) and how it was
+    decrypted.
+    """
+    if not pki_encrypted:
+        if key is None:
+            logging.info("[Encrypted] No key provided for decryption.")
+            return None, PacketDecryptionMethod.NOT_DECRYPTED
+        with get_ingest_metrics().stage("decryption"):
+            payload = (
+                context.decrypt_aes(key)
+                if context is not None
+                else decrypt_with_key_ring(packet, key)
+            )
+        if payload is None:
+            logging.info("[Encrypted] Could not decrypt packet")
+            return None, PacketDecryptionMethod.NOT_DECRYPTED
+        return payload, PacketDecryptionMethod.AES
+
+    logging.info("[PKI] Attempting decryption via PKI service")
+    try:
+        from ...services.service_manager import ServiceManager
+
+        manager = ServiceManager.get_instance()
+        pki_service = manager.get_pki_service() or manager.initialize_pki_service()
+    except Exception as exc:  # pragma: no cover - defensive logging
+        logging.warning(f"[PKI] Failed to resolve PKI service: {exc}")
+        pki_service = None
+
+    if pki_service is None:
+        logging.info("[PKI] Service unavailable; packet left encrypted")
+        return None, PacketDecryptionMethod.NOT_DECRYPTED
+    with get_ingest_metrics().stage("decryption"):
+        result = (
+            context.decrypt_pki(pki_service, to_node)
+            if context is not None
+            else pki_service.decrypt_packet(packet, to_node)
+        )
+    if not result.success or result.plaintext is None:
+        logging.info(f"[PKI] Decryption skipped: {result.reason}")
+        return None, PacketDecryptionMethod.NOT_DECRYPTED
+    data = mesh_pb2.Data()
+    data.ParseFromString(result.plaintext)
+    return data, PacketDecryptionMethod.PKI
+
+
+def _admit_packet(
+    packet: mesh_pb2.MeshPacket,
+    key: Optional[str] = "AQ==",
+    pki_encrypted: bool = False,
+    context: Optional[IngestContext] = None,
+) -> tuple[bool, Optional[tuple[Optional[mesh_pb2.Data], str]]]:
+    """Charge admission control for a packet that is not a repeat copy.
+
+    Runs before anything is archived or written, so it only needs the sender
+    and the port. Encrypted packets are decrypted first so they are charged to
+    their real port; PKI packets only when their receiver is already known (a
+    new node has no private key). Returns whether the packet is admitted and
+    the decryption result, if any, for `handle_packet` to reuse.
+    """
+    admission = get_admission_controller()
+    if admission is None:
+        return True, None
+    decrypted = None
+    if not packet.HasField("decoded") and packet.HasField("encrypted"):
+        to_node = (
+            Node.objects.filter(node_num=getattr(packet, "to", 0)).first()
+            if pki_encrypted
+            else None
+        )
+        if not pki_encrypted or to_node is not None:
+            decrypted = _decrypt_payload(
+                packet,
+                to_node,
+                key=key,
+                pki_encrypted=pki_encrypted,
+                context=context,
+            )
+    if admission.admit_packet(packet, decrypted[0] if decrypted else None):
+        return True, decrypted
+    logging.debug(f"[Admission] Shed packet from {getattr(packet, 'from', 0)}")
+    return False, decrypted
+
+
 def handle_packet(
     packet: mesh_pb2.MeshPacket,
     from_node: Node,
@@ -1011,9 +1214,30 @@ def handle_packet(
     packet_obj: Packet,
     key: Optional[str] = "AQ==",
     pki_encrypted: bool = False,
+    context: Optional[IngestContext] = None,
+    decrypted: Optional[tuple[Optional[mesh_pb2.Data], str]] = None,
 ):
     how_decrypted = PacketDecryptionMethod.NOT_DECRYPTED
+    payload: Optional[mesh_pb2.Data] = None
+    decoded_data: Optional[mesh_pb2.Data] = None
+    portnum: Optional[int] = None
     if packet.HasField("decoded"):
+        payload = packet.decoded
+    elif packet.HasField("encrypted"):
+        if pki_encrypted:
+            packet_obj.pki_encrypted = True
+        payload, how_decrypted = decrypted or _decrypt_payload(
+            packet,
+            to_node,
+            key=key,
+            pki_encrypted=pki_encrypted,
+            context=context,
+        )
+    else:
+        logging.info("[Unknown] Packet has no decoded or encrypted payload.")
+        logging.info(f"[Unknown] Packet:\n{packet}")
+
+    if payload is not None:
         packet_obj.how_decrypted = how_decrypted
         (
             packet,
@@ -1026,87 +1250,21 @@ def handle_packet(
             from_node=from_node,
             to_node=to_node,
             packet=packet,
-            decoded_data=packet.decoded,
+            decoded_data=payload,
             packet_obj=packet_obj,
             how_decrypted=how_decrypted,
         )
-    elif packet.HasField("encrypted"):
-        if not pki_encrypted:
-            if key is not None:
-                payload = decrypt_packet(packet, key)
-                if payload is not None:
-                    how_decrypted = PacketDecryptionMethod.AES
-                    packet_obj.how_decrypted = how_decrypted
-                    (
-                        packet,
-                        decoded_data,
-                        portnum,
-                        from_node,
-                        to_node,
-                        packet_obj,
-                    ) = handle_decoded_packet(
-                        from_node=from_node,
-                        to_node=to_node,
-                        packet=packet,
-                        decoded_data=payload,
-                        packet_obj=packet_obj,
-                        how_decrypted=how_decrypted,
-                    )
-                    # return
-                else:
-                    logging.info("[Encrypted] Could not decrypt packet")
-            else:
-                logging.info("[Encrypted] No key provided for decryption.")
-        else:
-            logging.info("[PKI] Attempting decryption via PKI service")
-            packet_obj.pki_encrypted = True
-            try:
-                from ...services.service_manager import ServiceManager
-
-                manager = ServiceManager.get_instance()
-                pki_service = (
-                    manager.get_pki_service() or manager.initialize_pki_service()
-                )
-            except Exception as exc:  # pragma: no cover - defensive logging
-                logging.warning(f"[PKI] Failed to resolve PKI service: {exc}")
-                pki_service = None
-
-            if pki_service is not None:
-                result = pki_service.decrypt_packet(packet, to_node)
-                if result.success and result.plaintext is not None:
-                    data = mesh_pb2.Data()
-                    data.ParseFromString(result.plaintext)
-                    how_decrypted = PacketDecryptionMethod.PKI
-                    packet_obj.how_decrypted = how_decrypted
-                    (
-                        packet,
-                        decoded_data,
-                        portnum,
-                        from_node,
-                        to_node,
-                        packet_obj,
-                    ) = handle_decoded_packet(
-                        from_node=from_node,
-                        to_node=to_node,
-                        packet=packet,
-                        decoded_data=data,
-                        packet_obj=packet_obj,
-                        how_decrypted=how_decrypted,
-                    )
-                else:
-                    logging.info(f"[PKI] Decryption skipped: {result.reason}")
-            else:
-                logging.info("[PKI] Service unavailable; packet left encrypted")
-    else:
-        logging.info("[Unknown] Packet has no decoded or encrypted payload.")
-        logging.info(f"[Unknown] Packet:\n{packet}")
+    # Archived envelopes keep the ciphertext; raw_data is the fallback
     packet_obj.raw_data = (
         base64.b64encode(packet.encrypted).decode("utf-8")
-        if packet.HasField("encrypted")
+        if packet.HasField("encrypted") and packet_obj.raw_segment is None
         else None
     )
     packet_obj.save()
 
+    if context is not None:
+        context.record_decryption(decoded_data, how_decrypted)
+
     return packet, decoded_data, portnum, from_node, to_node, packet_obj
 
 
@@ -1148,7 +1306,8 @@ def _dispatch_to_publisher_service(
         logging.error(f"Error in publisher service reaction: {e}")
 
 
-def on_message(client, userdata, normalized, iface="MQTT"):
+def _resolve_interface(normalized, iface: str) -> Interface:
+    """Resolve the Interface row a normalized message arrived on."""
     interface_id = (
         normalized.get("interface_id") if isinstance(normalized, dict) else None
     )
@@ -1164,6 +1323,180 @@ def on_message(client, userdata, normalized, iface="MQTT"):
         interface, _ = Interface.objects.get_or_create(
             interface_type=iface, defaults={"name": f"{iface.lower()}-default"}
         )
+    return interface
+
+
+def _extract_packet_fields(
+    packet, *, iface: str, channel_id: Optional[str]
+) -> dict[str, Any]:
+    """Read the MeshPacket header fields persisted on the Packet row."""
+    rx_rssi_raw = getattr(packet, "rx_rssi", None)
+    rx_snr_raw = getattr(packet, "rx_snr", None)
+    hop_limit = getattr(packet, "hop_limit", None)
+    hop_start = getattr(packet, "hop_start", None)
+    want_ack = getattr(packet, "want_ack", None)
+    return {
+        "packet_id": getattr(packet, "id", None),
+        "channel_num": getattr(packet, "channel", None),
+        "rx_rssi": int(round(rx_rssi_raw)) if rx_rssi_raw is not None else None,
+        "rx_snr": (
+            _decimal_from(rx_snr_raw, places=2) if rx_snr_raw is not None else None
+        ),
+        "rx_time": getattr(packet, "rx_time", None),
+        "hop_limit": hop_limit,
+        "hop_start": hop_start,
+        "hops": (
+            0
+            if hop_limit is None
+            else (hop_start - hop_limit) if hop_start is not None else 0
+        ),
+        "first_hop": getattr(packet, "first_hop", None),
+        "next_hop": getattr(packet, "next_hop", None),
+        "pki_encrypted": getattr(packet, "pki_encrypted", False) or channel_id == "PKI",
+        "want_ack": want_ack,
+        "ackd": False if want_ack is True else None,
+        "relay_node": getattr(packet, "relay_node", None),
+        "delayed": getattr(packet, "delayed", False),
+        "via_mqtt": True if iface == "MQTT" else getattr(packet, "via_mqtt", False),
+        "public_key": getattr(packet, "public_key", None),
+        "priority": getattr(packet, "priority", None),
+    }
+
+
+# Packet header fields copied from `_extract_packet_fields` onto the Packet row.
+PACKET_HEADER_FIELDS = (
+    "rx_rssi",
+    "rx_snr",
+    "rx_time",
+    "hop_limit",
+    "hop_start",
+    "first_hop",
+    "next_hop",
+    "relay_node",
+    "want_ack",
+    "ackd",
+    "priority",
+    "delayed",
+    "via_mqtt",
+    "pki_encrypted",
+    "public_key",
+)
+
+
+def _upsert_gateway_edge(
+    from_node: Node, gateway_node: Node, packet_pk: int, fields: dict[str, Any]
+) -> None:
+    """Create or refresh the sender -> gateway edge with a single statement."""
+    Edge.objects.bulk_create(
+        [
+            Edge(
+                source_node=from_node,
+                target_node=gateway_node,
+                last_packet_id=packet_pk,
+                last_rx_rssi=fields["rx_rssi"],
+                last_rx_snr=fields["rx_snr"],
+                last_hops=fields["hops"],
+            )
+        ],
+        update_conflicts=True,
+        unique_fields=["source_node", "target_node"],
+        update_fields=[
+            "last_packet",
+            "last_rx_rssi",
+            "last_rx_snr",
+            "last_hops",
+            "last_seen",
+        ],
+    )
+
+
+def _observation_kwargs(
+    packet_pk: int,
+    *,
+    interface: Interface,
+    gateway_node: Optional[Node],
+    fields: dict[str, Any],
+    is_duplicate: bool = False,
+) -> dict[str, Any]:
+    return {
+        "packet_id": packet_pk,
+        "gateway_node": gateway_node,
+        "interface": interface,
+        "rx_time": fields["rx_time"],
+        "rx_rssi": fields["rx_rssi"],
+        "rx_snr": fields["rx_snr"],
+        "hop_limit": fields["hop_limit"],
+        "hop_start": fields["hop_start"],
+        "relay_node": fields["relay_node"],
+        "is_duplicate": is_duplicate,
+    }
+
+
+def _record_duplicate_copy(
+    seen: SeenPacket,
+    *,
+    interface: Interface,
+    from_node: Node,
+    gateway_node: Optional[Node],
+    gateway_node_id: Optional[str],
+    fields: dict[str, Any],
+) -> bool:
+    """Attach a repeat copy to the already processed packet.
+
+    Only the interface/gateway associations, the sender -> gateway edge and the
+    copy's own observation are written. Returns False when the original packet
+    row no longer exists so the caller can process the copy normally.
+    """
+    # Foreign keys are checked at commit, so confirm the row still exists.
+    if not Packet.objects.filter(pk=seen.packet_pk).exists():
+        return False
+    node_interfaces = [
+        Node.interfaces.through(node_id=node.pk, interface_id=interface.pk)
+        for node in (from_node, gateway_node)
+        if node is not None
+    ]
+    try:
+        with transaction.atomic():
+            Node.interfaces.through.objects.bulk_create(
+                node_interfaces, ignore_conflicts=True
+            )
+            Packet.interfaces.through.objects.bulk_create(
+                [
+                    Packet.interfaces.through(
+                        packet_id=seen.packet_pk, interface_id=interface.pk
+                    )
+                ],
+                ignore_conflicts=True,
+            )
+            if gateway_node is not None and gateway_node_id:
+                Packet.gateway_nodes.through.objects.bulk_create(
+                    [
+                        Packet.gateway_nodes.through(
+                            packet_id=seen.packet_pk, node_id=gateway_node.pk
+                        )
+                    ],
+                    ignore_conflicts=True,
+                )
+            if gateway_node is not None:
+                _upsert_gateway_edge(from_node, gateway_node, seen.packet_pk, fields)
+            PacketObservation.objects.create(
+                **_observation_kwargs(
+                    seen.packet_pk,
+                    interface=interface,
+                    gateway_node=gateway_node,
+                    fields=fields,
+                    is_duplicate=True,
+                )
+            )
+    except IntegrityError:
+        return False
+    return True
+
+
+@track_packet
+def on_message(client, userdata, normalized, iface="MQTT"):
+    clock = get_ingest_metrics().clock()
+    interface = _resolve_interface(normalized, iface)
     gateway_node_id = normalized["gateway_node_id"]
     channel_id = normalized["channel_id"]
     packet = normalized["packet"]
@@ -1182,114 +1515,112 @@ def on_message(client, userdata, normalized, iface="MQTT"):
     to_node_num = getattr(packet, "to", 0)
     to_node_id = num_to_id(to_node_num)
     to_node_mac = num_to_mac(to_node_num).upper()
-    packet_id = getattr(packet, "id", None)
-    channel_num = getattr(packet, "channel", None)
-    rx_rssi_raw = getattr(packet, "rx_rssi", None)
-    rx_rssi = int(round(rx_rssi_raw)) if rx_rssi_raw is not None else None
-    rx_snr_raw = getattr(packet, "rx_snr", None)
-    rx_snr = _decimal_from(rx_snr_raw, places=2) if rx_snr_raw is not None else None
-    rx_time = getattr(packet, "rx_time", None)
-    hop_limit = getattr(packet, "hop_limit", None)
-    hop_start = getattr(packet, "hop_start", None)
-    hops = (
-        0
-        if hop_limit is None
-        else (hop_start - hop_limit) if hop_start is not None else 0
+    fields = _extract_packet_fields(packet, iface=iface, channel_id=channel_id)
+
+    # Admission only needs the sender and port, so shed packets cost no writes.
+    # Repeat copies of a packet already processed are not charged.
+    duplicate_window = get_duplicate_window()
+    channel_cache = get_channel_cache()
+    channel = decrypted = None
+    if duplicate_window.peek(from_node_num, fields["packet_id"]) is None:
+        channel = channel_cache.get_channel(channel_id, fields["channel_num"])
+        admitted, decrypted = _admit_packet(
+            packet,
+            key=channel.psk if channel.psk else "AQ==",
+            pki_encrypted=fields["pki_encrypted"],
+            context=normalized.get("context"),
+        )
+        clock.lap("admission")
+        if not admitted:
+            return packet, None, None, None, None, None
+
+    # Every admitted copy is archived, duplicates included
+    raw_ref = archive_envelope(
+        normalized, from_num=from_node_num, packet_id=fields["packet_id"]
     )
-    first_hop = getattr(packet, "first_hop", None)
-    next_hop = getattr(packet, "next_hop", None)
-    pki_encrypted = getattr(packet, "pki_encrypted", False) or channel_id == "PKI"
-    want_ack = getattr(packet, "want_ack", None)
-    ackd = False if want_ack is True else None
-    relay_node = getattr(packet, "relay_node", None)
-    delayed = getattr(packet, "delayed", False)
-    via_mqtt = True if iface == "MQTT" else getattr(packet, "via_mqtt", False)
-    public_key = getattr(packet, "public_key", None)
-    priority = getattr(packet, "priority", None)
 
     from_node = _get_or_update_node(
         node_num=from_node_num,
         node_id=from_node_id,
         mac_address=from_node_mac,
     )
-    from_node.update_last_seen()
-    from_node.interfaces.add(interface)
-    from_node.save()
+    touch_last_seen(from_node)
     if gateway_node_id is not None:
         gateway_node = _get_or_update_node(
             node_num=gateway_node_num,
             node_id=gateway_node_id,
             mac_address=gateway_node_mac,
         )
-        gateway_node.update_last_seen()
-        gateway_node.interfaces.add(interface)
-        gateway_node.save()
+        touch_last_seen(gateway_node)
     logging.info(f"[Packet] To node: {to_node_num} ({to_node_id}, {to_node_mac})")
     to_node = _get_or_update_node(
         node_num=to_node_num,
         node_id=to_node_id,
         mac_address=to_node_mac,
     )
+    clock.lap("node_resolution")
 
-    channel, _ = Channel.objects.get_or_create(
-        channel_id=channel_id,
-        channel_num=channel_num,
-    )
-    channel.interfaces.add(interface)
-    channel.members.add(from_node)
-    channel.members.add(to_node)
-    channel.save()
+    seen = duplicate_window.lookup(from_node_num, fields["packet_id"])
+    if seen is not None:
+        if _record_duplicate_copy(
+            seen,
+            interface=interface,
+            from_node=from_node,
+            gateway_node=gateway_node,
+            gateway_node_id=gateway_node_id,
+            fields=fields,
+        ):
+            logging.info(
+                f"[Packet] Duplicate copy of {fields['packet_id']} from {from_node_id} via {gateway_node_id}"
+            )
+            clock.lap("duplicate_copy")
+            return packet, None, None, from_node, to_node, None
+        # The first copy's row is gone; process this copy from scratch.
+        duplicate_window.forget(from_node_num, fields["packet_id"])
+    clock.lap("dedup")
+
+    if channel is None:
+        channel = channel_cache.get_channel(channel_id, fields["channel_num"])
+    key = channel.psk if channel.psk else "AQ=="
 
-    packet_obj, _ = Packet.objects.get_or_create(
-        packet_id=packet_id,
+    from_node.interfaces.add(interface)
+    if gateway_node is not None:
+        gateway_node.interfaces.add(interface)
+
+    channel_cache.link(channel, interfaces=(interface,), members=(from_node, to_node))
+    channel_cache.touch((channel.pk,))
+    clock.lap("channel_membership")
+
+    packet_obj = Packet(
+        packet_id=fields["packet_id"],
         from_node=from_node,
         to_node=to_node,
+        raw_segment=raw_ref.segment if raw_ref else None,
+        raw_offset=raw_ref.offset if raw_ref else None,
+        **{field_name: fields[field_name] for field_name in PACKET_HEADER_FIELDS},
     )
+    upsert_packets([packet_obj], update_fields=PACKET_HEADER_FIELDS)
     packet_obj.interfaces.add(interface)
-    packet_obj.save()
-
-    def _set_field(field_name: str, value: Any):
-        if hasattr(packet_obj, field_name):
-            setattr(packet_obj, field_name, value)
-
-    _set_field("rx_rssi", rx_rssi)
-    _set_field("rx_snr", rx_snr)
-    _set_field("rx_time", rx_time)
-    _set_field("hop_limit", hop_limit)
-    _set_field("hop_start", hop_start)
-    _set_field("first_hop", first_hop)
-    _set_field("next_hop", next_hop)
-    _set_field("relay_node", relay_node)
-    _set_field("want_ack", want_ack)
-    _set_field("ackd", ackd)
-    _set_field("priority", priority)
-    _set_field("delayed", delayed)
-    _set_field("via_mqtt", via_mqtt)
-    _set_field("pki_encrypted", pki_encrypted)
-    _set_field("public_key", public_key)
-
     packet_obj.channels.add(channel)
     packet_obj.gateway_nodes.add(gateway_node) if gateway_node_id else None
-    packet_obj.save()
+    clock.lap("packet_upsert")
 
-    NodeLink.objects.record_activity(
+    record_link_activity(
         from_node=from_node,
         to_node=to_node,
         packet=packet_obj,
         channel=channel,
     )
+    clock.lap("link_activity")
 
-    # Replace edge creation to handle absence of gateway_node
-    target_for_edge = gateway_node if gateway_node else None
-    if target_for_edge is not None:
-        link_edge, _ = Edge.objects.get_or_create(
-            source_node=from_node, target_node=target_for_edge
+    if gateway_node is not None:
+        _upsert_gateway_edge(from_node, gateway_node, packet_obj.pk, fields)
+    PacketObservation.objects.create(
+        **_observation_kwargs(
+            packet_obj.pk, interface=interface, gateway_node=gateway_node, fields=fields
         )
-        link_edge.last_packet = packet_obj  # type: ignore[assignment]
-        link_edge.last_rx_rssi = rx_rssi
-        link_edge.last_rx_snr = rx_snr
-        link_edge.last_hops = hops
-        link_edge.save()
+    )
+    clock.lap("edge_observation")
 
     logging.info(
         f"[Packet] from: {from_node_num} ({from_node_id}, {from_node_mac}) >----> to: {to_node_num} ({to_node_id}, {to_node_mac})"
@@ -1300,18 +1631,27 @@ def on_message(client, userdata, normalized, iface="MQTT"):
         from_node=from_node,
         to_node=to_node,
         packet_obj=packet_obj,
-        key=channel.psk if channel.psk else "AQ==",
-        pki_encrypted=pki_encrypted,
+        key=key,
+        pki_encrypted=fields["pki_encrypted"],
+        context=normalized.get("context"),
+        decrypted=decrypted,
     )
+    clock.lap("handle_packet")
 
-    # After packet processing, check if publisher service should react
-    _dispatch_to_publisher_service(
-        packet=packet,
-        decoded_data=decoded_data,
-        portnum=portnum,
-        from_node=from_node,
-        to_node=to_node,
-        packet_obj=packet_obj,
-    )
+    # Undecryptable copies are remembered too; decoding them again cannot succeed.
+    duplicate_window.remember(from_node_num, fields["packet_id"], packet_obj.pk)
+
+    # After packet processing, check if publisher service should react.
+    # Packets that could not be decoded never reach the reactive publisher.
+    if decoded_data is not None:
+        _dispatch_to_publisher_service(
+            packet=packet,
+            decoded_data=decoded_data,
+            portnum=portnum,
+            from_node=from_node,
+            to_node=to_node,
+            packet_obj=packet_obj,
+        )
+        clock.lap("publisher_dispatch")
 
     return packet, decoded_data, portnum, from_node, to_node, packet_obj
@@ -0,0 +1,115 @@
+"""Time-bucketed packet identity and the idempotent Packet insert path.
+
+Meshtastic packet ids are only unique per sender for a while: they wrap, so
+matching on ``(packet_id, from_node)`` alone can hit a months-old row. A packet
+is identified by ``(from_node, packet_id, identity_bucket)`` instead, where the
+bucket is the reception time divided by ``PACKET_IDENTITY_BUCKET_SECS``, and
+the ``unique_packet_identity`` constraint enforces it. Rows are written with
+``INSERT ... ON CONFLICT DO UPDATE``, so ingest workers that receive the same
+packet concurrently converge on a single row.
+
+A copy received within ``PACKET_IDENTITY_GRACE_SECS`` after a bucket boundary
+joins the previous bucket's row when there is one. Rows written before the
+identity existed have no bucket and are never matched. Neither are packets
+without an id (``packet_id`` 0 or missing): nothing tells two of them apart, so
+each is inserted as its own row without a bucket.
+"""
+
+from datetime import datetime
+from typing import Iterable, Optional, Sequence
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from ...models.packet_models import Packet
+
+IDENTITY_FIELDS = ("from_node", "packet_id", "identity_bucket")
+
+
+def _bucket_secs() -> int:
+    return max(1, int(getattr(settings, "PACKET_IDENTITY_BUCKET_SECS", 86_400)))
+
+
+def identity_bucket(moment: datetime) -> int:
+    return int(moment.timestamp()) // _bucket_secs()
+
+
+def candidate_buckets(moment: datetime) -> tuple[int, ...]:
+    """Buckets a copy received at ``moment`` may belong to, newest last."""
+    bucket = identity_bucket(moment)
+    grace = getattr(settings, "PACKET_IDENTITY_GRACE_SECS", 600)
+    if grace > 0 and int(moment.timestamp()) - bucket * _bucket_secs() < grace:
+        return (bucket - 1, bucket)
+    return (bucket,)
+
+
+def _previous_bucket_rows(
+    packets: Sequence[Packet], bucket: int
+) -> dict[tuple[int, int], int]:
+    keys = {
+        (packet.from_node_id, packet.packet_id)
+        for packet in packets
+        if packet.packet_id is not None
+    }
+    if not keys:
+        return {}
+    condition = Q()
+    for from_pk in {from_pk for from_pk, _ in keys}:
+        condition |= Q(
+            from_node_id=from_pk,
+            packet_id__in=[packet_id for pk, packet_id in keys if pk == from_pk],
+        )
+    return {
+        (from_pk, packet_id): bucket
+        for from_pk, packet_id in Packet.objects.filter(
+            condition, identity_bucket=bucket
+        ).values_list("from_node_id", "packet_id")
+    }
+
+
+def upsert_packets(
+    packets: Sequence[Packet],
+    *,
+    update_fields: Iterable[str],
+    now: Optional[datetime] = None,
+) -> Sequence[Packet]:
+    """Insert unsaved ``packets`` or update ``update_fields`` of their existing rows.
+
+    Every packet with an id must have a distinct identity; packets without one
+    are always inserted. On return each packet has its row's pk, bucket and
+    original reception ``time``.
+    """
+    if not packets:
+        return packets
+    identified = [packet for packet in packets if packet.packet_id]
+    anonymous = [packet for packet in packets if not packet.packet_id]
+    now = now or timezone.now()
+    buckets = candidate_buckets(now)
+    previous = _previous_bucket_rows(identified, buckets[0]) if len(buckets) > 1 else {}
+    for packet in identified:
+        packet.identity_bucket = previous.get(
+            (packet.from_node_id, packet.packet_id), buckets[-1]
+        )
+
+    if identified:
+        Packet.objects.bulk_create(
+            identified,
+            update_conflicts=True,
+            unique_fields=list(IDENTITY_FIELDS),
+            update_fields=list(update_fields),
+        )
+    if anonymous:
+        for packet in anonymous:
+            # NULL never conflicts, so the identity constraint lets these through.
+            packet.identity_bucket = None
+        Packet.objects.bulk_create(anonymous)
+    # Conflicting rows keep the reception time of the first copy.
+    times = dict(
+        Packet.objects.filter(pk__in=[packet.pk for packet in packets]).values_list(
+            "pk", "time"
+        )
+    )
+    for packet in packets:
+        packet.time = times.get(packet.pk, packet.time)
+    return packets
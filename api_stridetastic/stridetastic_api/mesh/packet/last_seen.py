@@ -0,0 +1,183 @@
+"""Coalesced ``Node.last_seen`` updates for the packet handler.
+
+Every packet marks its sender, gateway and any nodes named in its payload as
+seen. Instead of saving each Node, `LastSeenTracker` keeps the newest
+timestamp per node in memory and writes them all with one
+``UPDATE ... FROM (VALUES ...)`` every ``NODE_LAST_SEEN_FLUSH_SECS``.
+
+Readers that need current values (keepalive checks, reachability marking)
+call `flush_last_seen()` first. Code replaying stored packets wraps the
+handlers in `last_seen_at(packet.time)` so nodes are marked seen when the packet
+was received, not now.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Optional
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from ...models import Node
+
+logger = logging.getLogger(__name__)
+
+_default_seen_at: ContextVar[Optional[datetime]] = ContextVar(
+    "last_seen_at", default=None
+)
+
+
+class LastSeenTracker:
+    """Thread-safe per-node max(last_seen) aggregator."""
+
+    def __init__(self, *, flush_interval: float = 5.0):
+        self.flush_interval = max(0.0, float(flush_interval))
+        self._pending: dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.touches = 0
+        self.flushes = 0
+        self.rows_flushed = 0
+
+    def touch(self, node: Node, seen_at: Optional[datetime] = None) -> None:
+        if node is None or node.pk is None:
+            return
+        seen_at = seen_at or timezone.now()
+        with self._lock:
+            self.touches += 1
+            current = self._pending.get(node.pk)
+            if current is None or seen_at > current:
+                self._pending[node.pk] = seen_at
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        # Inside a transaction the UPDATE would hold node row locks until commit
+        # and vanish on rollback; a later touch or the flusher thread writes it.
+        if due and not connection.in_atomic_block:
+            self.flush()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """Write all pending timestamps; returns the number of nodes flushed."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._last_flush = time.monotonic()
+            if not batch:
+                return 0
+            try:
+                self._write(batch)
+            except Exception:
+                logger.exception(
+                    "[LastSeen] Failed to flush %d node timestamps", len(batch)
+                )
+                with self._lock:
+                    for node_pk, seen_at in batch.items():
+                        current = self._pending.get(node_pk)
+                        if current is None or seen_at > current:
+                            self._pending[node_pk] = seen_at
+                return 0
+            with self._lock:
+                self.flushes += 1
+                self.rows_flushed += len(batch)
+            return len(batch)
+
+    def _write(self, batch: dict[int, datetime]) -> None:
+        table = connection.ops.quote_name(Node._meta.db_table)
+        pk_column = connection.ops.quote_name(Node._meta.pk.column)
+        last_seen_column = connection.ops.quote_name(
+            Node._meta.get_field("last_seen").column
+        )
+        placeholders = ", ".join(["(%s, %s::timestamptz)"] * len(batch))
+        params: list[object] = []
+        # Stable row order keeps concurrent flushers from deadlocking.
+        for node_pk, seen_at in sorted(batch.items()):
+            params.extend((node_pk, seen_at))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} AS node SET {last_seen_column} = seen.last_seen "
+                f"FROM (VALUES {placeholders}) AS seen(id, last_seen) "
+                f"WHERE node.{pk_column} = seen.id "
+                f"AND (node.{last_seen_column} IS NULL "
+                f"OR node.{last_seen_column} < seen.last_seen)",
+                params,
+            )
+
+    def start(self) -> None:
+        """Run a background flusher so idle periods still get persisted."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="last-seen-flusher", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        thread = self._thread
+        if thread and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout=max(1.0, self.flush_interval * 2))
+        self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        try:
+            while not self._stop_event.wait(max(0.5, self.flush_interval)):
+                close_old_connections()
+                self.flush()
+        finally:
+            connection.close()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "touches": self.touches,
+                "flushes": self.flushes,
+                "rows_flushed": self.rows_flushed,
+                "flush_interval_secs": self.flush_interval,
+            }
+
+
+_tracker: Optional[LastSeenTracker] = None
+_tracker_lock = threading.Lock()
+
+
+def get_last_seen_tracker() -> LastSeenTracker:
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = LastSeenTracker(
+                flush_interval=getattr(settings, "NODE_LAST_SEEN_FLUSH_SECS", 5)
+            )
+        return _tracker
+
+
+@contextmanager
+def last_seen_at(moment: datetime):
+    """Default timestamp of `touch_last_seen` calls made inside the block."""
+    token = _default_seen_at.set(moment)
+    try:
+        yield
+    finally:
+        _default_seen_at.reset(token)
+
+
+def touch_last_seen(node: Node, seen_at: Optional[datetime] = None) -> None:
+    get_last_seen_tracker().touch(node, seen_at or _default_seen_at.get())
+
+
+def flush_last_seen() -> int:
+    """Synchronously persist pending last-seen timestamps of this process."""
+    return get_last_seen_tracker().flush()
@@ -0,0 +1,281 @@
+"""Write-behind aggregation of logical link (`NodeLink`) activity.
+
+`NodeLinkManager.record_activity` costs about five queries per packet, all
+contending on the same hot link rows. `LinkActivityAggregator` instead keeps
+per-link deltas in memory (packets per direction, newest activity and packet,
+channels seen) and every ``LINK_ACTIVITY_FLUSH_SECS`` writes them with a
+single ``INSERT ... ON CONFLICT DO UPDATE``: counters are added to the stored
+values and ``is_bidirectional`` is derived from the summed counters in SQL.
+
+Links therefore lag by at most the flush interval; readers in the ingest
+process that need exact values call `flush_link_activity()` first. A flush
+interval of 0 writes on every packet (still one upsert instead of five
+queries). Flushes never run inside the caller's transaction; deltas recorded
+there are written by the next flush after it, and a delta whose packet was
+rolled back keeps its counts but not the packet reference.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from ...models import Channel, Node, NodeLink
+from ...models.packet_models import Packet
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _LinkDelta:
+    a_to_b: int = 0
+    b_to_a: int = 0
+    last_activity: Optional[datetime] = None
+    last_packet_pk: Optional[int] = None
+    channel_pks: set[int] = field(default_factory=set)
+
+    def merge(self, other: "_LinkDelta") -> None:
+        self.a_to_b += other.a_to_b
+        self.b_to_a += other.b_to_a
+        if other.last_activity is not None and (
+            self.last_activity is None or other.last_activity >= self.last_activity
+        ):
+            self.last_activity = other.last_activity
+            self.last_packet_pk = other.last_packet_pk
+        self.channel_pks |= other.channel_pks
+
+
+class LinkActivityAggregator:
+    """Thread-safe accumulator of per-link packet deltas."""
+
+    def __init__(self, *, flush_interval: float = 5.0):
+        self.flush_interval = max(0.0, float(flush_interval))
+        self._pending: dict[tuple[int, int], _LinkDelta] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.records = 0
+        self.flushes = 0
+        self.links_flushed = 0
+
+    def record(
+        self,
+        *,
+        from_node: Node,
+        to_node: Node,
+        packet: Packet,
+        channel: Optional[Channel] = None,
+    ) -> None:
+        """Count ``packet`` on the logical link between the two nodes."""
+        if from_node.pk == to_node.pk:
+            return
+        node_a, node_b, direction = NodeLink.objects._normalize_nodes(
+            from_node, to_node
+        )
+        delta = _LinkDelta(
+            a_to_b=int(direction == "node_a_to_node_b"),
+            b_to_a=int(direction == "node_b_to_node_a"),
+            last_activity=getattr(packet, "time", None) or timezone.now(),
+            last_packet_pk=packet.pk,
+            channel_pks={channel.pk} if channel is not None else set(),
+        )
+        with self._lock:
+            self.records += 1
+            pending = self._pending.get((node_a.pk, node_b.pk))
+            if pending is None:
+                self._pending[(node_a.pk, node_b.pk)] = delta
+            else:
+                pending.merge(delta)
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        # A flush inside the ingest transaction would be lost with its rollback.
+        if due and not connection.in_atomic_block:
+            self.flush()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """Upsert all pending link deltas; returns the number of links written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._last_flush = time.monotonic()
+            if not batch:
+                return 0
+            try:
+                with transaction.atomic():
+                    self._write(batch)
+            except Exception:
+                logger.exception(
+                    "[LinkActivity] Failed to flush %d link deltas", len(batch)
+                )
+                with self._lock:
+                    for key, delta in batch.items():
+                        pending = self._pending.get(key)
+                        if pending is None:
+                            self._pending[key] = delta
+                        else:
+                            delta.merge(pending)
+                            self._pending[key] = delta
+                return 0
+            with self._lock:
+                self.flushes += 1
+                self.links_flushed += len(batch)
+            return len(batch)
+
+    def _write(self, batch: dict[tuple[int, int], _LinkDelta]) -> None:
+        qn = connection.ops.quote_name
+        meta = NodeLink._meta
+        table = qn(meta.db_table)
+
+        def column(name: str) -> str:
+            return qn(meta.get_field(name).column)
+
+        a_col, b_col = column("node_a"), column("node_b")
+        a_to_b, b_to_a = column("node_a_to_node_b_packets"), column(
+            "node_b_to_node_a_packets"
+        )
+        bidirectional = column("is_bidirectional")
+        first_seen, last_activity = column("first_seen"), column("last_activity")
+        last_packet = column("last_packet")
+        node_table = qn(Node._meta.db_table)
+        packet_table = qn(Packet._meta.db_table)
+
+        placeholders = ", ".join(
+            ["(%s::bigint, %s::bigint, %s::int, %s::int, %s::timestamptz, %s::bigint)"]
+            * len(batch)
+        )
+        params: list[object] = []
+        # Stable row order keeps concurrent flushers from deadlocking.
+        for (node_a_pk, node_b_pk), delta in sorted(batch.items()):
+            params.extend(
+                (
+                    node_a_pk,
+                    node_b_pk,
+                    delta.a_to_b,
+                    delta.b_to_a,
+                    delta.last_activity,
+                    delta.last_packet_pk,
+                )
+            )
+
+        # Joins drop deltas whose nodes or packet were deleted meanwhile.
+        sql = (
+            f"WITH delta(node_a, node_b, a_to_b, b_to_a, last_activity, last_packet) "
+            f"AS (VALUES {placeholders}) "
+            f"INSERT INTO {table} AS link ({a_col}, {b_col}, {a_to_b}, {b_to_a}, "
+            f"{bidirectional}, {first_seen}, {last_activity}, {last_packet}) "
+            f"SELECT delta.node_a, delta.node_b, delta.a_to_b, delta.b_to_a, "
+            f"delta.a_to_b > 0 AND delta.b_to_a > 0, now(), delta.last_activity, "
+            f"packet.id "
+            f"FROM delta "
+            f"JOIN {node_table} node_a ON node_a.id = delta.node_a "
+            f"JOIN {node_table} node_b ON node_b.id = delta.node_b "
+            f"LEFT JOIN {packet_table} packet ON packet.id = delta.last_packet "
+            f"ORDER BY delta.node_a, delta.node_b "
+            f"ON CONFLICT ({a_col}, {b_col}) DO UPDATE SET "
+            f"{a_to_b} = link.{a_to_b} + EXCLUDED.{a_to_b}, "
+            f"{b_to_a} = link.{b_to_a} + EXCLUDED.{b_to_a}, "
+            f"{bidirectional} = link.{bidirectional} OR ("
+            f"link.{a_to_b} + EXCLUDED.{a_to_b} > 0 "
+            f"AND link.{b_to_a} + EXCLUDED.{b_to_a} > 0), "
+            f"{last_packet} = CASE WHEN EXCLUDED.{last_activity} >= link.{last_activity} "
+            f"THEN COALESCE(EXCLUDED.{last_packet}, link.{last_packet}) "
+            f"ELSE link.{last_packet} END, "
+            f"{last_activity} = GREATEST(link.{last_activity}, EXCLUDED.{last_activity}) "
+            f"RETURNING link.id, link.{a_col}, link.{b_col}"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            link_pks = {(row[1], row[2]): row[0] for row in cursor.fetchall()}
+
+        through = NodeLink.channels.through
+        channel_rows = [
+            through(nodelink_id=link_pks[key], channel_id=channel_pk)
+            for key, delta in batch.items()
+            if key in link_pks
+            for channel_pk in delta.channel_pks
+        ]
+        if channel_rows:
+            through.objects.bulk_create(channel_rows, ignore_conflicts=True)
+
+    def start(self) -> None:
+        """Run a background flusher so idle periods still get persisted."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="link-activity-flusher", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        thread = self._thread
+        if thread and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout=max(1.0, self.flush_interval * 2))
+        self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        try:
+            while not self._stop_event.wait(max(0.5, self.flush_interval)):
+                close_old_connections()
+                self.flush()
+        finally:
+            connection.close()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pending.clear()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "records": self.records,
+                "flushes": self.flushes,
+                "links_flushed": self.links_flushed,
+                "flush_interval_secs": self.flush_interval,
+            }
+
+
+_aggregator: Optional[LinkActivityAggregator] = None
+_aggregator_lock = threading.Lock()
+
+
+def get_link_activity_aggregator() -> LinkActivityAggregator:
+    global _aggregator
+    with _aggregator_lock:
+        if _aggregator is None:
+            _aggregator = LinkActivityAggregator(
+                flush_interval=getattr(settings, "LINK_ACTIVITY_FLUSH_SECS", 5)
+            )
+        return _aggregator
+
+
+def record_link_activity(
+    *,
+    from_node: Node,
+    to_node: Node,
+    packet: Packet,
+    channel: Optional[Channel] = None,
+) -> None:
+    get_link_activity_aggregator().record(
+        from_node=from_node, to_node=to_node, packet=packet, channel=channel
+    )
+
+
+def flush_link_activity() -> int:
+    """Synchronously persist pending link deltas of this process."""
+    return get_link_activity_aggregator().flush()
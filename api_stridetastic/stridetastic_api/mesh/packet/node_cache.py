@@ -0,0 +1,173 @@
+"""Bounded in-process cache of node identities used by the packet handler.
+
+Maps ``node_num`` to ``(pk, node_id, mac_address)`` so `_get_or_update_node`
+can hand back a Node without touching the database. Cached nodes are built
+with every non-identity field deferred: reading e.g. ``public_key`` loads the
+current value lazily, and ``save()`` only writes fields that were loaded or
+assigned, so a cached instance never overwrites fresher columns.
+
+Entries expire after ``NODE_IDENTITY_CACHE_TTL_SECS`` which bounds how long
+another process (API vs. Celery worker) can observe an identity edit late.
+Edits made through `VirtualNodeService` invalidate the local cache right away.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from django.conf import settings
+from django.db import router, transaction
+
+from ...models import Node
+
+IDENTITY_FIELDS = ("id", "node_num", "node_id", "mac_address")
+
+
+@dataclass(frozen=True)
+class NodeIdentity:
+    pk: int
+    node_num: int
+    node_id: str
+    mac_address: str
+    cached_at: float
+
+
+class NodeIdentityCache:
+    """Thread-safe LRU of node identities with hit/miss counters."""
+
+    def __init__(self, *, max_size: int = 10_000, ttl_seconds: float = 300.0):
+        self.max_size = max(0, int(max_size))
+        self.ttl_seconds = float(ttl_seconds)
+        self._entries: "OrderedDict[int, NodeIdentity]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def lookup(self, node_num: int) -> Optional[NodeIdentity]:
+        with self._lock:
+            entry = self._entries.get(node_num)
+            if entry is not None and (
+                self.ttl_seconds <= 0
+                or time.monotonic() - entry.cached_at < self.ttl_seconds
+            ):
+                self._entries.move_to_end(node_num)
+                self.hits += 1
+                return entry
+            if entry is not None:
+                del self._entries[node_num]
+            self.misses += 1
+            return None
+
+    def get_node(
+        self,
+        node_num: int,
+        *,
+        node_id: Optional[str] = None,
+        mac_address: Optional[str] = None,
+    ) -> Optional[Node]:
+        """Return a deferred Node for a cached identity that still matches."""
+        entry = self.lookup(node_num)
+        if entry is None:
+            return None
+        if (node_id is not None and entry.node_id != node_id) or (
+            mac_address is not None and entry.mac_address != mac_address
+        ):
+            # Identity drifted; let the caller take the database path.
+            return None
+        return Node.from_db(
+            router.db_for_read(Node),
+            list(IDENTITY_FIELDS),
+            [entry.pk, entry.node_num, entry.node_id, entry.mac_address],
+        )
+
+    def remember(
+        self, *, pk: int, node_num: int, node_id: str, mac_address: str
+    ) -> None:
+        """Cache an identity; call once its row is committed (see `remember_on_commit`)."""
+        if not self.max_size:
+            return
+        entry = NodeIdentity(
+            pk=pk,
+            node_num=node_num,
+            node_id=node_id,
+            mac_address=mac_address,
+            cached_at=time.monotonic(),
+        )
+        with self._lock:
+            self._entries[node_num] = entry
+            self._entries.move_to_end(node_num)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *, node_num: Optional[int] = None, pk: Optional[int] = None):
+        with self._lock:
+            if node_num is not None and self._entries.pop(node_num, None) is not None:
+                self.invalidations += 1
+            if pk is not None:
+                for cached_num in [
+                    cached_num
+                    for cached_num, entry in self._entries.items()
+                    if entry.pk == pk
+                ]:
+                    del self._entries[cached_num]
+                    self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+def remember_on_commit(node: Node) -> None:
+    """Cache ``node`` once the surrounding transaction commits.
+
+    Rows created inside a transaction that later rolls back must never be
+    cached, otherwise later packets would reference a missing primary key.
+    """
+    identity = {
+        "pk": node.pk,
+        "node_num": node.node_num,
+        "node_id": node.node_id,
+        "mac_address": node.mac_address,
+    }
+    transaction.on_commit(lambda: get_node_identity_cache().remember(**identity))
+
+
+_cache: Optional[NodeIdentityCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_node_identity_cache() -> NodeIdentityCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = NodeIdentityCache(
+                max_size=getattr(settings, "NODE_IDENTITY_CACHE_SIZE", 10_000),
+                ttl_seconds=getattr(settings, "NODE_IDENTITY_CACHE_TTL_SECS", 300),
+            )
+        return _cache
+
+
+def invalidate_node_identity(node: Node, *, node_num: Optional[int] = None) -> None:
+    """Drop a node (and optionally a previous node_num) from the local cache."""
+    cache = get_node_identity_cache()
+    cache.invalidate(node_num=node.node_num, pk=node.pk)
+    if node_num is not None:
+        cache.invalidate(node_num=node_num)
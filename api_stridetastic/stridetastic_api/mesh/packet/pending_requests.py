@@ -0,0 +1,287 @@
+"""Registry of outstanding mesh requests awaiting a response.
+
+Responses (routing ACKs, traceroute replies, NodeInfo answers) only carry the
+``request_id`` of the packet they answer. Instead of searching the Packet and
+NodeLatencyHistory tables for that id, requests are registered here when they
+are sent (`PublisherService.publish_traceroute` / `publish_reachability_probe`,
+and therefore keepalive probes) or observed (packets with ``want_response`` or
+``want_ack`` addressed to a single node). Entries are keyed by
+``(message_id, node_num)``, where ``node_num`` is the node expected to answer,
+and expire after ``PENDING_REQUEST_TTL_SECS``.
+
+``PENDING_REQUEST_BACKEND`` selects the storage: ``memory`` keeps entries in
+this process, ``redis`` shares them between processes through
+``PENDING_REQUEST_REDIS_URL``. A request registered in one process (a Celery
+worker publishing a traceroute, an ingest worker observing a packet) is only
+matched in another one with ``redis``; the ingest worker pool warns at startup
+when it runs with ``memory``.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, fields, replace
+from datetime import datetime, timezone
+from typing import Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+BACKEND_MEMORY = "memory"
+BACKEND_REDIS = "redis"
+
+
+@dataclass(frozen=True)
+class PendingRequest:
+    message_id: int
+    node_num: int
+    from_node_num: Optional[int] = None
+    sent_at: Optional[float] = None
+    packet_pk: Optional[int] = None
+    history_pk: Optional[int] = None
+
+    @property
+    def sent_at_datetime(self) -> Optional[datetime]:
+        if self.sent_at is None:
+            return None
+        return datetime.fromtimestamp(self.sent_at, tz=timezone.utc)
+
+    def merged(self, other: "PendingRequest") -> "PendingRequest":
+        """Fill in fields from ``other``; the first ``sent_at`` wins."""
+        return replace(
+            self,
+            from_node_num=other.from_node_num or self.from_node_num,
+            sent_at=self.sent_at if self.sent_at is not None else other.sent_at,
+            packet_pk=other.packet_pk or self.packet_pk,
+            history_pk=other.history_pk or self.history_pk,
+        )
+
+
+class InMemoryPendingBackend:
+    """Per-process TTL map, evicting the oldest entries beyond ``max_size``."""
+
+    def __init__(self, *, ttl_seconds: float, max_size: int):
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_size = max(1, int(max_size))
+        self._entries: "OrderedDict[tuple[int, int], tuple[float, PendingRequest]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def put(self, request: PendingRequest) -> PendingRequest:
+        key = (request.message_id, request.node_num)
+        now = time.monotonic()
+        with self._lock:
+            current = self._entries.pop(key, None)
+            if current is not None and current[0] > now:
+                request = current[1].merged(request)
+            self._entries[key] = (now + self.ttl_seconds, request)
+            self._purge(now)
+        return request
+
+    def get(self, message_id: int, node_num: int) -> Optional[PendingRequest]:
+        key = (message_id, node_num)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            return entry[1]
+
+    def discard(self, message_id: int, node_num: int) -> None:
+        with self._lock:
+            self._entries.pop((message_id, node_num), None)
+
+    def _purge(self, now: float) -> None:
+        # Entries are ordered by expiry since the TTL is the same for all.
+        while self._entries:
+            key, (expires_at, _) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.max_size:
+                break
+            if expires_at > now:
+                self.evictions += 1
+            del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class RedisPendingBackend:
+    """Entries shared between processes as Redis hashes with an expiry."""
+
+    def __init__(self, *, url: str, ttl_seconds: float, prefix: str = "pending"):
+        import redis  # type: ignore[import]
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = max(1, int(ttl_seconds))
+        self.prefix = prefix
+
+    def _key(self, message_id: int, node_num: int) -> str:
+        return f"{self.prefix}:{message_id}:{node_num}"
+
+    def put(self, request: PendingRequest) -> PendingRequest:
+        key = self._key(request.message_id, request.node_num)
+        values = {
+            field.name: getattr(request, field.name)
+            for field in fields(request)
+            if field.name not in ("message_id", "node_num", "sent_at")
+            and getattr(request, field.name) is not None
+        }
+        pipe = self.client.pipeline(transaction=False)
+        if request.sent_at is not None:
+            pipe.hsetnx(key, "sent_at", request.sent_at)
+        if values:
+            pipe.hset(key, mapping=values)
+        pipe.expire(key, self.ttl_seconds)
+        pipe.execute()
+        return self.get(request.message_id, request.node_num) or request
+
+    def get(self, message_id: int, node_num: int) -> Optional[PendingRequest]:
+        raw = self.client.hgetall(self._key(message_id, node_num))
+        if not raw:
+            return None
+        values = {key.decode(): value.decode() for key, value in raw.items()}
+        return PendingRequest(
+            message_id=message_id,
+            node_num=node_num,
+            from_node_num=_optional_int(values.get("from_node_num")),
+            sent_at=(float(values["sent_at"]) if "sent_at" in values else None),
+            packet_pk=_optional_int(values.get("packet_pk")),
+            history_pk=_optional_int(values.get("history_pk")),
+        )
+
+    def discard(self, message_id: int, node_num: int) -> None:
+        self.client.delete(self._key(message_id, node_num))
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=f"{self.prefix}:*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+def _optional_int(value: Optional[str]) -> Optional[int]:
+    return int(value) if value not in (None, "") else None
+
+
+class PendingRequestRegistry:
+    """Register outstanding requests and match responses against them."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.registered = 0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def register(
+        self,
+        message_id: Optional[int],
+        node_num: Optional[int],
+        *,
+        from_node_num: Optional[int] = None,
+        sent_at: Optional[datetime] = None,
+        packet_pk: Optional[int] = None,
+        history_pk: Optional[int] = None,
+    ) -> Optional[PendingRequest]:
+        """Record (or enrich) the request ``message_id`` sent to ``node_num``."""
+        if not message_id or node_num is None:
+            return None
+        request = PendingRequest(
+            message_id=int(message_id),
+            node_num=int(node_num),
+            from_node_num=from_node_num,
+            sent_at=(sent_at.timestamp() if sent_at is not None else time.time()),
+            packet_pk=packet_pk,
+            history_pk=history_pk,
+        )
+        try:
+            stored = self.backend.put(request)
+        except Exception:
+            logger.exception("[PendingRequests] Failed to register %s", request)
+            with self._lock:
+                self.errors += 1
+            return None
+        with self._lock:
+            self.registered += 1
+        return stored
+
+    def match(
+        self, request_id: Optional[int], node_num: Optional[int]
+    ) -> Optional[PendingRequest]:
+        """Return the request ``node_num`` answered with ``request_id``, if known."""
+        if not request_id or node_num is None:
+            return None
+        try:
+            request = self.backend.get(int(request_id), int(node_num))
+        except Exception:
+            logger.exception(
+                "[PendingRequests] Failed to look up request %s", request_id
+            )
+            request = None
+            with self._lock:
+                self.errors += 1
+        with self._lock:
+            if request is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return request
+
+    def discard(self, message_id: int, node_num: int) -> None:
+        self.backend.discard(message_id, node_num)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = {
+                "backend": (
+                    BACKEND_REDIS
+                    if isinstance(self.backend, RedisPendingBackend)
+                    else BACKEND_MEMORY
+                ),
+                "registered": self.registered,
+                "hits": self.hits,
+                "misses": self.misses,
+                "errors": self.errors,
+            }
+        if isinstance(self.backend, InMemoryPendingBackend):
+            stats["pending"] = len(self.backend)
+            stats["evictions"] = self.backend.evictions
+        return stats
+
+
+_registry: Optional[PendingRequestRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_pending_requests() -> PendingRequestRegistry:
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            ttl_seconds = getattr(settings, "PENDING_REQUEST_TTL_SECS", 900)
+            backend_name = getattr(settings, "PENDING_REQUEST_BACKEND", BACKEND_MEMORY)
+            if backend_name == BACKEND_REDIS:
+                backend = RedisPendingBackend(
+                    url=getattr(settings, "PENDING_REQUEST_REDIS_URL"),
+                    ttl_seconds=ttl_seconds,
+                )
+            else:
+                backend = InMemoryPendingBackend(
+                    ttl_seconds=ttl_seconds,
+                    max_size=getattr(settings, "PENDING_REQUEST_MAX", 100_000),
+                )
+            _registry = PendingRequestRegistry(backend)
+        return _registry
@@ -0,0 +1,126 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stridetastic_api", "0010_rename_interface_name_to_type"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PacketObservation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "time",
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        help_text="Timestamp when this copy was received.",
+                    ),
+                ),
+                (
+                    "rx_time",
+                    models.BigIntegerField(
+                        blank=True,
+                        help_text="Time when this copy was received (secs since 1970).",
+                        null=True,
+                    ),
+                ),
+                (
+                    "rx_rssi",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=2,
+                        help_text="Received Signal Strength Indicator (RSSI) of this copy.",
+                        max_digits=5,
+                        null=True,
+                    ),
+                ),
+                (
+                    "rx_snr",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=2,
+                        help_text="Signal-to-Noise Ratio (SNR) of this copy.",
+                        max_digits=4,
+                        null=True,
+                    ),
+                ),
+                (
+                    "hop_limit",
+                    models.IntegerField(
+                        blank=True, help_text="Hop limit of this copy.", null=True
+                    ),
+                ),
+                (
+                    "hop_start",
+                    models.IntegerField(
+                        blank=True, help_text="Hop start of this copy.", null=True
+                    ),
+                ),
+                (
+                    "relay_node",
+                    models.IntegerField(
+                        blank=True,
+                        help_text="Node that relayed this copy, if known.",
+                        null=True,
+                    ),
+                ),
+                (
+                    "is_duplicate",
+                    models.BooleanField(
+                        default=False,
+                        help_text="Whether this copy arrived after the packet was already processed.",
+                    ),
+                ),
+                (
+                    "gateway_node",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Gateway node that reported this copy, if known.",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="packet_observations",
+                        to="stridetastic_api.node",
+                    ),
+                ),
+                (
+                    "interface",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Interface on which this copy was received.",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="packet_observations",
+                        to="stridetastic_api.interface",
+                    ),
+                ),
+                (
+                    "packet",
+                    models.ForeignKey(
+                        help_text="The packet this copy belongs to.",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="observations",
+                        to="stridetastic_api.packet",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Packet Observation",
+                "verbose_name_plural": "Packet Observations",
+                "ordering": ["time"],
+            },
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stridetastic_api", "0011_packet_observation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NodeNeighbor",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "snr",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=2,
+                        help_text="Last reported SNR (in dB) for the neighbor link.",
+                        max_digits=5,
+                        null=True,
+                    ),
+                ),
+                (
+                    "last_rx_time",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="Timestamp (UTC) the reporting node last heard the neighbor.",
+                        null=True,
+                    ),
+                ),
+                (
+                    "node_broadcast_interval_secs",
+                    models.IntegerField(
+                        blank=True,
+                        help_text="Broadcast interval advertised for this neighbor (seconds).",
+                        null=True,
+                    ),
+                ),
+                (
+                    "reported_at",
+                    models.DateTimeField(
+                        auto_now=True, help_text="Timestamp of the latest report."
+                    ),
+                ),
+                (
+                    "last_packet",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="NeighborInfo packet of the latest report.",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="stridetastic_api.packet",
+                    ),
+                ),
+                (
+                    "neighbor_node",
+                    models.ForeignKey(
+                        help_text="Advertised neighbor node.",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="advertised_by",
+                        to="stridetastic_api.node",
+                    ),
+                ),
+                (
+                    "reporting_node",
+                    models.ForeignKey(
+                        help_text="Node that advertised the neighbor.",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="current_neighbors",
+                        to="stridetastic_api.node",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("reporting_node", "neighbor_node"),
+                        name="unique_current_neighbor",
+                    )
+                ],
+            },
+        ),
+    ]
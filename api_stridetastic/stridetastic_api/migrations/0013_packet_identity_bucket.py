@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stridetastic_api", "0012_node_neighbor"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="packet",
+            name="identity_bucket",
+            field=models.BigIntegerField(
+                blank=True,
+                editable=False,
+                help_text="Reception time bucket that, with the sender and packet_id, identifies the packet.",
+                null=True,
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="packet",
+            constraint=models.UniqueConstraint(
+                fields=("from_node", "packet_id", "identity_bucket"),
+                name="unique_packet_identity",
+            ),
+        ),
+    ]
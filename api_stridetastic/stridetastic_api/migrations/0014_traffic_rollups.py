@@ -0,0 +1,278 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stridetastic_api", "0013_packet_identity_bucket"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TrafficRollupState",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        help_text="Rollup this watermark belongs to.",
+                        max_length=32,
+                        unique=True,
+                    ),
+                ),
+                (
+                    "refreshed_until",
+                    models.DateTimeField(
+                        help_text="Buckets before this instant are materialized; later traffic is read from the packets."
+                    ),
+                ),
+                (
+                    "refreshed_at",
+                    models.DateTimeField(
+                        auto_now=True, help_text="When the rollup was last refreshed."
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Traffic Rollup State",
+                "verbose_name_plural": "Traffic Rollup States",
+            },
+        ),
+        migrations.CreateModel(
+            name="PortTrafficRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "bucket",
+                    models.DateTimeField(
+                        help_text="Start of the aggregated time bucket."
+                    ),
+                ),
+                (
+                    "port",
+                    models.CharField(
+                        blank=True,
+                        help_text="Port of the packet data; empty for packets that were not decoded.",
+                        max_length=32,
+                        null=True,
+                    ),
+                ),
+                (
+                    "portnum",
+                    models.IntegerField(
+                        blank=True,
+                        help_text="Port number of the packet data.",
+                        null=True,
+                    ),
+                ),
+                (
+                    "packets",
+                    models.BigIntegerField(help_text="Packets received in the bucket."),
+                ),
+                (
+                    "last_seen",
+                    models.DateTimeField(help_text="Latest packet time in the bucket."),
+                ),
+            ],
+            options={
+                "verbose_name": "Port Traffic Rollup",
+                "verbose_name_plural": "Port Traffic Rollups",
+                "indexes": [
+                    models.Index(
+                        fields=["bucket"], name="stridetasti_bucket_117846_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="ChannelTrafficRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "bucket",
+                    models.DateTimeField(
+                        help_text="Start of the aggregated time bucket."
+                    ),
+                ),
+                (
+                    "packets",
+                    models.BigIntegerField(help_text="Packets received in the bucket."),
+                ),
+                (
+                    "last_seen",
+                    models.DateTimeField(help_text="Latest packet time in the bucket."),
+                ),
+                (
+                    "channel",
+                    models.ForeignKey(
+                        help_text="The channel the packets were sent through.",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="stridetastic_api.channel",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Channel Traffic Rollup",
+                "verbose_name_plural": "Channel Traffic Rollups",
+                "indexes": [
+                    models.Index(
+                        fields=["bucket"], name="stridetasti_bucket_1cefd6_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="ReceiverPortTrafficRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "bucket",
+                    models.DateTimeField(
+                        help_text="Start of the aggregated time bucket."
+                    ),
+                ),
+                (
+                    "port",
+                    models.CharField(
+                        blank=True,
+                        help_text="Port of the packet data; empty for packets that were not decoded.",
+                        max_length=32,
+                        null=True,
+                    ),
+                ),
+                (
+                    "portnum",
+                    models.IntegerField(
+                        blank=True,
+                        help_text="Port number of the packet data.",
+                        null=True,
+                    ),
+                ),
+                (
+                    "packets",
+                    models.BigIntegerField(help_text="Packets received in the bucket."),
+                ),
+                (
+                    "last_seen",
+                    models.DateTimeField(help_text="Latest packet time in the bucket."),
+                ),
+                (
+                    "node",
+                    models.ForeignKey(
+                        help_text="The node the packets were addressed to.",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="stridetastic_api.node",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Receiver Port Traffic Rollup",
+                "verbose_name_plural": "Receiver Port Traffic Rollups",
+                "indexes": [
+                    models.Index(
+                        fields=["bucket"], name="stridetasti_bucket_dbc13a_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="SenderPortTrafficRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "bucket",
+                    models.DateTimeField(
+                        help_text="Start of the aggregated time bucket."
+                    ),
+                ),
+                (
+                    "port",
+                    models.CharField(
+                        blank=True,
+                        help_text="Port of the packet data; empty for packets that were not decoded.",
+                        max_length=32,
+                        null=True,
+                    ),
+                ),
+                (
+                    "portnum",
+                    models.IntegerField(
+                        blank=True,
+                        help_text="Port number of the packet data.",
+                        null=True,
+                    ),
+                ),
+                (
+                    "packets",
+                    models.BigIntegerField(help_text="Packets received in the bucket."),
+                ),
+                (
+                    "last_seen",
+                    models.DateTimeField(help_text="Latest packet time in the bucket."),
+                ),
+                (
+                    "node",
+                    models.ForeignKey(
+                        help_text="The node that sent the packets.",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="stridetastic_api.node",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Sender Port Traffic Rollup",
+                "verbose_name_plural": "Sender Port Traffic Rollups",
+                "indexes": [
+                    models.Index(
+                        fields=["bucket"], name="stridetasti_bucket_2ea2c4_idx"
+                    )
+                ],
+            },
+        ),
+    ]
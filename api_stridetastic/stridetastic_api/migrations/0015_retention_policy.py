@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stridetastic_api", "0014_traffic_rollups"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RetentionPolicy",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "table",
+                    models.CharField(
+                        help_text="Model name of the managed time-series table (e.g. 'packet').",
+                        max_length=64,
+                        unique=True,
+                    ),
+                ),
+                (
+                    "enabled",
+                    models.BooleanField(
+                        default=False,
+                        help_text="Whether the policy is applied on scheduled runs.",
+                    ),
+                ),
+                (
+                    "retention_days",
+                    models.PositiveIntegerField(
+                        blank=True,
+                        help_text="Rows (or chunks) older than this many days are dropped; empty keeps everything.",
+                        null=True,
+                    ),
+                ),
+                (
+                    "compress_after_days",
+                    models.PositiveIntegerField(
+                        blank=True,
+                        help_text="Hypertable chunks older than this many days are compressed; empty disables compression.",
+                        null=True,
+                    ),
+                ),
+                (
+                    "chunk_interval_hours",
+                    models.PositiveIntegerField(
+                        blank=True,
+                        help_text="Time span of new hypertable chunks.",
+                        null=True,
+                    ),
+                ),
+                ("last_run_at", models.DateTimeField(blank=True, null=True)),
+                ("last_deleted_rows", models.BigIntegerField(default=0)),
+                ("last_reclaimed_bytes", models.BigIntegerField(default=0)),
+                ("total_reclaimed_bytes", models.BigIntegerField(default=0)),
+                ("last_error_message", models.TextField(blank=True, default="")),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Retention Policy",
+                "verbose_name_plural": "Retention Policies",
+                "ordering": ["table"],
+            },
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:18
+
+import django.db.models.deletion
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes are built without blocking ingest writes; the foreign key
+    # indexes they supersede are dropped once they exist.
+    atomic = False
+
+    dependencies = [
+        ("stridetastic_api", "0015_retention_policy"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="networkoverviewsnapshot",
+            index=models.Index(fields=["time"], name="overview_snapshot_time_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="nodelatencyhistory",
+            index=models.Index(fields=["node", "time"], name="latency_node_time_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="nodepresencehistory",
+            index=models.Index(fields=["time"], name="presence_time_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="packet",
+            index=models.Index(fields=["time"], name="packet_time_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="packet",
+            index=models.Index(
+                fields=["from_node", "time"], name="packet_from_node_time_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="packet",
+            index=models.Index(
+                fields=["to_node", "time"], name="packet_to_node_time_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="packetdata",
+            index=models.Index(
+                fields=["port", "time"], name="packetdata_port_time_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="packetdata",
+            index=models.Index(fields=["portnum"], name="packetdata_portnum_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="positionpayload",
+            index=models.Index(fields=["time"], name="positionpayload_time_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="telemetrypayload",
+            index=models.Index(fields=["time"], name="telemetrypayload_time_idx"),
+        ),
+        migrations.AlterField(
+            model_name="nodelatencyhistory",
+            name="node",
+            field=models.ForeignKey(
+                db_index=False,
+                help_text="Node associated with the probe result.",
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="latency_history",
+                to="stridetastic_api.node",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="packet",
+            name="from_node",
+            field=models.ForeignKey(
+                db_index=False,
+                help_text="The node that sent the packet.",
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="packets_sent",
+                to="stridetastic_api.node",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="packet",
+            name="to_node",
+            field=models.ForeignKey(
+                db_index=False,
+                help_text="The node that received the packet.",
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="packets_received",
+                to="stridetastic_api.node",
+            ),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stridetastic_api", "0016_workload_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="packet",
+            name="raw_offset",
+            field=models.BigIntegerField(
+                blank=True,
+                help_text="Offset of the envelope record in the raw segment file.",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="packet",
+            name="raw_segment",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Raw segment store file holding the received envelope.",
+                null=True,
+            ),
+        ),
+    ]
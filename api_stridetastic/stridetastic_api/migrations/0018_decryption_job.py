@@ -0,0 +1,112 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stridetastic_api", "0017_packet_raw_segment"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DecryptionJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("channel", "Channel PSK"),
+                            ("node", "Node private key"),
+                        ],
+                        help_text="Whether the job applies a channel PSK or a node private key.",
+                        max_length=16,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("running", "Running"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                            ("cancelled", "Cancelled"),
+                        ],
+                        default="pending",
+                        max_length=16,
+                    ),
+                ),
+                (
+                    "total",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Candidate packets when the job was (re)started.",
+                    ),
+                ),
+                ("processed", models.PositiveIntegerField(default=0)),
+                ("decrypted", models.PositiveIntegerField(default=0)),
+                (
+                    "failed",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Candidates the key did not decrypt."
+                    ),
+                ),
+                (
+                    "last_packet_pk",
+                    models.BigIntegerField(
+                        default=0,
+                        help_text="Resume cursor: primary key of the last processed packet.",
+                    ),
+                ),
+                ("error_message", models.TextField(blank=True, default="")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "channel",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Channel whose PSK is applied (channel jobs).",
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="decryption_jobs",
+                        to="stridetastic_api.channel",
+                    ),
+                ),
+                (
+                    "node",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Node whose private key is applied (node jobs).",
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="decryption_jobs",
+                        to="stridetastic_api.node",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Decryption Job",
+                "verbose_name_plural": "Decryption Jobs",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "updated_at"], name="decryptjob_status_idx"
+                    )
+                ],
+            },
+        ),
+    ]
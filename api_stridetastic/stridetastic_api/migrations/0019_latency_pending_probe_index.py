@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:05
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Built without blocking writes of probe results.
+    atomic = False
+
+    dependencies = [
+        ("stridetastic_api", "0018_decryption_job"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="nodelatencyhistory",
+            index=models.Index(
+                condition=models.Q(("responded_at__isnull", True)),
+                fields=["node", "probe_message_id"],
+                name="latency_pending_probe_idx",
+            ),
+        ),
+    ]
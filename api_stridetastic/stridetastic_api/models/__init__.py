@@ -7,15 +7,29 @@ These imports are intentionally re-exported.
 
 from .capture_models import CaptureSession
 from .channel_models import Channel
-from .graph_models import Edge
+from .decryption_models import DecryptionJob
+from .graph_models import Edge, NodeNeighbor
 from .interface_models import Interface
 from .keepalive_models import KeepaliveConfig, NodePresenceHistory
 from .link_models import NodeLink
 from .metrics_models import NetworkOverviewSnapshot
 from .node_models import Node, NodeLatencyHistory
-from .packet_models import NeighborInfoNeighbor, NeighborInfoPayload, Packet
+from .packet_models import (
+    NeighborInfoNeighbor,
+    NeighborInfoPayload,
+    Packet,
+    PacketObservation,
+)
 from .publisher_models import (
     PublisherPeriodicJob,
     PublisherReactiveConfig,
     PublishErserviceConfig,
 )
+from .retention_models import RetentionPolicy
+from .rollup_models import (
+    ChannelTrafficRollup,
+    PortTrafficRollup,
+    ReceiverPortTrafficRollup,
+    SenderPortTrafficRollup,
+    TrafficRollupState,
+)
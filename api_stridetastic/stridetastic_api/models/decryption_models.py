@@ -0,0 +1,88 @@
+from django.db import models
+
+
+class DecryptionJobKind(models.TextChoices):
+    CHANNEL = "channel", "Channel PSK"
+    NODE = "node", "Node private key"
+
+
+class DecryptionJobStatus(models.TextChoices):
+    PENDING = "pending", "Pending"
+    RUNNING = "running", "Running"
+    COMPLETED = "completed", "Completed"
+    FAILED = "failed", "Failed"
+    CANCELLED = "cancelled", "Cancelled"
+
+
+class DecryptionJob(models.Model):
+    """Retroactive decryption of stored packets with a newly learned key."""
+
+    kind = models.CharField(
+        max_length=16,
+        choices=DecryptionJobKind.choices,
+        help_text="Whether the job applies a channel PSK or a node private key.",
+    )
+    channel = models.ForeignKey(
+        "Channel",
+        on_delete=models.CASCADE,
+        related_name="decryption_jobs",
+        blank=True,
+        null=True,
+        help_text="Channel whose PSK is applied (channel jobs).",
+    )
+    node = models.ForeignKey(
+        "Node",
+        on_delete=models.CASCADE,
+        related_name="decryption_jobs",
+        blank=True,
+        null=True,
+        help_text="Node whose private key is applied (node jobs).",
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=DecryptionJobStatus.choices,
+        default=DecryptionJobStatus.PENDING,
+    )
+
+    total = models.PositiveIntegerField(
+        default=0, help_text="Candidate packets when the job was (re)started."
+    )
+    processed = models.PositiveIntegerField(default=0)
+    decrypted = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(
+        default=0, help_text="Candidates the key did not decrypt."
+    )
+    last_packet_pk = models.BigIntegerField(
+        default=0, help_text="Resume cursor: primary key of the last processed packet."
+    )
+    error_message = models.TextField(blank=True, default="")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Decryption Job"
+        verbose_name_plural = "Decryption Jobs"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "updated_at"], name="decryptjob_status_idx"),
+        ]
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in (
+            DecryptionJobStatus.PENDING,
+            DecryptionJobStatus.RUNNING,
+        )
+
+    @property
+    def progress(self) -> float:
+        if self.total <= 0:
+            return 1.0 if self.status == DecryptionJobStatus.COMPLETED else 0.0
+        return min(1.0, self.processed / self.total)
+
+    def __str__(self) -> str:  # pragma: no cover - repr convenience
+        target = self.channel if self.kind == DecryptionJobKind.CHANNEL else self.node
+        return f"Decryption job {self.pk} ({self.kind} {target}): {self.status}"
@@ -54,3 +54,61 @@ class Edge(models.Model):
 
     class Meta:
         unique_together = ("source_node", "target_node")
+
+
+class NodeNeighbor(models.Model):
+    """
+    Latest neighbor set advertised by a node through NeighborInfo.
+
+    One row per (reporting node, neighbor); the set is replaced on every
+    report, unlike the historical `NeighborInfoNeighbor` rows.
+    """
+
+    reporting_node = models.ForeignKey(
+        "Node",
+        related_name="current_neighbors",
+        on_delete=models.CASCADE,
+        help_text="Node that advertised the neighbor.",
+    )
+    neighbor_node = models.ForeignKey(
+        "Node",
+        related_name="advertised_by",
+        on_delete=models.CASCADE,
+        help_text="Advertised neighbor node.",
+    )
+    snr = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        help_text="Last reported SNR (in dB) for the neighbor link.",
+    )
+    last_rx_time = models.DateTimeField(
+        blank=True,
+        null=True,
+        help_text="Timestamp (UTC) the reporting node last heard the neighbor.",
+    )
+    node_broadcast_interval_secs = models.IntegerField(
+        blank=True,
+        null=True,
+        help_text="Broadcast interval advertised for this neighbor (seconds).",
+    )
+    last_packet = models.ForeignKey(
+        "Packet",
+        related_name="+",
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        help_text="NeighborInfo packet of the latest report.",
+    )
+    reported_at = models.DateTimeField(
+        auto_now=True, help_text="Timestamp of the latest report."
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["reporting_node", "neighbor_node"],
+                name="unique_current_neighbor",
+            )
+        ]
@@ -130,6 +130,7 @@ class NodePresenceHistory(TimescaleModel):
         verbose_name = "Node Presence History"
         verbose_name_plural = "Node Presence History"
         ordering = ["-time"]
+        indexes = [models.Index(fields=["time"], name="presence_time_idx")]
 
     @property
     def elapsed_seconds(self) -> Optional[int]:
@@ -50,3 +50,4 @@ class NetworkOverviewSnapshot(TimescaleModel):
         verbose_name = "Network Overview Snapshot"
         verbose_name_plural = "Network Overview Snapshots"
         ordering = ["time"]
+        indexes = [models.Index(fields=["time"], name="overview_snapshot_time_idx")]
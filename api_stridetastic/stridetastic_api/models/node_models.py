@@ -237,6 +237,10 @@ class Node(models.Model):
         )
 
     def save(self, *args, **kwargs):
+        if "public_key" in self.get_deferred_fields():
+            # The key was neither loaded nor assigned, so the flag cannot change.
+            super().save(*args, **kwargs)
+            return
         desired_flag = is_low_entropy_public_key(self.public_key)
         if desired_flag != self.is_low_entropy_public_key:
             self.is_low_entropy_public_key = desired_flag
@@ -260,6 +264,7 @@ class NodeLatencyHistory(TimescaleModel):
         Node,
         on_delete=models.CASCADE,
         related_name="latency_history",
+        db_index=False,  # Leading column of latency_node_time_idx
         help_text="Node associated with the probe result.",
     )
     probe_message_id = models.BigIntegerField(
@@ -287,3 +292,12 @@ class NodeLatencyHistory(TimescaleModel):
         verbose_name = "Node Latency History"
         verbose_name_plural = "Node Latency History"
         ordering = ["time"]
+        indexes = [
+            models.Index(fields=["node", "time"], name="latency_node_time_idx"),
+            # Responses from another process find their pending probe row by id.
+            models.Index(
+                fields=["node", "probe_message_id"],
+                name="latency_pending_probe_idx",
+                condition=models.Q(responded_at__isnull=True),
+            ),
+        ]
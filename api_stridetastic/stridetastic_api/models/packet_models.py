@@ -33,6 +33,7 @@ class Packet(TimescaleModel):
         "Node",
         on_delete=models.CASCADE,
         related_name="packets_sent",
+        db_index=False,  # Leading column of packet_from_node_time_idx
         help_text="The node that sent the packet.",
     )
     gateway_nodes = models.ManyToManyField(
@@ -45,6 +46,7 @@ class Packet(TimescaleModel):
         "Node",
         on_delete=models.CASCADE,
         related_name="packets_received",
+        db_index=False,  # Leading column of packet_to_node_time_idx
         help_text="The node that received the packet.",
     )
     channels = models.ManyToManyField(
@@ -60,9 +62,25 @@ class Packet(TimescaleModel):
         null=True,
         help_text="Raw data of the packet not saved in a specific field.",
     )
+    raw_segment = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        help_text="Raw segment store file holding the received envelope.",
+    )
+    raw_offset = models.BigIntegerField(
+        blank=True,
+        null=True,
+        help_text="Offset of the envelope record in the raw segment file.",
+    )
     packet_id = models.BigIntegerField(
         blank=True, null=True, help_text="Identifier for the packet."
     )
+    identity_bucket = models.BigIntegerField(
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="Reception time bucket that, with the sender and packet_id, identifies the packet.",
+    )
     rx_time = models.BigIntegerField(
         blank=True,
         null=True,
@@ -150,6 +168,94 @@ class Packet(TimescaleModel):
         ordering = [
             "time",
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["from_node", "packet_id", "identity_bucket"],
+                name="unique_packet_identity",
+            )
+        ]
+        indexes = [
+            # Time windows: dashboards, rollup refresh, retention
+            models.Index(fields=["time"], name="packet_time_idx"),
+            # Per-node and per-link history, newest first
+            models.Index(
+                fields=["from_node", "time"], name="packet_from_node_time_idx"
+            ),
+            models.Index(fields=["to_node", "time"], name="packet_to_node_time_idx"),
+        ]
+
+
+class PacketObservation(TimescaleModel):
+    """
+    One received copy of a Packet.
+    The same MeshPacket is usually heard by several gateways; each copy keeps its own
+    arrival metadata here so propagation can be analysed after duplicates are merged.
+    """
+
+    time = models.DateTimeField(
+        auto_now_add=True, help_text="Timestamp when this copy was received."
+    )
+    packet = models.ForeignKey(
+        Packet,
+        on_delete=models.CASCADE,
+        related_name="observations",
+        help_text="The packet this copy belongs to.",
+    )
+    gateway_node = models.ForeignKey(
+        "Node",
+        on_delete=models.SET_NULL,
+        related_name="packet_observations",
+        blank=True,
+        null=True,
+        help_text="Gateway node that reported this copy, if known.",
+    )
+    interface = models.ForeignKey(
+        "stridetastic_api.Interface",
+        on_delete=models.SET_NULL,
+        related_name="packet_observations",
+        blank=True,
+        null=True,
+        help_text="Interface on which this copy was received.",
+    )
+    rx_time = models.BigIntegerField(
+        blank=True,
+        null=True,
+        help_text="Time when this copy was received (secs since 1970).",
+    )
+    rx_rssi = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        help_text="Received Signal Strength Indicator (RSSI) of this copy.",
+    )
+    rx_snr = models.DecimalField(
+        max_digits=4,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        help_text="Signal-to-Noise Ratio (SNR) of this copy.",
+    )
+    hop_limit = models.IntegerField(
+        blank=True, null=True, help_text="Hop limit of this copy."
+    )
+    hop_start = models.IntegerField(
+        blank=True, null=True, help_text="Hop start of this copy."
+    )
+    relay_node = models.IntegerField(
+        blank=True, null=True, help_text="Node that relayed this copy, if known."
+    )
+    is_duplicate = models.BooleanField(
+        default=False,
+        help_text="Whether this copy arrived after the packet was already processed.",
+    )
+
+    class Meta:
+        verbose_name = "Packet Observation"
+        verbose_name_plural = "Packet Observations"
+        ordering = [
+            "time",
+        ]
 
 
 class PacketData(TimescaleModel):
@@ -230,6 +336,11 @@ class PacketData(TimescaleModel):
         ordering = [
             "time",
         ]
+        indexes = [
+            # Port packet listings, newest first; lookups by raw port number
+            models.Index(fields=["port", "time"], name="packetdata_port_time_idx"),
+            models.Index(fields=["portnum"], name="packetdata_portnum_idx"),
+        ]
 
 
 class NodeInfoPayload(TimescaleModel):
@@ -338,6 +449,10 @@ class PositionPayload(TimescaleModel):
     class Meta:
         verbose_name = "Position Payload"
         verbose_name_plural = "Position Payloads"
+        indexes = [
+            # Node position/telemetry history windows
+            models.Index(fields=["time"], name="positionpayload_time_idx"),
+        ]
 
     ordering = ["time"]
 
@@ -430,6 +545,10 @@ class TelemetryPayload(TimescaleModel):
     class Meta:
         verbose_name = "Telemetry Payload"
         verbose_name_plural = "Telemetry Payloads"
+        indexes = [
+            # Node position/telemetry history windows
+            models.Index(fields=["time"], name="telemetrypayload_time_idx"),
+        ]
 
     ordering = ["time"]
 
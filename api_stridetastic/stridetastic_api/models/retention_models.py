@@ -0,0 +1,44 @@
+from django.db import models
+
+
+class RetentionPolicy(models.Model):
+    """Storage policy of one time-series table (chunking, compression, retention)."""
+
+    table = models.CharField(
+        max_length=64,
+        unique=True,
+        help_text="Model name of the managed time-series table (e.g. 'packet').",
+    )
+    enabled = models.BooleanField(
+        default=False, help_text="Whether the policy is applied on scheduled runs."
+    )
+    retention_days = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        help_text="Rows (or chunks) older than this many days are dropped; empty keeps everything.",
+    )
+    compress_after_days = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        help_text="Hypertable chunks older than this many days are compressed; empty disables compression.",
+    )
+    chunk_interval_hours = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        help_text="Time span of new hypertable chunks.",
+    )
+
+    last_run_at = models.DateTimeField(blank=True, null=True)
+    last_deleted_rows = models.BigIntegerField(default=0)
+    last_reclaimed_bytes = models.BigIntegerField(default=0)
+    total_reclaimed_bytes = models.BigIntegerField(default=0)
+    last_error_message = models.TextField(blank=True, default="")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Retention Policy"
+        verbose_name_plural = "Retention Policies"
+        ordering = ["table"]
+
+    def __str__(self) -> str:  # pragma: no cover - repr convenience
+        return f"Retention policy for {self.table}"
@@ -0,0 +1,97 @@
+from django.db import models
+
+
+class TrafficRollupState(models.Model):
+    """Refresh watermark of one packet traffic rollup."""
+
+    name = models.CharField(
+        max_length=32, unique=True, help_text="Rollup this watermark belongs to."
+    )
+    refreshed_until = models.DateTimeField(
+        help_text="Buckets before this instant are materialized; later traffic is read from the packets."
+    )
+    refreshed_at = models.DateTimeField(
+        auto_now=True, help_text="When the rollup was last refreshed."
+    )
+
+    class Meta:
+        verbose_name = "Traffic Rollup State"
+        verbose_name_plural = "Traffic Rollup States"
+
+
+class TrafficRollup(models.Model):
+    bucket = models.DateTimeField(help_text="Start of the aggregated time bucket.")
+    port = models.CharField(
+        max_length=32,
+        blank=True,
+        null=True,
+        help_text="Port of the packet data; empty for packets that were not decoded.",
+    )
+    portnum = models.IntegerField(
+        blank=True, null=True, help_text="Port number of the packet data."
+    )
+    packets = models.BigIntegerField(help_text="Packets received in the bucket.")
+    last_seen = models.DateTimeField(help_text="Latest packet time in the bucket.")
+
+    class Meta:
+        abstract = True
+
+
+class PortTrafficRollup(TrafficRollup):
+    """Packets per minute and port."""
+
+    class Meta:
+        verbose_name = "Port Traffic Rollup"
+        verbose_name_plural = "Port Traffic Rollups"
+        indexes = [models.Index(fields=["bucket"])]
+
+
+class SenderPortTrafficRollup(TrafficRollup):
+    """Packets per hour, sending node and port."""
+
+    node = models.ForeignKey(
+        "Node",
+        on_delete=models.CASCADE,
+        related_name="+",
+        help_text="The node that sent the packets.",
+    )
+
+    class Meta:
+        verbose_name = "Sender Port Traffic Rollup"
+        verbose_name_plural = "Sender Port Traffic Rollups"
+        indexes = [models.Index(fields=["bucket"])]
+
+
+class ReceiverPortTrafficRollup(TrafficRollup):
+    """Packets per hour, destination node and port."""
+
+    node = models.ForeignKey(
+        "Node",
+        on_delete=models.CASCADE,
+        related_name="+",
+        help_text="The node the packets were addressed to.",
+    )
+
+    class Meta:
+        verbose_name = "Receiver Port Traffic Rollup"
+        verbose_name_plural = "Receiver Port Traffic Rollups"
+        indexes = [models.Index(fields=["bucket"])]
+
+
+class ChannelTrafficRollup(models.Model):
+    """Packets per minute and channel."""
+
+    bucket = models.DateTimeField(help_text="Start of the aggregated time bucket.")
+    channel = models.ForeignKey(
+        "Channel",
+        on_delete=models.CASCADE,
+        related_name="+",
+        help_text="The channel the packets were sent through.",
+    )
+    packets = models.BigIntegerField(help_text="Packets received in the bucket.")
+    last_seen = models.DateTimeField(help_text="Latest packet time in the bucket.")
+
+    class Meta:
+        verbose_name = "Channel Traffic Rollup"
+        verbose_name_plural = "Channel Traffic Rollups"
+        indexes = [models.Index(fields=["bucket"])]
@@ -12,7 +12,8 @@ from .channel_schemas import (
     ChannelStatisticsSchema,
 )
 from .common_schemas import MessageSchema
-from .graph_schemas import EdgeSchema
+from .decryption_schemas import DecryptionJobCreateSchema, DecryptionJobSchema
+from .graph_schemas import EdgeSchema, NodeNeighborSchema
 from .keepalive_schemas import (
     KeepaliveConfigSchema,
     KeepaliveConfigUpdateSchema,
@@ -28,9 +29,19 @@ from .link_schemas import (
     NodeLinkSchema,
 )
 from .metrics_schemas import (
+    IngestLogSchema,
+    IngestMetricsSchema,
+    IngestQueueInterfaceSchema,
+    IngestShedMetricsSchema,
+    IngestShedNodeSchema,
+    IngestWorkerSchema,
+    IngestWorkersSchema,
+    KeyCacheStatsSchema,
+    LatencyHistogramSchema,
     OverviewMetricSnapshotSchema,
     OverviewMetricsResponseSchema,
     OverviewMetricsSchema,
+    PKICacheMetricsSchema,
 )
 from .node_schemas import (
     NodeKeyHealthSchema,
@@ -68,3 +79,9 @@ from .publisher_schemas import (
     PublishTelemetrySchema,
     PublishTracerouteSchema,
 )
+from .retention_schemas import (
+    RetentionPolicySchema,
+    RetentionPolicyUpdateSchema,
+    RetentionRunRequestSchema,
+    RetentionRunSchema,
+)
@@ -0,0 +1,36 @@
+from datetime import datetime
+from typing import Optional
+
+from ninja import Field, Schema
+
+
+class DecryptionJobSchema(Schema):
+    id: int
+    kind: str = Field(..., description="'channel' (PSK) or 'node' (private key)")
+    channel_id: Optional[str] = Field(None, description="Channel name (channel jobs)")
+    channel_num: Optional[int] = Field(None, description="Channel hash (channel jobs)")
+    node_id: Optional[str] = Field(None, description="Target node id (node jobs)")
+    status: str
+    total: int = Field(..., description="Candidate packets when the job (re)started")
+    processed: int = Field(..., description="Candidates handled so far")
+    decrypted: int = Field(..., description="Candidates the key decrypted")
+    failed: int = Field(..., description="Candidates the key did not decrypt")
+    progress: float = Field(..., description="Fraction of the candidates handled")
+    error_message: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    updated_at: datetime
+
+
+class DecryptionJobCreateSchema(Schema):
+    channel_id: Optional[str] = Field(
+        None, description="Channel name; requires channel_num"
+    )
+    channel_num: Optional[int] = Field(None, description="Channel hash (0-255)")
+    psk: Optional[str] = Field(
+        None, description="Base64 PSK to store on the channel before decrypting"
+    )
+    node_id: Optional[str] = Field(
+        None, description="Node whose stored private key is applied"
+    )
@@ -29,3 +29,25 @@ class EdgeSchema(Schema):
         default_factory=list,
         description="List of interface names through which this edge is observed.",
     )
+
+
+class NodeNeighborSchema(Schema):
+    node_id: str = Field(..., description="Node ID of the advertised neighbor.")
+    node_num: int = Field(..., description="Node number of the advertised neighbor.")
+    short_name: Optional[str] = Field(None, description="Neighbor short name.")
+    long_name: Optional[str] = Field(None, description="Neighbor long name.")
+    snr: Optional[float] = Field(
+        None, description="Last reported SNR (in dB) for the neighbor link."
+    )
+    last_rx_time: Optional[datetime] = Field(
+        None, description="When the reporting node last heard the neighbor."
+    )
+    node_broadcast_interval_secs: Optional[int] = Field(
+        None, description="Broadcast interval advertised for the neighbor."
+    )
+    last_packet_id: Optional[int] = Field(
+        None, description="ID of the NeighborInfo packet of the latest report."
+    )
+    reported_at: datetime = Field(
+        ..., description="Timestamp of the latest NeighborInfo report."
+    )
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from ninja import Field, Schema
 
@@ -61,3 +61,137 @@ class OverviewMetricsResponseSchema(Schema):
         default_factory=list,
         description="Historical snapshot series ordered chronologically.",
     )
+
+
+class KeyCacheStatsSchema(Schema):
+    size: int = Field(..., description="Entries currently cached.")
+    hits: int = Field(..., description="Lookups served from the cache.")
+    misses: int = Field(..., description="Lookups that had to compute or load.")
+    hit_rate: float = Field(..., description="hits / (hits + misses).")
+
+
+class PKICacheMetricsSchema(Schema):
+    private_keys: KeyCacheStatsSchema = Field(
+        ..., description="Parsed private keys of virtual nodes."
+    )
+    shared_keys: KeyCacheStatsSchema = Field(
+        ..., description="Derived X25519 shared keys per (private key, peer) pair."
+    )
+    public_keys: KeyCacheStatsSchema = Field(
+        ..., description="Sender public keys resolved by node number."
+    )
+
+
+class LatencyHistogramSchema(Schema):
+    count: int = Field(..., description="Samples recorded since startup.")
+    sum: float = Field(..., description="Sum of all samples since startup.")
+    max: float = Field(..., description="Largest sample in the rolling window.")
+    p50: float = Field(..., description="Median of the rolling window.")
+    p95: float = Field(..., description="95th percentile of the rolling window.")
+    p99: float = Field(..., description="99th percentile of the rolling window.")
+
+
+class IngestQueueInterfaceSchema(Schema):
+    depth: int = Field(..., description="Packets currently queued.")
+    enqueued: int = Field(..., description="Packets accepted into the queue.")
+    dropped: int = Field(..., description="Packets dropped by backpressure.")
+    processed: int = Field(..., description="Packets handed to ingest.")
+    failed: int = Field(..., description="Packets whose ingest raised.")
+
+
+class IngestWorkerSchema(Schema):
+    index: int = Field(..., description="Shard served by the worker process.")
+    pid: Optional[int] = Field(None, description="Process id of the worker.")
+    alive: bool = Field(..., description="Whether the worker process is running.")
+    restarts: int = Field(..., description="Times the worker was restarted.")
+    depth: int = Field(..., description="Packets waiting in the worker queue.")
+    submitted: int = Field(..., description="Packets routed to the worker.")
+    dropped: int = Field(..., description="Packets dropped because it was full.")
+    processed: int = Field(..., description="Packets ingested by the worker.")
+    failed: int = Field(..., description="Packets whose ingest raised.")
+    throughput_pps: float = Field(
+        ..., description="Packets per second over the last sampling interval."
+    )
+
+
+class IngestWorkersSchema(Schema):
+    processes: int = Field(..., description="Number of ingest worker processes.")
+    restarts: int = Field(..., description="Worker restarts since startup.")
+    depth: int = Field(..., description="Packets waiting in all worker queues.")
+    submitted: int = Field(..., description="Packets routed to workers.")
+    dropped: int = Field(..., description="Packets dropped by full worker queues.")
+    processed: int = Field(..., description="Packets ingested by all workers.")
+    failed: int = Field(..., description="Packets whose ingest raised.")
+    throughput_pps: float = Field(
+        ..., description="Aggregate packets per second of all workers."
+    )
+    workers: List[IngestWorkerSchema] = Field(
+        ..., description="Counters per worker process."
+    )
+
+
+class IngestLogSchema(Schema):
+    backend: str = Field(..., description="Log storage: redis or memory.")
+    length: int = Field(
+        ..., description="Entries in the stream (-1 if it could not be read)."
+    )
+    pending: int = Field(
+        ..., description="Entries delivered to a writer but not acknowledged."
+    )
+    appended: int = Field(..., description="Packets appended by this process.")
+    append_failed: int = Field(..., description="Packets that could not be appended.")
+    processed: int = Field(..., description="Entries persisted by local writers.")
+    failed: int = Field(..., description="Failed deliveries of local writers.")
+    reclaimed: int = Field(..., description="Stale entries claimed for a retry.")
+    dead_lettered: int = Field(
+        ..., description="Entries moved to the dead stream after repeated failures."
+    )
+
+
+class IngestMetricsSchema(Schema):
+    window: int = Field(..., description="Samples kept per rolling histogram.")
+    stages: Dict[str, LatencyHistogramSchema] = Field(
+        ..., description="Latency in milliseconds per ingest stage."
+    )
+    ports: Dict[str, LatencyHistogramSchema] = Field(
+        ..., description="Payload handler latency in milliseconds per port."
+    )
+    queries_per_packet: LatencyHistogramSchema = Field(
+        ..., description="SQL queries issued per ingested packet."
+    )
+    queue: Dict[str, IngestQueueInterfaceSchema] = Field(
+        default_factory=dict,
+        description="Ingest queue counters per interface (empty when disabled).",
+    )
+    workers: Optional[IngestWorkersSchema] = Field(
+        None,
+        description="Ingest worker process counters (null in single-process mode).",
+    )
+    log: Optional[IngestLogSchema] = Field(
+        None, description="Durable ingest log counters (null when disabled)."
+    )
+
+
+class IngestShedNodeSchema(Schema):
+    node_num: int = Field(..., description="Sender node number.")
+    node_id: str = Field(..., description="Sender node id (!xxxxxxxx).")
+    shed: int = Field(..., description="Packets of the sender shed so far.")
+    by_port: Dict[str, int] = Field(..., description="Shed packets per port.")
+    first_shed_at: Optional[datetime] = Field(
+        None, description="When the first packet of the sender was shed."
+    )
+    last_shed_at: Optional[datetime] = Field(
+        None, description="When the latest packet of the sender was shed."
+    )
+
+
+class IngestShedMetricsSchema(Schema):
+    enabled: bool = Field(..., description="Whether admission control is active.")
+    admitted: int = Field(0, description="Packets admitted to the handler.")
+    shed: int = Field(0, description="Packets shed over their sender's budget.")
+    shed_by_port: Dict[str, int] = Field(
+        default_factory=dict, description="Shed packets per port."
+    )
+    nodes: List[IngestShedNodeSchema] = Field(
+        default_factory=list, description="Shed senders, most shed first."
+    )
@@ -0,0 +1,53 @@
+from datetime import datetime
+from typing import List, Optional
+
+from ninja import Field, Schema
+
+
+class RetentionPolicySchema(Schema):
+    table: str = Field(..., description="Managed table (model name)")
+    enabled: bool = Field(..., description="Whether scheduled runs apply the policy")
+    retention_days: Optional[int] = Field(
+        None, description="Data older than this many days is dropped"
+    )
+    compress_after_days: Optional[int] = Field(
+        None, description="Hypertable chunks older than this many days are compressed"
+    )
+    chunk_interval_hours: Optional[int] = Field(
+        None, description="Time span of new hypertable chunks"
+    )
+    hypertable: bool = Field(
+        ..., description="Whether the table is a TimescaleDB hypertable"
+    )
+    size_bytes: int = Field(..., description="Current on-disk size of the table")
+    last_run_at: Optional[datetime] = None
+    last_deleted_rows: int = 0
+    last_reclaimed_bytes: int = 0
+    total_reclaimed_bytes: int = 0
+    last_error_message: Optional[str] = None
+
+
+class RetentionPolicyUpdateSchema(Schema):
+    enabled: Optional[bool] = Field(None, description="Enable or disable the policy")
+    retention_days: Optional[int] = Field(
+        None, ge=1, description="Retention in days (null keeps everything)"
+    )
+    compress_after_days: Optional[int] = Field(
+        None, ge=0, description="Compression age in days (null disables compression)"
+    )
+    chunk_interval_hours: Optional[int] = Field(
+        None, ge=1, description="Chunk interval in hours"
+    )
+
+
+class RetentionRunRequestSchema(Schema):
+    tables: Optional[List[str]] = Field(
+        None, description="Tables to apply now; defaults to every enabled policy"
+    )
+
+
+class RetentionRunSchema(Schema):
+    task_id: str = Field(..., description="Celery task applying the policies")
+    tables: Optional[List[str]] = Field(
+        None, description="Tables being applied; null for every enabled policy"
+    )
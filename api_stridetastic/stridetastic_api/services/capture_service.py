@@ -30,13 +30,14 @@ from meshtastic.protobuf import (
     telemetry_pb2,
 )
 
-from ..mesh.encryption.aes import decrypt_packet
+from ..mesh.encryption.key_ring import decrypt_with_key_ring
 from ..models.capture_models import CaptureSession
 from ..models.channel_models import Channel
 from ..models.interface_models import Interface
 from ..utils.pcap_writer import PcapNgWriter
 
 if TYPE_CHECKING:  # pragma: no cover - typing only
+    from ..ingest.context import IngestContext
     from .pki_service import PKIService
 
 
@@ -485,6 +486,7 @@ class CaptureService:
         raw_payload: bytes,
         interface_id: Optional[int] = None,
         timestamp=None,
+        context: Optional[IngestContext] = None,
     ) -> None:
         def _select_targets() -> list[_ActiveCapture]:
             return [
@@ -509,12 +511,17 @@ class CaptureService:
         now = timezone.now()
         ts = timestamp or now
 
-        try:
-            envelope = mqtt_pb2.ServiceEnvelope()
-            envelope.ParseFromString(raw_payload)
-        except Exception as exc:
-            logging.exception("Failed to parse ServiceEnvelope for capture: %s", exc)
-            return
+        if context is not None:
+            envelope = context.envelope
+        else:
+            try:
+                envelope = mqtt_pb2.ServiceEnvelope()
+                envelope.ParseFromString(raw_payload)
+            except Exception as exc:
+                logging.exception(
+                    "Failed to parse ServiceEnvelope for capture: %s", exc
+                )
+                return
 
         mesh_packet = envelope.packet
         channel_id = getattr(envelope, "channel_id", None)
@@ -540,9 +547,11 @@ class CaptureService:
 
         if has_decoded:
             data_message = mesh_packet.decoded
+        elif context is not None and context.decoded_data is not None:
+            data_message = context.decoded_data
         else:
             data_message = self._decrypt_encrypted_payload(
-                mesh_packet, channel_id=channel_id
+                mesh_packet, channel_id=channel_id, context=context
             )
 
         if data_message is not None:
@@ -603,6 +612,7 @@ class CaptureService:
         mesh_packet: mesh_pb2.MeshPacket,
         *,
         channel_id: Optional[str],
+        context: Optional[IngestContext] = None,
     ) -> Optional[mesh_pb2.Data]:
         encrypted_bytes = getattr(mesh_packet, "encrypted", b"")
         if not encrypted_bytes:
@@ -622,7 +632,12 @@ class CaptureService:
                     target_node = Node.objects.filter(node_num=int(to_node_num)).first()
 
                 if target_node is not None:
-                    result = self._pki_service.decrypt_packet(mesh_packet, target_node)
+                    if context is not None:
+                        result = context.decrypt_pki(self._pki_service, target_node)
+                    else:
+                        result = self._pki_service.decrypt_packet(
+                            mesh_packet, target_node
+                        )
                     if result.success and result.plaintext:
                         data_message = mesh_pb2.Data()
                         data_message.ParseFromString(result.plaintext)
@@ -652,7 +667,10 @@ class CaptureService:
         if key is None:
             key = "AQ=="
 
-        payload = decrypt_packet(mesh_packet, key)
+        if context is not None:
+            payload = context.decrypt_aes(key)
+        else:
+            payload = decrypt_with_key_ring(mesh_packet, key)
         if (
             payload is not None
             and getattr(payload, "ByteSize", None)
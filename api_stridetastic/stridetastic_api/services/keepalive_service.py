@@ -7,6 +7,7 @@ from django.db import transaction
 from django.db.models import QuerySet
 from django.utils import timezone
 
+from ..mesh.packet.last_seen import flush_last_seen
 from ..models import KeepaliveConfig, Node, NodePresenceHistory
 
 logger = logging.getLogger(__name__)
@@ -35,6 +36,8 @@ class KeepaliveService:
 
     def run_check(self) -> int:
         """Evaluate nodes that just transitioned to offline. Returns count."""
+        # Persist coalesced last-seen updates before evaluating transitions.
+        flush_last_seen()
         now = timezone.now()
 
         with transaction.atomic():
@@ -13,10 +13,11 @@ from ..mesh.encryption.pkc import (
     PKIDecryptionInputs,
     PKIEncryptionError,
     PKIEncryptionInputs,
-    decrypt_with_private_key,
+    decrypt_with_shared_key,
     encrypt_with_private_key,
     load_public_key_bytes,
 )
+from ..mesh.encryption.pki_cache import PKIKeyCache, get_pki_key_cache
 from ..models import Node
 
 logger = logging.getLogger(__name__)
@@ -44,8 +45,9 @@ class PKIEncryptionResult:
 class PKIService:
     """Facade for Meshtastic public-key packet decryption."""
 
-    def __init__(self) -> None:
+    def __init__(self, key_cache: Optional[PKIKeyCache] = None) -> None:
         self._initialized_at = timezone.now()
+        self._key_cache = key_cache or get_pki_key_cache()
 
     @property
     def initialized_at(self):
@@ -96,8 +98,8 @@ class PKIService:
             if raw_public_key:
                 remote_public_key_bytes = load_public_key_bytes(raw_public_key)
             else:
-                remote_public_key_bytes = self._resolve_remote_public_key(
-                    int(from_node_num)
+                remote_public_key_bytes = self._key_cache.public_key(
+                    int(from_node_num), self._resolve_remote_public_key
                 )
         except PKIDecryptionError as exc:
             logger.info(
@@ -119,7 +121,11 @@ class PKIService:
         )
 
         try:
-            plaintext = decrypt_with_private_key(inputs, private_key_material)
+            fingerprint, private_key = self._key_cache.private_key(private_key_material)
+            derived_key = self._key_cache.shared_key(
+                fingerprint, private_key, remote_public_key_bytes
+            )
+            plaintext = decrypt_with_shared_key(inputs, derived_key)
         except PKIDecryptionError as exc:
             logger.info(
                 "PKI decrypt failed for packet %s from node %s: %s",
@@ -145,6 +151,11 @@ class PKIService:
         )
         return PKIDecryptionResult(success=True, plaintext=plaintext)
 
+    def get_cache_stats(self) -> dict:
+        """Hit/miss counters of the private, shared and public key caches."""
+
+        return self._key_cache.get_stats()
+
     def _resolve_remote_public_key(self, from_node_num: int) -> Optional[bytes]:
         remote_node = (
             Node.objects.filter(node_num=from_node_num).only("public_key").first()
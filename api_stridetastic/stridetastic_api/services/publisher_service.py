@@ -23,6 +23,7 @@ from ..mesh.packet.crafter import (
     craft_text_message,
     craft_traceroute,
 )
+from ..mesh.packet.pending_requests import get_pending_requests
 from ..mesh.utils import id_to_num
 from ..models import Interface, Node, NodeLatencyHistory, PublisherReactiveConfig
 from .pki_service import PKIEncryptionResult, PKIService
@@ -688,6 +689,26 @@ class PublisherService:
             base_topic=base_topic,
         )
 
+    @staticmethod
+    def _register_pending(
+        message_id: Optional[int],
+        from_node: str,
+        to_node: str,
+        history_pk: Optional[int] = None,
+    ) -> None:
+        """Remember a sent request so its response can be matched by id."""
+        try:
+            to_node_num = id_to_num(to_node)
+            from_node_num = id_to_num(from_node)
+        except (TypeError, ValueError):
+            return
+        get_pending_requests().register(
+            message_id,
+            to_node_num,
+            from_node_num=from_node_num,
+            history_pk=history_pk,
+        )
+
     def publish_traceroute(
         self,
         from_node: str,
@@ -732,18 +753,20 @@ class PublisherService:
             base_topic=base_topic,
         )
         if published:
+            history_pk = None
             if record_pending:
                 target = Node.objects.filter(node_id=to_node).first()
                 if target:
                     target.latency_reachable = False
                     target.latency_ms = None
                     target.save(update_fields=["latency_reachable", "latency_ms"])
-                    NodeLatencyHistory.objects.create(
+                    history_pk = NodeLatencyHistory.objects.create(
                         node=target,
                         reachable=False,
                         latency_ms=None,
                         probe_message_id=message_id,
-                    )
+                    ).pk
+            self._register_pending(message_id, from_node, to_node, history_pk)
             return True, message_id
         return False, None
 
@@ -789,17 +812,19 @@ class PublisherService:
             base_topic=base_topic,
         )
         if published:
+            history_pk = None
             target = Node.objects.filter(node_id=to_node).first()
             if target:
                 target.latency_reachable = False
                 target.latency_ms = None
                 target.save(update_fields=["latency_reachable", "latency_ms"])
-                NodeLatencyHistory.objects.create(
+                history_pk = NodeLatencyHistory.objects.create(
                     node=target,
                     reachable=False,
                     latency_ms=None,
                     probe_message_id=message_id,
-                )
+                ).pk
+            self._register_pending(message_id, from_node, to_node, history_pk)
         return published
 
     def publish_telemetry(
@@ -1119,12 +1144,15 @@ class PublisherService:
                         target.latency_reachable = False
                         target.latency_ms = None
                         target.save(update_fields=["latency_reachable", "latency_ms"])
-                        NodeLatencyHistory.objects.create(
+                        history = NodeLatencyHistory.objects.create(
                             node=target,
                             reachable=False,
                             latency_ms=None,
                             probe_message_id=message_id,
                         )
+                        self._register_pending(
+                            message_id, config.from_node, target_node_id, history.pk
+                        )
 
                 logging.info(
                     f"[Publisher] Reactive traceroute injected towards {target_node_id} "
@@ -0,0 +1,330 @@
+"""Chunking, compression and retention of the time-series tables.
+
+Every managed table has a ``RetentionPolicy`` row, seeded from the
+``RETENTION_*`` settings and editable through ``/retention/policies``.
+Applying a policy depends on what the table is in the database:
+
+* a TimescaleDB hypertable gets its chunk interval set, native compression
+  enabled (segmented by the table's sender/port/node column) with a
+  compression policy plus an immediate pass over old chunks, and chunks past
+  the retention dropped. The reclaimed space is the measured size difference.
+* a plain table (the default schema: the unique constraints do not include
+  the time column, so the tables cannot be converted) only has rows past the
+  retention deleted, in batches and with the ORM so that dependent rows
+  cascade. Postgres reuses the space after vacuum rather than shrinking the
+  file, so the reclaimed space is estimated from the average row size.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from ..ingest.segments import get_segment_store
+from ..models import (
+    NetworkOverviewSnapshot,
+    NodeLatencyHistory,
+    NodePresenceHistory,
+    Packet,
+    PacketObservation,
+    RetentionPolicy,
+)
+from ..models.packet_models import (
+    NeighborInfoNeighbor,
+    NeighborInfoPayload,
+    NodeInfoPayload,
+    PacketData,
+    PositionPayload,
+    RouteDiscoveryPayload,
+    RouteDiscoveryRoute,
+    RoutingPayload,
+    TelemetryPayload,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ManagedTable:
+    model: type
+    # Compression segmentby columns: rows sharing them are compressed together
+    segment_by: tuple[str, ...] = ()
+    # Reverse relations whose rows would cascade: only unreferenced rows expire
+    referenced_by: tuple[str, ...] = ()
+
+    @property
+    def name(self) -> str:
+        return self.model._meta.model_name
+
+    @property
+    def db_table(self) -> str:
+        return self.model._meta.db_table
+
+
+MANAGED_TABLES = {
+    table.name: table
+    for table in (
+        ManagedTable(Packet, ("from_node_id",)),
+        ManagedTable(PacketData, ("port",)),
+        ManagedTable(PacketObservation, ("gateway_node_id",)),
+        ManagedTable(NodeInfoPayload),
+        ManagedTable(PositionPayload),
+        ManagedTable(TelemetryPayload),
+        ManagedTable(NeighborInfoPayload, ("reporting_node_id",)),
+        ManagedTable(NeighborInfoNeighbor, ("node_id",)),
+        ManagedTable(RouteDiscoveryPayload),
+        ManagedTable(
+            RouteDiscoveryRoute,
+            referenced_by=(
+                "route_discovery_payloads",
+                "route_discovery_payloads_back",
+            ),
+        ),
+        ManagedTable(RoutingPayload),
+        ManagedTable(NodeLatencyHistory, ("node_id",)),
+        ManagedTable(NodePresenceHistory, ("node_id",)),
+        ManagedTable(NetworkOverviewSnapshot),
+    )
+}
+
+
+def parse_retention_days(spec: Optional[str]) -> dict[str, int]:
+    """Parse ``"table=days,..."``; table names are model names."""
+    days: dict[str, int] = {}
+    for item in (spec or "").split(","):
+        if not item.strip():
+            continue
+        table, _, value = item.partition("=")
+        table = table.strip().lower()
+        if table not in MANAGED_TABLES:
+            raise ValueError(f"Unknown retention table: {table!r}")
+        try:
+            days[table] = int(value)
+        except ValueError:
+            raise ValueError(f"Invalid retention days: {item.strip()!r}") from None
+    return days
+
+
+@dataclass
+class RetentionResult:
+    table: str
+    hypertable: bool
+    deleted_rows: int = 0
+    dropped_chunks: int = 0
+    compressed_chunks: int = 0
+    size_before: int = 0
+    size_after: int = 0
+    reclaimed_bytes: int = 0
+    error: Optional[str] = None
+
+
+class RetentionService:
+    """Seeds, reports and applies the retention policies."""
+
+    def __init__(self, *, batch_size: Optional[int] = None) -> None:
+        self.batch_size = max(
+            1,
+            int(batch_size or getattr(settings, "RETENTION_DELETE_BATCH_SIZE", 5_000)),
+        )
+
+    def ensure_policies(self) -> list[RetentionPolicy]:
+        """Return every managed table's policy, creating missing ones from settings."""
+        existing = {policy.table: policy for policy in RetentionPolicy.objects.all()}
+        missing = [name for name in MANAGED_TABLES if name not in existing]
+        if missing:
+            days = parse_retention_days(getattr(settings, "RETENTION_DAYS", ""))
+            default_days = getattr(settings, "RETENTION_DEFAULT_DAYS", 0)
+            compress_after = getattr(settings, "RETENTION_COMPRESS_AFTER_DAYS", 7)
+            chunk_hours = getattr(settings, "RETENTION_CHUNK_INTERVAL_HOURS", 24)
+            RetentionPolicy.objects.bulk_create(
+                [
+                    RetentionPolicy(
+                        table=name,
+                        enabled=getattr(settings, "RETENTION_POLICIES_ENABLED", False),
+                        retention_days=days.get(name, default_days) or None,
+                        compress_after_days=compress_after or None,
+                        chunk_interval_hours=chunk_hours or None,
+                    )
+                    for name in missing
+                ],
+                ignore_conflicts=True,
+            )
+            existing = {
+                policy.table: policy for policy in RetentionPolicy.objects.all()
+            }
+        return [existing[name] for name in MANAGED_TABLES if name in existing]
+
+    @staticmethod
+    def hypertable_info(db_table: str) -> Optional[bool]:
+        """``None`` for a plain table, else whether compression is enabled."""
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'timescaledb'")
+            if cursor.fetchone() is None:
+                return None
+            cursor.execute(
+                "SELECT compression_enabled FROM timescaledb_information.hypertables "
+                "WHERE hypertable_name = %s",
+                [db_table],
+            )
+            row = cursor.fetchone()
+        return None if row is None else bool(row[0])
+
+    @staticmethod
+    def table_size(db_table: str, *, hypertable: bool = False) -> int:
+        function = "hypertable_size" if hypertable else "pg_total_relation_size"
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT {function}(%s::regclass)", [db_table])
+            return int(cursor.fetchone()[0] or 0)
+
+    def apply(
+        self, policy: RetentionPolicy, *, now: Optional[datetime] = None
+    ) -> RetentionResult:
+        """Apply one policy and record the outcome on it."""
+        now = now or timezone.now()
+        table = MANAGED_TABLES[policy.table]
+        compression = self.hypertable_info(table.db_table)
+        result = RetentionResult(table=policy.table, hypertable=compression is not None)
+        try:
+            result.size_before = self.table_size(
+                table.db_table, hypertable=result.hypertable
+            )
+            if result.hypertable:
+                self._apply_hypertable(table, policy, bool(compression), result)
+                result.size_after = self.table_size(table.db_table, hypertable=True)
+                result.reclaimed_bytes = max(0, result.size_before - result.size_after)
+            else:
+                self._apply_table(table, policy, now, result)
+                result.size_after = self.table_size(table.db_table)
+            if table.model is Packet and policy.retention_days:
+                # Archived envelopes expire with the packets referencing them
+                store = get_segment_store()
+                if store is not None:
+                    store.prune(now - timedelta(days=policy.retention_days))
+        except Exception as exc:
+            logger.exception("Retention policy for %s failed", policy.table)
+            result.error = str(exc)
+
+        policy.last_run_at = now
+        policy.last_deleted_rows = result.deleted_rows
+        policy.last_reclaimed_bytes = result.reclaimed_bytes
+        policy.total_reclaimed_bytes += result.reclaimed_bytes
+        policy.last_error_message = result.error or ""
+        policy.save(
+            update_fields=[
+                "last_run_at",
+                "last_deleted_rows",
+                "last_reclaimed_bytes",
+                "total_reclaimed_bytes",
+                "last_error_message",
+                "updated_at",
+            ]
+        )
+        return result
+
+    def _apply_hypertable(
+        self,
+        table: ManagedTable,
+        policy: RetentionPolicy,
+        compression_enabled: bool,
+        result: RetentionResult,
+    ) -> None:
+        with connection.cursor() as cursor:
+            if policy.chunk_interval_hours:
+                cursor.execute(
+                    "SELECT set_chunk_time_interval(%s::regclass, %s::interval)",
+                    [table.db_table, f"{policy.chunk_interval_hours} hours"],
+                )
+            if policy.compress_after_days is not None:
+                if not compression_enabled:
+                    options = [
+                        "timescaledb.compress",
+                        "timescaledb.compress_orderby = 'time DESC'",
+                    ]
+                    if table.segment_by:
+                        segment_by = ", ".join(table.segment_by)
+                        options.append(
+                            f"timescaledb.compress_segmentby = '{segment_by}'"
+                        )
+                    cursor.execute(
+                        f"ALTER TABLE {table.db_table} SET ({', '.join(options)})"
+                    )
+                compress_after = f"{policy.compress_after_days} days"
+                cursor.execute(
+                    "SELECT add_compression_policy(%s::regclass, %s::interval, "
+                    "if_not_exists => true)",
+                    [table.db_table, compress_after],
+                )
+                cursor.execute(
+                    "SELECT count(compress_chunk(chunk, if_not_compressed => true)) "
+                    "FROM show_chunks(%s::regclass, older_than => %s::interval) chunk",
+                    [table.db_table, compress_after],
+                )
+                result.compressed_chunks = int(cursor.fetchone()[0] or 0)
+            if policy.retention_days:
+                cursor.execute(
+                    "SELECT count(*) FROM drop_chunks(%s::regclass, "
+                    "older_than => %s::interval)",
+                    [table.db_table, f"{policy.retention_days} days"],
+                )
+                result.dropped_chunks = int(cursor.fetchone()[0] or 0)
+
+    def _apply_table(
+        self,
+        table: ManagedTable,
+        policy: RetentionPolicy,
+        now: datetime,
+        result: RetentionResult,
+    ) -> None:
+        if not policy.retention_days:
+            return
+        rows_before = self._row_estimate(table)
+        expired = table.model.objects.filter(
+            time__lt=now - timedelta(days=policy.retention_days),
+            **{f"{relation}__isnull": True for relation in table.referenced_by},
+        ).order_by()
+        label = table.model._meta.label
+        while True:
+            batch = list(expired.values_list("pk", flat=True)[: self.batch_size])
+            if not batch:
+                break
+            _, deleted = table.model.objects.filter(pk__in=batch).delete()
+            result.deleted_rows += deleted.get(label, 0)
+        if rows_before:
+            result.reclaimed_bytes = min(
+                result.size_before,
+                result.size_before * result.deleted_rows // rows_before,
+            )
+
+    @staticmethod
+    def _row_estimate(table: ManagedTable) -> int:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                [table.db_table],
+            )
+            estimate = int(cursor.fetchone()[0] or 0)
+        # Never analyzed (-1) or stale: fall back to an exact count.
+        return estimate if estimate > 0 else table.model.objects.count()
+
+    def run(
+        self,
+        tables: Optional[Iterable[str]] = None,
+        *,
+        now: Optional[datetime] = None,
+    ) -> list[RetentionResult]:
+        """Apply the enabled policies, or the named ones regardless of ``enabled``."""
+        selected = set(tables) if tables is not None else None
+        results = []
+        for policy in self.ensure_policies():
+            if selected is None and not policy.enabled:
+                continue
+            if selected is not None and policy.table not in selected:
+                continue
+            results.append(self.apply(policy, now=now))
+        return results
@@ -0,0 +1,597 @@
+"""
+Retroactive decryption of stored packets with newly learned keys.
+
+Packets received while their key was unknown are stored ``not_decrypted``
+with their ciphertext (``Packet.raw_data`` or the raw segment store). When a
+channel PSK is set or a node private key is imported, a `DecryptionJob`
+selects those packets (channel jobs: AES packets whose channel hash matches
+the key; node jobs: PKI packets addressed to the node), decrypts them in
+batches of ``RETRO_DECRYPT_BATCH_SIZE`` across ``RETRO_DECRYPT_WORKERS``
+processes and feeds the results to the regular port handlers. Each batch
+commits together with the job's progress and resume cursor, so an
+interrupted job continues after the last committed packet. A Celery task runs
+at most ``RETRO_DECRYPT_BATCHES_PER_TASK`` batches and queues the rest of the
+job again, so a long job does not hold the worker.
+
+Old packets must not overwrite current state: payload rows take the packet's
+receive time, nodes are marked seen at that time, node fields that already
+had a value and existing current neighbour sets are restored after each
+batch, and the traffic rollups covering the batch are rebuilt.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Callable, Iterator, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, OuterRef, Q, QuerySet, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from meshtastic.protobuf import mesh_pb2
+
+from ..ingest.segments import SegmentCorruptError, load_envelope
+from ..mesh.encryption.aes import decode_key
+from ..mesh.encryption.bulk import CipherItem, decrypt_aes_batch, decrypt_pki_batch
+from ..mesh.encryption.key_ring import get_channel_key_ring
+from ..mesh.encryption.pkc import (
+    PKIDecryptionError,
+    load_private_key_bytes,
+    load_public_key_bytes,
+)
+from ..mesh.encryption.pki_cache import invalidate_public_key
+from ..mesh.packet.handler import handle_decoded_packet
+from ..mesh.packet.last_seen import last_seen_at
+from ..mesh.utils import ensure_aes_key, generate_hash
+from ..models import Channel, DecryptionJob, Node, NodeNeighbor, Packet
+from ..models.decryption_models import DecryptionJobKind, DecryptionJobStatus
+from ..models.packet_models import (
+    NeighborInfoNeighbor,
+    NeighborInfoPayload,
+    NodeInfoPayload,
+    PacketData,
+    PacketDecryptionMethod,
+    PositionPayload,
+    RouteDiscoveryPayload,
+    RoutingPayload,
+    TelemetryPayload,
+)
+from ..utils.traffic_rollups import recompute_rollups
+
+logger = logging.getLogger(__name__)
+
+# Node fields the port handlers overwrite with the packet's values
+NODE_STATE_FIELDS = (
+    "short_name",
+    "long_name",
+    "hw_model",
+    "role",
+    "public_key",
+    "latitude",
+    "longitude",
+    "altitude",
+    "position_accuracy",
+    "location_source",
+    "battery_level",
+    "voltage",
+    "channel_utilization",
+    "air_util_tx",
+    "uptime_seconds",
+    "temperature",
+    "relative_humidity",
+    "barometric_pressure",
+    "gas_resistance",
+    "iaq",
+)
+
+PAYLOAD_MODELS = (
+    NodeInfoPayload,
+    PositionPayload,
+    TelemetryPayload,
+    NeighborInfoPayload,
+    RouteDiscoveryPayload,
+    RoutingPayload,
+)
+
+# Rollups keyed by port; channel rollups only count packets
+PORT_ROLLUPS = ("port", "sender", "receiver")
+
+# Set while the process pool runs: its spawned children set Django up while
+# importing the package, with the celery worker's argv, before any task runs.
+WORKER_ENV = "RETRO_DECRYPT_WORKER"
+
+
+def is_decryption_worker() -> bool:
+    """Whether this process is a child of the decryption process pool."""
+    return bool(os.environ.get(WORKER_ENV))
+
+
+class RetroDecryptionError(ValueError):
+    """Raised when a decryption job cannot be created or resumed."""
+
+
+def validate_psk(psk: str) -> bytes:
+    """Decode a channel PSK, rejecting anything but an AES-128/256 key."""
+    try:
+        key_bytes = decode_key(psk)
+    except (binascii.Error, ValueError) as exc:
+        raise RetroDecryptionError("PSK is not valid base64") from exc
+    if len(key_bytes) not in (16, 32):
+        raise RetroDecryptionError("PSK must be a 16 or 32 byte AES key")
+    return key_bytes
+
+
+class _JobInterrupted(Exception):
+    """The job stopped running (e.g. it was cancelled) during a batch."""
+
+
+class _NodeState:
+    """Node fields and current neighbour sets to restore after old packets."""
+
+    def __init__(self, node_pks: set[int]):
+        self.values = {
+            row["pk"]: row
+            for row in Node.objects.filter(pk__in=node_pks).values(
+                "pk", *NODE_STATE_FIELDS
+            )
+        }
+        self.neighbors = list(
+            NodeNeighbor.objects.filter(reporting_node_id__in=node_pks)
+        )
+
+    def restore(self) -> None:
+        for node in Node.objects.filter(pk__in=list(self.values)):
+            previous = self.values[node.pk]
+            fields = [
+                field
+                for field in NODE_STATE_FIELDS
+                if previous[field] is not None
+                and getattr(node, field) != previous[field]
+            ]
+            if not fields:
+                continue
+            for field in fields:
+                setattr(node, field, previous[field])
+            node.save(update_fields=fields)
+            if "public_key" in fields:
+                invalidate_public_key(node.node_num)
+
+        reporters = {row.reporting_node_id for row in self.neighbors}
+        if reporters:
+            NodeNeighbor.objects.filter(reporting_node_id__in=reporters).delete()
+            NodeNeighbor.objects.bulk_create(self.neighbors)
+
+
+def _backdate(packet_pks: list[int]) -> None:
+    """Give the rows created for ``packet_pks`` the packets' receive time."""
+    PacketData.objects.filter(packet_id__in=packet_pks).update(
+        time=Subquery(Packet.objects.filter(pk=OuterRef("packet_id")).values("time"))
+    )
+    data = PacketData.objects.filter(packet_id__in=packet_pks)
+    for model in PAYLOAD_MODELS:
+        model.objects.filter(packet_data__in=data).update(
+            time=Subquery(
+                PacketData.objects.filter(pk=OuterRef("packet_data_id")).values("time")
+            )
+        )
+    NeighborInfoNeighbor.objects.filter(payload__packet_data__in=data).update(
+        time=Subquery(
+            NeighborInfoPayload.objects.filter(pk=OuterRef("payload_id")).values("time")
+        )
+    )
+
+
+class RetroDecryptionService:
+    """Creates and runs `DecryptionJob` rows."""
+
+    def __init__(
+        self, *, workers: Optional[int] = None, batch_size: Optional[int] = None
+    ):
+        if workers is None:
+            workers = getattr(settings, "RETRO_DECRYPT_WORKERS", 2)
+        if batch_size is None:
+            batch_size = getattr(settings, "RETRO_DECRYPT_BATCH_SIZE", 500)
+        self.workers = max(1, int(workers))
+        self.batch_size = max(1, int(batch_size))
+
+    @staticmethod
+    def stale_after() -> timedelta:
+        return timedelta(
+            seconds=max(1, int(getattr(settings, "RETRO_DECRYPT_STALE_SECS", 600)))
+        )
+
+    @staticmethod
+    def channel_hashes(channel: Channel) -> set[int]:
+        """Channel numbers on the wire of packets encrypted with the channel's PSK."""
+        hashes = {int(channel.channel_num)}
+        if channel.psk:
+            hashes.add(generate_hash(channel.channel_id, ensure_aes_key(channel.psk)))
+        return hashes
+
+    @classmethod
+    def candidates(cls, job: DecryptionJob) -> QuerySet:
+        """Undecrypted packets of the job after its cursor, in primary key order."""
+        packets = Packet.objects.filter(
+            Q(raw_segment__isnull=False) | Q(raw_data__gt=""),
+            how_decrypted=PacketDecryptionMethod.NOT_DECRYPTED,
+            data__isnull=True,
+            pk__gt=job.last_packet_pk,
+        )
+        if job.kind == DecryptionJobKind.CHANNEL:
+            packets = packets.filter(
+                pki_encrypted=False,
+                channels__channel_num__in=cls.channel_hashes(job.channel),
+            ).distinct()
+        else:
+            packets = packets.filter(pki_encrypted=True, to_node_id=job.node_id)
+        return packets.order_by("pk")
+
+    @staticmethod
+    def _load_key(job: DecryptionJob) -> bytes | str:
+        if job.kind == DecryptionJobKind.CHANNEL:
+            psk = job.channel.psk if job.channel else None
+            if not psk:
+                raise RetroDecryptionError("Channel has no PSK")
+            return validate_psk(psk)
+        private_key = job.node.private_key if job.node else None
+        if not private_key:
+            raise RetroDecryptionError("Node has no private key")
+        try:
+            load_private_key_bytes(private_key)
+        except PKIDecryptionError as exc:
+            raise RetroDecryptionError(str(exc)) from exc
+        return private_key
+
+    @classmethod
+    def create_job(
+        cls, *, channel: Optional[Channel] = None, node: Optional[Node] = None
+    ) -> DecryptionJob:
+        """Create a job for a channel PSK or node private key.
+
+        Returns the pending job for the same key instead, if there is one.
+        """
+        if (channel is None) == (node is None):
+            raise RetroDecryptionError("Specify either a channel or a node")
+        if channel is not None:
+            target = {"kind": DecryptionJobKind.CHANNEL, "channel": channel}
+        else:
+            target = {"kind": DecryptionJobKind.NODE, "node": node}
+        job = DecryptionJob(**target)
+        cls._load_key(job)
+
+        pending = DecryptionJob.objects.filter(
+            status=DecryptionJobStatus.PENDING, **target
+        ).first()
+        if pending is not None:
+            return pending
+        job.total = cls.candidates(job).count()
+        job.save()
+        return job
+
+    @classmethod
+    def resume(cls, job: DecryptionJob) -> DecryptionJob:
+        """Queue a failed, cancelled or orphaned job again from its cursor."""
+        if job.status == DecryptionJobStatus.COMPLETED:
+            raise RetroDecryptionError("Job already completed")
+        if (
+            job.status == DecryptionJobStatus.RUNNING
+            and job.updated_at > timezone.now() - cls.stale_after()
+        ):
+            raise RetroDecryptionError("Job is running")
+        cls._load_key(job)
+        DecryptionJob.objects.filter(pk=job.pk).update(
+            status=DecryptionJobStatus.PENDING,
+            error_message="",
+            finished_at=None,
+            updated_at=timezone.now(),
+        )
+        job.refresh_from_db()
+        return job
+
+    @staticmethod
+    def cancel(job: DecryptionJob) -> DecryptionJob:
+        now = timezone.now()
+        DecryptionJob.objects.filter(
+            pk=job.pk,
+            status__in=[DecryptionJobStatus.PENDING, DecryptionJobStatus.RUNNING],
+        ).update(status=DecryptionJobStatus.CANCELLED, finished_at=now, updated_at=now)
+        job.refresh_from_db()
+        return job
+
+    @classmethod
+    def stale_jobs(cls) -> QuerySet:
+        """Pending or running jobs idle for ``RETRO_DECRYPT_STALE_SECS``."""
+        return DecryptionJob.objects.filter(
+            status__in=[DecryptionJobStatus.PENDING, DecryptionJobStatus.RUNNING],
+            updated_at__lt=timezone.now() - cls.stale_after(),
+        ).order_by("created_at")
+
+    @classmethod
+    def requeue_stale(cls) -> list[DecryptionJob]:
+        """Mark stale jobs pending again so a new task can claim them."""
+        requeued = []
+        for job in cls.stale_jobs():
+            # Conditional: a worker may have advanced the job meanwhile.
+            if (
+                cls.stale_jobs()
+                .filter(pk=job.pk)
+                .update(status=DecryptionJobStatus.PENDING, updated_at=timezone.now())
+            ):
+                job.refresh_from_db()
+                requeued.append(job)
+        return requeued
+
+    def _claim(self, job: DecryptionJob) -> bool:
+        now = timezone.now()
+        claimed = (
+            DecryptionJob.objects.filter(pk=job.pk)
+            .filter(
+                Q(status=DecryptionJobStatus.PENDING)
+                | Q(
+                    status=DecryptionJobStatus.RUNNING,
+                    updated_at__lt=now - self.stale_after(),
+                )
+            )
+            .update(
+                status=DecryptionJobStatus.RUNNING,
+                started_at=Coalesce("started_at", Value(now)),
+                updated_at=now,
+            )
+        )
+        job.refresh_from_db()
+        return bool(claimed)
+
+    def _release(self, job: DecryptionJob) -> None:
+        DecryptionJob.objects.filter(
+            pk=job.pk, status=DecryptionJobStatus.RUNNING
+        ).update(status=DecryptionJobStatus.PENDING, updated_at=timezone.now())
+        job.refresh_from_db()
+
+    def _finish(self, job: DecryptionJob, status: str, error: str = "") -> None:
+        now = timezone.now()
+        DecryptionJob.objects.filter(
+            pk=job.pk, status=DecryptionJobStatus.RUNNING
+        ).update(status=status, error_message=error, finished_at=now, updated_at=now)
+        job.refresh_from_db()
+
+    def run(
+        self,
+        job: DecryptionJob,
+        *,
+        progress: Optional[Callable[[DecryptionJob], None]] = None,
+        max_batches: Optional[int] = None,
+    ) -> DecryptionJob:
+        """Process a pending (or orphaned) job; returns it refreshed.
+
+        ``progress`` is called with the job after every committed batch. With
+        ``max_batches`` the job is left pending once that many batches are
+        committed and packets remain. Jobs that are already running elsewhere
+        are returned untouched.
+        """
+        if not self._claim(job):
+            return job
+        try:
+            key = self._load_key(job)
+            job.total = job.processed + self.candidates(job).count()
+            DecryptionJob.objects.filter(pk=job.pk).update(total=job.total)
+            if job.kind == DecryptionJobKind.CHANNEL and not job.last_packet_pk:
+                # Live ingest picks the new key up immediately.
+                get_channel_key_ring().clear()
+            batches = 0
+            with self._executor() as executor:
+                while True:
+                    if max_batches is not None and batches >= max_batches:
+                        if not self.candidates(job).exists():
+                            break
+                        self._release(job)
+                        return job
+                    batch = self._next_batch(job)
+                    if not batch:
+                        break
+                    items = [item for _, item in batch if item is not None]
+                    results = dict(self._decrypt(executor, job, key, items))
+                    self._apply(job, batch, results)
+                    batches += 1
+                    if progress is not None:
+                        progress(job)
+        except _JobInterrupted:
+            job.refresh_from_db()
+            return job
+        except Exception as exc:
+            logger.exception("Decryption job %s failed", job.pk)
+            self._finish(job, DecryptionJobStatus.FAILED, str(exc))
+            return job
+        self._finish(job, DecryptionJobStatus.COMPLETED)
+        logger.info(
+            "Decryption job %s decrypted %d of %d packets",
+            job.pk,
+            job.decrypted,
+            job.processed,
+        )
+        return job
+
+    @contextmanager
+    def _executor(self) -> Iterator[Optional[Executor]]:
+        # Daemonic processes (e.g. multiprocessing pool workers) cannot fork.
+        if self.workers <= 1 or multiprocessing.current_process().daemon:
+            yield None
+            return
+        # Spawned, not forked: children must not share the database connection.
+        # Children are started on demand, so the marker stays set throughout.
+        os.environ[WORKER_ENV] = "1"
+        try:
+            with ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            ) as executor:
+                yield executor
+        finally:
+            os.environ.pop(WORKER_ENV, None)
+
+    def _decrypt(
+        self,
+        executor: Optional[Executor],
+        job: DecryptionJob,
+        key: bytes | str,
+        items: list[CipherItem],
+    ) -> list[tuple[int, Optional[bytes]]]:
+        decrypt = (
+            decrypt_aes_batch
+            if job.kind == DecryptionJobKind.CHANNEL
+            else decrypt_pki_batch
+        )
+        if executor is None or len(items) < 2:
+            return decrypt(key, items)
+        size = -(-len(items) // self.workers)
+        futures = [
+            executor.submit(decrypt, key, items[start : start + size])
+            for start in range(0, len(items), size)
+        ]
+        return [result for future in futures for result in future.result()]
+
+    def _next_batch(
+        self, job: DecryptionJob
+    ) -> list[tuple[Packet, Optional[CipherItem]]]:
+        packets = self.candidates(job).select_related("from_node", "to_node")
+        return [
+            (packet, self._cipher_item(job, packet))
+            for packet in packets[: self.batch_size]
+        ]
+
+    @staticmethod
+    def _cipher_item(job: DecryptionJob, packet: Packet) -> Optional[CipherItem]:
+        if packet.packet_id is None:
+            return None
+        public_keys = [packet.public_key, packet.from_node.public_key]
+        if packet.raw_data:
+            try:
+                ciphertext = base64.b64decode(packet.raw_data)
+            except (binascii.Error, ValueError):
+                return None
+        else:
+            try:
+                envelope = load_envelope(packet)
+            except (OSError, SegmentCorruptError) as exc:
+                logger.warning("Packet %s envelope unreadable: %s", packet.pk, exc)
+                return None
+            if envelope is None or not envelope.packet.encrypted:
+                return None
+            ciphertext = bytes(envelope.packet.encrypted)
+            public_keys.insert(0, bytes(envelope.packet.public_key))
+
+        sender_key = None
+        if job.kind == DecryptionJobKind.NODE:
+            for candidate in public_keys:
+                try:
+                    sender_key = load_public_key_bytes(candidate) if candidate else None
+                except PKIDecryptionError:
+                    continue
+                if sender_key is not None:
+                    break
+        return (
+            packet.pk,
+            int(packet.packet_id),
+            int(packet.from_node.node_num),
+            int(packet.to_node.node_num),
+            ciphertext,
+            sender_key,
+        )
+
+    def _apply(
+        self,
+        job: DecryptionJob,
+        batch: list[tuple[Packet, Optional[CipherItem]]],
+        results: dict[int, Optional[bytes]],
+    ) -> None:
+        method = (
+            PacketDecryptionMethod.AES
+            if job.kind == DecryptionJobKind.CHANNEL
+            else PacketDecryptionMethod.PKI
+        )
+        decoded = [
+            (packet, results[packet.pk])
+            for packet, _ in batch
+            if results.get(packet.pk) is not None
+        ]
+        with transaction.atomic():
+            state = _NodeState({packet.from_node_id for packet, _ in decoded})
+            done: list[Packet] = []
+            for packet, payload in decoded:
+                data = mesh_pb2.Data()
+                data.ParseFromString(payload)
+                mesh_packet = mesh_pb2.MeshPacket(
+                    id=packet.packet_id, to=packet.to_node.node_num
+                )
+                setattr(mesh_packet, "from", packet.from_node.node_num)
+                packet.how_decrypted = method
+                try:
+                    with transaction.atomic(), last_seen_at(packet.time):
+                        handle_decoded_packet(
+                            from_node=packet.from_node,
+                            to_node=packet.to_node,
+                            packet=mesh_packet,
+                            decoded_data=data,
+                            packet_obj=packet,
+                            how_decrypted=method,
+                        )
+                except Exception:
+                    logger.exception(
+                        "Decryption job %s: handlers failed for packet %s",
+                        job.pk,
+                        packet.pk,
+                    )
+                    continue
+                done.append(packet)
+
+            if done:
+                pks = [packet.pk for packet in done]
+                Packet.objects.filter(pk__in=pks).update(how_decrypted=method)
+                _backdate(pks)
+                state.restore()
+                times = [packet.time for packet in done]
+                recompute_rollups(min(times), max(times), names=PORT_ROLLUPS)
+
+            advanced = DecryptionJob.objects.filter(
+                pk=job.pk, status=DecryptionJobStatus.RUNNING
+            ).update(
+                processed=F("processed") + len(batch),
+                decrypted=F("decrypted") + len(done),
+                failed=F("failed") + len(batch) - len(done),
+                last_packet_pk=batch[-1][0].pk,
+                updated_at=timezone.now(),
+            )
+            if not advanced:
+                raise _JobInterrupted()
+        job.refresh_from_db()
+
+
+def enqueue_decryption_job(job: DecryptionJob) -> None:
+    """Run ``job`` on a Celery worker once the current transaction commits."""
+    from ..tasks.decryption_tasks import run_decryption_job
+
+    transaction.on_commit(lambda: run_decryption_job.delay(job.pk))
+
+
+def schedule_retro_decryption(
+    *, channel: Optional[Channel] = None, node: Optional[Node] = None
+) -> Optional[DecryptionJob]:
+    """Queue a job after a key was learned, if ``RETRO_DECRYPT_AUTO`` is on."""
+    if not getattr(settings, "RETRO_DECRYPT_AUTO", True):
+        return None
+    if channel is not None:
+        get_channel_key_ring().clear()
+    try:
+        job = RetroDecryptionService.create_job(channel=channel, node=node)
+    except RetroDecryptionError as exc:
+        logger.info("Retroactive decryption not scheduled: %s", exc)
+        return None
+    enqueue_decryption_job(job)
+    return job
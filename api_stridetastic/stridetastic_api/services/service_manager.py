@@ -6,9 +6,15 @@ from typing import Dict, Optional
 from django.conf import settings
 from django.utils import timezone
 
+from ..ingest.batch import shutdown_ingest_batcher
+from ..ingest.log import shutdown_ingest_log
+from ..ingest.queue import shutdown_ingest_queue
+from ..ingest.workers import is_ingest_shard, shutdown_sharded_ingest
 from ..interfaces.mqtt_interface import MqttInterface
 from ..interfaces.serial_interface import SerialInterface
 from ..interfaces.tcp_interface import TcpInterface
+from ..mesh.packet.last_seen import get_last_seen_tracker
+from ..mesh.packet.link_activity import get_link_activity_aggregator
 from ..models.interface_models import Interface
 from .capture_service import CaptureService
 from .pki_service import PKIService
@@ -156,6 +162,13 @@ class ServiceManager:
         )
         if self._capture_service:
             self._capture_service.stop_all()
+        # Interfaces are down: drain queued packets into the batcher, then flush.
+        shutdown_ingest_log()
+        shutdown_sharded_ingest()
+        shutdown_ingest_queue()
+        shutdown_ingest_batcher()
+        get_last_seen_tracker().stop()
+        get_link_activity_aggregator().stop()
 
     def reload_interface(self, interface_id: int):
         if not self._allow_interface_runtime:
@@ -355,6 +368,8 @@ class ServiceManager:
                     w.is_connected(),
                     getattr(w.db, "mqtt_topic", None),
                 )
+            get_last_seen_tracker().start()
+            get_link_activity_aggregator().start()
         else:
             logging.info(
                 "ServiceManager bootstrap: interface runtime disabled in process role %s",
@@ -449,6 +464,8 @@ class ServiceManager:
 
     @staticmethod
     def _detect_process_role() -> str:
+        if is_ingest_shard():
+            return "ingest_shard"
         argv = sys.argv
         if argv and argv[0].endswith("celery"):
             if "worker" in argv:
@@ -19,6 +19,8 @@ from django.db.models import Max
 from google.protobuf.descriptor import EnumValueDescriptor
 from meshtastic.protobuf import config_pb2, mesh_pb2
 
+from ..mesh.encryption.pki_cache import invalidate_public_key
+from ..mesh.packet.node_cache import invalidate_node_identity
 from ..mesh.utils import id_to_num, num_to_mac
 from ..models import Node
 
@@ -137,6 +139,7 @@ class VirtualNodeService:
         fields = cls._sanitize_fields(payload)
 
         secrets: Optional[VirtualNodeSecrets] = None
+        previous_node_num = node.node_num
 
         try:
             with transaction.atomic():
@@ -181,6 +184,9 @@ class VirtualNodeService:
         except IntegrityError as exc:  # pragma: no cover - defensive
             raise VirtualNodeError("Failed to update virtual node") from exc
 
+        invalidate_node_identity(node, node_num=previous_node_num)
+        invalidate_public_key(previous_node_num)
+        invalidate_public_key(node.node_num)
         node.refresh_from_db()
         return node, secrets
 
@@ -188,6 +194,7 @@ class VirtualNodeService:
     def delete_virtual_node(cls, node: Node) -> None:
         if not node.is_virtual:
             raise VirtualNodeError("Node is not managed as a virtual node")
+        invalidate_node_identity(node)
         node.delete()
 
     @classmethod
@@ -257,6 +264,7 @@ class VirtualNodeService:
         cls.ensure_key_pair_available(public_key, private_key, exclude_pk=node.pk)
         node.public_key = public_key
         node.save(update_fields=["public_key"])
+        invalidate_public_key(node.node_num)
         fingerprint = hashlib.sha256(private_key.encode("utf-8")).hexdigest()
         node.store_private_key(private_key, fingerprint=fingerprint)
 
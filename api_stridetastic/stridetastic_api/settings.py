@@ -367,3 +367,147 @@ DEFAULT_VIRTUAL_NODE_PRIVATE_KEY = (
 
 CAPTURE_MAX_FILESIZE = _env_int("CAPTURE_MAX_FILESIZE", 1_073_741_824)
 CAPTURE_TASK_TIMEOUT = _env_int("CAPTURE_TASK_TIMEOUT", 15)
+
+# Write-behind ingest: persist packets in size/time bounded micro-batches
+INGEST_BATCH_ENABLED = _env_flag("INGEST_BATCH_ENABLED", False)
+INGEST_BATCH_MAX_SIZE = _env_int("INGEST_BATCH_MAX_SIZE", 200)
+INGEST_BATCH_MAX_WAIT_MS = _env_int("INGEST_BATCH_MAX_WAIT_MS", 500)
+
+# In-process node identity cache used by the packet handler (0 disables it)
+NODE_IDENTITY_CACHE_SIZE = _env_int("NODE_IDENTITY_CACHE_SIZE", 10_000)
+NODE_IDENTITY_CACHE_TTL_SECS = _env_int("NODE_IDENTITY_CACHE_TTL_SECS", 300)
+
+# Coalesced Node.last_seen writes: pending timestamps are flushed this often
+NODE_LAST_SEEN_FLUSH_SECS = _env_int("NODE_LAST_SEEN_FLUSH_SECS", 5)
+
+# Multi-gateway duplicate suppression (window of 0 disables it)
+PACKET_DEDUP_WINDOW_SECS = _env_int("PACKET_DEDUP_WINDOW_SECS", 30)
+PACKET_DEDUP_MAX_ENTRIES = _env_int("PACKET_DEDUP_MAX_ENTRIES", 50_000)
+
+# Channel key ring: known PSKs are reloaded from the Channel table this often
+CHANNEL_KEY_RING_REFRESH_SECS = _env_int("CHANNEL_KEY_RING_REFRESH_SECS", 60)
+
+# PKI decryption caches: parsed keys / derived shared keys (0 disables them)
+PKI_KEY_CACHE_SIZE = _env_int("PKI_KEY_CACHE_SIZE", 1024)
+PKI_PUBLIC_KEY_TTL_SECS = _env_int("PKI_PUBLIC_KEY_TTL_SECS", 300)
+
+# Bounded ingest queue between interface callbacks and the DB-heavy ingest path
+INGEST_QUEUE_ENABLED = _env_flag("INGEST_QUEUE_ENABLED", False)
+INGEST_QUEUE_MAX_SIZE = _env_int("INGEST_QUEUE_MAX_SIZE", 10_000)
+INGEST_QUEUE_WORKERS = _env_int("INGEST_QUEUE_WORKERS", 1)
+# One of: block, drop_oldest, drop_newest
+INGEST_QUEUE_POLICY = (os.getenv("INGEST_QUEUE_POLICY") or "block").strip().lower()
+INGEST_QUEUE_BLOCK_TIMEOUT_SECS = _env_int("INGEST_QUEUE_BLOCK_TIMEOUT_SECS", 5)
+INGEST_QUEUE_DRAIN_TIMEOUT_SECS = _env_int("INGEST_QUEUE_DRAIN_TIMEOUT_SECS", 30)
+
+# Rolling window size of the ingest latency histograms
+INGEST_METRICS_WINDOW = _env_int("INGEST_METRICS_WINDOW", 1024)
+
+# Channel row/membership cache of the packet handler; Channel.last_seen is
+# written at most once per interval
+CHANNEL_CACHE_SIZE = _env_int("CHANNEL_CACHE_SIZE", 50_000)
+CHANNEL_CACHE_TTL_SECS = _env_int("CHANNEL_CACHE_TTL_SECS", 300)
+CHANNEL_LAST_SEEN_INTERVAL_SECS = _env_int("CHANNEL_LAST_SEEN_INTERVAL_SECS", 30)
+
+# Write-behind NodeLink counters: per-link deltas are upserted this often
+# (0 writes on every packet)
+LINK_ACTIVITY_FLUSH_SECS = _env_int("LINK_ACTIVITY_FLUSH_SECS", 5)
+
+# Pending request registry used to match responses (ACKs, traceroute replies)
+# to sent or observed requests: "memory" (per process) or "redis" (shared, needed
+# when requests and responses are handled in different processes, e.g. with
+# INGEST_WORKER_PROCESSES > 0)
+PENDING_REQUEST_BACKEND = (
+    (os.getenv("PENDING_REQUEST_BACKEND") or "memory").strip().lower()
+)
+PENDING_REQUEST_REDIS_URL = os.getenv(
+    "PENDING_REQUEST_REDIS_URL", "redis://redis_stridetastic.local:6379/2"
+)
+PENDING_REQUEST_TTL_SECS = _env_int("PENDING_REQUEST_TTL_SECS", 900)
+PENDING_REQUEST_MAX = _env_int("PENDING_REQUEST_MAX", 100_000)
+
+# Packet identity: (sender, packet_id, reception time bucket) is unique; copies
+# received within the grace period after a bucket boundary join the previous one
+PACKET_IDENTITY_BUCKET_SECS = _env_int("PACKET_IDENTITY_BUCKET_SECS", 86_400)
+PACKET_IDENTITY_GRACE_SECS = _env_int("PACKET_IDENTITY_GRACE_SECS", 600)
+
+# Multi-process ingest: packets are partitioned by sender onto this many worker
+# processes (0 ingests in the receiving process)
+INGEST_WORKER_PROCESSES = _env_int("INGEST_WORKER_PROCESSES", 0)
+INGEST_WORKER_QUEUE_SIZE = _env_int("INGEST_WORKER_QUEUE_SIZE", 10_000)
+INGEST_WORKER_SUPERVISE_SECS = _env_int("INGEST_WORKER_SUPERVISE_SECS", 2)
+
+# Durable ingest log: interfaces append packets to a Redis Stream ("redis") or
+# a process-local log ("memory"); consumer-group writers persist them
+INGEST_LOG_ENABLED = _env_flag("INGEST_LOG_ENABLED", False)
+INGEST_LOG_BACKEND = (os.getenv("INGEST_LOG_BACKEND") or "redis").strip().lower()
+INGEST_LOG_REDIS_URL = os.getenv(
+    "INGEST_LOG_REDIS_URL", "redis://redis_stridetastic.local:6379/3"
+)
+INGEST_LOG_STREAM = os.getenv("INGEST_LOG_STREAM", "stridetastic:ingest")
+INGEST_LOG_GROUP = os.getenv("INGEST_LOG_GROUP", "ingest-writers")
+INGEST_LOG_MAXLEN = _env_int("INGEST_LOG_MAXLEN", 1_000_000)
+# Writer threads next to the interfaces (0: only `run_ingest_consumers`)
+INGEST_LOG_CONSUMERS = _env_int("INGEST_LOG_CONSUMERS", 1)
+INGEST_LOG_BATCH_SIZE = _env_int("INGEST_LOG_BATCH_SIZE", 100)
+INGEST_LOG_BLOCK_MS = _env_int("INGEST_LOG_BLOCK_MS", 1000)
+INGEST_LOG_CLAIM_IDLE_SECS = _env_int("INGEST_LOG_CLAIM_IDLE_SECS", 60)
+INGEST_LOG_MAX_DELIVERIES = _env_int("INGEST_LOG_MAX_DELIVERIES", 5)
+
+# Ingest admission: per-sender token buckets charged after dedup and decryption;
+# port limits are "PORT=per_minute:burst" pairs, e.g. "POSITION_APP=12:10"
+INGEST_ADMISSION_ENABLED = _env_flag("INGEST_ADMISSION_ENABLED", False)
+INGEST_ADMISSION_NODE_PER_MIN = _env_int("INGEST_ADMISSION_NODE_PER_MIN", 120)
+INGEST_ADMISSION_NODE_BURST = _env_int("INGEST_ADMISSION_NODE_BURST", 60)
+INGEST_ADMISSION_PORT_LIMITS = os.getenv("INGEST_ADMISSION_PORT_LIMITS", "")
+INGEST_ADMISSION_MAX_NODES = _env_int("INGEST_ADMISSION_MAX_NODES", 10_000)
+
+# Packet traffic rollups: buckets up to now - END_OFFSET are materialized every
+# REFRESH interval, recomputing LOOKBACK before the watermark for late packets
+# and backfilling at most MAX_WINDOW of history per run
+TRAFFIC_ROLLUP_REFRESH_SECS = _env_int("TRAFFIC_ROLLUP_REFRESH_SECS", 60)
+TRAFFIC_ROLLUP_END_OFFSET_SECS = _env_int("TRAFFIC_ROLLUP_END_OFFSET_SECS", 60)
+TRAFFIC_ROLLUP_LOOKBACK_SECS = _env_int("TRAFFIC_ROLLUP_LOOKBACK_SECS", 600)
+TRAFFIC_ROLLUP_MAX_WINDOW_SECS = _env_int("TRAFFIC_ROLLUP_MAX_WINDOW_SECS", 86_400)
+CELERY_BEAT_SCHEDULE["refresh_traffic_rollups"] = {
+    "task": "stridetastic_api.tasks.metrics_tasks.refresh_traffic_rollups",
+    "schedule": TRAFFIC_ROLLUP_REFRESH_SECS,
+}
+
+# Storage policies of the time-series tables (editable at /retention/policies
+# once seeded): RETENTION_DAYS holds "table=days" pairs such as
+# "packet=180,nodelatencyhistory=30"; 0 days keeps everything
+RETENTION_POLICIES_ENABLED = _env_flag("RETENTION_POLICIES_ENABLED", False)
+RETENTION_DAYS = os.getenv("RETENTION_DAYS", "")
+RETENTION_DEFAULT_DAYS = _env_int("RETENTION_DEFAULT_DAYS", 0)
+RETENTION_COMPRESS_AFTER_DAYS = _env_int("RETENTION_COMPRESS_AFTER_DAYS", 7)
+RETENTION_CHUNK_INTERVAL_HOURS = _env_int("RETENTION_CHUNK_INTERVAL_HOURS", 24)
+RETENTION_DELETE_BATCH_SIZE = _env_int("RETENTION_DELETE_BATCH_SIZE", 5_000)
+RETENTION_RUN_INTERVAL_SECS = _env_int("RETENTION_RUN_INTERVAL_SECS", 3600)
+CELERY_BEAT_SCHEDULE["run_retention_policies"] = {
+    "task": "stridetastic_api.tasks.retention_tasks.run_retention_policies",
+    "schedule": RETENTION_RUN_INTERVAL_SECS,
+}
+
+# Raw segment store: every received envelope appended to segment files of at
+# most RAW_SEGMENT_MAX_BYTES; packets reference their record instead of
+# keeping base64 ciphertext
+RAW_SEGMENTS_ENABLED = _env_flag("RAW_SEGMENTS_ENABLED", False)
+RAW_SEGMENT_ROOT = Path(os.getenv("RAW_SEGMENT_ROOT") or BASE_DIR / "segments")
+RAW_SEGMENT_MAX_BYTES = _env_int("RAW_SEGMENT_MAX_BYTES", 64 * 1024 * 1024)
+RAW_SEGMENT_FSYNC = _env_flag("RAW_SEGMENT_FSYNC", False)
+
+# Retroactive decryption: setting a channel PSK or importing a node private key
+# queues a job decrypting the stored packets it applies to, in batches spread
+# over RETRO_DECRYPT_WORKERS processes; a task runs BATCHES_PER_TASK batches
+# and queues the rest of the job again; jobs idle for STALE_SECS are resumed
+RETRO_DECRYPT_AUTO = _env_flag("RETRO_DECRYPT_AUTO", True)
+RETRO_DECRYPT_WORKERS = _env_int("RETRO_DECRYPT_WORKERS", 2)
+RETRO_DECRYPT_BATCH_SIZE = _env_int("RETRO_DECRYPT_BATCH_SIZE", 500)
+RETRO_DECRYPT_BATCHES_PER_TASK = _env_int("RETRO_DECRYPT_BATCHES_PER_TASK", 20)
+RETRO_DECRYPT_STALE_SECS = _env_int("RETRO_DECRYPT_STALE_SECS", 600)
+RETRO_DECRYPT_RESUME_SECS = _env_int("RETRO_DECRYPT_RESUME_SECS", 300)
+CELERY_BEAT_SCHEDULE["resume_decryption_jobs"] = {
+    "task": "stridetastic_api.tasks.decryption_tasks.resume_decryption_jobs",
+    "schedule": RETRO_DECRYPT_RESUME_SECS,
+}
@@ -6,7 +6,9 @@ These star imports are used for backwards compatibility.
 # ruff: noqa: F401,F403
 
 from .capture_tasks import *
+from .decryption_tasks import *
 from .keepalive_tasks import *
 from .metrics_tasks import *
 from .publisher_tasks import *
+from .retention_tasks import *
 from .sniffer_tasks import *
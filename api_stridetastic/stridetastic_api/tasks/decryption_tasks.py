@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import logging
+
+from celery import shared_task
+from django.conf import settings
+
+from ..models import DecryptionJob
+from ..models.decryption_models import DecryptionJobStatus
+from ..services.retro_decryption_service import (
+    RetroDecryptionService,
+    enqueue_decryption_job,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name="stridetastic_api.tasks.decryption_tasks.run_decryption_job")
+def run_decryption_job(job_id: int) -> int:
+    """Run a bounded slice of a decryption job; returns the packets it decrypted.
+
+    A job left pending after ``RETRO_DECRYPT_BATCHES_PER_TASK`` batches is
+    queued again, so other tasks get the worker in between.
+    """
+    try:
+        job = DecryptionJob.objects.filter(pk=job_id).first()
+        if job is None:
+            logger.warning("Decryption job %s no longer exists", job_id)
+            return 0
+        decrypted_before = job.decrypted
+        job = RetroDecryptionService().run(
+            job,
+            max_batches=max(
+                1, int(getattr(settings, "RETRO_DECRYPT_BATCHES_PER_TASK", 20))
+            ),
+        )
+        if job.status == DecryptionJobStatus.PENDING:
+            enqueue_decryption_job(job)
+        return job.decrypted - decrypted_before
+    except Exception:  # pragma: no cover - defensive
+        logger.exception("run_decryption_job task failed for job %s", job_id)
+        return 0
+
+
+@shared_task(name="stridetastic_api.tasks.decryption_tasks.resume_decryption_jobs")
+def resume_decryption_jobs() -> int:
+    """Queue jobs whose worker died or whose task message was lost again."""
+    try:
+        resumed = 0
+        for job in RetroDecryptionService.requeue_stale():
+            logger.info("Resuming stale decryption job %s", job.pk)
+            enqueue_decryption_job(job)
+            resumed += 1
+        return resumed
+    except Exception:  # pragma: no cover - defensive
+        logger.exception("resume_decryption_jobs task failed")
+        return 0
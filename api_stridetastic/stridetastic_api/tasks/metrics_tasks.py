@@ -9,6 +9,8 @@ from celery import shared_task
 from django.db.models import Avg
 from django.utils import timezone
 
+from ..mesh.packet.last_seen import flush_last_seen
+from ..mesh.packet.link_activity import flush_link_activity
 from ..models import (
     Channel,
     Edge,
@@ -17,6 +19,7 @@ from ..models import (
     NodeLatencyHistory,
     NodeLink,
 )
+from ..utils import traffic_rollups
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +44,7 @@ def record_network_overview_snapshot() -> bool:
     dashboard can be populated on a regular schedule by Celery Beat.
     """
     try:
+        flush_link_activity()
         now = timezone.now()
         active_threshold = now - ACTIVE_WINDOW
 
@@ -107,6 +111,7 @@ def mark_unreachable_nodes() -> int:
         from django.conf import settings
 
         timeout_secs = getattr(settings, "REACTIVE_REACHABILITY_TIMEOUT_SECS", 3600)
+        flush_last_seen()
         cutoff = timezone.now() - timedelta(seconds=int(timeout_secs))
 
         qs = Node.objects.filter(latency_reachable=True, last_seen__lt=cutoff)
@@ -131,3 +136,17 @@ def mark_unreachable_nodes() -> int:
     except Exception:  # pragma: no cover - defensive
         logger.exception("mark_unreachable_nodes task failed")
         return 0
+
+
+@shared_task(name="stridetastic_api.tasks.metrics_tasks.refresh_traffic_rollups")
+def refresh_traffic_rollups() -> int:
+    """Materialize packet traffic rollup buckets up to the refresh end offset.
+
+    Returns the number of rollups that had a window to refresh.
+    """
+    try:
+        refreshed = traffic_rollups.refresh_traffic_rollups()
+        return sum(1 for window in refreshed.values() if window is not None)
+    except Exception:  # pragma: no cover - defensive
+        logger.exception("refresh_traffic_rollups task failed")
+        return 0
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import logging
+from typing import Optional
+
+from celery import shared_task
+
+from ..services.retention_service import RetentionService
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name="stridetastic_api.tasks.retention_tasks.run_retention_policies")
+def run_retention_policies(tables: Optional[list[str]] = None) -> int:
+    """Apply the enabled or the named policies; returns the bytes reclaimed."""
+    try:
+        results = RetentionService().run(tables)
+        for result in results:
+            if result.error:
+                logger.warning(
+                    "Retention policy for %s failed: %s", result.table, result.error
+                )
+        return sum(result.reclaimed_bytes for result in results)
+    except Exception:  # pragma: no cover - defensive
+        logger.exception("run_retention_policies task failed")
+        return 0
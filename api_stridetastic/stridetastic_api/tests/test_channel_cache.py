@@ -0,0 +1,129 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase  # type: ignore[import]
+from django.utils import timezone
+from meshtastic.protobuf import mesh_pb2, portnums_pb2  # type: ignore[attr-defined]
+
+from ..mesh.packet import handler
+from ..mesh.packet.channel_cache import ChannelMembershipCache, get_channel_cache
+from ..mesh.packet.dedup import get_duplicate_window
+from ..mesh.packet.node_cache import get_node_identity_cache
+from ..models import Channel, Interface, Node
+
+
+def _message(packet_id: int) -> dict:
+    packet = mesh_pb2.MeshPacket()
+    setattr(packet, "from", 0x4444)
+    packet.to = 0xFFFFFFFF
+    packet.id = packet_id
+    packet.channel = 8
+    packet.decoded.portnum = portnums_pb2.TEXT_MESSAGE_APP
+    packet.decoded.payload = b"hi"
+    return {
+        "gateway_node_id": "!0000aaaa",
+        "channel_id": "LongFast",
+        "packet": packet,
+        "interface_id": None,
+    }
+
+
+class ChannelMembershipCacheTests(TestCase):
+    def setUp(self) -> None:
+        self.cache = ChannelMembershipCache(last_seen_interval=60)
+        self.interface = Interface.objects.create(
+            interface_type=Interface.Types.MQTT, name="mqtt-test"
+        )
+        self.nodes = [
+            Node.objects.create(
+                node_num=num,
+                node_id=f"!{num:08x}",
+                mac_address=f"AA:00:00:00:00:0{num}",
+            )
+            for num in (1, 2)
+        ]
+
+    def test_known_pairs_and_channels_skip_the_database(self) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            channel = self.cache.get_channel("LongFast", 8)
+            with self.assertNumQueries(2):
+                written = self.cache.link(
+                    channel, interfaces=(self.interface,), members=self.nodes
+                )
+        self.assertEqual(written, 3)
+
+        with self.assertNumQueries(0):
+            cached = self.cache.get_channel("LongFast", 8)
+            self.assertEqual(
+                self.cache.link(
+                    cached, interfaces=(self.interface,), members=self.nodes
+                ),
+                0,
+            )
+
+        self.assertEqual(cached.pk, channel.pk)
+        self.assertEqual(cached.psk, channel.psk)
+        self.assertEqual(set(channel.members.all()), set(self.nodes))
+        self.assertEqual(list(channel.interfaces.all()), [self.interface])
+        stats = self.cache.get_stats()
+        self.assertEqual(stats["channel_hits"], 1)
+        self.assertEqual(stats["pairs_inserted"], 3)
+        self.assertEqual(stats["pair_hits"], 3)
+
+    def test_pairs_are_not_cached_when_transaction_rolls_back(self) -> None:
+        channel = self.cache.get_channel("LongFast", 8)
+        self.cache.link(channel, members=self.nodes[:1])
+
+        self.assertEqual(self.cache.get_stats()["pairs"], 0)
+        with self.assertNumQueries(1):
+            self.cache.link(channel, members=self.nodes[:1])
+
+    def test_last_seen_is_written_at_most_once_per_interval(self) -> None:
+        channel = self.cache.get_channel("LongFast", 8)
+        stale = timezone.now() - timedelta(days=1)
+        Channel.objects.filter(pk=channel.pk).update(last_seen=stale)
+
+        self.assertEqual(self.cache.touch([channel.pk]), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.cache.touch([channel.pk]), 0)
+        self.assertGreater(Channel.objects.get(pk=channel.pk).last_seen, stale)
+
+        with patch(
+            "stridetastic_api.mesh.packet.channel_cache.time.monotonic",
+            return_value=10**9,
+        ):
+            self.assertEqual(self.cache.touch([channel.pk]), 1)
+
+
+@patch("stridetastic_api.mesh.packet.handler._dispatch_to_publisher_service")
+class OnMessageChannelCacheTests(TestCase):
+    def setUp(self) -> None:
+        self.cache = get_channel_cache()
+        self.cache.clear()
+        self.addCleanup(self.cache.clear)
+        window = get_duplicate_window()
+        window.clear()
+        self.addCleanup(window.clear)
+        # Committed callbacks cache node rows that the test rollback removes.
+        self.addCleanup(get_node_identity_cache().clear)
+
+    def test_repeat_traffic_reuses_channel_and_membership(self, _dispatch) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            handler.on_message(None, None, _message(1))
+        before = self.cache.get_stats()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            handler.on_message(None, None, _message(2))
+        after = self.cache.get_stats()
+
+        channel = Channel.objects.get(channel_id="LongFast")
+        self.assertEqual(
+            sorted(channel.members.values_list("node_num", flat=True)),
+            [0x4444, 0xFFFFFFFF],
+        )
+        self.assertEqual(channel.interfaces.count(), 1)
+        self.assertEqual(channel.packets.count(), 2)
+        self.assertEqual(after["channel_hits"], before["channel_hits"] + 1)
+        self.assertEqual(after["pairs_inserted"], before["pairs_inserted"])
+        self.assertEqual(after["pair_hits"], before["pair_hits"] + 3)
+        self.assertEqual(after["last_seen_writes"], before["last_seen_writes"])
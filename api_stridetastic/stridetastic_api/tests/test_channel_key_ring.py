@@ -0,0 +1,113 @@
+from unittest.mock import patch
+
+from django.test import TestCase  # type: ignore[import]
+
+from ..mesh.encryption.aes import decode_key
+from ..mesh.encryption.key_ring import ChannelKeyRing, get_channel_key_ring
+from ..mesh.packet import handler
+from ..mesh.packet.crafter import craft_mesh_packet, craft_text_message
+from ..mesh.packet.dedup import get_duplicate_window
+from ..models import Channel
+from ..models.packet_models import Packet, PacketDecryptionMethod
+
+SECRET_PSK = "AQIDBAUGBwgJCgsMDQ4PEA=="  # hash 38 on "Secret"
+SECRET_ALT_PSK = "AwQFBgcICQoLDA0ODxAREg=="  # also hash 38 on "Secret"
+OTHER_PSK = "AgMEBQYHCAkKCwwNDg8QEQ=="  # hash 68 on "Other"
+
+
+def _packet(psk: str, *, channel_name: str = "Secret", packet_id: int = 321):
+    return craft_mesh_packet(
+        from_id="!00007777",
+        to_id="!ffffffff",
+        channel_name=channel_name,
+        channel_aes_key=psk,
+        global_message_id=packet_id,
+        data_protobuf=craft_text_message("ring"),
+    )
+
+
+class ChannelKeyRingTests(TestCase):
+    def setUp(self) -> None:
+        Channel.objects.create(channel_id="Secret", channel_num=38, psk=SECRET_PSK)
+        Channel.objects.create(channel_id="Secret", channel_num=38, psk=SECRET_ALT_PSK)
+        Channel.objects.create(channel_id="Other", channel_num=68, psk=OTHER_PSK)
+        self.ring = ChannelKeyRing(refresh_seconds=3600)
+
+    def test_candidates_are_indexed_by_channel_hash(self) -> None:
+        self.assertEqual(
+            sorted(key.psk for key in self.ring.candidates(38)),
+            sorted([SECRET_PSK, SECRET_ALT_PSK]),
+        )
+        self.assertEqual([key.psk for key in self.ring.candidates(68)], [OTHER_PSK])
+        self.assertEqual(
+            [key.channel_name for key in self.ring.candidates(8)], ["LongFast"]
+        )
+
+    def test_falls_back_to_hash_matched_keys(self) -> None:
+        data, key = self.ring.decrypt(_packet(SECRET_ALT_PSK), preferred_psk="AQ==")
+
+        self.assertEqual(data.payload, b"ring")
+        self.assertEqual(key.psk, SECRET_ALT_PSK)
+        stats = self.ring.get_stats()
+        self.assertEqual(stats["trial_hits"], 1)
+        self.assertLessEqual(stats["trial_attempts"], 2)
+
+    def test_preferred_psk_is_used_without_trials(self) -> None:
+        data, key = self.ring.decrypt(
+            _packet(OTHER_PSK, channel_name="Other"), preferred_psk=OTHER_PSK
+        )
+
+        self.assertEqual(data.payload, b"ring")
+        self.assertIsNone(key)
+        self.assertEqual(self.ring.get_stats()["trial_attempts"], 0)
+
+    def test_unknown_key_returns_preferred_result(self) -> None:
+        packet = _packet("BAUGBwgJCgsMDQ4PEBESEw==", channel_name="Nowhere")
+
+        with patch.object(self.ring, "candidates", return_value=[]):
+            data, key = self.ring.decrypt(packet, preferred_psk="AQ==")
+
+        self.assertIsNone(key)
+        self.assertNotEqual(getattr(data, "payload", None), b"ring")
+        self.assertEqual(self.ring.get_stats()["misses"], 1)
+
+    def test_key_material_is_decoded_once(self) -> None:
+        decode_key.cache_clear()
+        for packet_id in range(1, 4):
+            self.ring.decrypt(
+                _packet(OTHER_PSK, packet_id=packet_id), preferred_psk=OTHER_PSK
+            )
+
+        info = decode_key.cache_info()
+        self.assertEqual(info.misses, 1)
+        self.assertEqual(info.hits, 2)
+
+
+@patch("stridetastic_api.mesh.packet.handler._dispatch_to_publisher_service")
+class SerialChannelDecryptionTests(TestCase):
+    def setUp(self) -> None:
+        window = get_duplicate_window()
+        window.clear()
+        self.addCleanup(window.clear)
+        ring = get_channel_key_ring()
+        ring.clear()
+        self.addCleanup(ring.clear)
+
+    def test_serial_packet_is_decrypted_by_hash_match(self, dispatch) -> None:
+        Channel.objects.create(channel_id="Secret", channel_num=38, psk=SECRET_PSK)
+
+        handler.on_message(
+            None,
+            None,
+            {
+                "gateway_node_id": "!0000aaaa",
+                "channel_id": "0",
+                "packet": _packet(SECRET_PSK),
+                "interface_id": None,
+            },
+            "Serial",
+        )
+
+        packet = Packet.objects.get(packet_id=321)
+        self.assertEqual(packet.how_decrypted, PacketDecryptionMethod.AES)
+        self.assertEqual(dispatch.call_count, 1)
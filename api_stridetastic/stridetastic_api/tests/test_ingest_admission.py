@@ -0,0 +1,228 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings  # type: ignore[import]
+from meshtastic.protobuf import mesh_pb2, portnums_pb2  # type: ignore[attr-defined]
+
+from ..controllers.metrics_controller import MetricsController
+from ..ingest import admission
+from ..ingest.admission import AdmissionController, packet_port, parse_port_limits
+from ..ingest.utils import dispatch_normalized
+from ..mesh.encryption.aes import encrypt_message
+from ..mesh.packet.bulk import persist_packet_batch
+from ..mesh.packet.dedup import get_duplicate_window
+from ..mesh.packet.link_activity import get_link_activity_aggregator
+from ..models import Node
+from ..models.packet_models import Packet, PacketDecryptionMethod
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _packet(sender: int, packet_id: int, portnum=portnums_pb2.TEXT_MESSAGE_APP):
+    packet = mesh_pb2.MeshPacket()
+    setattr(packet, "from", sender)
+    packet.to = 0xFFFFFFFF
+    packet.id = packet_id
+    packet.channel = 8
+    packet.decoded.portnum = portnum
+    packet.decoded.payload = b"x"
+    return packet
+
+
+def _encrypted_packet(sender: int, packet_id: int, portnum) -> mesh_pb2.MeshPacket:
+    packet = _packet(sender, packet_id, portnum)
+    data = mesh_pb2.Data()
+    data.CopyFrom(packet.decoded)
+    data.payload = b""
+    packet.ClearField("decoded")
+    packet.encrypted = encrypt_message("LongFast", "AQ==", packet, data, sender)
+    return packet
+
+
+def _normalized(packet, gateway_node_id: str = "!0000aaaa") -> dict:
+    return {
+        "gateway_node_id": gateway_node_id,
+        "channel_id": "LongFast",
+        "packet": packet,
+        "interface_id": None,
+    }
+
+
+class AdmissionControllerTests(TestCase):
+    def setUp(self) -> None:
+        self.clock = _Clock()
+        self.controller = AdmissionController(
+            node_per_minute=60,
+            node_burst=3,
+            port_limits={"POSITION_APP": (6, 1)},
+            clock=self.clock,
+        )
+
+    def test_port_limits_are_parsed(self) -> None:
+        self.assertEqual(
+            parse_port_limits(" position_app=12:10, TEXT_MESSAGE_APP=30 ,"),
+            {"POSITION_APP": (12.0, 10.0), "TEXT_MESSAGE_APP": (30.0, 30.0)},
+        )
+        with self.assertRaises(ValueError):
+            parse_port_limits("POSITION_APP=fast")
+
+    def test_encrypted_packets_use_their_own_port(self) -> None:
+        packet = mesh_pb2.MeshPacket(encrypted=b"\x01")
+        self.assertEqual(packet_port(packet), "ENCRYPTED")
+        self.assertEqual(packet_port(_packet(1, 1)), "TEXT_MESSAGE_APP")
+
+    def test_node_budget_refills_over_time(self) -> None:
+        admitted = [self.controller.admit(0x1, "TEXT_MESSAGE_APP") for _ in range(5)]
+        self.assertEqual(admitted, [True, True, True, False, False])
+        self.assertTrue(self.controller.admit(0x2, "TEXT_MESSAGE_APP"))
+
+        self.clock.now += 1.0
+        self.assertTrue(self.controller.admit(0x1, "TEXT_MESSAGE_APP"))
+        self.assertFalse(self.controller.admit(0x1, "TEXT_MESSAGE_APP"))
+
+    def test_port_budget_sheds_only_that_port(self) -> None:
+        self.assertTrue(self.controller.admit(0x1, "POSITION_APP"))
+        self.assertFalse(self.controller.admit(0x1, "POSITION_APP"))
+        self.assertTrue(self.controller.admit(0x1, "TEXT_MESSAGE_APP"))
+
+        stats = self.controller.get_stats()
+        self.assertEqual((stats["admitted"], stats["shed"]), (2, 1))
+        self.assertEqual(stats["shed_by_port"], {"POSITION_APP": 1})
+        [node] = stats["nodes"]
+        self.assertEqual((node["node_num"], node["shed"]), (0x1, 1))
+        self.assertEqual(node["by_port"], {"POSITION_APP": 1})
+        self.assertIsNotNone(node["first_shed_at"])
+
+
+@override_settings(
+    INGEST_ADMISSION_ENABLED=True,
+    INGEST_ADMISSION_NODE_PER_MIN=1,
+    INGEST_ADMISSION_NODE_BURST=2,
+    INGEST_ADMISSION_PORT_LIMITS="",
+)
+@patch("stridetastic_api.mesh.packet.handler._dispatch_to_publisher_service")
+class AdmissionDispatchTests(TestCase):
+    def setUp(self) -> None:
+        patcher = patch.object(admission, "_controller", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        window = get_duplicate_window()
+        window.clear()
+        self.addCleanup(window.clear)
+        self.addCleanup(get_link_activity_aggregator().clear)
+
+    def _dispatch(
+        self, sender: int, packet_id: int, gateway_node_id: str = "!0000aaaa"
+    ) -> None:
+        dispatch_normalized(
+            None, None, _normalized(_packet(sender, packet_id), gateway_node_id)
+        )
+
+    def _stats(self) -> dict:
+        return admission.get_admission_controller().get_stats()
+
+    def test_flooding_node_is_shed_without_persisting(self, _publish) -> None:
+        for packet_id in range(1, 11):
+            self._dispatch(0x1111, packet_id)
+        self._dispatch(0x2222, 100)
+
+        self.assertEqual(Packet.objects.filter(from_node__node_num=0x1111).count(), 2)
+        self.assertTrue(Packet.objects.filter(packet_id=100).exists())
+        self.assertEqual(_publish.call_count, 3)
+
+        status, payload = MetricsController().get_ingest_shed_metrics(SimpleNamespace())
+        self.assertEqual(status, 200)
+        self.assertTrue(payload.enabled)
+        self.assertEqual((payload.admitted, payload.shed), (3, 8))
+        self.assertEqual(payload.nodes[0].node_id, "!00001111")
+        self.assertEqual(payload.nodes[0].by_port, {"TEXT_MESSAGE_APP": 8})
+
+    def test_shed_packets_are_neither_archived_nor_resolved(self, _publish) -> None:
+        with patch(
+            "stridetastic_api.mesh.packet.handler.archive_envelope", return_value=None
+        ) as archive:
+            for packet_id in range(1, 5):
+                self._dispatch(0x1111, packet_id, f"!0000aa0{packet_id}")
+
+        self.assertEqual(archive.call_count, 2)
+        self.assertEqual(
+            sorted(Node.objects.values_list("node_id", flat=True)),
+            ["!00001111", "!0000aa01", "!0000aa02", "!ffffffff"],
+        )
+
+    def test_duplicate_copies_are_not_charged(self, _publish) -> None:
+        for gateway_node_id in ("!0000aaaa", "!0000bbbb", "!0000cccc"):
+            self._dispatch(0x1111, 1, gateway_node_id)
+        self._dispatch(0x1111, 2)
+        self._dispatch(0x1111, 3)
+
+        self.assertEqual(
+            sorted(
+                Packet.objects.filter(from_node__node_num=0x1111).values_list(
+                    "packet_id", flat=True
+                )
+            ),
+            [1, 2],
+        )
+        self.assertEqual(Packet.objects.get(packet_id=1).gateway_nodes.count(), 3)
+        stats = self._stats()
+        self.assertEqual((stats["admitted"], stats["shed"]), (2, 1))
+
+    @override_settings(INGEST_ADMISSION_PORT_LIMITS="POSITION_APP=1:1")
+    def test_encrypted_packets_are_charged_to_their_port(self, _publish) -> None:
+        for packet_id in (1, 2):
+            dispatch_normalized(
+                None,
+                None,
+                _normalized(
+                    _encrypted_packet(0x1111, packet_id, portnums_pb2.POSITION_APP)
+                ),
+            )
+
+        self.assertEqual(
+            list(Packet.objects.values_list("packet_id", "how_decrypted")),
+            [(1, PacketDecryptionMethod.AES)],
+        )
+        stats = self._stats()
+        self.assertEqual(stats["shed_by_port"], {"POSITION_APP": 1})
+
+    def test_batch_path_charges_like_the_per_packet_path(self, _publish) -> None:
+        items = [
+            (_normalized(_packet(0x1111, 1)), "MQTT"),
+            (_normalized(_packet(0x1111, 1), "!0000bbbb"), "MQTT"),
+            (_normalized(_packet(0x1111, 2)), "MQTT"),
+            (_normalized(_packet(0x1111, 3)), "MQTT"),
+            (_normalized(_packet(0x1111, 3), "!0000bbbb"), "MQTT"),
+        ]
+        results = persist_packet_batch(items)
+
+        self.assertEqual(len(results), 5)
+        self.assertEqual([result[5] is None for result in results[3:]], [True, True])
+        self.assertEqual(
+            sorted(Packet.objects.values_list("packet_id", flat=True)), [1, 2]
+        )
+        self.assertEqual(Packet.objects.get(packet_id=1).gateway_nodes.count(), 2)
+        stats = self._stats()
+        self.assertEqual((stats["admitted"], stats["shed"]), (2, 2))
+
+    def test_batch_path_sheds_before_resolving_nodes(self, _publish) -> None:
+        items = [
+            (_normalized(_packet(0x1111, packet_id), f"!0000aa0{packet_id}"), "MQTT")
+            for packet_id in range(1, 5)
+        ]
+        with patch(
+            "stridetastic_api.mesh.packet.bulk.archive_envelope", return_value=None
+        ) as archive:
+            results = persist_packet_batch(items)
+
+        self.assertEqual(archive.call_count, 2)
+        self.assertEqual(
+            results[3], (items[3][0]["packet"], None, None, None, None, None)
+        )
+        self.assertFalse(Node.objects.filter(node_id="!0000aa03").exists())
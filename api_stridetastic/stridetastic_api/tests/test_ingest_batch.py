@@ -0,0 +1,282 @@
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase  # type: ignore[import]
+from meshtastic.protobuf import mesh_pb2, portnums_pb2  # type: ignore[attr-defined]
+
+from ..ingest.batch import IngestBatcher
+from ..mesh.packet import handler
+from ..mesh.packet.bulk import persist_packet_batch
+from ..mesh.packet.dedup import get_duplicate_window
+from ..mesh.packet.link_activity import (
+    flush_link_activity,
+    get_link_activity_aggregator,
+)
+from ..models import Channel, Edge, Interface, Node, NodeLink
+from ..models.packet_models import (
+    Packet,
+    PacketData,
+    PacketObservation,
+    PositionPayload,
+)
+
+
+def _text_packet(packet_id: int, sender: int, *, rssi: int, snr: float):
+    packet = mesh_pb2.MeshPacket()
+    setattr(packet, "from", sender)
+    packet.to = 0xFFFFFFFF
+    packet.id = packet_id
+    packet.channel = 8
+    packet.hop_limit = 2
+    packet.hop_start = 3
+    packet.rx_rssi = rssi
+    packet.rx_snr = snr
+    packet.decoded.portnum = portnums_pb2.TEXT_MESSAGE_APP
+    packet.decoded.payload = f"hello {packet_id}".encode()
+    return packet
+
+
+def _position_packet(packet_id: int, sender: int):
+    position = mesh_pb2.Position(latitude_i=473_000_000, longitude_i=85_000_000)
+    packet = mesh_pb2.MeshPacket()
+    setattr(packet, "from", sender)
+    packet.to = 0xFFFFFFFF
+    packet.id = packet_id
+    packet.channel = 8
+    packet.decoded.portnum = portnums_pb2.POSITION_APP
+    packet.decoded.payload = position.SerializeToString()
+    return packet
+
+
+def _normalized(packet, gateway_node_id: str) -> dict:
+    return {
+        "gateway_node_id": gateway_node_id,
+        "channel_id": "LongFast",
+        "packet": packet,
+        "interface_id": None,
+    }
+
+
+def _workload() -> list[tuple[dict, str]]:
+    return [
+        (
+            _normalized(_text_packet(1001, 0x1111, rssi=-90, snr=4.5), "!0000aaaa"),
+            "MQTT",
+        ),
+        # Same packet heard by a second gateway.
+        (
+            _normalized(_text_packet(1001, 0x1111, rssi=-70, snr=8.25), "!0000bbbb"),
+            "MQTT",
+        ),
+        (_normalized(_position_packet(1002, 0x2222), "!0000aaaa"), "MQTT"),
+        (
+            _normalized(_text_packet(1003, 0x2222, rssi=-80, snr=1.0), "!0000bbbb"),
+            "MQTT",
+        ),
+    ]
+
+
+def _snapshot() -> dict:
+    flush_link_activity()
+    return {
+        "nodes": sorted(Node.objects.values_list("node_num", "node_id", "mac_address")),
+        "node_interfaces": sorted(
+            Node.interfaces.through.objects.values_list(
+                "node__node_num", "interface__interface_type"
+            )
+        ),
+        "channels": sorted(Channel.objects.values_list("channel_id", "channel_num")),
+        "channel_members": sorted(
+            Channel.members.through.objects.values_list(
+                "channel__channel_id", "node__node_num"
+            )
+        ),
+        "packets": sorted(
+            Packet.objects.values_list(
+                "packet_id",
+                "from_node__node_num",
+                "to_node__node_num",
+                "rx_rssi",
+                "rx_snr",
+                "hop_limit",
+                "hop_start",
+                "via_mqtt",
+                "how_decrypted",
+                "raw_data",
+            )
+        ),
+        "gateways": sorted(
+            Packet.gateway_nodes.through.objects.values_list(
+                "packet__packet_id", "node__node_num"
+            )
+        ),
+        "packet_data": sorted(
+            PacketData.objects.values_list("packet__packet_id", "port", "raw_payload")
+        ),
+        "positions": sorted(
+            PositionPayload.objects.values_list(
+                "packet_data__packet__packet_id", "latitude", "longitude"
+            )
+        ),
+        "edges": sorted(
+            Edge.objects.values_list(
+                "source_node__node_num",
+                "target_node__node_num",
+                "last_packet__packet_id",
+                "last_rx_rssi",
+                "last_rx_snr",
+                "last_hops",
+            )
+        ),
+        "observations": sorted(
+            PacketObservation.objects.values_list(
+                "packet__packet_id",
+                "gateway_node__node_num",
+                "rx_rssi",
+                "rx_snr",
+                "is_duplicate",
+            )
+        ),
+        "links": sorted(
+            NodeLink.objects.values_list(
+                "node_a__node_num",
+                "node_b__node_num",
+                "node_a_to_node_b_packets",
+                "node_b_to_node_a_packets",
+            )
+        ),
+    }
+
+
+def _reset() -> None:
+    for model in (Edge, NodeLink, Packet, Channel, Node, Interface):
+        model.objects.all().delete()
+
+
+@patch("stridetastic_api.mesh.packet.handler._dispatch_to_publisher_service")
+class PersistPacketBatchTests(TestCase):
+    def setUp(self) -> None:
+        get_duplicate_window().clear()
+        self.addCleanup(get_duplicate_window().clear)
+        get_link_activity_aggregator().clear()
+        self.addCleanup(get_link_activity_aggregator().clear)
+
+    def test_batch_produces_same_rows_as_per_packet_path(self, _dispatch) -> None:
+        for normalized, iface in _workload():
+            handler.on_message(None, None, normalized, iface)
+        expected = _snapshot()
+
+        _reset()
+        persist_packet_batch(_workload())
+
+        self.assertEqual(_snapshot(), expected)
+        self.assertEqual(Packet.objects.count(), 3)
+        self.assertEqual(
+            Packet.objects.get(packet_id=1001).gateway_nodes.count(),
+            2,
+        )
+
+    def test_batch_dispatches_decoded_packets_after_commit(self, dispatch) -> None:
+        results = persist_packet_batch(_workload())
+
+        self.assertEqual(len(results), 4)
+        # The second gateway's copy of packet 1001 is not dispatched again.
+        self.assertEqual(dispatch.call_count, 3)
+
+    def test_batch_updates_existing_nodes_and_packets(self, _dispatch) -> None:
+        Node.objects.create(
+            node_num=0x1111,
+            node_id="!stale",
+            mac_address="00:00:00:00:00:01",
+        )
+
+        persist_packet_batch(_workload()[:1])
+        persist_packet_batch(_workload()[1:2])
+
+        node = Node.objects.get(node_num=0x1111)
+        self.assertEqual(node.node_id, "!00001111")
+        packet = Packet.objects.get(packet_id=1001)
+        # The second copy is a suppressed duplicate: the first copy's header wins.
+        self.assertEqual(packet.rx_rssi, -90)
+        self.assertEqual(packet.gateway_nodes.count(), 2)
+        self.assertEqual(
+            list(
+                packet.observations.order_by("pk").values_list(
+                    "rx_rssi", "is_duplicate"
+                )
+            ),
+            [(-90, False), (-70, True)],
+        )
+
+    def test_packets_without_id_are_kept_apart(self, dispatch) -> None:
+        persist_packet_batch(
+            [
+                (
+                    _normalized(_text_packet(0, 0x1111, rssi=-90, snr=1.0), gateway),
+                    "MQTT",
+                )
+                for gateway in ("!0000aaaa", "!0000bbbb")
+            ]
+        )
+
+        self.assertEqual(
+            sorted(
+                Packet.objects.filter(packet_id=0).values_list("rx_rssi", flat=True)
+            ),
+            [-90, -90],
+        )
+        self.assertEqual(PacketData.objects.count(), 2)
+        self.assertEqual(dispatch.call_count, 2)
+
+    def test_failing_packet_does_not_abort_batch(self, _dispatch) -> None:
+        original = handler.handle_packet
+        calls = {"count": 0}
+
+        def _flaky_handle_packet(**kwargs):
+            calls["count"] += 1
+            if calls["count"] == 1:
+                raise RuntimeError("boom")
+            return original(**kwargs)
+
+        with patch.object(handler, "handle_packet", side_effect=_flaky_handle_packet):
+            results = persist_packet_batch(_workload())
+
+        self.assertIsNone(results[0])
+        self.assertTrue(all(result is not None for result in results[1:]))
+        self.assertEqual(PacketData.objects.count(), 3)
+
+
+class IngestBatcherTests(TestCase):
+    def test_flushes_when_batch_is_full(self) -> None:
+        persist = MagicMock()
+        batcher = IngestBatcher(max_batch_size=2, max_wait_ms=60_000, persist=persist)
+
+        batcher.submit({"packet": 1}, "MQTT")
+        persist.assert_not_called()
+        batcher.submit({"packet": 2}, "TCP")
+
+        persist.assert_called_once_with(
+            [({"packet": 1}, "MQTT"), ({"packet": 2}, "TCP")]
+        )
+        stats = batcher.get_stats()
+        self.assertEqual(stats["batches_flushed"], 1)
+        self.assertEqual(stats["packets_flushed"], 2)
+        self.assertEqual(stats["last_batch_size"], 2)
+        self.assertEqual(stats["pending"], 0)
+
+    def test_stop_drains_pending_items(self) -> None:
+        persist = MagicMock()
+        batcher = IngestBatcher(max_batch_size=50, max_wait_ms=60_000, persist=persist)
+        batcher.submit({"packet": 1}, "MQTT")
+
+        batcher.stop()
+
+        persist.assert_called_once()
+        self.assertEqual(batcher.pending(), 0)
+
+    def test_persist_failure_is_counted(self) -> None:
+        persist = MagicMock(side_effect=RuntimeError("db down"))
+        batcher = IngestBatcher(max_batch_size=1, max_wait_ms=60_000, persist=persist)
+
+        batcher.submit({"packet": 1}, "MQTT")
+
+        self.assertEqual(batcher.get_stats()["failed_batches"], 1)
@@ -0,0 +1,95 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase  # type: ignore[import]
+from meshtastic.protobuf import portnums_pb2  # type: ignore[attr-defined]
+
+from ..ingest import mqtt as mqtt_ingest
+from ..ingest.context import IngestContext
+from ..mesh.encryption.key_ring import decrypt_with_key_ring
+from ..mesh.packet import handler
+from ..mesh.packet.crafter import (
+    craft_mesh_packet,
+    craft_service_envelope,
+    craft_text_message,
+)
+from ..mesh.packet.dedup import get_duplicate_window
+from ..models.packet_models import PacketData, PacketDecryptionMethod
+from ..services.capture_service import CaptureService
+
+
+def _encrypted_payload(packet_id: int = 777) -> bytes:
+    mesh_packet = craft_mesh_packet(
+        from_id="!00006666",
+        to_id="!ffffffff",
+        channel_name="LongFast",
+        channel_aes_key="AQ==",
+        global_message_id=packet_id,
+        data_protobuf=craft_text_message("hello"),
+    )
+    return craft_service_envelope(mesh_packet, "LongFast", "!0000aaaa")
+
+
+@patch("stridetastic_api.mesh.packet.handler._dispatch_to_publisher_service")
+class IngestContextTests(TestCase):
+    def setUp(self) -> None:
+        window = get_duplicate_window()
+        window.clear()
+        self.addCleanup(window.clear)
+
+    def test_capture_and_handler_share_one_decryption(self, dispatch) -> None:
+        context = IngestContext.from_payload(_encrypted_payload())
+        capture = CaptureService(enable_writer=False)
+
+        with patch(
+            "stridetastic_api.ingest.context.decrypt_with_key_ring",
+            wraps=decrypt_with_key_ring,
+        ) as decrypt:
+            captured = capture._decrypt_encrypted_payload(
+                context.packet, channel_id=context.channel_id, context=context
+            )
+            normalized = mqtt_ingest.normalize_mqtt_message(
+                SimpleNamespace(topic="msh/test", payload=None), context=context
+            )
+            handler.on_message(None, None, normalized)
+
+        self.assertEqual(decrypt.call_count, 1)
+        self.assertEqual(context.decrypt_calls, 1)
+        self.assertEqual(captured.portnum, portnums_pb2.TEXT_MESSAGE_APP)
+        self.assertEqual(context.how_decrypted, PacketDecryptionMethod.AES)
+        self.assertEqual(context.decoded_data.payload, b"hello")
+        self.assertEqual(PacketData.objects.count(), 1)
+        self.assertEqual(dispatch.call_count, 1)
+
+    def test_handle_mqtt_ingest_parses_envelope_once(self, _dispatch) -> None:
+        capture_service = MagicMock()
+        manager = MagicMock()
+        manager.get_capture_service.return_value = capture_service
+        msg = SimpleNamespace(topic="msh/test", payload=_encrypted_payload())
+
+        with (
+            patch(
+                "stridetastic_api.services.service_manager.ServiceManager.get_instance",
+                return_value=manager,
+            ),
+            patch.object(
+                IngestContext, "from_payload", wraps=IngestContext.from_payload
+            ) as from_payload,
+            patch.object(mqtt_ingest, "dispatch_normalized") as dispatch_normalized,
+        ):
+            mqtt_ingest.handle_mqtt_ingest(None, None, msg, interface_id=None)
+
+        self.assertEqual(from_payload.call_count, 1)
+        context = capture_service.handle_ingest.call_args.kwargs["context"]
+        normalized = dispatch_normalized.call_args.args[2]
+        self.assertIs(normalized["context"], context)
+        self.assertIs(normalized["packet"], context.packet)
+        self.assertEqual(normalized["gateway_node_id"], "!0000aaaa")
+
+    def test_invalid_payload_is_dropped(self, _dispatch) -> None:
+        msg = SimpleNamespace(topic="msh/test", payload=b"\xff\xff\xff")
+        with patch.object(mqtt_ingest, "dispatch_normalized") as dispatch_normalized:
+            self.assertIsNone(mqtt_ingest.normalize_mqtt_message(msg))
+            mqtt_ingest.handle_mqtt_ingest(None, None, msg)
+
+        dispatch_normalized.assert_not_called()
@@ -0,0 +1,116 @@
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings  # type: ignore[import]
+from meshtastic.protobuf import mesh_pb2, portnums_pb2  # type: ignore[attr-defined]
+
+from ..ingest.dispatcher import enqueue_packet
+from ..ingest.log import (
+    IngestLog,
+    InMemoryStreamBackend,
+    get_ingest_log,
+    shutdown_ingest_log,
+)
+from ..mesh.packet.dedup import get_duplicate_window
+from ..mesh.packet.link_activity import get_link_activity_aggregator
+from ..models.packet_models import Packet
+
+
+def _serial_packet(packet_id: int, sender: int = 0x1111) -> dict:
+    packet = mesh_pb2.MeshPacket()
+    setattr(packet, "from", sender)
+    packet.to = 0xFFFFFFFF
+    packet.id = packet_id
+    packet.channel = 8
+    packet.decoded.portnum = portnums_pb2.TEXT_MESSAGE_APP
+    packet.decoded.payload = f"hello {packet_id}".encode()
+    return {"raw": packet, "channel": 0}
+
+
+class IngestLogTests(TestCase):
+    def setUp(self) -> None:
+        self.backend = InMemoryStreamBackend()
+        self.log = IngestLog(self.backend, max_deliveries=2)
+        self.handled: list = []
+
+    def _handle(self, job) -> None:
+        self.handled.append(job)
+
+    def _fail(self, job) -> None:
+        raise RuntimeError("handler crashed")
+
+    def test_entries_are_acknowledged_after_processing(self) -> None:
+        for packet_id in (1, 2, 3):
+            self.assertTrue(self.log.append("serial", _serial_packet(packet_id), None))
+
+        self.assertEqual(self.log.consume("a", count=2, handler=self._handle), 2)
+        self.assertEqual(self.log.consume("a", count=2, handler=self._handle), 1)
+
+        self.assertEqual(len(self.handled), 3)
+        self.assertEqual(self.handled[0].source_type, "serial")
+        stats = self.log.get_stats()
+        self.assertEqual((stats["length"], stats["pending"]), (0, 0))
+        self.assertEqual((stats["appended"], stats["processed"]), (3, 3))
+
+    def test_entries_of_a_dead_consumer_are_claimed_by_another(self) -> None:
+        self.log.append("serial", _serial_packet(1), None)
+        # Consumer "a" reads the entry and dies before acknowledging it.
+        self.backend.read("a", count=10, block_ms=0)
+        self.assertEqual(self.backend.pending(), 1)
+
+        self.assertEqual(
+            self.log.consume(
+                "b", claim_idle_ms=60_000, handler=self._handle, block_ms=0
+            ),
+            0,
+        )
+        self.assertEqual(
+            self.log.consume("b", claim_idle_ms=0, handler=self._handle, block_ms=0), 1
+        )
+
+        self.assertEqual(len(self.handled), 1)
+        self.assertEqual(self.backend.pending(), 0)
+        self.assertEqual(self.log.get_stats()["reclaimed"], 1)
+
+    def test_repeatedly_failing_entries_are_dead_lettered(self) -> None:
+        self.log.append("serial", _serial_packet(1), None)
+
+        self.log.consume("a", claim_idle_ms=60_000, handler=self._fail, block_ms=0)
+        self.assertEqual(self.backend.pending(), 1)
+        self.log.consume("a", claim_idle_ms=0, handler=self._fail, block_ms=0)
+
+        self.assertEqual(self.backend.pending(), 0)
+        self.assertEqual(len(self.backend.dead), 1)
+        stats = self.log.get_stats()
+        self.assertEqual((stats["failed"], stats["dead_lettered"]), (2, 1))
+
+    def test_append_failures_are_reported(self) -> None:
+        with patch.object(self.backend, "append", side_effect=ConnectionError):
+            self.assertFalse(self.log.append("serial", _serial_packet(1), None))
+        self.assertEqual(self.log.get_stats()["append_failed"], 1)
+
+
+@override_settings(
+    INGEST_LOG_ENABLED=True, INGEST_LOG_BACKEND="memory", INGEST_LOG_CONSUMERS=0
+)
+class IngestLogDispatchTests(TestCase):
+    def setUp(self) -> None:
+        shutdown_ingest_log()
+        self.addCleanup(shutdown_ingest_log)
+        window = get_duplicate_window()
+        window.clear()
+        self.addCleanup(window.clear)
+        aggregator = get_link_activity_aggregator()
+        self.addCleanup(aggregator.clear)
+
+    @patch("stridetastic_api.mesh.packet.handler._dispatch_to_publisher_service")
+    def test_interface_packets_are_persisted_by_log_writers(self, _dispatch) -> None:
+        self.assertTrue(
+            enqueue_packet("serial", _serial_packet(4242), {"interface_id": None})
+        )
+        self.assertFalse(Packet.objects.filter(packet_id=4242).exists())
+
+        ingest_log = get_ingest_log()
+        self.assertEqual(ingest_log.consume("writer", block_ms=0), 1)
+
+        self.assertTrue(Packet.objects.filter(packet_id=4242).exists())
+        self.assertEqual(ingest_log.get_stats()["processed"], 1)
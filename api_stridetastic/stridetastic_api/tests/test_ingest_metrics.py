@@ -0,0 +1,100 @@
+from unittest.mock import patch
+
+from django.test import TestCase  # type: ignore[import]
+from meshtastic.protobuf import mesh_pb2, portnums_pb2  # type: ignore[attr-defined]
+
+from ..controllers.metrics_controller import MetricsController
+from ..ingest.metrics import IngestMetrics, RollingHistogram, get_ingest_metrics
+from ..mesh.packet import handler
+from ..mesh.packet.dedup import get_duplicate_window
+
+
+def _text_message(packet_id: int = 5151) -> dict:
+    packet = mesh_pb2.MeshPacket()
+    setattr(packet, "from", 0x6666)
+    packet.to = 0xFFFFFFFF
+    packet.id = packet_id
+    packet.channel = 8
+    packet.decoded.portnum = portnums_pb2.TEXT_MESSAGE_APP
+    packet.decoded.payload = b"hello"
+    return {
+        "gateway_node_id": "!0000aaaa",
+        "channel_id": "LongFast",
+        "packet": packet,
+        "interface_id": None,
+    }
+
+
+class RollingHistogramTests(TestCase):
+    def test_nearest_rank_percentiles(self) -> None:
+        histogram = RollingHistogram(100)
+        for value in range(1, 101):
+            histogram.observe(float(value))
+
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot["count"], 100)
+        self.assertEqual(snapshot["p50"], 50.0)
+        self.assertEqual(snapshot["p95"], 95.0)
+        self.assertEqual(snapshot["p99"], 99.0)
+        self.assertEqual(snapshot["max"], 100.0)
+
+    def test_window_keeps_latest_samples_only(self) -> None:
+        histogram = RollingHistogram(2)
+        for value in (100.0, 1.0, 2.0):
+            histogram.observe(value)
+
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot["count"], 3)
+        self.assertEqual(snapshot["max"], 2.0)
+
+    def test_batches_are_amortised_per_packet(self) -> None:
+        metrics = IngestMetrics(window=16)
+        with metrics.packets(4):
+            with metrics.packets():
+                pass
+
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot["stages"]["total"]["count"], 4)
+        self.assertEqual(snapshot["queries_per_packet"]["count"], 4)
+
+
+@patch("stridetastic_api.mesh.packet.handler._dispatch_to_publisher_service")
+class IngestMetricsPipelineTests(TestCase):
+    def setUp(self) -> None:
+        self.metrics = get_ingest_metrics()
+        self.metrics.reset()
+        self.addCleanup(self.metrics.reset)
+        window = get_duplicate_window()
+        window.clear()
+        self.addCleanup(window.clear)
+
+    def test_on_message_records_stages_ports_and_queries(self, _dispatch) -> None:
+        handler.on_message(None, None, _text_message())
+
+        snapshot = self.metrics.snapshot()
+        for stage in ("node_resolution", "packet_upsert", "handle_packet", "total"):
+            self.assertEqual(snapshot["stages"][stage]["count"], 1, stage)
+        self.assertEqual(snapshot["ports"]["TEXT_MESSAGE_APP"]["count"], 1)
+        self.assertEqual(snapshot["queries_per_packet"]["count"], 1)
+        self.assertGreater(snapshot["queries_per_packet"]["max"], 0)
+
+    def test_json_and_prometheus_endpoints(self, _dispatch) -> None:
+        handler.on_message(None, None, _text_message())
+        controller = MetricsController()
+
+        status, payload = controller.get_ingest_latency_metrics(None)
+        self.assertEqual(status, 200)
+        self.assertEqual(payload.stages["total"].count, 1)
+        self.assertIn("TEXT_MESSAGE_APP", payload.ports)
+        self.assertEqual(payload.queue, {})
+
+        response = controller.get_ingest_prometheus_metrics(None)
+        body = response.content.decode()
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        self.assertIn(
+            'stridetastic_ingest_stage_latency_ms{stage="total",quantile="0.5"}', body
+        )
+        self.assertIn(
+            'stridetastic_ingest_port_latency_ms_count{port="TEXT_MESSAGE_APP"} 1', body
+        )
+        self.assertIn("stridetastic_ingest_queries_per_packet_count 1", body)
@@ -0,0 +1,129 @@
+import threading
+import time
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings  # type: ignore[import]
+
+from ..ingest.dispatcher import enqueue_packet
+from ..ingest.queue import (
+    POLICY_BLOCK,
+    POLICY_DROP_NEWEST,
+    POLICY_DROP_OLDEST,
+    IngestQueue,
+    shutdown_ingest_queue,
+)
+
+
+class _GatedHandler:
+    """Records packets; blocks every call until the gate opens."""
+
+    def __init__(self) -> None:
+        self.gate = threading.Event()
+        self.seen: list = []
+
+    def __call__(self, source_type, raw_data, meta) -> None:
+        self.gate.wait(5)
+        self.seen.append(raw_data)
+
+
+def _wait_until(predicate, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.005)
+
+
+class IngestQueueTests(TestCase):
+    def _saturated_queue(self, policy: str, **kwargs) -> tuple:
+        handler = _GatedHandler()
+        queue = IngestQueue(handler, max_size=2, workers=1, policy=policy, **kwargs)
+        queue.start()
+        self.addCleanup(queue.stop, drain=False, timeout=1)
+        self.addCleanup(handler.gate.set)
+        meta = {"interface_id": 1}
+        self.assertTrue(queue.submit("mqtt", 0, meta))
+        _wait_until(lambda: queue.get_stats()["in_flight"] == 1)
+        self.assertTrue(queue.submit("mqtt", 1, meta))
+        self.assertTrue(queue.submit("mqtt", 2, meta))
+        return queue, handler
+
+    def test_drop_newest_rejects_incoming_packet(self) -> None:
+        queue, handler = self._saturated_queue(POLICY_DROP_NEWEST)
+
+        self.assertFalse(queue.submit("mqtt", 3, {"interface_id": 1}))
+        handler.gate.set()
+        queue.stop(drain=True, timeout=2)
+
+        self.assertEqual(handler.seen, [0, 1, 2])
+        stats = queue.get_stats()["interfaces"]["mqtt:1"]
+        self.assertEqual(stats["dropped"], 1)
+        self.assertEqual(stats["processed"], 3)
+        self.assertEqual(stats["depth"], 0)
+
+    def test_drop_oldest_discards_head_of_queue(self) -> None:
+        queue, handler = self._saturated_queue(POLICY_DROP_OLDEST)
+
+        self.assertTrue(queue.submit("mqtt", 3, {"interface_id": 1}))
+        self.assertEqual(queue.get_stats()["interfaces"]["mqtt:1"]["depth"], 2)
+        handler.gate.set()
+        queue.stop(drain=True, timeout=2)
+
+        self.assertEqual(handler.seen, [0, 2, 3])
+        self.assertEqual(queue.get_stats()["interfaces"]["mqtt:1"]["dropped"], 1)
+
+    def test_block_waits_for_room_then_gives_up(self) -> None:
+        queue, handler = self._saturated_queue(POLICY_BLOCK, block_timeout=0.05)
+
+        started = time.monotonic()
+        self.assertFalse(queue.submit("mqtt", 3, {"interface_id": 1}))
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+
+        releaser = threading.Timer(0.05, handler.gate.set)
+        releaser.start()
+        queue.block_timeout = 2.0
+        self.assertTrue(queue.submit("mqtt", 4, {"interface_id": 1}))
+        queue.stop(drain=True, timeout=2)
+
+        self.assertEqual(handler.seen, [0, 1, 2, 4])
+
+    def test_counters_are_tracked_per_interface(self) -> None:
+        handler = _GatedHandler()
+        handler.gate.set()
+        queue = IngestQueue(handler, workers=2)
+        queue.start()
+
+        queue.submit("mqtt", "a", {"interface_id": 1})
+        queue.submit("serial", "b", {"interface_id": 2})
+        queue.submit("serial", "c", {"interface_id": 2})
+        queue.stop(drain=True, timeout=2)
+
+        interfaces = queue.get_stats()["interfaces"]
+        self.assertEqual(interfaces["mqtt:1"]["processed"], 1)
+        self.assertEqual(interfaces["serial:2"]["enqueued"], 2)
+        self.assertEqual(interfaces["serial:2"]["processed"], 2)
+        self.assertFalse(queue.submit("mqtt", "late", {"interface_id": 1}))
+
+
+@override_settings(INGEST_QUEUE_ENABLED=True, INGEST_QUEUE_WORKERS=1)
+class IngestQueueDispatchTests(TestCase):
+    def test_enqueue_packet_is_drained_on_shutdown(self) -> None:
+        handler = _GatedHandler()
+        self.addCleanup(shutdown_ingest_queue)
+
+        with patch("stridetastic_api.ingest.dispatcher.ingest_packet", handler):
+            for index in range(3):
+                self.assertTrue(
+                    enqueue_packet("serial", index, meta={"interface_id": 7})
+                )
+            handler.gate.set()
+            shutdown_ingest_queue()
+
+        self.assertEqual(handler.seen, [0, 1, 2])
+
+    @override_settings(INGEST_QUEUE_ENABLED=False)
+    def test_disabled_queue_ingests_inline(self) -> None:
+        with patch("stridetastic_api.ingest.dispatcher.ingest_packet") as ingest:
+            enqueue_packet("tcp", b"raw", meta={"interface_id": 3})
+
+        ingest.assert_called_once_with("tcp", b"raw", meta={"interface_id": 3})
@@ -0,0 +1,208 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.conf import settings
+from django.test import TestCase, override_settings  # type: ignore[import]
+from meshtastic.protobuf import mesh_pb2, mqtt_pb2  # type: ignore[attr-defined]
+
+from ..ingest import jobs, workers
+from ..ingest.jobs import IngestJob, build_job, run_job
+from ..ingest.workers import SHARD_ENV, ShardedIngest, shard_for
+
+CRASH_PACKET_ID = 0xDEAD
+
+
+def _counting_worker(index, jobs, counters) -> None:
+    # Stands in for `_worker_main` without Django; runs in a forked process.
+    while True:
+        job = jobs.get()
+        if job is None:
+            return
+        packet = mesh_pb2.MeshPacket()
+        packet.ParseFromString(job.payload)
+        if packet.id == CRASH_PACKET_ID:
+            os._exit(3)
+        with counters.get_lock():
+            counters[index * 2] += 1
+
+
+# Spawns a real worker, as a celery worker's receiver does, and reports whether
+# the app bootstrapped its services inside it.
+WORKER_ENTRY_SCRIPT = """
+import os
+import sys
+
+
+def probe(index, jobs, counters):
+    from stridetastic_api.ingest.workers import _worker_main
+    from stridetastic_api.services.service_manager import ServiceManager
+
+    _worker_main(index, jobs, counters)
+    print(os.environ.get("MQTT_SUBSCRIBER_STARTED", "-"), flush=True)
+    print(ServiceManager.get_instance()._process_role, flush=True)
+
+
+if __name__ == "__main__":
+    from stridetastic_api.ingest.workers import ShardedIngest
+
+    sys.argv = ["celery", "-A", "stridetastic_api", "worker"]
+    pool = ShardedIngest(processes=1, supervise_interval=3600, target=probe)
+    pool.start()
+    pool.stop(timeout=60)
+"""
+
+
+def _serial_packet(sender: int, packet_id: int = 1) -> dict:
+    packet = mesh_pb2.MeshPacket()
+    setattr(packet, "from", sender)
+    packet.to = 0xFFFFFFFF
+    packet.id = packet_id
+    return {"raw": packet, "channel": 0}
+
+
+def _wait_for(condition, timeout: float = 10.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return condition()
+
+
+class ShardedIngestTests(TestCase):
+    def _pool(self, processes: int = 3) -> ShardedIngest:
+        pool = ShardedIngest(
+            processes=processes,
+            supervise_interval=3600,
+            start_method="fork",
+            target=_counting_worker,
+        )
+        pool.start()
+        self.addCleanup(pool.stop, timeout=5)
+        return pool
+
+    def test_packets_are_partitioned_by_sender(self) -> None:
+        pool = self._pool()
+        senders = [0x10 + offset for offset in range(12)]
+        for sender in senders:
+            for packet_id in (1, 2):
+                self.assertTrue(
+                    pool.submit("serial", _serial_packet(sender, packet_id), None)
+                )
+
+        self.assertTrue(_wait_for(lambda: pool.get_stats()["processed"] == 24))
+        stats = pool.get_stats()
+        for worker in stats["workers"]:
+            expected = 2 * sum(
+                1 for sender in senders if shard_for(sender, 3) == worker["index"]
+            )
+            self.assertEqual(worker["submitted"], expected)
+            self.assertEqual(worker["processed"], expected)
+        self.assertEqual(stats["submitted"], 24)
+        self.assertEqual(shard_for(0x10, 3), shard_for(0x10, 3))
+
+    def test_crashed_worker_is_restarted_and_keeps_its_queue(self) -> None:
+        pool = self._pool(processes=1)
+        pool.submit("tcp", _serial_packet(0x20, CRASH_PACKET_ID), None)
+        self.assertTrue(_wait_for(lambda: not pool.get_stats()["workers"][0]["alive"]))
+        pool.submit("tcp", _serial_packet(0x20, 2), None)
+
+        self.assertEqual(pool.check_workers(), 1)
+        self.assertTrue(_wait_for(lambda: pool.get_stats()["processed"] == 1))
+        worker = pool.get_stats()["workers"][0]
+        self.assertTrue(worker["alive"])
+        self.assertEqual(worker["restarts"], 1)
+
+    def test_submit_after_stop_is_dropped(self) -> None:
+        pool = self._pool(processes=1)
+        pool.stop(timeout=5)
+
+        self.assertFalse(pool.submit("serial", _serial_packet(0x30), None))
+        self.assertEqual(pool.get_stats()["dropped"], 1)
+
+
+@override_settings(INGEST_WORKER_PROCESSES=2)
+class ShardedIngestStartupTests(TestCase):
+    def setUp(self) -> None:
+        for patcher in (
+            patch.object(workers, "_sharded", None),
+            patch.object(workers, "ShardedIngest"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @override_settings(PENDING_REQUEST_BACKEND="memory")
+    def test_memory_pending_backend_is_reported(self) -> None:
+        with self.assertLogs(workers.logger, level="WARNING") as logs:
+            workers.get_sharded_ingest()
+
+        self.assertIn("PENDING_REQUEST_BACKEND=memory", logs.output[0])
+
+    @override_settings(PENDING_REQUEST_BACKEND="redis")
+    def test_shared_pending_backend_starts_quietly(self) -> None:
+        with self.assertNoLogs(workers.logger, level="WARNING"):
+            workers.get_sharded_ingest()
+
+        workers.ShardedIngest.return_value.start.assert_called_once_with()
+
+
+class WorkerEntryTests(TestCase):
+    def test_spawned_worker_does_not_bootstrap_services(self) -> None:
+        script = Path(self.enterContext(tempfile.TemporaryDirectory())) / "entry.py"
+        script.write_text(WORKER_ENTRY_SCRIPT)
+        env = {**os.environ, "PYTHONPATH": str(settings.BASE_DIR)}
+        env.pop("MQTT_SUBSCRIBER_STARTED", None)
+        env.pop(SHARD_ENV, None)
+        result = subprocess.run(
+            [sys.executable, str(script)],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=120,
+            check=False,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.splitlines()[-2:], ["-", "ingest_shard"])
+
+
+class IngestJobTests(TestCase):
+    def test_mqtt_jobs_carry_the_raw_payload_and_skip_capture(self) -> None:
+        envelope = mqtt_pb2.ServiceEnvelope()
+        setattr(envelope.packet, "from", 0x40)
+        envelope.channel_id = "LongFast"
+        payload = envelope.SerializeToString()
+        msg = SimpleNamespace(topic="msh/EU/2/e/LongFast/!00000040", payload=payload)
+        with patch.object(jobs, "record_mqtt_capture") as capture:
+            from_num, job = build_job("mqtt", payload, {"msg": msg, "interface_id": 7})
+        capture.assert_called_once()
+        self.assertEqual(from_num, 0x40)
+
+        with patch("stridetastic_api.ingest.dispatcher.ingest_packet") as ingest:
+            run_job(job)
+        source_type, raw_data = ingest.call_args.args
+        meta = ingest.call_args.kwargs["meta"]
+        self.assertEqual((source_type, raw_data), ("mqtt", payload))
+        self.assertEqual(meta["msg"].topic, msg.topic)
+        self.assertEqual(meta["interface_id"], 7)
+        self.assertFalse(meta["capture"])
+
+    def test_serial_jobs_rebuild_the_mesh_packet(self) -> None:
+        from_num, job = build_job(
+            "serial", _serial_packet(0x50, 9), {"interface_id": 3}
+        )
+        job = IngestJob.from_fields(job.to_fields())
+
+        with patch("stridetastic_api.ingest.dispatcher.ingest_packet") as ingest:
+            run_job(job)
+        source_type, raw_data = ingest.call_args.args
+        self.assertEqual((from_num, source_type), (0x50, "serial"))
+        self.assertEqual(raw_data["raw"].id, 9)
+        self.assertEqual(raw_data["channel"], 0)
+        self.assertEqual(ingest.call_args.kwargs["meta"], {"interface_id": 3})
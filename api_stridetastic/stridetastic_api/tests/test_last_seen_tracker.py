@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.test import TestCase, TransactionTestCase  # type: ignore[import]
+from django.utils import timezone  # type: ignore[import]
+
+from ..mesh.packet.last_seen import LastSeenTracker, get_last_seen_tracker
+from ..models import Node
+from ..tasks.metrics_tasks import mark_unreachable_nodes
+
+
+class LastSeenTrackerTests(TestCase):
+    def setUp(self) -> None:
+        self.node_a = Node.objects.create(
+            node_num=0x10, node_id="!00000010", mac_address="00:00:00:00:00:10"
+        )
+        self.node_b = Node.objects.create(
+            node_num=0x11, node_id="!00000011", mac_address="00:00:00:00:00:11"
+        )
+        self.past = timezone.now() - timedelta(hours=2)
+        Node.objects.filter(pk__in=[self.node_a.pk, self.node_b.pk]).update(
+            last_seen=self.past
+        )
+
+    def test_touches_are_coalesced_until_flush(self) -> None:
+        tracker = LastSeenTracker(flush_interval=3600)
+        first = timezone.now() - timedelta(minutes=5)
+        latest = timezone.now()
+
+        tracker.touch(self.node_a, latest)
+        tracker.touch(self.node_a, first)
+        tracker.touch(self.node_b, first)
+
+        self.assertEqual(Node.objects.get(pk=self.node_a.pk).last_seen, self.past)
+        self.assertEqual(tracker.pending(), 2)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(tracker.flush(), 2)
+
+        self.assertEqual(Node.objects.get(pk=self.node_a.pk).last_seen, latest)
+        self.assertEqual(Node.objects.get(pk=self.node_b.pk).last_seen, first)
+        self.assertEqual(tracker.get_stats()["rows_flushed"], 2)
+
+    def test_flush_never_moves_last_seen_backwards(self) -> None:
+        tracker = LastSeenTracker(flush_interval=3600)
+        newer = timezone.now()
+        Node.objects.filter(pk=self.node_a.pk).update(last_seen=newer)
+
+        tracker.touch(self.node_a, newer - timedelta(minutes=1))
+        tracker.flush()
+
+        self.assertEqual(Node.objects.get(pk=self.node_a.pk).last_seen, newer)
+
+    def test_touch_never_flushes_inside_a_transaction(self) -> None:
+        tracker = LastSeenTracker(flush_interval=0)
+
+        # TestCase wraps every test in a transaction, so the write is deferred.
+        tracker.touch(self.node_a, timezone.now())
+
+        self.assertEqual(tracker.pending(), 1)
+        self.assertEqual(Node.objects.get(pk=self.node_a.pk).last_seen, self.past)
+
+    def test_mark_unreachable_nodes_flushes_pending_touches(self) -> None:
+        Node.objects.filter(pk__in=[self.node_a.pk, self.node_b.pk]).update(
+            latency_reachable=True
+        )
+        tracker = get_last_seen_tracker()
+        tracker.flush()
+        tracker.touch(self.node_a, timezone.now())
+
+        updated = mark_unreachable_nodes()
+
+        self.assertEqual(updated, 1)
+        self.assertTrue(Node.objects.get(pk=self.node_a.pk).latency_reachable)
+        self.assertFalse(Node.objects.get(pk=self.node_b.pk).latency_reachable)
+
+
+class LastSeenTrackerAutocommitTests(TransactionTestCase):
+    def test_touch_flushes_once_interval_elapsed(self) -> None:
+        node = Node.objects.create(
+            node_num=0x12, node_id="!00000012", mac_address="00:00:00:00:00:12"
+        )
+        tracker = LastSeenTracker(flush_interval=0)
+        seen_at = timezone.now()
+
+        tracker.touch(node, seen_at)
+
+        self.assertEqual(tracker.pending(), 0)
+        self.assertEqual(Node.objects.get(pk=node.pk).last_seen, seen_at)
@@ -0,0 +1,108 @@
+from datetime import timedelta
+
+from django.test import TestCase  # type: ignore[import]
+from django.utils import timezone
+
+from ..mesh.packet.link_activity import LinkActivityAggregator
+from ..models import Channel, Node, NodeLink
+from ..models.packet_models import Packet
+
+
+class LinkActivityAggregatorTests(TestCase):
+    def setUp(self) -> None:
+        self.aggregator = LinkActivityAggregator(flush_interval=3600)
+        self.low, self.high, self.other = (
+            Node.objects.create(
+                node_num=num,
+                node_id=f"!{num:08x}",
+                mac_address=f"AA:00:00:00:00:0{num}",
+            )
+            for num in (1, 2, 3)
+        )
+        self.channel = Channel.objects.create(channel_id="LongFast", channel_num=8)
+        self.start = timezone.now() - timedelta(minutes=10)
+
+    def _packet(self, sender: Node, receiver: Node, packet_id: int) -> Packet:
+        packet = Packet.objects.create(
+            from_node=sender, to_node=receiver, packet_id=packet_id
+        )
+        # Packet.time is auto_now_add, so backdate it after the insert.
+        packet.time = self.start + timedelta(seconds=packet_id)
+        Packet.objects.filter(pk=packet.pk).update(time=packet.time)
+        return packet
+
+    def _record(self, sender: Node, receiver: Node, packet_id: int) -> Packet:
+        packet = self._packet(sender, receiver, packet_id)
+        self.aggregator.record(
+            from_node=sender, to_node=receiver, packet=packet, channel=self.channel
+        )
+        return packet
+
+    def test_deltas_are_written_in_one_upsert_per_flush(self) -> None:
+        for packet_id in (1, 2, 3):
+            self._record(self.high, self.low, packet_id)
+        last = self._record(self.other, self.low, 4)
+        self.assertFalse(NodeLink.objects.exists())
+
+        with self.assertNumQueries(4):  # savepoint, upsert, channels, release
+            self.assertEqual(self.aggregator.flush(), 2)
+
+        link = NodeLink.objects.get(node_a=self.low, node_b=self.high)
+        self.assertEqual(link.node_a_to_node_b_packets, 0)
+        self.assertEqual(link.node_b_to_node_a_packets, 3)
+        self.assertFalse(link.is_bidirectional)
+        self.assertEqual(link.last_packet.packet_id, 3)
+        self.assertEqual(link.last_activity, self.start + timedelta(seconds=3))
+        self.assertEqual(list(link.channels.all()), [self.channel])
+        self.assertEqual(
+            NodeLink.objects.get(node_a=self.low, node_b=self.other).last_packet,
+            last,
+        )
+        self.assertEqual(self.aggregator.pending(), 0)
+
+    def test_counters_accumulate_across_flushes(self) -> None:
+        self._record(self.low, self.high, 10)
+        self.aggregator.flush()
+        first_seen = NodeLink.objects.get().first_seen
+
+        self._record(self.high, self.low, 11)
+        self._record(self.low, self.high, 12)
+        self.aggregator.flush()
+
+        link = NodeLink.objects.get()
+        self.assertEqual(link.node_a_to_node_b_packets, 2)
+        self.assertEqual(link.node_b_to_node_a_packets, 1)
+        self.assertTrue(link.is_bidirectional)
+        self.assertEqual(link.first_seen, first_seen)
+        self.assertEqual(link.last_packet.packet_id, 12)
+        self.assertEqual(link.channels.count(), 1)
+
+    def test_older_delta_keeps_newest_packet(self) -> None:
+        self._record(self.low, self.high, 30)
+        self.aggregator.flush()
+        self._record(self.low, self.high, 20)
+        self.aggregator.flush()
+
+        link = NodeLink.objects.get()
+        self.assertEqual(link.node_a_to_node_b_packets, 2)
+        self.assertEqual(link.last_packet.packet_id, 30)
+        self.assertEqual(link.last_activity, self.start + timedelta(seconds=30))
+
+    def test_self_links_and_deleted_nodes_are_skipped(self) -> None:
+        self._record(self.low, self.low, 40)
+        self._record(self.low, self.other, 41)
+        Node.objects.filter(pk=self.other.pk).delete()
+
+        self.assertEqual(self.aggregator.get_stats()["records"], 1)
+        self.aggregator.flush()
+        self.assertFalse(NodeLink.objects.exists())
+
+    def test_record_never_flushes_inside_a_transaction(self) -> None:
+        aggregator = LinkActivityAggregator(flush_interval=0)
+        packet = self._packet(self.low, self.high, 50)
+
+        # TestCase wraps every test in a transaction, so the write is deferred.
+        aggregator.record(from_node=self.low, to_node=self.high, packet=packet)
+        self.assertEqual(aggregator.pending(), 1)
+        self.assertEqual(aggregator.flush(), 1)
+        self.assertEqual(NodeLink.objects.get().node_a_to_node_b_packets, 1)
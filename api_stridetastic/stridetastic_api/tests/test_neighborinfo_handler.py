@@ -1,11 +1,13 @@
 from datetime import timezone as dt_timezone
 
+from django.db import connection
 from django.test import TestCase  # type: ignore[import]
+from django.test.utils import CaptureQueriesContext
 from meshtastic.protobuf import mesh_pb2  # type: ignore[attr-defined]
 
 from ..mesh.packet.handler import handle_neighborinfo
 from ..mesh.utils import id_to_num
-from ..models import Edge, Node, Packet
+from ..models import Edge, Node, NodeNeighbor, Packet
 from ..models.packet_models import NeighborInfoPayload, PacketData
 
 
@@ -105,3 +107,58 @@ class NeighborInfoHandlerTests(TestCase):
         self.assertIsNotNone(edge)
         if edge:
             self.assertAlmostEqual(float(edge.last_rx_snr or 0), 8.25, places=2)
+
+    def test_current_neighbors_track_latest_report(self) -> None:
+        first_info = mesh_pb2.NeighborInfo()
+        first_info.node_id = self.reporting_node.node_num
+        for node_num, snr in ((0x2, 5.0), (0x3, 6.0)):
+            entry = first_info.neighbors.add()
+            entry.node_id = node_num
+            entry.snr = snr
+        handle_neighborinfo(first_info.SerializeToString(), self.packet_data)
+
+        second_info = mesh_pb2.NeighborInfo()
+        second_info.node_id = self.reporting_node.node_num
+        for node_num, snr in ((0x3, 7.5), (0x4, 1.25)):
+            entry = second_info.neighbors.add()
+            entry.node_id = node_num
+            entry.snr = snr
+        handle_neighborinfo(second_info.SerializeToString(), self.packet_data)
+
+        self.assertEqual(
+            sorted(
+                (row.neighbor_node.node_num, float(row.snr))
+                for row in NodeNeighbor.objects.filter(
+                    reporting_node=self.reporting_node
+                ).select_related("neighbor_node")
+            ),
+            [(0x3, 7.5), (0x4, 1.25)],
+        )
+        self.assertTrue(
+            Edge.objects.filter(
+                source_node=self.reporting_node, target_node__node_num=0x2
+            ).exists()
+        )
+
+    def test_large_report_uses_constant_queries(self) -> None:
+        def report(count: int, base: int) -> bytes:
+            info = mesh_pb2.NeighborInfo()
+            info.node_id = self.reporting_node.node_num
+            for offset in range(count):
+                entry = info.neighbors.add()
+                entry.node_id = base + offset
+                entry.snr = 1.0
+            return info.SerializeToString()
+
+        # The first report also creates the NeighborInfoPayload row.
+        handle_neighborinfo(report(1, 0x100), self.packet_data)
+        with CaptureQueriesContext(connection) as small:
+            handle_neighborinfo(report(2, 0x1000), self.packet_data)
+        with CaptureQueriesContext(connection) as large:
+            handle_neighborinfo(report(40, 0x2000), self.packet_data)
+
+        self.assertEqual(len(large), len(small))
+        self.assertEqual(
+            NodeNeighbor.objects.filter(reporting_node=self.reporting_node).count(),
+            40,
+        )
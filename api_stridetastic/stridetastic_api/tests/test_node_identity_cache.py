@@ -0,0 +1,112 @@
+from unittest.mock import patch
+
+from django.test import TestCase  # type: ignore[import]
+
+from ..mesh.packet.handler import _get_or_update_node
+from ..mesh.packet.node_cache import NodeIdentityCache, get_node_identity_cache
+from ..models import Node
+from ..services.virtual_node_service import VirtualNodeService
+
+
+class NodeIdentityCacheTests(TestCase):
+    def setUp(self) -> None:
+        self.cache = get_node_identity_cache()
+        self.cache.clear()
+        self.addCleanup(self.cache.clear)
+
+    def _resolve(self, node_num: int) -> Node:
+        with self.captureOnCommitCallbacks(execute=True):
+            return _get_or_update_node(
+                node_num=node_num,
+                node_id=f"!{node_num:08x}",
+                mac_address=f"00:00:00:00:{node_num >> 8 & 0xFF:02x}:{node_num & 0xFF:02x}",
+            )
+
+    def test_hit_resolves_without_queries(self) -> None:
+        created = self._resolve(0x1234)
+        hits_before = self.cache.hits
+
+        with self.assertNumQueries(0):
+            cached = self._resolve(0x1234)
+
+        self.assertEqual(cached.pk, created.pk)
+        self.assertEqual(cached.node_id, "!00001234")
+        self.assertEqual(self.cache.hits, hits_before + 1)
+
+    def test_identity_drift_takes_database_path(self) -> None:
+        self._resolve(0x10)
+
+        node = _get_or_update_node(
+            node_num=0x10, node_id="!changed", mac_address="00:00:00:00:00:10"
+        )
+
+        self.assertEqual(node.node_id, "!changed")
+        self.assertEqual(Node.objects.get(node_num=0x10).node_id, "!changed")
+
+    def test_cached_node_save_does_not_overwrite_fresh_columns(self) -> None:
+        self._resolve(0x20)
+        cached = self._resolve(0x20)
+        Node.objects.filter(pk=cached.pk).update(short_name="NEW")
+
+        cached.battery_level = 50
+        cached.save()
+
+        node = Node.objects.get(pk=cached.pk)
+        self.assertEqual(node.short_name, "NEW")
+        self.assertEqual(node.battery_level, 50)
+
+    def test_rolled_back_nodes_are_not_cached(self) -> None:
+        _get_or_update_node(
+            node_num=0x30, node_id="!00000030", mac_address="00:00:00:00:00:30"
+        )
+
+        self.assertIsNone(self.cache.lookup(0x30))
+
+    def test_delete_virtual_node_invalidates_entry(self) -> None:
+        self._resolve(0x40)
+        Node.objects.filter(node_num=0x40).update(is_virtual=True)
+        node = Node.objects.get(node_num=0x40)
+
+        VirtualNodeService.delete_virtual_node(node)
+
+        self.assertIsNone(self.cache.lookup(0x40))
+
+
+class NodeIdentityCacheUnitTests(TestCase):
+    def _remember(self, cache: NodeIdentityCache, node_num: int) -> None:
+        cache.remember(
+            pk=node_num,
+            node_num=node_num,
+            node_id=f"!{node_num:08x}",
+            mac_address="00:00:00:00:00:00",
+        )
+
+    def test_evicts_least_recently_used(self) -> None:
+        cache = NodeIdentityCache(max_size=2)
+        self._remember(cache, 1)
+        self._remember(cache, 2)
+        cache.lookup(1)
+        self._remember(cache, 3)
+
+        self.assertIsNotNone(cache.lookup(1))
+        self.assertIsNone(cache.lookup(2))
+        self.assertEqual(cache.get_stats()["evictions"], 1)
+
+    def test_entries_expire_after_ttl(self) -> None:
+        cache = NodeIdentityCache(ttl_seconds=10)
+        with patch("stridetastic_api.mesh.packet.node_cache.time.monotonic") as now:
+            now.return_value = 100.0
+            self._remember(cache, 1)
+            now.return_value = 111.0
+
+            self.assertIsNone(cache.lookup(1))
+
+        stats = cache.get_stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["size"], 0)
+
+    def test_zero_size_disables_cache(self) -> None:
+        cache = NodeIdentityCache(max_size=0)
+        self._remember(cache, 1)
+
+        self.assertIsNone(cache.lookup(1))
@@ -0,0 +1,188 @@
+from unittest.mock import patch
+
+from django.test import TestCase  # type: ignore[import]
+from meshtastic.protobuf import mesh_pb2, portnums_pb2  # type: ignore[attr-defined]
+
+from ..mesh.packet import handler
+from ..mesh.packet.bulk import persist_packet_batch
+from ..mesh.packet.dedup import DuplicateWindow, get_duplicate_window
+from ..mesh.packet.link_activity import (
+    flush_link_activity,
+    get_link_activity_aggregator,
+)
+from ..models import Edge, NodeLink
+from ..models.packet_models import Packet, PacketData, PacketObservation
+
+
+def _copy(
+    gateway_node_id: str, *, rssi: int, packet_id: int = 4242, encrypted=None
+) -> dict:
+    packet = mesh_pb2.MeshPacket()
+    setattr(packet, "from", 0x5555)
+    packet.to = 0xFFFFFFFF
+    packet.id = packet_id
+    packet.channel = 8
+    packet.rx_rssi = rssi
+    if encrypted is not None:
+        packet.encrypted = encrypted
+    else:
+        packet.decoded.portnum = portnums_pb2.TEXT_MESSAGE_APP
+        packet.decoded.payload = b"hello"
+    return {
+        "gateway_node_id": gateway_node_id,
+        "channel_id": "LongFast",
+        "packet": packet,
+        "interface_id": None,
+    }
+
+
+@patch("stridetastic_api.mesh.packet.handler._dispatch_to_publisher_service")
+class DuplicateSuppressionTests(TestCase):
+    def setUp(self) -> None:
+        self.window = get_duplicate_window()
+        self.window.clear()
+        self.addCleanup(self.window.clear)
+        get_link_activity_aggregator().clear()
+        self.addCleanup(get_link_activity_aggregator().clear)
+
+    def test_repeat_copies_only_add_gateway_and_observation(self, dispatch) -> None:
+        suppressed_before = self.window.get_stats()["suppressed"]
+        with patch.object(
+            handler, "handle_packet", wraps=handler.handle_packet
+        ) as handle_packet:
+            handler.on_message(None, None, _copy("!0000aaaa", rssi=-90))
+            result = handler.on_message(None, None, _copy("!0000bbbb", rssi=-60))
+
+        self.assertEqual(handle_packet.call_count, 1)
+        self.assertEqual(dispatch.call_count, 1)
+        self.assertIsNone(result[1])
+
+        packet = Packet.objects.get(packet_id=4242)
+        self.assertEqual(packet.rx_rssi, -90)
+        self.assertEqual(
+            sorted(packet.gateway_nodes.values_list("node_num", flat=True)),
+            [0xAAAA, 0xBBBB],
+        )
+        self.assertEqual(PacketData.objects.count(), 1)
+        self.assertEqual(
+            list(
+                PacketObservation.objects.order_by("pk").values_list(
+                    "gateway_node__node_num", "rx_rssi", "is_duplicate"
+                )
+            ),
+            [(0xAAAA, -90, False), (0xBBBB, -60, True)],
+        )
+        self.assertEqual(
+            Edge.objects.get(
+                source_node__node_num=0x5555, target_node__node_num=0xBBBB
+            ).last_rx_rssi,
+            -60,
+        )
+        flush_link_activity()
+        link = NodeLink.objects.get()
+        self.assertEqual(
+            link.node_a_to_node_b_packets + link.node_b_to_node_a_packets, 1
+        )
+        self.assertEqual(self.window.get_stats()["suppressed"], suppressed_before + 1)
+
+    def test_stale_entry_falls_back_to_full_processing(self, _dispatch) -> None:
+        handler.on_message(None, None, _copy("!0000aaaa", rssi=-90))
+        Packet.objects.all().delete()
+
+        handler.on_message(None, None, _copy("!0000bbbb", rssi=-60))
+
+        packet = Packet.objects.get(packet_id=4242)
+        self.assertEqual(packet.rx_rssi, -60)
+        self.assertTrue(PacketData.objects.filter(packet=packet).exists())
+        self.assertFalse(packet.observations.filter(is_duplicate=True).exists())
+
+    def test_undecryptable_repeat_copy_takes_duplicate_path(self, dispatch) -> None:
+        # Random bytes never decrypt with the default key.
+        encrypted = bytes(range(40))
+        with patch.object(
+            handler, "_record_duplicate_copy", wraps=handler._record_duplicate_copy
+        ) as record_copy:
+            first = handler.on_message(
+                None, None, _copy("!0000aaaa", rssi=-90, encrypted=encrypted)
+            )
+            handler.on_message(
+                None, None, _copy("!0000bbbb", rssi=-60, encrypted=encrypted)
+            )
+
+        self.assertIsNone(first[1])
+        self.assertEqual(record_copy.call_count, 1)
+        self.assertEqual(dispatch.call_count, 0)
+        self.assertEqual(Packet.objects.filter(packet_id=4242).count(), 1)
+        self.assertEqual(
+            list(
+                PacketObservation.objects.order_by("pk").values_list(
+                    "is_duplicate", flat=True
+                )
+            ),
+            [False, True],
+        )
+
+    def test_undecryptable_repeat_copy_is_suppressed_across_batches(
+        self, _dispatch
+    ) -> None:
+        encrypted = bytes(range(40))
+        persist_packet_batch(
+            [(_copy("!0000aaaa", rssi=-90, encrypted=encrypted), "MQTT")]
+        )
+        with patch.object(
+            handler, "handle_packet", wraps=handler.handle_packet
+        ) as handle_packet:
+            persist_packet_batch(
+                [(_copy("!0000bbbb", rssi=-60, encrypted=encrypted), "MQTT")]
+            )
+
+        self.assertEqual(handle_packet.call_count, 0)
+        self.assertTrue(
+            PacketObservation.objects.filter(
+                gateway_node__node_num=0xBBBB, is_duplicate=True
+            ).exists()
+        )
+
+    def test_disabled_window_processes_every_copy(self, dispatch) -> None:
+        with patch.object(self.window, "window_seconds", 0):
+            handler.on_message(None, None, _copy("!0000aaaa", rssi=-90))
+            handler.on_message(None, None, _copy("!0000bbbb", rssi=-60))
+
+        self.assertEqual(dispatch.call_count, 2)
+        self.assertEqual(Packet.objects.get(packet_id=4242).rx_rssi, -60)
+        self.assertFalse(PacketObservation.objects.filter(is_duplicate=True).exists())
+
+
+class DuplicateWindowTests(TestCase):
+    def test_entries_expire_after_window(self) -> None:
+        window = DuplicateWindow(window_seconds=5)
+        with patch("stridetastic_api.mesh.packet.dedup.time.monotonic") as now:
+            now.return_value = 10.0
+            window.remember(1, 99, packet_pk=7)
+            now.return_value = 14.0
+            self.assertEqual(window.lookup(1, 99).packet_pk, 7)
+            now.return_value = 15.5
+            self.assertIsNone(window.lookup(1, 99))
+
+    def test_memory_cap_evicts_oldest(self) -> None:
+        window = DuplicateWindow(max_entries=2)
+        window.remember(1, 1, packet_pk=1)
+        window.remember(1, 2, packet_pk=2)
+        window.remember(1, 3, packet_pk=3)
+
+        self.assertIsNone(window.peek(1, 1))
+        self.assertIsNotNone(window.peek(1, 3))
+        self.assertEqual(window.get_stats()["evictions"], 1)
+
+    def test_mismatched_packet_pk_is_treated_as_stale(self) -> None:
+        window = DuplicateWindow()
+        window.remember(1, 1, packet_pk=1)
+
+        self.assertIsNone(window.lookup(1, 1, packet_pk=2))
+        self.assertIsNone(window.peek(1, 1))
+
+    def test_packets_without_id_are_never_suppressed(self) -> None:
+        window = DuplicateWindow()
+        window.remember(1, 0, packet_pk=1)
+
+        self.assertIsNone(window.lookup(1, 0))
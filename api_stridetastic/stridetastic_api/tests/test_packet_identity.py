@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta, timezone
+
+from django.test import TestCase, override_settings  # type: ignore[import]
+
+from ..mesh.packet.handler import PACKET_HEADER_FIELDS
+from ..mesh.packet.identity import candidate_buckets, identity_bucket, upsert_packets
+from ..models import Node
+from ..models.packet_models import Packet
+
+BUCKET_START = datetime(2026, 1, 2, tzinfo=timezone.utc)
+
+
+@override_settings(PACKET_IDENTITY_BUCKET_SECS=86_400, PACKET_IDENTITY_GRACE_SECS=600)
+class PacketIdentityTests(TestCase):
+    def setUp(self) -> None:
+        self.sender, self.receiver = (
+            Node.objects.create(
+                node_num=num,
+                node_id=f"!{num:08x}",
+                mac_address=f"AA:00:00:00:00:0{num}",
+            )
+            for num in (1, 2)
+        )
+
+    def _upsert(self, packet_id: int, now: datetime, **header) -> Packet:
+        packet = Packet(
+            packet_id=packet_id,
+            from_node=self.sender,
+            to_node=self.receiver,
+            **header,
+        )
+        upsert_packets([packet], update_fields=PACKET_HEADER_FIELDS, now=now)
+        return packet
+
+    def test_candidate_buckets_include_previous_during_grace(self) -> None:
+        bucket = identity_bucket(BUCKET_START)
+        self.assertEqual(
+            candidate_buckets(BUCKET_START + timedelta(seconds=30)),
+            (bucket - 1, bucket),
+        )
+        self.assertEqual(
+            candidate_buckets(BUCKET_START + timedelta(hours=1)), (bucket,)
+        )
+
+    def test_copies_in_a_bucket_share_one_row(self) -> None:
+        now = BUCKET_START + timedelta(hours=1)
+        first = self._upsert(7, now, rx_rssi=-90)
+        stored_time = Packet.objects.get(pk=first.pk).time
+
+        second = self._upsert(7, now + timedelta(minutes=1), rx_rssi=-70)
+
+        self.assertEqual(second.pk, first.pk)
+        self.assertEqual(second.time, stored_time)
+        row = Packet.objects.get()
+        self.assertEqual(float(row.rx_rssi), -70.0)
+        self.assertEqual(row.identity_bucket, identity_bucket(now))
+
+    def test_wrapped_packet_ids_get_a_new_row(self) -> None:
+        old = self._upsert(7, BUCKET_START - timedelta(days=90))
+        new = self._upsert(7, BUCKET_START + timedelta(hours=1))
+
+        self.assertNotEqual(new.pk, old.pk)
+        self.assertEqual(Packet.objects.filter(packet_id=7).count(), 2)
+
+    def test_copy_after_boundary_joins_previous_bucket(self) -> None:
+        before = self._upsert(7, BUCKET_START - timedelta(seconds=5))
+        after = self._upsert(7, BUCKET_START + timedelta(seconds=5))
+        unrelated = self._upsert(8, BUCKET_START + timedelta(seconds=5))
+
+        self.assertEqual(after.pk, before.pk)
+        self.assertEqual(after.identity_bucket, identity_bucket(BUCKET_START) - 1)
+        self.assertEqual(unrelated.identity_bucket, identity_bucket(BUCKET_START))
+
+    def test_rows_without_bucket_are_never_matched(self) -> None:
+        legacy = Packet.objects.create(
+            packet_id=7, from_node=self.sender, to_node=self.receiver
+        )
+
+        packet = self._upsert(7, BUCKET_START + timedelta(hours=1))
+
+        self.assertNotEqual(packet.pk, legacy.pk)
+        self.assertIsNone(Packet.objects.get(pk=legacy.pk).identity_bucket)
+
+    def test_packets_without_id_each_get_a_row(self) -> None:
+        now = BUCKET_START + timedelta(hours=1)
+        first = self._upsert(0, now, rx_rssi=-90)
+        second = self._upsert(0, now + timedelta(seconds=1), rx_rssi=-70)
+
+        self.assertNotEqual(second.pk, first.pk)
+        self.assertEqual(
+            sorted(
+                Packet.objects.filter(packet_id=0).values_list("rx_rssi", flat=True)
+            ),
+            [-90, -70],
+        )
@@ -0,0 +1,207 @@
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from django.db import connection
+from django.test import TestCase  # type: ignore[import]
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from meshtastic.protobuf import mesh_pb2, portnums_pb2  # type: ignore[attr-defined]
+
+from ..mesh.packet import handler
+from ..mesh.packet.dedup import get_duplicate_window
+from ..mesh.packet.pending_requests import (
+    InMemoryPendingBackend,
+    PendingRequestRegistry,
+    get_pending_requests,
+)
+from ..models import Node, NodeLatencyHistory
+from ..models.packet_models import Packet, PacketData
+from ..services.publisher_service import PublisherService
+
+
+def _message(sender: int, receiver: int, packet_id: int, **decoded) -> dict:
+    packet = mesh_pb2.MeshPacket()
+    setattr(packet, "from", sender)
+    packet.to = receiver
+    packet.id = packet_id
+    packet.channel = 8
+    for name, value in decoded.items():
+        setattr(packet.decoded, name, value)
+    return {
+        "gateway_node_id": "!0000aaaa",
+        "channel_id": "LongFast",
+        "packet": packet,
+        "interface_id": None,
+    }
+
+
+class PendingRequestRegistryTests(TestCase):
+    def test_entries_merge_and_expire(self) -> None:
+        registry = PendingRequestRegistry(
+            InMemoryPendingBackend(ttl_seconds=60, max_size=10)
+        )
+        sent_at = timezone.now() - timedelta(seconds=5)
+        registry.register(7, 0x2, from_node_num=0x1, sent_at=sent_at, history_pk=3)
+        registry.register(7, 0x2, packet_pk=11)
+
+        request = registry.match(7, 0x2)
+        self.assertIsNotNone(request)
+        assert request is not None
+        self.assertEqual(request.packet_pk, 11)
+        self.assertEqual(request.history_pk, 3)
+        self.assertEqual(request.from_node_num, 0x1)
+        self.assertEqual(request.sent_at_datetime, sent_at)
+        self.assertIsNone(registry.match(7, 0x3))
+        self.assertIsNone(registry.match(0, 0x2))
+
+        with patch(
+            "stridetastic_api.mesh.packet.pending_requests.time.monotonic",
+            return_value=10**9,
+        ):
+            self.assertIsNone(registry.match(7, 0x2))
+        stats = registry.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+
+    def test_oldest_entries_are_evicted_beyond_max_size(self) -> None:
+        backend = InMemoryPendingBackend(ttl_seconds=60, max_size=2)
+        registry = PendingRequestRegistry(backend)
+        for message_id in (1, 2, 3):
+            registry.register(message_id, 0x2)
+
+        self.assertIsNone(registry.match(1, 0x2))
+        self.assertIsNotNone(registry.match(3, 0x2))
+        self.assertEqual(backend.evictions, 1)
+
+
+@patch("stridetastic_api.mesh.packet.handler._dispatch_to_publisher_service")
+class ResponseMatchingTests(TestCase):
+    def setUp(self) -> None:
+        self.pending = get_pending_requests()
+        self.pending.clear()
+        self.addCleanup(self.pending.clear)
+        window = get_duplicate_window()
+        window.clear()
+        self.addCleanup(window.clear)
+
+    def test_observed_want_response_packet_is_matched_by_reply(self, _dispatch) -> None:
+        handler.on_message(
+            None,
+            None,
+            _message(
+                0x1111,
+                0x2222,
+                501,
+                portnum=portnums_pb2.NODEINFO_APP,
+                payload=mesh_pb2.User(id="!00001111").SerializeToString(),
+                want_response=True,
+            ),
+        )
+        request = self.pending.match(501, 0x2222)
+        self.assertIsNotNone(request)
+
+        handler.on_message(
+            None,
+            None,
+            _message(
+                0x2222,
+                0x1111,
+                502,
+                portnum=portnums_pb2.ROUTING_APP,
+                payload=mesh_pb2.Routing().SerializeToString(),
+                request_id=501,
+            ),
+        )
+
+        original = Packet.objects.get(packet_id=501)
+        self.assertTrue(original.ackd)
+        self.assertTrue(PacketData.objects.get(packet=original).got_response)
+        responder = Node.objects.get(node_num=0x2222)
+        self.assertTrue(responder.latency_reachable)
+        self.assertEqual(
+            NodeLatencyHistory.objects.filter(
+                node=responder, probe_message_id=501
+            ).count(),
+            1,
+        )
+
+    def test_unknown_request_ids_do_not_query_packets(self, _dispatch) -> None:
+        responder = Node.objects.create(
+            node_num=0x3333, node_id="!00003333", mac_address="AA:00:00:00:33:33"
+        )
+        response = Packet.objects.create(from_node=responder, to_node=responder)
+        response_data = PacketData.objects.create(packet=response, request_id=999)
+
+        with CaptureQueriesContext(connection) as queries:
+            handler.handle_routing(
+                mesh_pb2.Routing().SerializeToString(), response_data
+            )
+
+        packet_table = Packet._meta.db_table
+        self.assertFalse(
+            [q["sql"] for q in queries if f'FROM "{packet_table}"' in q["sql"]]
+        )
+        self.assertFalse(NodeLatencyHistory.objects.exists())
+
+    def test_published_probe_is_matched_without_echo(self, _dispatch) -> None:
+        target = Node.objects.create(
+            node_num=0x4444, node_id="!00004444", mac_address="AA:00:00:00:44:44"
+        )
+        publisher = MagicMock()
+        publisher.is_connected.return_value = True
+        publisher.publish.return_value = True
+        service = PublisherService(publisher=publisher)
+        with patch.object(service, "_get_global_message_id", return_value=4321):
+            self.assertTrue(
+                service.publish_reachability_probe(
+                    from_node="!00005555",
+                    to_node="!00004444",
+                    channel_name="LongFast",
+                    channel_aes_key="AQ==",
+                )
+            )
+        pending_history = NodeLatencyHistory.objects.get(node=target)
+
+        response = Packet.objects.create(
+            from_node=target,
+            to_node=Node.objects.create(
+                node_num=0x5555, node_id="!00005555", mac_address="AA:00:00:00:55:55"
+            ),
+        )
+        response_data = PacketData.objects.create(packet=response, request_id=4321)
+        handler.handle_routing(mesh_pb2.Routing().SerializeToString(), response_data)
+
+        pending_history.refresh_from_db()
+        self.assertTrue(pending_history.reachable)
+        self.assertIsNotNone(pending_history.latency_ms)
+        self.assertEqual(NodeLatencyHistory.objects.filter(node=target).count(), 1)
+        self.assertEqual(
+            self.pending.match(4321, 0x4444).history_pk, pending_history.pk
+        )
+
+    def test_pending_probe_row_is_found_by_message_id(self, _dispatch) -> None:
+        target = Node.objects.create(
+            node_num=0x6666, node_id="!00006666", mac_address="AA:00:00:00:66:66"
+        )
+        sent_at = timezone.now() - timedelta(seconds=2)
+        pending_history = NodeLatencyHistory.objects.create(
+            node=target, reachable=False, probe_message_id=6543, time=sent_at
+        )
+        # Registered without the row, as when another process sent the probe.
+        self.pending.register(6543, 0x6666, from_node_num=0x7777, sent_at=sent_at)
+
+        response = Packet.objects.create(
+            from_node=target,
+            to_node=Node.objects.create(
+                node_num=0x7777, node_id="!00007777", mac_address="AA:00:00:00:77:77"
+            ),
+        )
+        response_data = PacketData.objects.create(packet=response, request_id=6543)
+        handler.handle_routing(mesh_pb2.Routing().SerializeToString(), response_data)
+
+        pending_history.refresh_from_db()
+        self.assertTrue(pending_history.reachable)
+        self.assertIsNotNone(pending_history.responded_at)
+        self.assertEqual(NodeLatencyHistory.objects.filter(node=target).count(), 1)
+        self.assertEqual(
+            self.pending.match(6543, 0x6666).history_pk, pending_history.pk
+        )
@@ -0,0 +1,142 @@
+import base64
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import TestCase  # type: ignore[import]
+from meshtastic.protobuf import mesh_pb2  # type: ignore[attr-defined]
+
+from ..controllers.metrics_controller import MetricsController
+from ..mesh.encryption.pki_cache import PKIKeyCache, get_pki_key_cache
+from ..mesh.packet.handler import handle_nodeinfo
+from ..models import Node
+from ..services.pki_service import PKIService
+from .test_pki_utils import (
+    ENCRYPTED_HEX,
+    PLAINTEXT_HEX,
+    PRIVATE_KEY_HEX,
+    REMOTE_PUBLIC_HEX,
+)
+
+
+def _packet(remote_num: int, target_num: int) -> SimpleNamespace:
+    packet = SimpleNamespace(
+        id=0x13B2D662,
+        to=target_num,
+        encrypted=bytes.fromhex(ENCRYPTED_HEX),
+        public_key=b"",
+        pki_encrypted=True,
+    )
+    setattr(packet, "from", remote_num)
+    return packet
+
+
+class PKIKeyCacheServiceTests(TestCase):
+    def setUp(self) -> None:
+        self.cache = PKIKeyCache()
+        self.service = PKIService(key_cache=self.cache)
+        self.target = Node.objects.create(
+            node_num=0x0001,
+            node_id="!00000001",
+            mac_address="AA:00:00:00:00:01",
+            private_key=base64.b64encode(bytes.fromhex(PRIVATE_KEY_HEX)).decode(
+                "ascii"
+            ),
+        )
+        self.remote = Node.objects.create(
+            node_num=0x0929,
+            node_id="!00000929",
+            mac_address="AA:00:00:00:09:29",
+            public_key=base64.b64encode(bytes.fromhex(REMOTE_PUBLIC_HEX)).decode(
+                "ascii"
+            ),
+        )
+
+    def test_repeat_pairs_reuse_derived_key(self) -> None:
+        packet = _packet(self.remote.node_num, self.target.node_num)
+        first = self.service.decrypt_packet(packet, self.target)
+
+        with patch(
+            "stridetastic_api.mesh.encryption.pki_cache.derive_shared_key"
+        ) as derive, self.assertNumQueries(0):
+            second = self.service.decrypt_packet(packet, self.target)
+
+        derive.assert_not_called()
+        self.assertEqual(first.plaintext, bytes.fromhex(PLAINTEXT_HEX))
+        self.assertEqual(second.plaintext, first.plaintext)
+        stats = self.service.get_cache_stats()
+        self.assertEqual(stats["shared_keys"]["hits"], 1)
+        self.assertEqual(stats["shared_keys"]["misses"], 1)
+        self.assertEqual(stats["private_keys"]["hit_rate"], 0.5)
+        self.assertEqual(stats["public_keys"]["hits"], 1)
+
+    def test_missing_sender_key_is_cached_until_invalidated(self) -> None:
+        Node.objects.filter(pk=self.remote.pk).update(public_key=None)
+        packet = _packet(self.remote.node_num, self.target.node_num)
+
+        result = self.service.decrypt_packet(packet, self.target)
+        self.assertFalse(result.success)
+
+        Node.objects.filter(pk=self.remote.pk).update(
+            public_key=base64.b64encode(bytes.fromhex(REMOTE_PUBLIC_HEX)).decode(
+                "ascii"
+            )
+        )
+        self.assertFalse(self.service.decrypt_packet(packet, self.target).success)
+
+        self.cache.invalidate_public_key(self.remote.node_num)
+        self.assertTrue(self.service.decrypt_packet(packet, self.target).success)
+
+
+class PKIKeyCacheInvalidationTests(TestCase):
+    def setUp(self) -> None:
+        self.cache = get_pki_key_cache()
+        self.cache.clear()
+        self.addCleanup(self.cache.clear)
+
+    def test_nodeinfo_invalidates_public_key(self) -> None:
+        Node.objects.create(
+            node_num=0x0929, node_id="!00000929", mac_address="AA:00:00:00:09:29"
+        )
+        self.cache.public_key(0x0929, lambda _num: None)
+
+        user = mesh_pb2.User(
+            id="!00000929", public_key=bytes.fromhex(REMOTE_PUBLIC_HEX)
+        )
+        packet_data = SimpleNamespace(request_id=None)
+        with patch(
+            "stridetastic_api.mesh.packet.handler.NodeInfoPayload.objects.get_or_create",
+            return_value=(SimpleNamespace(save=lambda: None), True),
+        ):
+            handle_nodeinfo(user.SerializeToString(), packet_data)
+
+        loaded = self.cache.public_key(0x0929, lambda _num: b"fresh")
+        self.assertEqual(loaded, b"fresh")
+
+    def test_metrics_endpoint_reports_hit_rates(self) -> None:
+        self.cache.public_key(1, lambda _num: None)
+        self.cache.public_key(1, lambda _num: None)
+
+        status, payload = MetricsController().get_pki_cache_metrics(None)
+
+        self.assertEqual(status, 200)
+        stats = self.cache.get_stats()["public_keys"]
+        self.assertEqual(payload.public_keys.hits, stats["hits"])
+        self.assertEqual(payload.public_keys.hit_rate, stats["hit_rate"])
+        self.assertGreater(payload.public_keys.hits, 0)
+
+
+class PKIKeyCacheUnitTests(TestCase):
+    def test_public_keys_expire_after_ttl(self) -> None:
+        cache = PKIKeyCache(public_key_ttl=10)
+        with patch("stridetastic_api.mesh.encryption.pki_cache.time.monotonic") as now:
+            now.return_value = 100.0
+            cache.public_key(5, lambda _num: b"old")
+            now.return_value = 111.0
+            self.assertEqual(cache.public_key(5, lambda _num: b"new"), b"new")
+
+    def test_zero_size_disables_cache(self) -> None:
+        cache = PKIKeyCache(max_size=0)
+        cache.public_key(5, lambda _num: b"old")
+
+        self.assertEqual(cache.public_key(5, lambda _num: b"new"), b"new")
+        self.assertEqual(cache.get_stats()["public_keys"]["size"], 0)
@@ -0,0 +1,105 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase  # type: ignore[import]
+
+from ..models import Node, NodeLatencyHistory, Packet
+from ..utils.query_benchmark import (
+    BENCHMARK_NODE_NUM_BASE,
+    explain_full_scans,
+    full_scans,
+    run_case,
+)
+
+
+class QueryPlanCheckTests(TestCase):
+    def test_full_scans_are_found_in_nested_plans(self) -> None:
+        def scan(node_type, table, **extra):
+            return {"Node Type": node_type, "Relation Name": table, **extra}
+
+        plan = [
+            {
+                "Plan": {
+                    "Node Type": "Hash Join",
+                    "Plans": [
+                        scan("Seq Scan", "stridetastic_api_node"),
+                        scan("Seq Scan", "stridetastic_api_packet"),
+                        scan(
+                            "Index Scan",
+                            "stridetastic_api_packetdata",
+                            **{"Index Cond": "(packet_id = p.id)"},
+                        ),
+                        scan("Index Only Scan", "stridetastic_api_telemetrypayload"),
+                        {
+                            "Node Type": "Limit",
+                            "Plans": [
+                                scan(
+                                    "Index Scan", "stridetastic_api_nodelatencyhistory"
+                                ),
+                                {
+                                    "Node Type": "Sort",
+                                    "Plans": [
+                                        scan(
+                                            "Index Scan",
+                                            "stridetastic_api_nodepresencehistory",
+                                        )
+                                    ],
+                                },
+                            ],
+                        },
+                    ],
+                }
+            }
+        ]
+
+        self.assertEqual(
+            list(full_scans(plan)),
+            [
+                "stridetastic_api_packet",
+                "stridetastic_api_telemetrypayload",
+                "stridetastic_api_nodepresencehistory",
+            ],
+        )
+
+    def test_unindexed_filters_are_reported(self) -> None:
+        sql = str(Packet.objects.filter(hop_limit=3).query)
+        self.assertEqual(explain_full_scans(sql), [Packet._meta.db_table])
+
+        result = run_case(
+            "by_sender", lambda: list(Packet.objects.filter(from_node_id=1))
+        )
+        self.assertEqual((result.status, result.queries), (200, 1))
+        self.assertEqual(result.full_scans, [])
+
+    def test_pending_probe_lookup_uses_its_partial_index(self) -> None:
+        plan = (
+            NodeLatencyHistory.objects.filter(
+                node_id=1, probe_message_id=42, responded_at__isnull=True
+            )
+            .order_by("time")
+            .values("pk")
+            .explain()
+        )
+        self.assertIn("latency_pending_probe_idx", plan)
+
+
+class BenchmarkQueriesCommandTests(TestCase):
+    def test_hot_queries_use_indexes(self) -> None:
+        stdout = StringIO()
+
+        call_command(
+            "benchmark_queries", nodes=12, packets=3000, max_ms=0, stdout=stdout
+        )
+
+        output = stdout.getvalue()
+        self.assertIn("no regressions", output)
+        self.assertIn("link_packets", output)
+        # The dataset is rolled back.
+        self.assertFalse(
+            Node.objects.filter(node_num__gte=BENCHMARK_NODE_NUM_BASE).exists()
+        )
+
+    def test_invalid_dataset_is_rejected(self) -> None:
+        with self.assertRaises(CommandError):
+            call_command("benchmark_queries", nodes=1, stdout=StringIO())
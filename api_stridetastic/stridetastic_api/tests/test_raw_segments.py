@@ -0,0 +1,294 @@
+import mmap
+import os
+import tempfile
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import (  # type: ignore[import]
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from meshtastic.protobuf import mesh_pb2  # type: ignore[attr-defined]
+
+from ..ingest.mqtt import normalize_mqtt_message
+from ..ingest.replay import ReplayMessage, ingest_sink
+from ..ingest.segments import (
+    FLAG_REENCODED,
+    HEADER_SIZE,
+    INDEX_ENTRY,
+    SegmentCorruptError,
+    SegmentRef,
+    SegmentStore,
+    archive_envelope,
+    load_envelope,
+    shutdown_segment_store,
+)
+from ..mesh.packet.bulk import persist_packet_batch
+from ..mesh.packet.crafter import craft_service_envelope
+from ..mesh.packet.dedup import get_duplicate_window
+from ..models import Packet
+
+T0 = datetime(2026, 5, 1, 12, 0, tzinfo=dt_timezone.utc)
+
+
+def _encrypted_packet(packet_id: int) -> mesh_pb2.MeshPacket:
+    packet = mesh_pb2.MeshPacket()
+    setattr(packet, "from", 0x7777)
+    packet.to = 0xFFFFFFFF
+    packet.id = packet_id
+    packet.channel = 8
+    # Not decryptable with the default key: the packet stays encrypted.
+    packet.encrypted = bytes(range(40))
+    return packet
+
+
+class SegmentStoreTests(SimpleTestCase):
+    def setUp(self) -> None:
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.root = Path(tmpdir.name)
+        self.store = SegmentStore(self.root, max_bytes=256)
+        self.addCleanup(self.store.close)
+
+    def _append(self, index: int, size: int = 60) -> SegmentRef:
+        return self.store.append(
+            bytes([index]) * size,
+            from_num=0x1000 + index % 2,
+            packet_id=index,
+            time=T0 + timedelta(seconds=index),
+        )
+
+    def test_records_round_trip_across_rotated_segments(self) -> None:
+        refs = [self._append(index) for index in range(10)]
+
+        self.assertGreater(len(self.store.segments()), 1)
+        self.assertEqual(refs[0], SegmentRef(1, HEADER_SIZE))
+        for index, ref in enumerate(refs):
+            record = self.store.read(ref)
+            self.assertEqual(record.payload, bytes([index]) * 60)
+        # Every record lives in exactly one segment, whole.
+        self.assertLessEqual(
+            max(
+                os.path.getsize(self.store.data_path(s)) for s in self.store.segments()
+            ),
+            256,
+        )
+
+    def test_lookup_by_time_sender_and_packet_id(self) -> None:
+        refs = [self._append(index) for index in range(10)]
+
+        in_range = list(
+            self.store.lookup(
+                since=T0 + timedelta(seconds=3), until=T0 + timedelta(seconds=6)
+            )
+        )
+        self.assertEqual([entry.packet_id for _, entry in in_range], [3, 4, 5, 6])
+        self.assertEqual([ref for ref, _ in in_range], refs[3:7])
+        self.assertEqual(in_range[0][1].time, T0 + timedelta(seconds=3))
+
+        by_sender = list(self.store.lookup(from_num=0x1001))
+        self.assertEqual([entry.packet_id for _, entry in by_sender], [1, 3, 5, 7, 9])
+
+        [(ref, _)] = self.store.lookup(from_num=0x1000, packet_id=8)
+        self.assertEqual(ref, refs[8])
+
+    def test_index_stays_in_time_order(self) -> None:
+        self._append(5)
+        late = self.store.append(b"late", time=T0)
+
+        entries = list(self.store.lookup(since=T0 + timedelta(seconds=5)))
+        self.assertEqual([ref for ref, _ in entries][-1], late)
+        self.assertEqual(
+            [entry.time for _, entry in entries], [T0 + timedelta(seconds=5)] * 2
+        )
+
+    def test_corrupt_records_are_rejected(self) -> None:
+        ref = self._append(1)
+        with open(self.store.data_path(ref.segment), "r+b") as handle:
+            handle.seek(ref.offset + 20)
+            handle.write(b"\xff")
+
+        with self.assertRaises(SegmentCorruptError):
+            self.store.read(ref)
+        with self.assertRaises(SegmentCorruptError):
+            self.store.read(SegmentRef(ref.segment, 4096))
+        with self.assertRaises(SegmentCorruptError):
+            self.store.read(SegmentRef(99, HEADER_SIZE))
+
+    def test_torn_index_entry_is_dropped(self) -> None:
+        self._append(1)
+        with open(self.store.index_path(1), "ab") as handle:
+            handle.write(b"\x00" * 5)
+
+        self._append(2)
+
+        self.assertEqual(
+            os.path.getsize(self.store.index_path(1)),
+            HEADER_SIZE + 2 * INDEX_ENTRY.size,
+        )
+        self.assertEqual([e.packet_id for _, e in self.store.lookup()], [1, 2])
+
+    def test_appends_from_another_writer_are_followed(self) -> None:
+        other = SegmentStore(self.root, max_bytes=256)
+        self.addCleanup(other.close)
+
+        refs = [(other if index % 2 else self.store) for index in range(8)]
+        refs = [
+            writer.append(bytes([index]) * 60, packet_id=index)
+            for index, writer in enumerate(refs)
+        ]
+
+        self.assertEqual(len(set(refs)), 8)
+        self.assertEqual([e.packet_id for _, e in self.store.lookup()], list(range(8)))
+
+    def test_active_segment_mappings_are_closed_after_use(self) -> None:
+        refs = [self._append(index) for index in range(3)]
+        self.assertEqual(self.store.segments(), [1])
+        mappings = []
+        real_mmap = mmap.mmap
+
+        def _map(*args, **kwargs):
+            mappings.append(real_mmap(*args, **kwargs))
+            return mappings[-1]
+
+        with patch("stridetastic_api.ingest.segments.mmap.mmap", side_effect=_map):
+            for _ in range(2):
+                self.assertEqual(
+                    [self.store.read(ref).payload[0] for ref in refs], [0, 1, 2]
+                )
+                self.assertEqual(len(list(self.store.lookup())), 3)
+
+        self.assertEqual(len(mappings), 8)
+        self.assertTrue(all(mapping.closed for mapping in mappings))
+
+    def test_prune_keeps_recent_and_active_segments(self) -> None:
+        for index in range(10):
+            self._append(index)
+        segments = self.store.segments()
+
+        removed = self.store.prune(T0 + timedelta(seconds=4))
+
+        self.assertGreater(removed, 0)
+        self.assertEqual(self.store.segments(), segments[removed:])
+        remaining = [entry.packet_id for _, entry in self.store.lookup()]
+        self.assertEqual(remaining, list(range(remaining[0], 10)))
+        self.assertLessEqual(remaining[0], 4)
+        self.assertEqual(
+            self.store.prune(T0 + timedelta(days=1)), len(segments) - removed - 1
+        )
+
+
+@patch("stridetastic_api.mesh.packet.handler._dispatch_to_publisher_service")
+class SegmentIngestTests(TestCase):
+    def setUp(self) -> None:
+        window = get_duplicate_window()
+        window.clear()
+        self.addCleanup(window.clear)
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.root = Path(tmpdir.name)
+        settings = override_settings(
+            RAW_SEGMENTS_ENABLED=True, RAW_SEGMENT_ROOT=self.root
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        shutdown_segment_store()
+        self.addCleanup(shutdown_segment_store)
+
+    def _uplink(self, packet_id: int, gateway: str = "!5e9a7e00") -> bytes:
+        payload = craft_service_envelope(
+            _encrypted_packet(packet_id), "LongFast", gateway
+        )
+        ingest_sink()(ReplayMessage(topic="msh/test", payload=payload))
+        return payload
+
+    def test_packets_reference_their_archived_envelope(self, _dispatch) -> None:
+        payload = self._uplink(201)
+
+        packet = Packet.objects.get(packet_id=201)
+        self.assertIsNone(packet.raw_data)
+        self.assertIsNotNone(packet.raw_segment)
+        envelope = load_envelope(packet)
+        self.assertEqual(envelope.SerializeToString(), payload)
+        self.assertEqual(envelope.gateway_id, "!5e9a7e00")
+        self.assertEqual(envelope.packet.encrypted, bytes(range(40)))
+
+        self._uplink(201, gateway="!5e9a7e01")
+        store = SegmentStore(self.root)
+        self.addCleanup(store.close)
+        # The copy from the second gateway is archived as well.
+        entries = list(store.lookup(from_num=0x7777, packet_id=201))
+        self.assertEqual(len(entries), 2)
+
+    def test_batched_packets_reference_their_archived_envelope(self, _dispatch) -> None:
+        payloads = [
+            craft_service_envelope(_encrypted_packet(packet_id), "LongFast", gateway)
+            for packet_id, gateway in (
+                (211, "!5e9a7e00"),
+                (211, "!5e9a7e01"),
+                (212, "!5e9a7e00"),
+            )
+        ]
+        persist_packet_batch(
+            [
+                (normalize_mqtt_message(ReplayMessage("msh/test", payload)), "MQTT")
+                for payload in payloads
+            ]
+        )
+
+        for packet_id, payload in ((211, payloads[0]), (212, payloads[2])):
+            packet = Packet.objects.get(packet_id=packet_id)
+            self.assertIsNone(packet.raw_data)
+            self.assertEqual(load_envelope(packet).SerializeToString(), payload)
+        store = SegmentStore(self.root)
+        self.addCleanup(store.close)
+        entries = list(store.lookup(from_num=0x7777, packet_id=211))
+        self.assertEqual(len(entries), 2)
+
+    def test_bare_mesh_packets_are_wrapped(self, _dispatch) -> None:
+        normalized = {
+            "packet": _encrypted_packet(7),
+            "channel_id": "LongFast",
+            "gateway_node_id": "!5e9a7e00",
+        }
+
+        ref = archive_envelope(normalized, from_num=0x7777, packet_id=7)
+
+        store = SegmentStore(self.root)
+        self.addCleanup(store.close)
+        record = store.read(ref)
+        self.assertEqual(record.flags, FLAG_REENCODED)
+        self.assertEqual(
+            record.payload,
+            craft_service_envelope(normalized["packet"], "LongFast", "!5e9a7e00"),
+        )
+
+    def test_raw_data_is_kept_when_disabled(self, _dispatch) -> None:
+        with override_settings(RAW_SEGMENTS_ENABLED=False):
+            self._uplink(202)
+
+        packet = Packet.objects.get(packet_id=202)
+        self.assertIsNone(packet.raw_segment)
+        self.assertTrue(packet.raw_data)
+        self.assertIsNone(load_envelope(packet))
+
+    def test_archived_stream_can_be_replayed(self, _dispatch) -> None:
+        for packet_id in (301, 302, 303):
+            self._uplink(packet_id)
+        Packet.objects.all().delete()
+        get_duplicate_window().clear()
+
+        with override_settings(RAW_SEGMENTS_ENABLED=False):
+            call_command(
+                "replay_ingest", "--segments", str(self.root), stdout=StringIO()
+            )
+
+        self.assertEqual(
+            sorted(Packet.objects.values_list("packet_id", flat=True)),
+            [301, 302, 303],
+        )
@@ -0,0 +1,202 @@
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings  # type: ignore[import]
+from django.utils import timezone  # type: ignore[import]
+
+from ..controllers.retention_controller import RetentionController
+from ..models import Node, NodeLatencyHistory, RetentionPolicy
+from ..models.packet_models import (
+    Packet,
+    PacketData,
+    RouteDiscoveryPayload,
+    RouteDiscoveryRoute,
+)
+from ..schemas import RetentionPolicyUpdateSchema, RetentionRunRequestSchema
+from ..services.retention_service import (
+    MANAGED_TABLES,
+    RetentionService,
+    parse_retention_days,
+)
+from ..tasks.retention_tasks import run_retention_policies
+
+
+class RetentionServiceTests(TestCase):
+    def setUp(self) -> None:
+        self.node = Node.objects.create(
+            node_num=0x10, node_id="!aaaa0001", mac_address="00:00:00:00:aa:01"
+        )
+        self.now = timezone.now()
+
+    def _packet(self, days_ago: int) -> Packet:
+        packet = Packet.objects.create(
+            from_node=self.node, to_node=self.node, packet_id=days_ago
+        )
+        PacketData.objects.create(packet=packet, port="TEXT_MESSAGE_APP")
+        Packet.objects.filter(pk=packet.pk).update(
+            time=self.now - timedelta(days=days_ago)
+        )
+        return packet
+
+    def test_retention_days_are_parsed(self) -> None:
+        self.assertEqual(
+            parse_retention_days(" Packet=180, nodelatencyhistory=30 ,"),
+            {"packet": 180, "nodelatencyhistory": 30},
+        )
+        with self.assertRaises(ValueError):
+            parse_retention_days("packets=180")
+        with self.assertRaises(ValueError):
+            parse_retention_days("packet=forever")
+
+    @override_settings(
+        RETENTION_DAYS="packet=90",
+        RETENTION_DEFAULT_DAYS=0,
+        RETENTION_POLICIES_ENABLED=True,
+    )
+    def test_policies_are_seeded_from_settings(self) -> None:
+        policies = {
+            policy.table: policy for policy in RetentionService().ensure_policies()
+        }
+
+        self.assertEqual(set(policies), set(MANAGED_TABLES))
+        self.assertEqual(policies["packet"].retention_days, 90)
+        self.assertIsNone(policies["packetdata"].retention_days)
+        self.assertTrue(policies["packet"].enabled)
+
+    def test_plain_tables_delete_expired_rows_in_batches(self) -> None:
+        expired = [self._packet(days_ago) for days_ago in (40, 50, 60)]
+        kept = self._packet(1)
+        service = RetentionService(batch_size=2)
+        service.ensure_policies()
+        RetentionPolicy.objects.filter(table="packet").update(
+            enabled=True, retention_days=30
+        )
+
+        [result] = service.run(now=self.now)
+
+        self.assertEqual(result.table, "packet")
+        self.assertFalse(result.hypertable)
+        self.assertIsNone(result.error)
+        self.assertEqual(result.deleted_rows, 3)
+        self.assertGreater(result.reclaimed_bytes, 0)
+        self.assertLessEqual(result.reclaimed_bytes, result.size_before)
+        self.assertEqual(list(Packet.objects.values_list("pk", flat=True)), [kept.pk])
+        # Packet data of the expired packets cascades with them.
+        self.assertFalse(
+            PacketData.objects.filter(packet__in=[p.pk for p in expired]).exists()
+        )
+
+        policy = RetentionPolicy.objects.get(table="packet")
+        self.assertEqual(policy.last_deleted_rows, 3)
+        self.assertEqual(policy.total_reclaimed_bytes, result.reclaimed_bytes)
+
+    def test_disabled_policies_only_run_when_named(self) -> None:
+        self._packet(40)
+        service = RetentionService()
+        service.ensure_policies()
+        RetentionPolicy.objects.filter(table="packet").update(retention_days=30)
+
+        self.assertEqual(service.run(now=self.now), [])
+        [result] = service.run(["packet"], now=self.now)
+        self.assertEqual(result.deleted_rows, 1)
+
+    def test_routes_referenced_by_payloads_are_kept(self) -> None:
+        packet_data = self._packet(1).data
+        kept, orphan = (
+            RouteDiscoveryRoute.objects.create(),
+            RouteDiscoveryRoute.objects.create(),
+        )
+        RouteDiscoveryPayload.objects.create(packet_data=packet_data, route_back=kept)
+        RouteDiscoveryRoute.objects.update(time=self.now - timedelta(days=40))
+        service = RetentionService()
+        service.ensure_policies()
+        RetentionPolicy.objects.filter(table="routediscoveryroute").update(
+            retention_days=30
+        )
+
+        [result] = service.run(["routediscoveryroute"], now=self.now)
+
+        self.assertEqual(result.deleted_rows, 1)
+        self.assertEqual(
+            list(RouteDiscoveryRoute.objects.values_list("pk", flat=True)), [kept.pk]
+        )
+        self.assertTrue(RouteDiscoveryPayload.objects.filter(route_back=kept).exists())
+        self.assertFalse(RouteDiscoveryRoute.objects.filter(pk=orphan.pk).exists())
+
+    def test_hypertable_detection_without_timescaledb(self) -> None:
+        self.assertIsNone(RetentionService.hypertable_info(Packet._meta.db_table))
+
+
+class RetentionControllerTests(TestCase):
+    def setUp(self) -> None:
+        self.controller = RetentionController()
+        node = Node.objects.create(
+            node_num=0x10, node_id="!aaaa0001", mac_address="00:00:00:00:aa:01"
+        )
+        self.old = NodeLatencyHistory.objects.create(node=node, latency_ms=10)
+        NodeLatencyHistory.objects.filter(pk=self.old.pk).update(
+            time=timezone.now() - timedelta(days=10)
+        )
+        NodeLatencyHistory.objects.create(node=node, latency_ms=12)
+
+    def test_policies_are_listed_with_sizes(self) -> None:
+        status, policies = self.controller.list_policies(SimpleNamespace())
+
+        self.assertEqual(status, 200)
+        latency = next(p for p in policies if p.table == "nodelatencyhistory")
+        self.assertFalse(latency.hypertable)
+        self.assertGreater(latency.size_bytes, 0)
+
+    def test_update_and_run_reports_reclaimed_space(self) -> None:
+        status, policy = self.controller.update_policy(
+            SimpleNamespace(),
+            "NodeLatencyHistory",
+            RetentionPolicyUpdateSchema(enabled=True, retention_days=7),
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual((policy.enabled, policy.retention_days), (True, 7))
+
+        with patch.object(
+            run_retention_policies, "delay", return_value=SimpleNamespace(id="abc")
+        ) as delay:
+            status, run = self.controller.run_policies(
+                SimpleNamespace(), RetentionRunRequestSchema()
+            )
+
+        self.assertEqual(status, 200)
+        self.assertEqual((run.task_id, run.tables), ("abc", None))
+        delay.assert_called_once_with(tables=None)
+        self.assertTrue(NodeLatencyHistory.objects.filter(pk=self.old.pk).exists())
+
+        reclaimed = run_retention_policies(**delay.call_args.kwargs)
+
+        policy = RetentionPolicy.objects.get(table="nodelatencyhistory")
+        self.assertEqual(policy.last_deleted_rows, 1)
+        self.assertEqual(policy.last_reclaimed_bytes, reclaimed)
+        self.assertFalse(NodeLatencyHistory.objects.filter(pk=self.old.pk).exists())
+
+    def test_named_tables_are_passed_to_the_task(self) -> None:
+        with patch.object(
+            run_retention_policies, "delay", return_value=SimpleNamespace(id="abc")
+        ) as delay:
+            status, run = self.controller.run_policies(
+                SimpleNamespace(),
+                RetentionRunRequestSchema(tables=["NodeLatencyHistory"]),
+            )
+
+        self.assertEqual(status, 200)
+        self.assertEqual(run.tables, ["nodelatencyhistory"])
+        delay.assert_called_once_with(tables=["nodelatencyhistory"])
+
+    def test_unknown_tables_are_rejected(self) -> None:
+        status, _ = self.controller.update_policy(
+            SimpleNamespace(), "users", RetentionPolicyUpdateSchema(enabled=True)
+        )
+        self.assertEqual(status, 404)
+
+        status, message = self.controller.run_policies(
+            SimpleNamespace(), RetentionRunRequestSchema(tables=["users"])
+        )
+        self.assertEqual(status, 400)
+        self.assertIn("users", message.message)
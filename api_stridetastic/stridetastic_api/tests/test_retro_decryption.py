@@ -0,0 +1,412 @@
+import base64
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from cryptography.hazmat.primitives.asymmetric import x25519
+from cryptography.hazmat.primitives.serialization import (
+    Encoding,
+    NoEncryption,
+    PrivateFormat,
+    PublicFormat,
+)
+from django.contrib import admin
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import TestCase, override_settings  # type: ignore[import]
+from django.utils import timezone  # type: ignore[import]
+from meshtastic.protobuf import (  # type: ignore[attr-defined]
+    mesh_pb2,
+    portnums_pb2,
+    telemetry_pb2,
+)
+
+from ..admin.channel_admin import ChannelAdmin
+from ..controllers.decryption_controller import DecryptionController
+from ..mesh.encryption.key_ring import get_channel_key_ring
+from ..mesh.encryption.pkc import PKIEncryptionInputs, encrypt_with_private_key
+from ..mesh.packet import handler
+from ..mesh.packet.crafter import craft_mesh_packet, craft_text_message
+from ..mesh.packet.dedup import get_duplicate_window
+from ..models import Channel, DecryptionJob, Node, PortTrafficRollup
+from ..models.packet_models import Packet, PacketData, PacketDecryptionMethod
+from ..schemas import DecryptionJobCreateSchema
+from ..services.retro_decryption_service import (
+    RetroDecryptionError,
+    RetroDecryptionService,
+    is_decryption_worker,
+)
+from ..tasks.decryption_tasks import resume_decryption_jobs, run_decryption_job
+from ..utils.traffic_rollups import refresh_traffic_rollups
+
+SECRET_PSK = "AQIDBAUGBwgJCgsMDQ4PEA=="  # hash 38 on "Secret"
+OTHER_PSK = "AgMEBQYHCAkKCwwNDg8QEQ=="  # hash 68 on "Other"
+SENDER = "!00007777"
+
+
+def _key_pair() -> tuple[str, str]:
+    private_key = x25519.X25519PrivateKey.generate()
+    private_b64 = base64.b64encode(
+        private_key.private_bytes(Encoding.Raw, PrivateFormat.Raw, NoEncryption())
+    ).decode()
+    public_b64 = base64.b64encode(
+        private_key.public_key().public_bytes(Encoding.Raw, PublicFormat.Raw)
+    ).decode()
+    return private_b64, public_b64
+
+
+def _telemetry(battery_level: int, voltage: float) -> mesh_pb2.Data:
+    telemetry = telemetry_pb2.Telemetry()
+    telemetry.device_metrics.battery_level = battery_level
+    telemetry.device_metrics.voltage = voltage
+    data = mesh_pb2.Data()
+    data.portnum = portnums_pb2.TELEMETRY_APP
+    data.payload = telemetry.SerializeToString()
+    return data
+
+
+@patch("stridetastic_api.mesh.packet.handler._dispatch_to_publisher_service")
+class RetroDecryptionServiceTests(TestCase):
+    def setUp(self) -> None:
+        window = get_duplicate_window()
+        window.clear()
+        self.addCleanup(window.clear)
+        ring = get_channel_key_ring()
+        ring.clear()
+        self.addCleanup(ring.clear)
+        self.received_at = timezone.now() - timedelta(days=1)
+
+    def _ingest(self, packet, channel_id: str = "Secret") -> Packet:
+        handler.on_message(
+            None,
+            None,
+            {
+                "gateway_node_id": "!0000aaaa",
+                "channel_id": channel_id,
+                "packet": packet,
+                "interface_id": None,
+            },
+        )
+        stored = Packet.objects.get(packet_id=packet.id)
+        Packet.objects.filter(pk=stored.pk).update(time=self.received_at)
+        return stored
+
+    def _ingest_channel(self, packet_id: int, data=None, psk=SECRET_PSK) -> Packet:
+        return self._ingest(
+            craft_mesh_packet(
+                from_id=SENDER,
+                to_id="!ffffffff",
+                channel_name="Secret" if psk == SECRET_PSK else "Other",
+                channel_aes_key=psk,
+                global_message_id=packet_id,
+                data_protobuf=data or craft_text_message(f"old {packet_id}"),
+            ),
+            channel_id="Secret" if psk == SECRET_PSK else "Other",
+        )
+
+    def _secret_channel(self) -> Channel:
+        channel = Channel.objects.get(channel_id="Secret")
+        channel.psk = SECRET_PSK
+        channel.save()
+        return channel
+
+    def test_channel_job_decrypts_stored_packets(self, _dispatch) -> None:
+        stored = [self._ingest_channel(packet_id) for packet_id in (401, 402, 403)]
+        self._ingest_channel(404, psk=OTHER_PSK)
+        self.assertFalse(PacketData.objects.exists())
+        refresh_traffic_rollups()
+        self.assertFalse(
+            PortTrafficRollup.objects.filter(port="TEXT_MESSAGE_APP").exists()
+        )
+
+        job = RetroDecryptionService.create_job(channel=self._secret_channel())
+        self.assertEqual(job.total, 3)
+        reported = []
+        job = RetroDecryptionService(workers=1, batch_size=2).run(
+            job, progress=lambda job: reported.append(job.processed)
+        )
+
+        self.assertEqual(reported, [2, 3])
+        self.assertEqual(job.status, "completed")
+        self.assertEqual((job.processed, job.decrypted, job.failed), (3, 3, 0))
+        self.assertEqual(job.last_packet_pk, stored[-1].pk)
+        self.assertEqual(job.progress, 1.0)
+        for packet in Packet.objects.filter(pk__in=[p.pk for p in stored]):
+            self.assertEqual(packet.how_decrypted, PacketDecryptionMethod.AES)
+            self.assertEqual(packet.data.port, "TEXT_MESSAGE_APP")
+            self.assertEqual(packet.data.how_decrypted, PacketDecryptionMethod.AES)
+            # Payload rows keep the time the packet was received.
+            self.assertEqual(packet.data.time, self.received_at)
+        self.assertEqual(
+            Packet.objects.get(packet_id=404).how_decrypted,
+            PacketDecryptionMethod.NOT_DECRYPTED,
+        )
+        # Materialized buckets are rebuilt with the decrypted ports.
+        self.assertEqual(
+            PortTrafficRollup.objects.filter(port="TEXT_MESSAGE_APP").aggregate(
+                packets=Sum("packets")
+            )["packets"],
+            3,
+        )
+        # Nothing is left for another run.
+        again = RetroDecryptionService.create_job(channel=job.channel)
+        self.assertEqual(again.total, 0)
+
+    def test_historic_packets_only_fill_node_state(self, _dispatch) -> None:
+        stored = self._ingest_channel(411, data=_telemetry(50, 3.7))
+        sender = Node.objects.get(node_id=SENDER)
+        sender.battery_level = 90
+        sender.save()
+
+        job = RetroDecryptionService.create_job(channel=self._secret_channel())
+        RetroDecryptionService(workers=1).run(job)
+
+        sender.refresh_from_db()
+        self.assertEqual(sender.battery_level, 90)
+        self.assertEqual(sender.voltage, Decimal("3.70"))
+        payload = Packet.objects.get(pk=stored.pk).data.telemetry_payload
+        self.assertEqual(payload.battery_level, 50)
+        self.assertEqual(payload.time, self.received_at)
+
+    def test_node_job_decrypts_pki_messages(self, _dispatch) -> None:
+        sender_private, sender_public = _key_pair()
+        receiver_private, receiver_public = _key_pair()
+        Node.objects.create(
+            node_num=0x7777,
+            node_id=SENDER,
+            mac_address="00:00:00:00:77:77",
+            public_key=sender_public,
+        )
+        receiver = Node.objects.create(
+            node_num=0x8888,
+            node_id="!00008888",
+            mac_address="00:00:00:00:88:88",
+            public_key=receiver_public,
+        )
+        ciphertext = encrypt_with_private_key(
+            PKIEncryptionInputs(
+                plaintext=craft_text_message("direct").SerializeToString(),
+                from_node_num=0x7777,
+                to_node_num=0x8888,
+                packet_id=421,
+                public_key=base64.b64decode(receiver_public),
+            ),
+            sender_private,
+        )
+        stored = self._ingest(
+            craft_mesh_packet(
+                from_id=SENDER,
+                to_id="!00008888",
+                channel_name="PKI",
+                channel_aes_key="",
+                global_message_id=421,
+                data_protobuf=None,
+                pki_encrypted=True,
+                encrypted_payload=ciphertext,
+            ),
+            channel_id="PKI",
+        )
+        self.assertEqual(stored.how_decrypted, PacketDecryptionMethod.NOT_DECRYPTED)
+
+        with self.assertRaises(RetroDecryptionError):
+            RetroDecryptionService.create_job(node=receiver)
+        receiver.store_private_key(receiver_private)
+        job = RetroDecryptionService.create_job(node=receiver)
+        job = RetroDecryptionService(workers=1).run(job)
+
+        self.assertEqual((job.status, job.decrypted), ("completed", 1))
+        packet = Packet.objects.get(pk=stored.pk)
+        self.assertEqual(packet.how_decrypted, PacketDecryptionMethod.PKI)
+        self.assertEqual(packet.data.port, "TEXT_MESSAGE_APP")
+
+    def test_interrupted_job_resumes_after_last_batch(self, _dispatch) -> None:
+        stored = [self._ingest_channel(packet_id) for packet_id in (431, 432, 433)]
+        job = RetroDecryptionService.create_job(channel=self._secret_channel())
+
+        def crash(job):
+            raise RuntimeError("worker lost")
+
+        service = RetroDecryptionService(workers=1, batch_size=1)
+        job = service.run(job, progress=crash)
+        self.assertEqual(job.status, "failed")
+        self.assertIn("worker lost", job.error_message)
+        self.assertEqual((job.processed, job.last_packet_pk), (1, stored[0].pk))
+
+        job = service.run(RetroDecryptionService.resume(job))
+
+        self.assertEqual(job.status, "completed")
+        self.assertEqual((job.total, job.processed, job.decrypted), (3, 3, 3))
+        self.assertEqual(
+            PacketData.objects.filter(packet__in=[p.pk for p in stored]).count(), 3
+        )
+        with self.assertRaises(RetroDecryptionError):
+            RetroDecryptionService.resume(job)
+
+    def test_cancelled_job_stops_before_next_batch(self, _dispatch) -> None:
+        for packet_id in (441, 442, 443):
+            self._ingest_channel(packet_id)
+        job = RetroDecryptionService.create_job(channel=self._secret_channel())
+
+        job = RetroDecryptionService(workers=1, batch_size=1).run(
+            job, progress=RetroDecryptionService.cancel
+        )
+
+        self.assertEqual((job.status, job.processed), ("cancelled", 1))
+        self.assertEqual(PacketData.objects.count(), 1)
+
+    def test_process_pool_decrypts_batches(self, _dispatch) -> None:
+        for packet_id in range(451, 457):
+            self._ingest_channel(packet_id)
+        job = RetroDecryptionService.create_job(channel=self._secret_channel())
+
+        service = RetroDecryptionService(workers=2, batch_size=4)
+        job = service.run(job)
+
+        self.assertEqual((job.status, job.decrypted, job.failed), ("completed", 6, 0))
+        # Pool children are marked so the app does not start services there.
+        with service._executor() as executor:
+            self.assertTrue(executor.submit(is_decryption_worker).result())
+        self.assertFalse(is_decryption_worker())
+
+    @override_settings(
+        RETRO_DECRYPT_WORKERS=1,
+        RETRO_DECRYPT_BATCH_SIZE=1,
+        RETRO_DECRYPT_BATCHES_PER_TASK=2,
+    )
+    def test_task_runs_bounded_slices_and_requeues(self, _dispatch) -> None:
+        for packet_id in (456, 457, 458):
+            self._ingest_channel(packet_id)
+        job = RetroDecryptionService.create_job(channel=self._secret_channel())
+
+        with patch.object(run_decryption_job, "delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(run_decryption_job(job.pk), 2)
+            delay.assert_called_once_with(job.pk)
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.processed), ("pending", 2))
+            started_at = job.started_at
+
+            delay.reset_mock()
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(run_decryption_job(job.pk), 1)
+            delay.assert_not_called()
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed, job.total), ("completed", 3, 3))
+        self.assertEqual(job.started_at, started_at)
+
+    def test_stale_jobs_are_queued_again(self, _dispatch) -> None:
+        self._ingest_channel(459)
+        job = RetroDecryptionService.create_job(channel=self._secret_channel())
+        DecryptionJob.objects.filter(pk=job.pk).update(
+            status="running", updated_at=timezone.now() - timedelta(hours=1)
+        )
+
+        with patch.object(
+            run_decryption_job, "delay"
+        ) as delay, self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(resume_decryption_jobs(), 1)
+            self.assertEqual(resume_decryption_jobs(), 0)
+
+        delay.assert_called_once_with(job.pk)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed), ("pending", 0))
+
+    @override_settings(RETRO_DECRYPT_WORKERS=1)
+    def test_task_and_command_run_jobs(self, _dispatch) -> None:
+        self._ingest_channel(461)
+        self._ingest_channel(462, psk=OTHER_PSK)
+        job = RetroDecryptionService.create_job(channel=self._secret_channel())
+        self.assertEqual(
+            RetroDecryptionService.create_job(channel=job.channel).pk, job.pk
+        )
+
+        self.assertEqual(run_decryption_job(job.pk), 1)
+
+        Channel.objects.filter(channel_id="Other").update(psk=OTHER_PSK)
+        stdout = StringIO()
+        call_command("retro_decrypt", channel="Other", stdout=stdout)
+        self.assertIn("1 of 1 packet(s) decrypted", stdout.getvalue())
+        self.assertEqual(
+            Packet.objects.get(packet_id=462).how_decrypted,
+            PacketDecryptionMethod.AES,
+        )
+
+    def test_setting_a_psk_in_admin_queues_a_job(self, _dispatch) -> None:
+        self._ingest_channel(471)
+        channel = Channel.objects.get(channel_id="Secret")
+        channel.psk = SECRET_PSK
+        model_admin = ChannelAdmin(Channel, admin.site)
+
+        with patch(
+            "stridetastic_api.tasks.decryption_tasks.run_decryption_job.delay"
+        ) as delay, self.captureOnCommitCallbacks(execute=True):
+            model_admin.save_model(
+                None, channel, SimpleNamespace(changed_data=["psk"]), True
+            )
+
+        job = DecryptionJob.objects.get(channel=channel)
+        delay.assert_called_once_with(job.pk)
+        self.assertEqual((job.status, job.total), ("pending", 1))
+
+
+class DecryptionControllerTests(TestCase):
+    def setUp(self) -> None:
+        self.controller = DecryptionController()
+        Channel.objects.create(channel_id="Secret", channel_num=38)
+
+    def test_jobs_are_created_listed_and_fetched(self) -> None:
+        with patch(
+            "stridetastic_api.tasks.decryption_tasks.run_decryption_job.delay"
+        ) as delay, self.captureOnCommitCallbacks(execute=True):
+            status, job = self.controller.create_job(
+                SimpleNamespace(),
+                DecryptionJobCreateSchema(
+                    channel_id="Secret", channel_num=38, psk=SECRET_PSK
+                ),
+            )
+
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            (job.kind, job.channel_id, job.status), ("channel", "Secret", "pending")
+        )
+        delay.assert_called_once_with(job.id)
+        self.assertEqual(Channel.objects.get(channel_id="Secret").psk, SECRET_PSK)
+
+        status, jobs = self.controller.list_jobs(
+            SimpleNamespace(GET={"status": "pending"})
+        )
+        self.assertEqual((status, [j.id for j in jobs]), (200, [job.id]))
+        status, fetched = self.controller.get_job(SimpleNamespace(), job.id)
+        self.assertEqual((status, fetched.total), (200, 0))
+
+        status, cancelled = self.controller.cancel_job(SimpleNamespace(), job.id)
+        self.assertEqual((status, cancelled.status), (200, "cancelled"))
+        with patch("stridetastic_api.tasks.decryption_tasks.run_decryption_job.delay"):
+            status, resumed = self.controller.resume_job(SimpleNamespace(), job.id)
+        self.assertEqual((status, resumed.status), (200, "pending"))
+
+    def test_invalid_requests_are_rejected(self) -> None:
+        status, message = self.controller.create_job(
+            SimpleNamespace(),
+            DecryptionJobCreateSchema(channel_id="Secret", channel_num=38),
+        )
+        self.assertEqual((status, message.message), (400, "Channel has no PSK"))
+
+        status, _ = self.controller.create_job(
+            SimpleNamespace(),
+            DecryptionJobCreateSchema(channel_id="Secret", channel_num=38, psk="!"),
+        )
+        self.assertEqual(status, 400)
+        status, _ = self.controller.create_job(
+            SimpleNamespace(), DecryptionJobCreateSchema(node_id="!deadbeef")
+        )
+        self.assertEqual(status, 404)
+        status, _ = self.controller.create_job(
+            SimpleNamespace(), DecryptionJobCreateSchema()
+        )
+        self.assertEqual(status, 400)
+        status, _ = self.controller.get_job(SimpleNamespace(), 999)
+        self.assertEqual(status, 404)
@@ -1,6 +1,8 @@
 from datetime import timedelta
 
+from django.db import connection
 from django.test import TestCase  # type: ignore[import]
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone  # type: ignore[import]
 from meshtastic.protobuf import mesh_pb2  # type: ignore[import]
 
@@ -10,6 +12,7 @@ from ..mesh.packet.handler import (
     handle_route_discovery,
     handle_routing,
 )
+from ..mesh.packet.pending_requests import get_pending_requests
 from ..models import Edge, Node, NodeLatencyHistory, Packet
 from ..models.packet_models import (
     PacketData,
@@ -20,6 +23,9 @@ from ..models.packet_models import (
 
 class RouteDiscoveryBroadcastTests(TestCase):
     def setUp(self) -> None:
+        self.pending = get_pending_requests()
+        self.pending.clear()
+        self.addCleanup(self.pending.clear)
         self.origin_node = Node.objects.create(
             node_num=0x1,
             node_id="!00000001",
@@ -31,6 +37,17 @@ class RouteDiscoveryBroadcastTests(TestCase):
             mac_address="00:00:00:00:00:02",
         )
 
+    def _register(self, request_packet: Packet, history_pk=None) -> None:
+        """Record the request as ingest or the publisher would have."""
+        self.pending.register(
+            request_packet.packet_id,
+            request_packet.to_node.node_num,
+            from_node_num=request_packet.from_node.node_num,
+            sent_at=request_packet.time,
+            packet_pk=request_packet.pk,
+            history_pk=history_pk,
+        )
+
     def test_request_traceroute_with_broadcast_skips_only_broadcast_node(self) -> None:
         packet = Packet.objects.create(
             from_node=self.origin_node,
@@ -74,6 +91,7 @@ class RouteDiscoveryBroadcastTests(TestCase):
         ack_request_packet.time = timezone.now() - timedelta(milliseconds=250)
         ack_request_packet.save(update_fields=["time"])
 
+        self._register(ack_request_packet)
         response_packet = Packet.objects.create(
             from_node=responder_node,
             to_node=self.origin_node,
@@ -132,6 +150,7 @@ class RouteDiscoveryBroadcastTests(TestCase):
         )
         PacketData.objects.create(packet=ack_request_packet)
 
+        self._register(ack_request_packet)
         response_packet = Packet.objects.create(
             from_node=self.origin_node,
             to_node=responder_node,
@@ -204,6 +223,7 @@ class RouteDiscoveryBroadcastTests(TestCase):
         )
         PacketData.objects.create(packet=ack_request_packet)
 
+        self._register(ack_request_packet)
         response_packet = Packet.objects.create(
             from_node=destination_node,
             to_node=source_node,
@@ -246,6 +266,7 @@ class RouteDiscoveryBroadcastTests(TestCase):
         ack_request_packet.time = timezone.now() - timedelta(milliseconds=180)
         ack_request_packet.save(update_fields=["time"])
 
+        self._register(ack_request_packet)
         response_packet = Packet.objects.create(
             from_node=responder_node,
             to_node=self.origin_node,
@@ -288,12 +309,13 @@ class RouteDiscoveryBroadcastTests(TestCase):
         request_packet.time = request_time
         request_packet.save(update_fields=["time"])
 
-        NodeLatencyHistory.objects.create(
+        pending_history = NodeLatencyHistory.objects.create(
             node=responder_node,
             reachable=False,
             latency_ms=None,
             probe_message_id=request_packet.packet_id,
         )
+        self._register(request_packet, history_pk=pending_history.pk)
 
         response_packet = Packet.objects.create(
             from_node=responder_node,
@@ -327,3 +349,115 @@ class RouteDiscoveryBroadcastTests(TestCase):
             self.assertIsNotNone(entry.responded_at)
             if entry.responded_at:
                 self.assertEqual(entry.responded_at, response_time)
+
+
+class RouteDiscoveryPersistenceTests(TestCase):
+    def setUp(self) -> None:
+        self.pending = get_pending_requests()
+        self.pending.clear()
+        self.addCleanup(self.pending.clear)
+        self.origin_node = Node.objects.create(
+            node_num=0x10, node_id="!00000010", mac_address="00:00:00:00:00:10"
+        )
+        self.responder_node = Node.objects.create(
+            node_num=0x20, node_id="!00000020", mac_address="00:00:00:00:00:20"
+        )
+
+    def _response(self, packet_id: int) -> PacketData:
+        request_packet = Packet.objects.create(
+            from_node=self.origin_node,
+            to_node=self.responder_node,
+            packet_id=packet_id,
+        )
+        PacketData.objects.create(packet=request_packet)
+        self.pending.register(
+            packet_id,
+            self.responder_node.node_num,
+            from_node_num=self.origin_node.node_num,
+            packet_pk=request_packet.pk,
+        )
+        response_packet = Packet.objects.create(
+            from_node=self.responder_node, to_node=self.origin_node
+        )
+        return PacketData.objects.create(packet=response_packet, request_id=packet_id)
+
+    def _route(self, hops: list[int]) -> bytes:
+        route_discovery = mesh_pb2.RouteDiscovery()
+        route_discovery.route.extend(hops)
+        route_discovery.snr_towards.extend([4 * (i + 1) for i in range(len(hops) + 1)])
+        route_discovery.route_back.extend(list(reversed(hops)))
+        route_discovery.snr_back.extend([-4] * (len(hops) + 1))
+        return route_discovery.SerializeToString()
+
+    def test_edges_follow_each_direction_with_snr_per_hop(self) -> None:
+        hops = [0x31, 0x32]
+        response = self._response(100)
+
+        handle_route_discovery(self._route(hops), response)
+
+        edges = {
+            (edge.source_node.node_num, edge.target_node.node_num): edge
+            for edge in Edge.objects.select_related("source_node", "target_node")
+        }
+        self.assertEqual(
+            sorted(edges),
+            sorted(
+                [(0x10, 0x31), (0x31, 0x32), (0x32, 0x20)]
+                # The route back stops at the last hop before the origin.
+                + [(0x20, 0x32), (0x32, 0x31)]
+            ),
+        )
+        self.assertEqual(float(edges[(0x10, 0x31)].last_rx_snr), 1.0)
+        self.assertEqual(float(edges[(0x32, 0x20)].last_rx_snr), 3.0)
+        self.assertEqual(float(edges[(0x32, 0x31)].last_rx_snr), -1.0)
+        for edge in edges.values():
+            self.assertEqual(edge.last_hops, 0)
+            self.assertEqual(edge.last_rx_rssi, 0)
+            self.assertEqual(edge.last_packet.packet_id, 100)
+
+    def test_long_routes_use_the_same_number_of_queries(self) -> None:
+        short_hops = [0x41]
+        long_hops = list(range(0x50, 0x60))
+        short_response = self._response(200)
+        long_response = self._response(201)
+
+        with CaptureQueriesContext(connection) as short:
+            handle_route_discovery(self._route(short_hops), short_response)
+        with CaptureQueriesContext(connection) as long:
+            handle_route_discovery(self._route(long_hops), long_response)
+
+        self.assertEqual(len(long), len(short))
+        # Forward edges include both endpoints, the route back omits the origin.
+        self.assertEqual(Edge.objects.count(), 3 + 2 * len(long_hops) + 1)
+
+    def test_request_routes_are_shared_between_traceroutes(self) -> None:
+        def request(packet_id: int) -> PacketData:
+            packet = Packet.objects.create(
+                from_node=self.origin_node,
+                to_node=self.responder_node,
+                packet_id=packet_id,
+            )
+            return PacketData.objects.create(packet=packet, request_id=0)
+
+        route_discovery = mesh_pb2.RouteDiscovery()
+        route_discovery.route.extend([0x61, 0x62])
+        handle_route_discovery(route_discovery.SerializeToString(), request(300))
+        repeated = request(301)
+        with CaptureQueriesContext(connection) as queries:
+            handle_route_discovery(route_discovery.SerializeToString(), repeated)
+
+        route_table = RouteDiscoveryRoute._meta.db_table
+        self.assertFalse(
+            [
+                q["sql"]
+                for q in queries
+                if route_table in q["sql"] and not q["sql"].startswith("SELECT")
+            ]
+        )
+        route = RouteDiscoveryRoute.objects.get()
+        self.assertEqual(route.hops, 3)
+        self.assertEqual(
+            sorted(route.nodes.values_list("node_num", flat=True)),
+            [0x10, 0x61, 0x62],
+        )
+        self.assertEqual(RouteDiscoveryPayload.objects.count(), 2)
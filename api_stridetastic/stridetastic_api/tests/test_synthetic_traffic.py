@@ -0,0 +1,141 @@
+import json
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase  # type: ignore[import]
+from meshtastic.protobuf import mqtt_pb2, portnums_pb2  # type: ignore[attr-defined]
+
+from ..ingest.synthetic import (
+    PORT_PKI_DM,
+    PORT_TEXT,
+    LocalBroker,
+    SyntheticMesh,
+    TrafficProfile,
+    parse_port_mix,
+)
+from ..mesh.encryption.pkc import PKIDecryptionInputs, decrypt_with_private_key
+from ..mesh.packet.dedup import get_duplicate_window
+from ..models import Packet, PacketObservation
+
+
+def _envelopes(mesh: SyntheticMesh, count: int) -> list:
+    envelopes = []
+    for message in mesh.messages(count):
+        envelope = mqtt_pb2.ServiceEnvelope()
+        envelope.ParseFromString(message.payload)
+        envelopes.append((message.topic, envelope))
+    return envelopes
+
+
+class SyntheticMeshTests(TestCase):
+    def test_fanout_controls_gateway_copies(self) -> None:
+        full = SyntheticMesh(TrafficProfile(nodes=20, gateways=4, fanout=4, seed=1))
+        single = SyntheticMesh(TrafficProfile(nodes=20, gateways=4, fanout=1, seed=1))
+
+        self.assertEqual(len(list(full.messages(10))), 40)
+        envelopes = _envelopes(single, 10)
+        self.assertEqual(len(envelopes), 10)
+        gateway_ids = {gateway.node_id for gateway in single.gateways}
+        for topic, envelope in envelopes:
+            self.assertIn(envelope.gateway_id, gateway_ids)
+            self.assertTrue(topic.endswith(f"/{envelope.gateway_id}"))
+
+    def test_encrypted_ratio_and_port_mix(self) -> None:
+        profile = TrafficProfile(
+            nodes=10, port_mix={PORT_TEXT: 1.0}, encrypted_ratio=0.0, seed=2
+        )
+        for _topic, envelope in _envelopes(SyntheticMesh(profile), 5):
+            self.assertEqual(
+                envelope.packet.decoded.portnum, portnums_pb2.TEXT_MESSAGE_APP
+            )
+
+        profile.encrypted_ratio = 1.0
+        for _topic, envelope in _envelopes(SyntheticMesh(profile), 5):
+            self.assertTrue(envelope.packet.encrypted)
+            self.assertEqual(envelope.packet.channel, 8)
+
+    def test_pki_direct_messages_decrypt_with_receiver_key(self) -> None:
+        mesh = SyntheticMesh(
+            TrafficProfile(nodes=5, fanout=1, port_mix={PORT_PKI_DM: 1.0}, seed=3)
+        )
+        topic, envelope = _envelopes(mesh, 1)[0]
+        packet = envelope.packet
+        receiver = next(node for node in mesh.nodes if node.node_num == packet.to)
+
+        plaintext = decrypt_with_private_key(
+            PKIDecryptionInputs(
+                encrypted_payload=packet.encrypted,
+                from_node_num=getattr(packet, "from"),
+                to_node_num=packet.to,
+                packet_id=packet.id,
+                public_key=next(
+                    node.public_key_bytes
+                    for node in mesh.nodes
+                    if node.node_num == getattr(packet, "from")
+                ),
+            ),
+            receiver.private_key_b64,
+        )
+
+        self.assertTrue(packet.pki_encrypted)
+        self.assertIn("/2/e/PKI/", topic)
+        self.assertIn(b"dm ", plaintext)
+
+    def test_parse_port_mix_rejects_unknown_ports(self) -> None:
+        self.assertEqual(
+            parse_port_mix("text=2, pki_dm=1"), {"TEXT": 2.0, "PKI_DM": 1.0}
+        )
+        with self.assertRaises(ValueError):
+            parse_port_mix("BOGUS=1")
+
+    def test_local_broker_delivers_to_subscribers(self) -> None:
+        broker = LocalBroker()
+        received = []
+        broker.subscribe(lambda client, userdata, msg: received.append(msg.topic))
+
+        self.assertTrue(broker.publish("msh/US/2/e/LongFast/!00000001", b""))
+        self.assertEqual(received, ["msh/US/2/e/LongFast/!00000001"])
+        self.assertEqual(broker.published, 1)
+
+
+@patch("stridetastic_api.mesh.packet.handler._dispatch_to_publisher_service")
+class GenerateTrafficCommandTests(TestCase):
+    def setUp(self) -> None:
+        window = get_duplicate_window()
+        window.clear()
+        self.addCleanup(window.clear)
+
+    def test_broker_sink_ingests_channel_ports_with_duplicates(self, _dispatch) -> None:
+        # Undecryptable PKI DMs are deliberately reprocessed per copy, so the
+        # duplicate count is asserted on channel traffic only.
+        out = StringIO()
+        call_command(
+            "generate_traffic",
+            "--packets",
+            "24",
+            "--nodes",
+            "12",
+            "--gateways",
+            "3",
+            "--fanout",
+            "3",
+            "--seed",
+            "7",
+            "--port-mix",
+            "NODEINFO=1,POSITION=1,TELEMETRY=1,NEIGHBORINFO=1,TRACEROUTE=1,ROUTING=1,TEXT=1",
+            "--sink",
+            "broker",
+            "--json",
+            stdout=out,
+        )
+
+        report = json.loads(out.getvalue())
+        self.assertEqual(report["packets"], 72)
+        self.assertEqual(report["failed"], 0)
+        self.assertEqual(Packet.objects.count(), 24)
+        self.assertEqual(PacketObservation.objects.count(), 72)
+        self.assertEqual(
+            PacketObservation.objects.filter(is_duplicate=True).count(), 48
+        )
+        self.assertEqual(report["metrics"]["stages"]["total"]["count"], 72)
@@ -0,0 +1,151 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings  # type: ignore[import]
+from django.utils import timezone  # type: ignore[import]
+
+from ..controllers.node_controller import NodeController
+from ..controllers.port_controller import PortController
+from ..models import (
+    Channel,
+    Node,
+    PortTrafficRollup,
+    SenderPortTrafficRollup,
+    TrafficRollupState,
+)
+from ..models.packet_models import Packet, PacketData
+from ..utils.traffic_rollups import (
+    ROLLUPS,
+    refresh_rollup,
+    refresh_traffic_rollups,
+    traffic_totals,
+)
+
+
+class TrafficRollupTests(TestCase):
+    def setUp(self) -> None:
+        self.now = timezone.now().replace(second=30, microsecond=0)
+        self.node_a = Node.objects.create(
+            node_num=0x10, node_id="!aaaa0001", mac_address="00:00:00:00:aa:01"
+        )
+        self.node_b = Node.objects.create(
+            node_num=0x11, node_id="!bbbb0002", mac_address="00:00:00:00:bb:02"
+        )
+        self.channel = Channel.objects.create(channel_id="LongFast", channel_num=8)
+        self.packet_ids = iter(range(1, 10_000))
+
+    def _packet(self, sender, receiver, port=None, *, minutes_ago=0) -> Packet:
+        packet = Packet.objects.create(
+            from_node=sender, to_node=receiver, packet_id=next(self.packet_ids)
+        )
+        packet.channels.add(self.channel)
+        if port is not None:
+            PacketData.objects.create(packet=packet, port=port)
+        Packet.objects.filter(pk=packet.pk).update(
+            time=self.now - timedelta(minutes=minutes_ago)
+        )
+        return packet
+
+    def _seed(self) -> None:
+        self._packet(self.node_a, self.node_b, "TEXT_MESSAGE_APP", minutes_ago=150)
+        self._packet(self.node_a, self.node_b, "TEXT_MESSAGE_APP", minutes_ago=90)
+        self._packet(self.node_b, self.node_a, "POSITION_APP", minutes_ago=90)
+        self._packet(self.node_b, self.node_a, minutes_ago=30)
+
+    def test_refresh_materializes_buckets_up_to_the_end_offset(self) -> None:
+        self._seed()
+
+        windows = refresh_traffic_rollups(now=self.now)
+
+        self.assertEqual(set(windows), set(ROLLUPS))
+        self.assertEqual(
+            PortTrafficRollup.objects.filter(port="TEXT_MESSAGE_APP").count(), 2
+        )
+        sender_rows = SenderPortTrafficRollup.objects.filter(node=self.node_a)
+        self.assertEqual(sum(row.packets for row in sender_rows), 2)
+        # The undecoded packet is counted without a port.
+        self.assertTrue(
+            PortTrafficRollup.objects.filter(port__isnull=True, packets=1).exists()
+        )
+        watermark = TrafficRollupState.objects.get(name="port").refreshed_until
+        self.assertEqual(watermark, self.now.replace(second=0) - timedelta(minutes=1))
+
+    def test_totals_combine_rollups_with_packets_after_the_watermark(self) -> None:
+        self._seed()
+        refresh_traffic_rollups(now=self.now)
+        self._packet(self.node_a, self.node_b, "TEXT_MESSAGE_APP")
+
+        totals = {
+            entry["port"]: entry
+            for entry in traffic_totals("port", ["port"], decoded_only=True)
+        }
+        self.assertEqual(totals["TEXT_MESSAGE_APP"]["packets"], 3)
+        self.assertEqual(totals["TEXT_MESSAGE_APP"]["last_seen"], self.now)
+        self.assertEqual(totals["POSITION_APP"]["packets"], 1)
+
+        [channel] = traffic_totals("channel", ["channel__channel_id"])
+        self.assertEqual(
+            (channel["channel__channel_id"], channel["packets"]), ("LongFast", 5)
+        )
+
+    def test_refresh_is_idempotent_and_picks_up_late_packets(self) -> None:
+        self._seed()
+        refresh_traffic_rollups(now=self.now)
+        # Arrives after the refresh with a time inside the lookback.
+        self._packet(self.node_a, self.node_b, "TEXT_MESSAGE_APP", minutes_ago=5)
+        refresh_traffic_rollups(now=self.now)
+        refresh_traffic_rollups(now=self.now)
+
+        [entry] = traffic_totals(
+            "port", ["port"], ports=["TEXT_MESSAGE_APP"], decoded_only=True
+        )
+        self.assertEqual(entry["packets"], 3)
+        rolled_up = sum(
+            PortTrafficRollup.objects.filter(port="TEXT_MESSAGE_APP").values_list(
+                "packets", flat=True
+            )
+        )
+        self.assertEqual(rolled_up, 3)
+
+    @override_settings(TRAFFIC_ROLLUP_MAX_WINDOW_SECS=3600)
+    def test_backfill_advances_one_window_per_run(self) -> None:
+        self._seed()
+        spec = ROLLUPS["port"]
+
+        start, end = refresh_rollup(spec, now=self.now)
+        self.assertEqual(end - start, timedelta(hours=1))
+        self.assertEqual(PortTrafficRollup.objects.count(), 1)
+
+        out = StringIO()
+        call_command("refresh_traffic_rollups", rollup=["port"], stdout=out)
+        self.assertIn("port: refreshed", out.getvalue())
+        self.assertEqual(
+            sum(PortTrafficRollup.objects.values_list("packets", flat=True)), 4
+        )
+
+    def test_activity_endpoints_read_from_rollups(self) -> None:
+        self._seed()
+        refresh_traffic_rollups(now=self.now)
+        self._packet(self.node_a, self.node_b, "POSITION_APP")
+
+        status, ports = PortController().get_port_activity()
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            {entry.port: entry.total_packets for entry in ports},
+            {"TEXT_MESSAGE_APP": 2, "POSITION_APP": 2},
+        )
+
+        status, senders = PortController().get_port_node_activity("POSITION_APP")
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            {entry.node_id: entry.sent_count for entry in senders},
+            {"!aaaa0001": 1, "!bbbb0002": 1},
+        )
+
+        status, node_ports = NodeController().get_node_port_activity("!aaaa0001")
+        self.assertEqual(status, 200)
+        by_port = {entry.port: entry for entry in node_ports}
+        self.assertEqual(by_port["TEXT_MESSAGE_APP"].sent_count, 2)
+        self.assertEqual(by_port["POSITION_APP"].sent_count, 1)
+        self.assertEqual(by_port["POSITION_APP"].received_count, 1)
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import struct
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+
+
+@dataclass(frozen=True)
+class PcapNgRecord:
+    timestamp: datetime
+    message_type: Optional[str]
+    payload: bytes
+
+
+class PcapNgReader:
+    """Minimal PCAP-NG reader for captures produced by `PcapNgWriter`.
+
+    Yields one `PcapNgRecord` per Enhanced Packet Block. The protobuf message
+    type is taken from the ``type=...`` frame comment, falling back to the
+    ``proto:`` hint in the description of the block's interface.
+    """
+
+    _SECTION_HEADER_BLOCK = 0x0A0D0D0A
+    _INTERFACE_DESCRIPTION_BLOCK = 0x00000001
+    _ENHANCED_PACKET_BLOCK = 0x00000006
+    _BYTE_ORDER_MAGIC = 0x1A2B3C4D
+
+    _IF_DESCRIPTION_OPTION = 3
+    _IF_TSRESOL_OPTION = 9
+    _EPB_COMMENT_OPTION = 1
+
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        self._endian = "<"
+        self._interfaces: list[tuple[Optional[str], int]] = []
+
+    def __iter__(self) -> Iterator[PcapNgRecord]:
+        with self.path.open("rb") as handle:
+            yield from self._read(handle)
+
+    def _read(self, handle: BinaryIO) -> Iterator[PcapNgRecord]:
+        while True:
+            header = handle.read(8)
+            if len(header) < 8:
+                return
+            block_type = struct.unpack("<I", header[:4])[0]
+            if block_type == self._SECTION_HEADER_BLOCK:
+                magic = handle.read(4)
+                self._endian = (
+                    "<"
+                    if struct.unpack("<I", magic)[0] == self._BYTE_ORDER_MAGIC
+                    else ">"
+                )
+                self._interfaces = []
+                total_length = struct.unpack(f"{self._endian}I", header[4:])[0]
+                body = magic + handle.read(total_length - 16)
+            else:
+                total_length = struct.unpack(f"{self._endian}I", header[4:])[0]
+                body = handle.read(total_length - 12)
+            if len(body) < total_length - 12 or len(handle.read(4)) < 4:
+                raise ValueError(f"Truncated PCAP-NG block in {self.path}")
+
+            if block_type == self._INTERFACE_DESCRIPTION_BLOCK:
+                self._interfaces.append(self._parse_interface(body))
+            elif block_type == self._ENHANCED_PACKET_BLOCK:
+                yield self._parse_packet(body)
+
+    def _options(self, data: bytes) -> Iterator[tuple[int, bytes]]:
+        offset = 0
+        while offset + 4 <= len(data):
+            code, length = struct.unpack(f"{self._endian}HH", data[offset : offset + 4])
+            if code == 0:
+                return
+            offset += 4
+            yield code, data[offset : offset + length]
+            offset += (length + 3) & ~0x03
+
+    def _parse_interface(self, body: bytes) -> tuple[Optional[str], int]:
+        message_type = None
+        resolution = 1_000_000
+        for code, value in self._options(body[8:]):
+            if code == self._IF_DESCRIPTION_OPTION:
+                description = value.decode("utf-8", errors="replace")
+                if description.startswith("proto:protobuf."):
+                    message_type = description[len("proto:protobuf.") :]
+            elif code == self._IF_TSRESOL_OPTION and value:
+                exponent = value[0]
+                resolution = 2 ** (exponent & 0x7F) if exponent & 0x80 else 10**exponent
+        return message_type, resolution
+
+    def _parse_packet(self, body: bytes) -> PcapNgRecord:
+        interface_id, ts_high, ts_low, captured_length, _ = struct.unpack(
+            f"{self._endian}IIIII", body[:20]
+        )
+        payload = body[20 : 20 + captured_length]
+        message_type, resolution = (
+            self._interfaces[interface_id]
+            if interface_id < len(self._interfaces)
+            else (None, 1_000_000)
+        )
+        options_offset = 20 + ((captured_length + 3) & ~0x03)
+        for code, value in self._options(body[options_offset:]):
+            if code == self._EPB_COMMENT_OPTION:
+                comment = value.decode("utf-8", errors="replace")
+                if comment.startswith("type="):
+                    message_type = comment[len("type=") :]
+        ticks = (ts_high << 32) | ts_low
+        return PcapNgRecord(
+            timestamp=datetime.fromtimestamp(ticks / resolution, tz=timezone.utc),
+            message_type=message_type,
+            payload=bytes(payload),
+        )
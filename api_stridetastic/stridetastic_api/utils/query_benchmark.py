@@ -0,0 +1,356 @@
+"""Query-plan regression benchmark for the API's hot read paths.
+
+`seed_dataset` bulk-inserts a synthetic history (packets with their data,
+position and telemetry payloads and channels, latency probes and presence
+transitions) with ``generate_series`` so that hundreds of thousands of rows
+take seconds, then analyzes the tables. `run_case` calls a real controller
+method, captures the SQL it issued and:
+
+* times the call with the normal planner settings;
+* re-plans every captured SELECT with ``EXPLAIN`` and sequential scans, hash
+  and merge joins disabled. Every row then has to be found through an index
+  lookup, so the planner only reads a whole table (sequentially, or through
+  an index without a condition) when no index matches the query, whatever
+  the dataset size and statistics: such a read of one of the large
+  time-series tables means a query lost (or never had) its supporting index.
+
+The ``benchmark_queries`` management command runs `benchmark_cases` inside a
+transaction that is rolled back.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Callable, Iterator, Optional
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from meshtastic.protobuf import portnums_pb2  # type: ignore[attr-defined]
+
+from ..models import (
+    Channel,
+    NetworkOverviewSnapshot,
+    Node,
+    NodeLatencyHistory,
+    NodeLink,
+    NodePresenceHistory,
+    Packet,
+    PacketObservation,
+)
+from ..models.packet_models import PacketData, PositionPayload, TelemetryPayload
+from .traffic_rollups import refresh_traffic_rollups
+
+# Tables large enough that reading them in full is a regression
+WATCHED_TABLES = frozenset(
+    model._meta.db_table
+    for model in (
+        Packet,
+        PacketData,
+        PacketObservation,
+        PositionPayload,
+        TelemetryPayload,
+        NodeLatencyHistory,
+        NodePresenceHistory,
+        NetworkOverviewSnapshot,
+    )
+)
+
+BENCHMARK_PORTS = (
+    "TEXT_MESSAGE_APP",
+    "POSITION_APP",
+    "NODEINFO_APP",
+    "ROUTING_APP",
+    "TELEMETRY_APP",
+    "TRACEROUTE_APP",
+    "NEIGHBORINFO_APP",
+)
+
+# Well above real node numbers so a kept dataset is easy to tell apart
+BENCHMARK_NODE_NUM_BASE = 0x7E000000
+
+
+@dataclass
+class BenchmarkDataset:
+    nodes: list[Node]
+    link: NodeLink
+    now: datetime
+    packets: int
+
+
+@dataclass
+class CaseResult:
+    name: str
+    status: int
+    elapsed_ms: float
+    queries: int
+    full_scans: list[str] = field(default_factory=list)
+
+
+def seed_dataset(
+    *,
+    nodes: int = 200,
+    packets: int = 100_000,
+    days: int = 30,
+    now: Optional[datetime] = None,
+) -> BenchmarkDataset:
+    """Insert a synthetic history spread evenly over the last ``days``."""
+    if nodes < 2 or packets < 1 or days < 1:
+        raise ValueError("Need at least 2 nodes, 1 packet and 1 day")
+    now = now or timezone.now()
+    created = Node.objects.bulk_create(
+        [
+            Node(
+                node_num=BENCHMARK_NODE_NUM_BASE + index,
+                node_id=f"!{BENCHMARK_NODE_NUM_BASE + index:08x}",
+                mac_address=f"7e:00:00:00:{index >> 8 & 0xFF:02x}:{index & 0xFF:02x}",
+                short_name=f"B{index:03d}"[-4:],
+                long_name=f"Benchmark node {index}",
+            )
+            for index in range(nodes)
+        ]
+    )
+    node_ids = [node.pk for node in created]
+    channel = Channel.objects.create(channel_id="Benchmark")
+    # Node 0 sends every n-th packet, each of them to node 3 (see below)
+    link = NodeLink.objects.create(node_a=created[0], node_b=created[3 % nodes])
+
+    span = timedelta(days=days).total_seconds()
+    port_names = list(BENCHMARK_PORTS)
+    port_nums = [portnums_pb2.PortNum.Value(name) for name in port_names]
+    packet_table = Packet._meta.db_table
+    data_table = PacketData._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {packet_table}
+                (time, from_node_id, to_node_id, packet_id, how_decrypted)
+            SELECT %s::timestamptz - make_interval(secs => g * %s / %s),
+                   ids[1 + g %% cardinality(ids)],
+                   ids[1 + (7 * g + 3) %% cardinality(ids)],
+                   g, 'aes'
+            FROM generate_series(1, %s) AS g, (SELECT %s::bigint[] AS ids) AS n
+            """,
+            [now, span, packets, packets, node_ids],
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO {data_table} (time, packet_id, port, portnum, how_decrypted)
+            SELECT p.time, p.id,
+                   (%s::text[])[1 + p.packet_id %% %s],
+                   (%s::int[])[1 + p.packet_id %% %s],
+                   'aes'
+            FROM {packet_table} AS p WHERE p.from_node_id = ANY(%s)
+            """,
+            [port_names, len(port_names), port_nums, len(port_nums), node_ids],
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO {PositionPayload._meta.db_table}
+                (time, packet_data_id, latitude, longitude, altitude)
+            SELECT d.time, d.id, 40 + (d.id %% 1000) / 1000.0,
+                   -3 - (d.id %% 1000) / 1000.0, d.id %% 500
+            FROM {data_table} AS d JOIN {packet_table} AS p ON p.id = d.packet_id
+            WHERE d.port = 'POSITION_APP' AND p.from_node_id = ANY(%s)
+            """,
+            [node_ids],
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO {TelemetryPayload._meta.db_table}
+                (time, packet_data_id, battery_level, voltage)
+            SELECT d.time, d.id, d.id %% 101, 3.3 + (d.id %% 90) / 100.0
+            FROM {data_table} AS d JOIN {packet_table} AS p ON p.id = d.packet_id
+            WHERE d.port = 'TELEMETRY_APP' AND p.from_node_id = ANY(%s)
+            """,
+            [node_ids],
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO {Packet.channels.through._meta.db_table} (packet_id, channel_id)
+            SELECT p.id, %s FROM {packet_table} AS p WHERE p.from_node_id = ANY(%s)
+            """,
+            [channel.pk, node_ids],
+        )
+        # Probes, transitions and snapshots are rarer than packets
+        cursor.execute(
+            f"""
+            INSERT INTO {NodeLatencyHistory._meta.db_table}
+                (time, node_id, probe_message_id, reachable, latency_ms)
+            SELECT %s::timestamptz - make_interval(secs => g * %s / %s),
+                   ids[1 + g %% cardinality(ids)], g, g %% 10 <> 0, g %% 5000
+            FROM generate_series(1, %s) AS g, (SELECT %s::bigint[] AS ids) AS n
+            """,
+            [now, span, max(1, packets // 10), max(1, packets // 10), node_ids],
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO {NodePresenceHistory._meta.db_table}
+                (time, node_id, last_seen, offline_at, reason)
+            SELECT t, ids[1 + g %% cardinality(ids)], t, t, 'benchmark'
+            FROM generate_series(1, %s) AS g,
+                 LATERAL (SELECT %s::timestamptz
+                                 - make_interval(secs => g * %s / %s) AS t) AS ts,
+                 (SELECT %s::bigint[] AS ids) AS n
+            """,
+            [
+                max(1, packets // 50),
+                now,
+                span,
+                max(1, packets // 50),
+                node_ids,
+            ],
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO {NetworkOverviewSnapshot._meta.db_table}
+                (time, total_nodes, active_nodes, reachable_nodes,
+                 active_connections, channels)
+            SELECT %s::timestamptz - make_interval(secs => g * %s / %s),
+                   %s, g %% %s, g %% %s, g %% 50, 1
+            FROM generate_series(1, %s) AS g
+            """,
+            [now, span, max(1, packets // 100), nodes, nodes, nodes]
+            + [max(1, packets // 100)],
+        )
+        for table in sorted(WATCHED_TABLES):
+            cursor.execute(f"ANALYZE {table}")
+    return BenchmarkDataset(nodes=created, link=link, now=now, packets=packets)
+
+
+_BLOCKING_NODES = frozenset(
+    ("Sort", "Hash", "Aggregate", "Materialize", "SetOp", "WindowAgg")
+)
+
+
+def full_scans(
+    plan: Any, tables: frozenset[str] = WATCHED_TABLES, *, limited: bool = False
+) -> Iterator[str]:
+    """Yield the watched relations an ``EXPLAIN (FORMAT JSON)`` plan reads fully.
+
+    That is a ``Seq Scan``, or an index scan without an index condition (what
+    the planner picks instead once sequential scans are disabled) unless it
+    streams straight into a ``Limit`` and only walks the index for its order.
+    """
+    if isinstance(plan, list):
+        for item in plan:
+            yield from full_scans(item, tables, limited=limited)
+        return
+    node = plan.get("Plan", plan)
+    node_type = node.get("Node Type")
+    if node.get("Relation Name") in tables:
+        if node_type == "Seq Scan" or (
+            node_type in ("Index Scan", "Index Only Scan")
+            and "Index Cond" not in node
+            and not limited
+        ):
+            yield node["Relation Name"]
+    # Nodes consuming all of their input before returning rows end the Limit
+    limited = (limited or node_type == "Limit") and node_type not in _BLOCKING_NODES
+    for child in node.get("Plans", ()):
+        yield from full_scans(child, tables, limited=limited)
+
+
+# Left only with index lookups, the planner reads a relation in full only
+# when no index serves the query
+_INDEX_ONLY_PLANNING = ("enable_seqscan", "enable_hashjoin", "enable_mergejoin")
+
+
+def explain_full_scans(sql: str) -> list[str]:
+    """Plan ``sql`` through index lookups only and report full table reads.
+
+    Must run inside a transaction (``SET LOCAL``).
+    """
+    with connection.cursor() as cursor:
+        for setting in _INDEX_ONLY_PLANNING:
+            cursor.execute(f"SET LOCAL {setting} = off")
+        try:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+            plan = cursor.fetchone()[0]
+        finally:
+            for setting in _INDEX_ONLY_PLANNING:
+                cursor.execute(f"SET LOCAL {setting} TO DEFAULT")
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return list(full_scans(plan))
+
+
+def run_case(name: str, call: Callable[[], Any]) -> CaseResult:
+    with CaptureQueriesContext(connection) as captured:
+        started = time.perf_counter()
+        response = call()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    full_scans: list[str] = []
+    for query in captured.captured_queries:
+        sql = query["sql"]
+        if sql.lstrip()[:6].upper() != "SELECT":
+            continue
+        for table in explain_full_scans(sql):
+            if table not in full_scans:
+                full_scans.append(table)
+    status = response[0] if isinstance(response, tuple) else 200
+    return CaseResult(
+        name=name,
+        status=status,
+        elapsed_ms=elapsed_ms,
+        queries=len(captured.captured_queries),
+        full_scans=full_scans,
+    )
+
+
+def _request(**params: str) -> SimpleNamespace:
+    return SimpleNamespace(GET=params)
+
+
+def benchmark_cases(
+    dataset: BenchmarkDataset,
+) -> list[tuple[str, Callable[[], Any]]]:
+    """The hot read paths, as (name, call) pairs against ``dataset``."""
+    from ..controllers.keepalive_controller import KeepaliveController
+    from ..controllers.link_controller import LinkController
+    from ..controllers.metrics_controller import MetricsController
+    from ..controllers.node_controller import NodeController
+    from ..controllers.port_controller import PortController
+
+    node_id = dataset.nodes[0].node_id
+    week = _request(last="7days")
+    nodes, links, ports = NodeController(), LinkController(), PortController()
+    return [
+        ("node_positions", lambda: nodes.get_node_positions(week, node_id)),
+        ("node_telemetry", lambda: nodes.get_node_telemetry(week, node_id)),
+        ("node_latency", lambda: nodes.get_node_latency_history(week, node_id)),
+        ("node_port_activity", lambda: nodes.get_node_port_activity(node_id)),
+        (
+            "node_port_packets",
+            lambda: nodes.get_node_port_packets(week, node_id, "TEXT_MESSAGE_APP"),
+        ),
+        ("link_packets", lambda: links.get_link_packets(week, dataset.link.pk)),
+        (
+            "links_by_port",
+            lambda: links.list_links(_request(last="24hours", port="POSITION_APP")),
+        ),
+        ("port_activity", lambda: ports.get_port_activity()),
+        ("port_node_activity", lambda: ports.get_port_node_activity("POSITION_APP")),
+        (
+            "presence_transitions",
+            lambda: KeepaliveController().list_transitions(_request(), last="24hours"),
+        ),
+        (
+            "overview_history",
+            lambda: MetricsController().get_overview_metrics(
+                _request(), history_last="24hours", record_snapshot=False
+            ),
+        ),
+    ]
+
+
+def run_benchmark(dataset: BenchmarkDataset) -> list[CaseResult]:
+    """Refresh the rollups over ``dataset`` and run every case once."""
+    # Bring the rollups up to date in one window, as a caught-up beat would
+    with override_settings(TRAFFIC_ROLLUP_MAX_WINDOW_SECS=0):
+        refresh_traffic_rollups(now=dataset.now)
+    return [run_case(name, call) for name, call in benchmark_cases(dataset)]
@@ -0,0 +1,281 @@
+"""Packet traffic rollups: continuously refreshed GROUP BY results over packets.
+
+Each rollup stores packet counts and the latest packet time per time bucket
+and dimension (port; sender and port; destination and port; channel). The
+tables are not hypertables (``Packet`` has unique constraints without its time
+column and is a plain table), so instead of TimescaleDB continuous aggregates
+the rollups are refreshed by ``refresh_traffic_rollups`` on a Celery beat
+schedule, the same way a refresh policy would:
+
+* buckets in ``[watermark - TRAFFIC_ROLLUP_LOOKBACK_SECS, now -
+  TRAFFIC_ROLLUP_END_OFFSET_SECS)`` are recomputed from the packets and
+  replaced, so late packets inside the lookback are picked up;
+* at most ``TRAFFIC_ROLLUP_MAX_WINDOW_SECS`` of history is processed per run,
+  so the first refresh of a large database backfills in bounded chunks.
+
+``traffic_totals`` reads the rollups before the watermark and aggregates the
+packets after it, like a real-time aggregate, so results are never stale.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Collection, Optional, Sequence
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.utils import timezone
+
+from ..models import (
+    ChannelTrafficRollup,
+    Packet,
+    PortTrafficRollup,
+    ReceiverPortTrafficRollup,
+    SenderPortTrafficRollup,
+    TrafficRollupState,
+)
+from ..models.packet_models import PacketData
+
+logger = logging.getLogger(__name__)
+
+_PORT_FIELDS = ("port", "portnum")
+
+
+@dataclass(frozen=True)
+class RollupSpec:
+    name: str
+    model: Any
+    unit: str
+    # Packet path of the rollup's ``node``/``channel`` dimension
+    dimension_path: Optional[str] = None
+    dimension_column: Optional[str] = None
+
+    @property
+    def bucket(self) -> timedelta:
+        return timedelta(minutes=1) if self.unit == "minute" else timedelta(hours=1)
+
+    def truncate(self, moment: datetime) -> datetime:
+        moment = moment.replace(second=0, microsecond=0)
+        if self.unit == "hour":
+            moment = moment.replace(minute=0)
+        return moment
+
+    def raw_path(self, field: str) -> str:
+        if field in _PORT_FIELDS:
+            return f"data__{field}"
+        head, _, rest = field.partition("__")
+        if head in ("node", "channel") and self.dimension_path:
+            return f"{self.dimension_path}__{rest}" if rest else self.dimension_path
+        raise ValueError(f"Unknown {self.name} rollup field: {field}")
+
+
+ROLLUPS = {
+    spec.name: spec
+    for spec in (
+        RollupSpec("port", PortTrafficRollup, "minute"),
+        RollupSpec(
+            "sender", SenderPortTrafficRollup, "hour", "from_node", "p.from_node_id"
+        ),
+        RollupSpec(
+            "receiver", ReceiverPortTrafficRollup, "hour", "to_node", "p.to_node_id"
+        ),
+        RollupSpec("channel", ChannelTrafficRollup, "minute", "channels", None),
+    )
+}
+
+
+def _refresh_sql(spec: RollupSpec) -> str:
+    packets = Packet._meta.db_table
+    if spec.name == "channel":
+        channels = Packet.channels.through._meta.db_table
+        return (
+            f"INSERT INTO {spec.model._meta.db_table} "
+            "(bucket, channel_id, packets, last_seen) "
+            f"SELECT date_trunc('{spec.unit}', p.time), pc.channel_id, count(*), "
+            "max(p.time) "
+            f"FROM {packets} p JOIN {channels} pc ON pc.packet_id = p.id "
+            "WHERE p.time >= %s AND p.time < %s GROUP BY 1, 2"
+        )
+    node_column = ", node_id" if spec.dimension_column else ""
+    node_select = f", {spec.dimension_column}" if spec.dimension_column else ""
+    group_by = "1, 2, 3, 4" if spec.dimension_column else "1, 2, 3"
+    return (
+        f"INSERT INTO {spec.model._meta.db_table} "
+        f"(bucket, port, portnum{node_column}, packets, last_seen) "
+        f"SELECT date_trunc('{spec.unit}', p.time), pd.port, pd.portnum"
+        f"{node_select}, count(*), max(p.time) "
+        f"FROM {packets} p LEFT JOIN {PacketData._meta.db_table} pd "
+        "ON pd.packet_id = p.id "
+        f"WHERE p.time >= %s AND p.time < %s GROUP BY {group_by}"
+    )
+
+
+def _seconds(name: str, default: int) -> timedelta:
+    return timedelta(seconds=max(0, int(getattr(settings, name, default))))
+
+
+def refresh_rollup(
+    spec: RollupSpec, *, now: Optional[datetime] = None
+) -> Optional[tuple[datetime, datetime]]:
+    """Recompute one refresh window of ``spec``; returns it, or None if idle."""
+    now = now or timezone.now()
+    end = spec.truncate(now - _seconds("TRAFFIC_ROLLUP_END_OFFSET_SECS", 60))
+    with transaction.atomic():
+        _lock(spec)
+        state = TrafficRollupState.objects.filter(name=spec.name).first()
+        if state is not None:
+            resume = state.refreshed_until
+            start = spec.truncate(
+                resume - _seconds("TRAFFIC_ROLLUP_LOOKBACK_SECS", 600)
+            )
+        else:
+            earliest = Packet.objects.aggregate(earliest=Min("time"))["earliest"]
+            if earliest is None:
+                return None
+            resume = start = spec.truncate(earliest)
+        max_window = _seconds("TRAFFIC_ROLLUP_MAX_WINDOW_SECS", 86_400)
+        if max_window:
+            end = min(
+                end, max(spec.truncate(resume + max_window), resume + spec.bucket)
+            )
+        if end <= start:
+            return None
+
+        _rebuild(spec, start, end)
+        TrafficRollupState.objects.update_or_create(
+            name=spec.name,
+            defaults={"refreshed_until": max(end, resume)},
+        )
+    return start, end
+
+
+def _lock(spec: RollupSpec) -> None:
+    with connection.cursor() as cursor:
+        # Serializes concurrent refreshes of the same rollup.
+        cursor.execute(
+            "SELECT pg_advisory_xact_lock(hashtext(%s))",
+            [f"traffic_rollup:{spec.name}"],
+        )
+
+
+def _rebuild(spec: RollupSpec, start: datetime, end: datetime) -> None:
+    spec.model.objects.filter(bucket__gte=start, bucket__lt=end).delete()
+    with connection.cursor() as cursor:
+        cursor.execute(_refresh_sql(spec), [start, end])
+
+
+def recompute_rollups(
+    start: datetime, end: datetime, *, names: Optional[Collection[str]] = None
+) -> int:
+    """Rebuild the materialized buckets covering ``[start, end]``.
+
+    For packets whose data changed after their buckets were refreshed (e.g.
+    retroactively decrypted ones); buckets past the watermark are left to the
+    next refresh. Returns the number of rollups touched.
+    """
+    touched = 0
+    for name, spec in ROLLUPS.items():
+        if names is not None and name not in names:
+            continue
+        with transaction.atomic():
+            _lock(spec)
+            watermark = rollup_watermark(name)
+            if watermark is None:
+                continue
+            window_end = min(spec.truncate(end) + spec.bucket, watermark)
+            window_start = spec.truncate(start)
+            if window_end <= window_start:
+                continue
+            _rebuild(spec, window_start, window_end)
+            touched += 1
+    return touched
+
+
+def refresh_traffic_rollups(
+    *, now: Optional[datetime] = None, names: Optional[Collection[str]] = None
+) -> dict[str, Optional[tuple[datetime, datetime]]]:
+    """Run one refresh of every rollup (or of ``names``)."""
+    refreshed = {}
+    for name, spec in ROLLUPS.items():
+        if names is not None and name not in names:
+            continue
+        refreshed[name] = refresh_rollup(spec, now=now)
+    return refreshed
+
+
+def rollup_watermark(name: str) -> Optional[datetime]:
+    return (
+        TrafficRollupState.objects.filter(name=name)
+        .values_list("refreshed_until", flat=True)
+        .first()
+    )
+
+
+def traffic_totals(
+    name: str,
+    fields: Sequence[str],
+    *,
+    node=None,
+    ports: Collection[str] = (),
+    portnums: Collection[int] = (),
+    decoded_only: bool = False,
+) -> list[dict]:
+    """Packet count and latest time grouped by ``fields`` of the ``name`` rollup.
+
+    ``fields`` are rollup field paths (``port``, ``portnum``, ``node__node_id``,
+    ``channel__channel_id``...). ``ports``/``portnums`` keep packets matching
+    any of them; ``decoded_only`` drops packets without packet data.
+    """
+    spec = ROLLUPS[name]
+    rollup_filter = Q()
+    raw_filter = Q()
+    if node is not None:
+        rollup_filter &= Q(node=node)
+        raw_filter &= Q(**{spec.raw_path("node"): node})
+    if ports or portnums:
+        rollup_filter &= Q(port__in=list(ports)) | Q(portnum__in=list(portnums))
+        raw_filter &= Q(data__port__in=list(ports)) | Q(
+            data__portnum__in=list(portnums)
+        )
+    if decoded_only:
+        rollup_filter &= Q(port__isnull=False) | Q(portnum__isnull=False)
+        raw_filter &= Q(data__port__isnull=False) | Q(data__portnum__isnull=False)
+
+    watermark = rollup_watermark(name)
+    totals: dict[tuple, dict] = {}
+
+    def _merge(rows, paths: Sequence[str]) -> None:
+        for row in rows:
+            key = tuple(row[path] for path in paths)
+            entry = totals.get(key)
+            if entry is None:
+                entry = totals[key] = dict(zip(fields, key))
+                entry.update(packets=0, last_seen=None)
+            entry["packets"] += row["packets"]
+            if entry["last_seen"] is None or (
+                row["last_seen"] is not None and row["last_seen"] > entry["last_seen"]
+            ):
+                entry["last_seen"] = row["last_seen"]
+
+    if watermark is not None:
+        _merge(
+            spec.model.objects.filter(rollup_filter, bucket__lt=watermark)
+            .values(*fields)
+            .annotate(packets=Sum("packets"), last_seen=Max("last_seen"))
+            .order_by(),
+            fields,
+        )
+        raw_filter &= Q(time__gte=watermark)
+
+    raw_paths = [spec.raw_path(field) for field in fields]
+    _merge(
+        Packet.objects.filter(raw_filter)
+        .values(*raw_paths)
+        .annotate(packets=Count("id"), last_seen=Max("time"))
+        .order_by(),
+        raw_paths,
+    )
+    return list(totals.values())